@@ -17,6 +17,15 @@ from .routes.characters import characters_bp
 from .routes.api_keys import api_keys_bp
 from .routes.content_generation import content_generation_bp
 from .routes.trends import trends_bp
+from .routes.maintenance import maintenance_bp
+from .services.video_job_queue import start_video_job_workers
+from .services.video_search import VideoSearchIndex
+from .services.trend_scheduler import start_trend_scheduler
+from .services.trend_tokens import backfill_trend_tokens
+from .services.trend_canonical import backfill_canonical_trends
+from .services.trend_forecast import backfill_trend_forecasts
+from .services.retention import start_retention_worker
+from .migrations import run_migrations
 
 # Ensure all blueprints are Blueprint instances (not _DummyBlueprint)
 assert isinstance(ai_configs_bp, Blueprint)
@@ -27,15 +36,19 @@ assert isinstance(characters_bp, Blueprint)
 assert isinstance(api_keys_bp, Blueprint)
 assert isinstance(content_generation_bp, Blueprint)
 assert isinstance(trends_bp, Blueprint)
+assert isinstance(maintenance_bp, Blueprint)
 
 load_dotenv()
 
-def create_app():
+def create_app(start_workers=True):
     app = Flask(__name__)
     
     # Configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///social_media_manager.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///social_media_manager.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # Video job workers write from separate processes; wait on locks instead of failing
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
     app.config['SECRET_KEY'] = 'dev-secret-key'
     
     # Initialize extensions
@@ -45,6 +58,12 @@ def create_app():
     # Create tables
     with app.app_context():
         db.create_all()
+        # create_all never alters existing tables; bring older databases up to date
+        run_migrations()
+        VideoSearchIndex().ensure_index()
+        backfill_trend_tokens()
+        backfill_canonical_trends()
+        backfill_trend_forecasts()
     
     # Register blueprints
     app.register_blueprint(ai_configs_bp, url_prefix='/api')
@@ -55,6 +74,13 @@ def create_app():
     app.register_blueprint(api_keys_bp, url_prefix='/api')
     app.register_blueprint(content_generation_bp, url_prefix='/api')
     app.register_blueprint(trends_bp, url_prefix='/api')
+    app.register_blueprint(maintenance_bp, url_prefix='/api')
+    
+    # Background video analysis workers, scheduled trend refreshes and retention purges
+    if start_workers:
+        start_video_job_workers(app)
+        start_trend_scheduler(app)
+        start_retention_worker(app)
     
     # Health check endpoint
     @app.route('/api/health')
@@ -77,7 +103,8 @@ def create_app():
                 'characters': '/api/characters',
                 'api_keys': '/api/api_keys',
                 'content_generation': '/api/content/generate',
-                'trends': '/api/trends'
+                'trends': '/api/trends',
+                'maintenance': '/api/maintenance/retention'
             }
         })
     
@@ -0,0 +1,2 @@
+from src.migrations.operations import Operations, MigrationIncomplete
+from src.migrations.runner import Migration, MigrationRunner, run_migrations
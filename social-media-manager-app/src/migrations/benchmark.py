@@ -0,0 +1,143 @@
+"""Query plans and timings of the main query shapes before and after the schema migrations.
+
+    python -m src.migrations.benchmark --rows 50000
+
+Builds a scratch database (SQLite in a temporary directory unless
+--database is given), strips it back to the baseline schema (primary keys
+and unique constraints only), seeds it, and prints EXPLAIN output and the
+median time of each query. It then applies the migrations and prints the
+same again.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+# Tables whose secondary indexes the migrations add, and the query shapes the routes run on them
+TABLES = ['trend', 'user_analytics', 'favorite_content', 'character_profiles', 'api_key', 'ai_provider_configs']
+QUERIES = {
+    'trends by platform and category': (
+        "SELECT * FROM trend WHERE platform = :platform AND category = :category "
+        "ORDER BY engagement_score DESC, id DESC LIMIT 100"
+    ),
+    'trends page after cursor': (
+        "SELECT * FROM trend WHERE platform = :platform AND (engagement_score, id) < (:score, :trend_id) "
+        "ORDER BY engagement_score DESC, id DESC LIMIT 100"
+    ),
+    'category distribution in date range': (
+        "SELECT category, COUNT(id), AVG(engagement_score) FROM trend "
+        "WHERE created_at >= :since AND created_at <= :until GROUP BY category"
+    ),
+    'latest value of a user metric': (
+        "SELECT * FROM user_analytics WHERE user_id = :user_id AND metric_name = :metric "
+        "ORDER BY timestamp DESC LIMIT 1"
+    ),
+    'favorite lookup': "SELECT * FROM favorite_content WHERE user_id = :user_id AND content_id = :content_id",
+    'favorites of a user': "SELECT * FROM favorite_content WHERE user_id = :user_id ORDER BY saved_date DESC",
+    'characters of a user': "SELECT * FROM character_profiles WHERE user_id = :user_id ORDER BY created_at DESC",
+    'api key for a service': "SELECT * FROM api_key WHERE user_id = :user_id AND service = :service",
+}
+PARAMS = {
+    'platform': 'tiktok', 'category': 'technology', 'score': 5.0, 'trend_id': 1000000,
+    'user_id': 7, 'metric': 'followers', 'content_id': 'post-7-3', 'service': 'openai',
+    'since': (datetime.utcnow() - timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'),
+    'until': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=None, help='database URL (default: a temporary SQLite file)')
+    parser.add_argument('--rows', type=int, default=50000, help='trend and user_analytics rows to seed')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20, help='executions per query for the median time')
+    return parser.parse_args(argv)
+
+def strip_to_baseline(connection, text, inspect):
+    """Drop secondary (non-unique) indexes and forget applied migrations."""
+    inspector = inspect(connection)
+    for table in TABLES:
+        for index in inspector.get_indexes(table):
+            if not index.get('unique'):
+                connection.execute(text(f'DROP INDEX {index["name"]}'))
+    connection.execute(text('DELETE FROM schema_migrations'))
+
+def seed(db, models, rows, users):
+    Trend, UserAnalytics, FavoriteContent, CharacterProfile, ApiKey, User = models
+    now = datetime.utcnow()
+    platforms = ['twitter', 'instagram', 'tiktok', 'facebook']
+    categories = ['technology', 'entertainment', 'lifestyle', 'business', 'sports', 'news']
+    db.session.bulk_insert_mappings(User, [
+        {'id': user_id, 'username': f'bench{user_id}', 'email': f'bench{user_id}@example.com'}
+        for user_id in range(1, users + 1)
+    ])
+    db.session.bulk_insert_mappings(Trend, [{
+        'keyword': f'keyword {index}', 'platform': random.choice(platforms), 'category': random.choice(categories),
+        'engagement_score': round(random.uniform(0, 10), 2), 'volume': random.randint(1, 100000),
+        'growth_rate': 0.0, 'sentiment': 'neutral', 'hashtags': '[]',
+        'created_at': now - timedelta(minutes=random.randint(0, 60 * 24 * 90)), 'updated_at': now
+    } for index in range(rows)])
+    db.session.bulk_insert_mappings(UserAnalytics, [{
+        'user_id': random.randint(1, users), 'metric_name': random.choice(['followers', 'likes', 'reach', 'posts']),
+        'value': str(random.randint(0, 10000)), 'timestamp': now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+    } for _ in range(rows)])
+    db.session.bulk_insert_mappings(FavoriteContent, [{
+        'user_id': user_id, 'content_id': f'post-{user_id}-{index}', 'saved_date': now - timedelta(days=index)
+    } for user_id in range(1, users + 1) for index in range(max(rows // users // 10, 1))])
+    db.session.bulk_insert_mappings(CharacterProfile, [{
+        'user_id': user_id, 'name': f'character {index}', 'created_at': now - timedelta(days=index)
+    } for user_id in range(1, users + 1) for index in range(5)])
+    db.session.bulk_insert_mappings(ApiKey, [{
+        'user_id': user_id, 'service': service, 'key': 'sk-bench'
+    } for user_id in range(1, users + 1) for service in ('openai', 'gemini', 'anthropic')])
+    db.session.commit()
+
+def explain(connection, text, sql):
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'), PARAMS)]
+    return [row[0] for row in connection.execute(text(f'EXPLAIN {sql}'), PARAMS)]
+
+def report(db, text, label, repeat):
+    print(f"\n=== {label} ===")
+    with db.engine.connect() as connection:
+        # Fresh statistics, so the planner knows the new indexes' selectivity
+        connection.execute(text('ANALYZE'))
+        for name, sql in QUERIES.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(text(sql), PARAMS).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"- {name}: median {statistics.median(timings):.3f}ms")
+            for line in explain(connection, text, sql):
+                print(f"    {line}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database is None:
+        args.database = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='migration-benchmark-'), 'benchmark.db')}"
+    os.environ['DATABASE_URL'] = args.database
+
+    from sqlalchemy import text, inspect
+    from src.main import create_app
+    from src.models import db, Trend, UserAnalytics, FavoriteContent, CharacterProfile, ApiKey, User
+    from src.migrations import MigrationRunner
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            strip_to_baseline(connection, text, inspect)
+        seed(db, (Trend, UserAnalytics, FavoriteContent, CharacterProfile, ApiKey, User), args.rows, args.users)
+        print(f"database={args.database} rows={args.rows} users={args.users}")
+        report(db, text, 'before migrations', args.repeat)
+        started = time.monotonic()
+        result = MigrationRunner().run()
+        print(f"\nmigrations applied in {(time.monotonic() - started) * 1000:.0f}ms: {', '.join(result['applied'])}")
+        report(db, text, 'after migrations', args.repeat)
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    main()
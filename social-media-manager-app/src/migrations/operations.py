@@ -0,0 +1,89 @@
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class MigrationIncomplete(Exception):
+    """A migration step could not be applied yet, e.g. existing rows violate a new constraint."""
+
+class Operations:
+    """Idempotent schema changes run on one migration's connection.
+
+    Every operation checks the live schema first and does nothing when the
+    change is already there, so a migration is safe to run against a table
+    db.create_all() just created from the current models.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self._quote = connection.dialect.identifier_preparer.quote
+
+    def has_table(self, table_name: str) -> bool:
+        return inspect(self.connection).has_table(table_name)
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        return any(column['name'] == column_name for column in inspect(self.connection).get_columns(table_name))
+
+    def has_index(self, table_name: str, name: str) -> bool:
+        """Whether an index or unique constraint called `name` exists on the table."""
+        inspector = inspect(self.connection)
+        names = {index['name'] for index in inspector.get_indexes(table_name)}
+        names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table_name))
+        return name in names
+
+    def add_column(self, model, column_name: str) -> bool:
+        """Add a model column missing from its table; returns whether it was added.
+
+        Foreign keys are not added to existing tables (SQLite cannot), only
+        the column itself.
+        """
+        table = model.__table__
+        if not self.has_table(table.name) or self.has_column(table.name, column_name):
+            return False
+        definition = CreateColumn(table.c[column_name]).compile(dialect=self.connection.dialect)
+        self.execute(f"ALTER TABLE {self._quote(table.name)} ADD COLUMN {definition}")
+        logger.info(f"Added column {table.name}.{column_name}")
+        return True
+
+    def create_index(self, model, name: str) -> bool:
+        """Create the model's index called `name` if the table lacks it; returns whether it was created."""
+        table = model.__table__
+        index = next(index for index in table.indexes if index.name == name)
+        if not self.has_table(table.name) or self.has_index(table.name, name):
+            return False
+        index.create(self.connection)
+        logger.info(f"Created index {name} on {table.name}")
+        return True
+
+    def create_unique_constraint(self, model, name: str) -> bool:
+        """Add the model's unique constraint called `name`; returns whether it was created.
+
+        SQLite cannot add constraints to existing tables, so there it becomes
+        a unique index of the same name. Raises MigrationIncomplete while
+        existing rows hold duplicates.
+        """
+        table = model.__table__
+        constraint = next(constraint for constraint in table.constraints if constraint.name == name)
+        if not self.has_table(table.name) or self.has_index(table.name, name):
+            return False
+        columns = ', '.join(self._quote(column.name) for column in constraint.columns)
+        not_null = ' AND '.join(f"{self._quote(column.name)} IS NOT NULL" for column in constraint.columns)
+        duplicate = self.connection.execute(text(
+            f"SELECT {columns} FROM {self._quote(table.name)} WHERE {not_null} "
+            f"GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1"
+        )).first()
+        if duplicate is not None:
+            raise MigrationIncomplete(f"{table.name} has duplicate rows for {name}, e.g. {tuple(duplicate)}")
+        if self.dialect == 'sqlite':
+            self.execute(f"CREATE UNIQUE INDEX {self._quote(name)} ON {self._quote(table.name)} ({columns})")
+        else:
+            self.execute(f"ALTER TABLE {self._quote(table.name)} ADD CONSTRAINT {self._quote(name)} UNIQUE ({columns})")
+        logger.info(f"Created unique constraint {name} on {table.name}")
+        return True
+
+    def execute(self, statement: str, **params):
+        return self.connection.execute(text(statement), params)
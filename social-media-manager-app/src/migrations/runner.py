@@ -0,0 +1,105 @@
+import os
+import time
+import socket
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Callable
+from src.models import db, SchemaMigration
+from src.migrations.operations import Operations, MigrationIncomplete
+from src.services.trend_scheduler import acquire_lease, release_lease
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'schema-migrations'
+
+class Migration:
+    """One versioned schema change; `upgrade` receives an Operations bound to its transaction."""
+
+    def __init__(self, version: str, description: str, upgrade: Callable[[Operations], None]):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+class MigrationRunner:
+    """Applies the migrations this database has not recorded in schema_migrations yet.
+
+    Runs after db.create_all() on every start. Processes starting together
+    take turns through a lease row: one migrates, the others wait for it
+    (up to MIGRATION_LOCK_WAIT_SECONDS) and then find nothing left to do. A
+    migration that fails is rolled back, logged and retried on the next
+    start; the ones after it still run, as each is self-contained.
+    """
+
+    def __init__(self, migrations: List[Migration] = None):
+        if migrations is None:
+            from src.migrations.versions import MIGRATIONS
+            migrations = MIGRATIONS
+        self.migrations = migrations
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = int(os.getenv('MIGRATION_LEASE_SECONDS', 600))
+        self.lock_wait_seconds = float(os.getenv('MIGRATION_LOCK_WAIT_SECONDS', 120))
+
+    def applied(self) -> Dict[str, SchemaMigration]:
+        return {migration.version: migration for migration in SchemaMigration.query.all()}
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied()
+        return [migration for migration in self.migrations if migration.version not in applied]
+
+    def run(self) -> Dict[str, List[str]]:
+        """Apply every pending migration in order; returns the versions applied and failed."""
+        result = {'applied': [], 'failed': []}
+        if not self.pending():
+            return result
+        deadline = time.monotonic() + self.lock_wait_seconds
+        while not acquire_lease(LEASE_NAME, self.node_id, self.lease_seconds):
+            if time.monotonic() > deadline:
+                logger.warning("Schema migrations are held by another process; starting without waiting longer")
+                return result
+            time.sleep(1)
+        try:
+            # Another process may have finished them while this one waited
+            for migration in self.pending():
+                if self.apply(migration):
+                    result['applied'].append(migration.version)
+                else:
+                    result['failed'].append(migration.version)
+        finally:
+            release_lease(LEASE_NAME, self.node_id)
+        if result['applied'] or result['failed']:
+            logger.info(f"Schema migrations: {result}")
+        return result
+
+    def apply(self, migration: Migration) -> bool:
+        started = time.monotonic()
+        try:
+            with db.engine.begin() as connection:
+                migration.upgrade(Operations(connection))
+        except MigrationIncomplete as e:
+            logger.warning(f"Migration {migration.version} postponed: {str(e)}")
+            return False
+        except Exception as e:
+            logger.error(f"Migration {migration.version} failed: {str(e)}")
+            return False
+        db.session.add(SchemaMigration(
+            version=migration.version,
+            description=migration.description,
+            applied_at=datetime.utcnow(),
+            duration_ms=round((time.monotonic() - started) * 1000, 1),
+            runner=self.node_id
+        ))
+        db.session.commit()
+        return True
+
+    def status(self) -> List[Dict[str, Any]]:
+        applied = self.applied()
+        return [
+            dict(applied[migration.version].to_dict(), status='applied') if migration.version in applied
+            else {'version': migration.version, 'description': migration.description, 'status': 'pending'}
+            for migration in self.migrations
+        ]
+
+def run_migrations() -> Dict[str, List[str]]:
+    return MigrationRunner().run()
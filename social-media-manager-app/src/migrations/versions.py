@@ -0,0 +1,209 @@
+"""Schema migrations, oldest first.
+
+db.create_all() creates missing tables with every current column and index
+but never alters a table that already exists. Each migration brings tables
+created by an older release up to date; on a new database they find
+everything in place and only get recorded. Each runs in one transaction
+(on databases with transactional DDL; on SQLite every operation is
+idempotent instead), so constraints that existing rows may violate get their own migration
+rather than holding back the columns next to them. Append new migrations
+at the end and never renumber applied ones.
+"""
+import logging
+from sqlalchemy import select, update, delete, func, and_, or_, bindparam, table, column
+from sqlalchemy.orm import aliased
+from src.models import (
+    Trend, ContentRecommendation, VideoAnalysis, UserAnalytics, FavoriteContent, CharacterProfile, ApiKey,
+    AIProviderConfig, VideoAnalysisJob, TrendSnapshot, TrendToken, TrendBurstState, CanonicalTrend,
+    CanonicalTrendBand
+)
+from src.migrations.runner import Migration
+from src.services.trend_rollups import rebuild_trend_rollups
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def video_analysis_columns(op):
+    for column_name in ('transcription_seconds', 'visual_seconds', 'content_hash', 'normalized_url'):
+        op.add_column(VideoAnalysis, column_name)
+    op.create_index(VideoAnalysis, 'ix_video_analysis_post_id')
+    op.create_index(VideoAnalysis, 'ix_video_analysis_normalized_url')
+    op.create_index(VideoAnalysis, 'ix_video_analysis_user_date')
+
+def video_analysis_content_key(op):
+    op.create_unique_constraint(VideoAnalysis, 'uq_video_analysis_content')
+
+def video_job_language(op):
+    op.add_column(VideoAnalysisJob, 'language')
+
+def trend_upsert_key(op):
+    # Until this exists, ingest falls back to separate bulk inserts and updates
+    merge_duplicate_trends(op)
+    op.create_unique_constraint(Trend, 'uq_trend_keyword_platform')
+
+def merge_duplicate_trends(op) -> int:
+    """Fold trends repeating a (keyword, platform) into the most recently updated one.
+
+    Releases before the upsert inserted a new row per fetch. The kept row
+    takes the earliest created_at of its group, and the snapshots, index
+    tokens, recommendations and burst state of the others; where the kept
+    row already has a token, burst state or a recommendation for the same
+    user and character, the duplicate's copy is dropped. The kept row leaves
+    its canonical trend so the start-up backfill re-clusters it and
+    refreshes that cluster's metrics. Returns the rows removed.
+    """
+    duplicated = select(Trend.keyword, Trend.platform).group_by(Trend.keyword, Trend.platform).having(
+        func.count(Trend.id) > 1
+    ).subquery()
+    rows = op.connection.execute(
+        select(Trend.id, Trend.keyword, Trend.platform, Trend.created_at).join(
+            duplicated, and_(Trend.keyword == duplicated.c.keyword, Trend.platform == duplicated.c.platform)
+        ).order_by(Trend.keyword, Trend.platform, Trend.updated_at.desc().nulls_last(), Trend.id.desc())
+    ).all()
+    if not rows:
+        return 0
+
+    keepers = {}
+    pairs = []
+    for trend_id, keyword, platform, created_at in rows:
+        keeper = keepers.setdefault((keyword, platform), {'id': trend_id, 'created_at': created_at})
+        if keeper['id'] != trend_id:
+            pairs.append({'duplicate_id': trend_id, 'keeper_id': keeper['id']})
+            if created_at is not None and (keeper['created_at'] is None or created_at < keeper['created_at']):
+                keeper['created_at'] = created_at
+
+    connection = op.connection
+    connection.execute(
+        update(TrendSnapshot).where(TrendSnapshot.trend_id == bindparam('duplicate_id'))
+        .values(trend_id=bindparam('keeper_id')), pairs
+    )
+    kept_token = aliased(TrendToken)
+    kept_state = aliased(TrendBurstState)
+    # Columns added by later migrations are only there on databases that already ran them, so
+    # rows are repointed through bare tables that leave out the models' onupdate columns
+    by_character = op.has_column('content_recommendation', 'character_id')
+    has_canonical = op.has_column('trend', 'canonical_id')
+    recommendations = table('content_recommendation', column('trend_id'))
+    trends = table('trend', column('id'), column('created_at'), *([column('canonical_id')] if has_canonical else []))
+    for pair in pairs:
+        duplicate_id, keeper_id = pair['duplicate_id'], pair['keeper_id']
+        connection.execute(delete(TrendToken).where(
+            TrendToken.trend_id == duplicate_id,
+            select(kept_token.token).where(kept_token.trend_id == keeper_id, kept_token.token == TrendToken.token)
+            .exists()
+        ))
+        connection.execute(update(TrendToken).where(TrendToken.trend_id == duplicate_id).values(trend_id=keeper_id))
+        connection.execute(delete(TrendBurstState).where(
+            TrendBurstState.trend_id == duplicate_id,
+            select(kept_state.trend_id).where(kept_state.trend_id == keeper_id).exists()
+        ))
+        connection.execute(
+            update(TrendBurstState).where(TrendBurstState.trend_id == duplicate_id).values(trend_id=keeper_id)
+        )
+        if by_character:
+            kept = aliased(ContentRecommendation)
+            connection.execute(delete(ContentRecommendation).where(
+                ContentRecommendation.trend_id == duplicate_id,
+                select(kept.id).where(
+                    kept.trend_id == keeper_id, kept.user_id == ContentRecommendation.user_id,
+                    or_(kept.character_id == ContentRecommendation.character_id,
+                        and_(kept.character_id.is_(None), ContentRecommendation.character_id.is_(None)))
+                ).exists()
+            ))
+        connection.execute(
+            update(recommendations).where(recommendations.c.trend_id == duplicate_id).values(trend_id=keeper_id)
+        )
+
+    connection.execute(delete(Trend).where(Trend.id == bindparam('duplicate_id')), pairs)
+    keeper_values = {'created_at': bindparam('keeper_created_at')}
+    if has_canonical:
+        keeper_values['canonical_id'] = None
+    connection.execute(update(trends).where(trends.c.id == bindparam('keeper_id')).values(**keeper_values), [
+        {'keeper_id': keeper['id'], 'keeper_created_at': keeper['created_at']} for keeper in keepers.values()
+    ])
+    if has_canonical:
+        # Clusters left without members go, with their LSH buckets
+        orphaned = select(CanonicalTrend.id).where(
+            ~select(Trend.id).where(Trend.canonical_id == CanonicalTrend.id).exists()
+        )
+        connection.execute(delete(CanonicalTrendBand).where(CanonicalTrendBand.canonical_id.in_(orphaned)))
+        connection.execute(delete(CanonicalTrend).where(CanonicalTrend.id.in_(orphaned)))
+    # Rollups already built by a later migration counted the duplicates
+    rebuild_trend_rollups(connection)
+    logger.info(f"Merged {len(pairs)} duplicate trends into {len(keepers)}")
+    return len(pairs)
+
+def trend_momentum(op):
+    op.add_column(Trend, 'velocity')
+    op.add_column(Trend, 'acceleration')
+    op.create_index(TrendSnapshot, 'ix_trend_snapshot_ts')
+
+def recommendation_columns(op):
+    for column_name in ('character_id', 'generation', 'updated_at'):
+        op.add_column(ContentRecommendation, column_name)
+
+def recommendation_key(op):
+    op.create_unique_constraint(ContentRecommendation, 'uq_content_recommendation_user_character_trend')
+
+def retention_indexes(op):
+    op.create_index(ContentRecommendation, 'ix_content_recommendation_updated_at')
+    op.create_index(VideoAnalysis, 'ix_video_analysis_analysis_date')
+    op.create_index(UserAnalytics, 'ix_user_analytics_timestamp')
+    op.create_index(UserAnalytics, 'ix_user_analytics_user_timestamp')
+
+def canonical_trends(op):
+    op.add_column(Trend, 'canonical_id')
+    op.create_index(Trend, 'ix_trend_canonical_id')
+
+def trend_keyset_indexes(op):
+    for name in ('ix_trend_engagement_id', 'ix_trend_platform_engagement_id', 'ix_trend_category_engagement_id'):
+        op.create_index(Trend, name)
+
+def query_indexes(op):
+    op.create_index(Trend, 'ix_trend_platform_category_engagement_id')
+    op.create_index(Trend, 'ix_trend_created_at')
+    op.create_index(UserAnalytics, 'ix_user_analytics_user_metric_timestamp')
+    op.create_index(FavoriteContent, 'ix_favorite_content_user_content')
+    op.create_index(FavoriteContent, 'ix_favorite_content_user_saved')
+    op.create_index(CharacterProfile, 'ix_character_profiles_user_created')
+    op.create_index(ApiKey, 'ix_api_key_user_service')
+    op.create_index(AIProviderConfig, 'ix_ai_provider_configs_user_default')
+
+def trend_rollups(op):
+    # db.create_all() made the table; fill it from the trends stored so far, ingest keeps it current
+    rebuild_trend_rollups(op.connection)
+
+def trend_token_indexed_at(op):
+    # Postings written before this have no time; the token index reads them on its first full load
+    op.add_column(TrendToken, 'indexed_at')
+    op.create_index(TrendToken, 'ix_trend_token_indexed_at')
+
+def trend_engagement_not_null(op):
+    # A NULL score has no place in the (engagement_score, id) keyset order; SQLite cannot add
+    # NOT NULL to an existing column, so there the backfill alone has to do
+    trends = table('trend', column('engagement_score'))
+    op.connection.execute(update(trends).where(trends.c.engagement_score.is_(None)).values(engagement_score=0.0))
+    if op.dialect == 'postgresql':
+        op.execute("ALTER TABLE trend ALTER COLUMN engagement_score SET NOT NULL")
+
+MIGRATIONS = [
+    Migration('0001_video_analysis_columns', 'Video analysis timings, content fingerprint and lookup indexes',
+              video_analysis_columns),
+    Migration('0002_video_analysis_content_key', 'Unique content fingerprint per user and post on video analyses',
+              video_analysis_content_key),
+    Migration('0003_video_job_language', 'Transcription language hint on video analysis jobs', video_job_language),
+    Migration('0004_trend_upsert_key', 'Unique (keyword, platform) on trends for the ingest upsert', trend_upsert_key),
+    Migration('0005_trend_momentum', 'Trend velocity and acceleration, snapshot time index', trend_momentum),
+    Migration('0006_recommendation_columns', 'Materialized recommendation columns', recommendation_columns),
+    Migration('0007_recommendation_key', 'Unique (user, character, trend) on recommendations', recommendation_key),
+    Migration('0008_retention_indexes', 'Timestamp indexes used by retention purges', retention_indexes),
+    Migration('0009_canonical_trends', 'Canonical trend link on trends', canonical_trends),
+    Migration('0010_trend_keyset_indexes', 'Keyset pagination indexes on trends', trend_keyset_indexes),
+    Migration('0011_query_indexes', 'Composite indexes matching the trend and per-user query shapes', query_indexes),
+    Migration('0012_trend_rollups', 'Daily trend rollups per platform, category and sentiment', trend_rollups),
+    Migration('0013_trend_token_indexed_at', 'Write time on trend tokens for incremental index loads',
+              trend_token_indexed_at),
+    Migration('0014_trend_engagement_not_null', 'Trend engagement scores backfilled and made NOT NULL',
+              trend_engagement_not_null),
+]
@@ -6,4 +6,17 @@ from .user import User
 from .api_key import ApiKey
 from .ai_provider import AIProviderConfig
 from .character import CharacterProfile
-from .trend import Trend, ContentRecommendation, VideoAnalysis, UserAnalytics, FavoriteContent
\ No newline at end of file
+from .trend import Trend, ContentRecommendation, VideoAnalysis, UserAnalytics, FavoriteContent
+from .video_job import VideoAnalysisJob
+from .audio_fingerprint import AudioFingerprint
+from .trend_refresh import SchedulerLease, TrendRefreshRun
+from .trend_snapshot import TrendSnapshot
+from .trend_burst import TrendBurstState
+from .trend_token import TrendToken
+from .recommendation_state import RecommendationState
+from .retention_run import RetentionRun
+from .twitter_cursor import TwitterSearchCursor
+from .canonical_trend import CanonicalTrend, CanonicalTrendBand
+from .schema_migration import SchemaMigration
+from .trend_rollup import TrendRollup
+from .trend_forecast import TrendForecast
\ No newline at end of file
@@ -14,6 +14,10 @@ class AIProviderConfig(db.Model):
     is_default = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_ai_provider_configs_user_default', 'user_id', 'is_default'),
+    )
     
     def to_dict(self):
         return {
@@ -8,6 +8,10 @@ class ApiKey(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    __table_args__ = (
+        db.Index("ix_api_key_user_service", "user_id", "service"),
+    )
+
     def __repr__(self):
         return f"<ApiKey {self.service} for User {self.user_id}>"
 
@@ -0,0 +1,17 @@
+from src.models import db
+
+class AudioFingerprint(db.Model):
+    """One spectral-peak landmark of an analyzed audio track.
+
+    A track is stored as many (hash, offset) rows; looking up a new track's
+    hashes and counting hits that agree on the same time shift finds re-uploads
+    of the same audio even when the video bytes differ.
+    """
+    __tablename__ = 'audio_fingerprint'
+    id = db.Column(db.Integer, primary_key=True)
+    analysis_id = db.Column(db.Integer, db.ForeignKey('video_analysis.id'), nullable=False, index=True)
+    hash = db.Column(db.Integer, nullable=False, index=True)  # anchor frequency, target frequency and time delta
+    offset = db.Column(db.Integer, nullable=False)  # anchor position in spectrogram frames
+
+    def __repr__(self):
+        return f'<AudioFingerprint {self.analysis_id} {self.hash}@{self.offset}>'
@@ -0,0 +1,58 @@
+from datetime import datetime
+import json
+from src.models import db
+
+class CanonicalTrend(db.Model):
+    """One topic behind near-duplicate trends, e.g. 'AI Revolution', '#airevolution' and 'AI revolution 2025'.
+
+    Member trends point here through Trend.canonical_id; the metric columns
+    aggregate the members and are refreshed whenever an ingest touches one.
+    """
+    __tablename__ = 'canonical_trend'
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), nullable=False, unique=True)  # normalized keyword of the first member
+    label = db.Column(db.String(200), nullable=False)  # first member's keyword, for display
+    category = db.Column(db.String(100))
+    signature = db.Column(db.LargeBinary)  # MinHash signature of the key's character shingles
+    trend_count = db.Column(db.Integer, default=0)
+    platforms = db.Column(db.Text)  # JSON list of member platforms
+    volume = db.Column(db.Integer, default=0)  # sum over members
+    engagement_score = db.Column(db.Float, default=0.0)  # volume-weighted mean over members
+    peak_engagement = db.Column(db.Float, default=0.0)  # best member
+    growth_rate = db.Column(db.Float, default=0.0)  # volume-weighted mean over members
+    velocity = db.Column(db.Float)  # sum over members, volume per hour
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_canonical_trend_engagement', 'engagement_score'),
+    )
+
+    def __repr__(self):
+        return f'<CanonicalTrend {self.label}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'key': self.key,
+            'label': self.label,
+            'category': self.category,
+            'trend_count': self.trend_count,
+            'platforms': json.loads(self.platforms) if self.platforms else [],
+            'volume': self.volume,
+            'engagement_score': self.engagement_score,
+            'peak_engagement': self.peak_engagement,
+            'growth_rate': self.growth_rate,
+            'velocity': self.velocity,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class CanonicalTrendBand(db.Model):
+    """LSH bucket row: one band hash of a canonical trend's MinHash signature."""
+    __tablename__ = 'canonical_trend_band'
+    band = db.Column(db.String(20), primary_key=True)  # band number + hash of its signature rows
+    canonical_id = db.Column(db.Integer, db.ForeignKey('canonical_trend.id'), primary_key=True)
+
+    def __repr__(self):
+        return f'<CanonicalTrendBand {self.band} -> {self.canonical_id}>'
@@ -0,0 +1,19 @@
+from datetime import datetime
+from src.models import db
+
+class RecommendationState(db.Model):
+    """What a user's materialized recommendations were computed from.
+
+    When the trend generation, the relevant trends or the user's characters
+    differ from what is recorded here, the recommendations are recomputed;
+    otherwise reads are served from the stored rows.
+    """
+    __tablename__ = 'recommendation_state'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    generation = db.Column(db.DateTime)  # newest trend snapshot time at computation
+    trend_signature = db.Column(db.String(40))  # sha1 of the candidate trend ids in rank order
+    character_signature = db.Column(db.String(40))  # sha1 of the user's characters and their update times
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RecommendationState for User {self.user_id}>'
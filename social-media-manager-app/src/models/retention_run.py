@@ -0,0 +1,41 @@
+from datetime import datetime
+from src.models import db
+
+class RetentionRun(db.Model):
+    """Outcome of purging one table under its retention policy."""
+    __tablename__ = 'retention_run'
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(100), nullable=False)
+    trigger = db.Column(db.String(20), nullable=False, default='schedule')  # schedule, manual
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Float)
+    rows_purged = db.Column(db.Integer, default=0)
+    rows_archived = db.Column(db.Integer, default=0)
+    batches = db.Column(db.Integer, default=0)
+    archive_path = db.Column(db.String(500))
+    error = db.Column(db.Text)
+    runner = db.Column(db.String(100))  # host:pid that ran it
+
+    __table_args__ = (
+        db.Index('ix_retention_run_table_started', 'table_name', 'started_at'),
+    )
+
+    def __repr__(self):
+        return f'<RetentionRun {self.table_name} {self.rows_purged} rows>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'trigger': self.trigger,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_ms': self.duration_ms,
+            'rows_purged': self.rows_purged,
+            'rows_archived': self.rows_archived,
+            'batches': self.batches,
+            'archive_path': self.archive_path,
+            'error': self.error,
+            'runner': self.runner
+        }
@@ -0,0 +1,23 @@
+from datetime import datetime
+from src.models import db
+
+class SchemaMigration(db.Model):
+    """A schema migration applied to this database."""
+    __tablename__ = 'schema_migrations'
+    version = db.Column(db.String(100), primary_key=True)  # e.g. 0011_query_indexes
+    description = db.Column(db.String(255))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    duration_ms = db.Column(db.Float)
+    runner = db.Column(db.String(100))  # host:pid that applied it
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}>'
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'description': self.description,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None,
+            'duration_ms': self.duration_ms,
+            'runner': self.runner
+        }
@@ -6,15 +6,29 @@ class Trend(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     keyword = db.Column(db.String(200), nullable=False)
     platform = db.Column(db.String(50), nullable=False)  # twitter, instagram, tiktok, etc.
-    engagement_score = db.Column(db.Float, default=0.0)
+    engagement_score = db.Column(db.Float, nullable=False, default=0.0)  # keyset pagination orders by it
     volume = db.Column(db.Integer, default=0)
     growth_rate = db.Column(db.Float, default=0.0)
+    velocity = db.Column(db.Float)  # EWMA of volume change per hour, from trend_snapshot history
+    acceleration = db.Column(db.Float)  # change in velocity per hour
     sentiment = db.Column(db.String(20), default='neutral')  # positive, negative, neutral
     category = db.Column(db.String(100))
     hashtags = db.Column(db.Text)  # JSON string of related hashtags
+    canonical_id = db.Column(db.Integer, db.ForeignKey('canonical_trend.id'), index=True)  # near-duplicate cluster
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.UniqueConstraint('keyword', 'platform', name='uq_trend_keyword_platform'),
+        # Keyset pagination by (engagement_score DESC, id DESC), unfiltered or by platform/category
+        db.Index('ix_trend_engagement_id', 'engagement_score', 'id'),
+        db.Index('ix_trend_platform_engagement_id', 'platform', 'engagement_score', 'id'),
+        db.Index('ix_trend_category_engagement_id', 'category', 'engagement_score', 'id'),
+        db.Index('ix_trend_platform_category_engagement_id', 'platform', 'category', 'engagement_score', 'id'),
+        # Date-range filters of the listing and visualization endpoints
+        db.Index('ix_trend_created_at', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Trend {self.keyword} on {self.platform}>'
     
@@ -26,9 +40,12 @@ class Trend(db.Model):
             'engagement_score': self.engagement_score,
             'volume': self.volume,
             'growth_rate': self.growth_rate,
+            'velocity': self.velocity,
+            'acceleration': self.acceleration,
             'sentiment': self.sentiment,
             'category': self.category,
             'hashtags': self.hashtags,
+            'canonical_id': self.canonical_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -38,12 +55,20 @@ class ContentRecommendation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     trend_id = db.Column(db.Integer, db.ForeignKey('trend.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character_profiles.id'))  # null for generic recommendations
     content_type = db.Column(db.String(50), nullable=False)  # post, story, reel, video
     recommended_time = db.Column(db.DateTime)
     confidence_score = db.Column(db.Float, default=0.0)
     hashtag_suggestions = db.Column(db.Text)  # JSON string
     content_suggestions = db.Column(db.Text)  # JSON string
+    generation = db.Column(db.DateTime)  # trend refresh (newest snapshot time) the row was computed from
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'character_id', 'trend_id', name='uq_content_recommendation_user_character_trend'),
+        db.Index('ix_content_recommendation_updated_at', 'updated_at'),
+    )
     
     # Relationships
     user = db.relationship('User', backref=db.backref('recommendations', lazy=True))
@@ -57,25 +82,38 @@ class ContentRecommendation(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'trend_id': self.trend_id,
+            'character_id': self.character_id,
             'content_type': self.content_type,
             'recommended_time': self.recommended_time.isoformat() if self.recommended_time else None,
             'confidence_score': self.confidence_score,
             'hashtag_suggestions': self.hashtag_suggestions,
             'content_suggestions': self.content_suggestions,
+            'generation': self.generation.isoformat() if self.generation else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'trend': self.trend.to_dict() if self.trend else None
         }
 
 class VideoAnalysis(db.Model):
     __tablename__ = 'video_analysis'
     id = db.Column(db.Integer, primary_key=True)
-    post_id = db.Column(db.Integer)
+    post_id = db.Column(db.Integer, index=True)
     video_url = db.Column(db.String(500), nullable=False)
     transcription_text = db.Column(db.Text)
     visual_description = db.Column(db.Text)
     analysis_date = db.Column(db.DateTime, default=datetime.utcnow)
     provider_config_id = db.Column(db.Integer, db.ForeignKey('ai_provider_configs.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    transcription_seconds = db.Column(db.Float)  # wall-clock time of the audio branch
+    visual_seconds = db.Column(db.Float)  # wall-clock time of the visual branch
+    content_hash = db.Column(db.String(64))  # sha256 of the downloaded bytes, set once fully analyzed
+    normalized_url = db.Column(db.String(500), index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'user_id', 'post_id', name='uq_video_analysis_content'),
+        db.Index('ix_video_analysis_user_date', 'user_id', 'analysis_date'),
+        db.Index('ix_video_analysis_analysis_date', 'analysis_date'),
+    )
 
 class UserAnalytics(db.Model):
     __tablename__ = 'user_analytics'
@@ -85,9 +123,21 @@ class UserAnalytics(db.Model):
     value = db.Column(db.String(255), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_user_analytics_timestamp', 'timestamp'),
+        db.Index('ix_user_analytics_user_timestamp', 'user_id', 'timestamp'),
+        # Latest value of one metric per user
+        db.Index('ix_user_analytics_user_metric_timestamp', 'user_id', 'metric_name', 'timestamp'),
+    )
+
 class FavoriteContent(db.Model):
     __tablename__ = 'favorite_content'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     content_id = db.Column(db.String(255), nullable=False)
     saved_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_favorite_content_user_content', 'user_id', 'content_id'),
+        db.Index('ix_favorite_content_user_saved', 'user_id', 'saved_date'),
+    )
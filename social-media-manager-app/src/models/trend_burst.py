@@ -0,0 +1,41 @@
+from datetime import datetime
+from src.models import db
+
+class TrendBurstState(db.Model):
+    """Streaming burst-detector state for one trend, updated in place on every snapshot.
+
+    Holds just enough to score the next observation: the previous volume and
+    time (to get velocity), and a robust running baseline and spread of that
+    velocity.
+    """
+    __tablename__ = 'trend_burst_state'
+    trend_id = db.Column(db.Integer, db.ForeignKey('trend.id'), primary_key=True)
+    last_ts = db.Column(db.DateTime)
+    last_volume = db.Column(db.Integer)
+    observations = db.Column(db.Integer, nullable=False, default=0)  # velocities seen so far
+    velocity = db.Column(db.Float)  # volume change per hour at the latest snapshot
+    baseline = db.Column(db.Float)  # robust running level of velocity
+    scale = db.Column(db.Float)  # running mean absolute deviation around the baseline
+    z_score = db.Column(db.Float)
+    bursting = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    burst_started_at = db.Column(db.DateTime)
+    peak_z_score = db.Column(db.Float)  # highest score in the current (or last) burst
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    trend = db.relationship('Trend', backref=db.backref('burst_state', uselist=False, lazy=True))
+
+    def __repr__(self):
+        return f'<TrendBurstState {self.trend_id} z={self.z_score}>'
+
+    def to_dict(self):
+        return {
+            'trend_id': self.trend_id,
+            'observations': self.observations,
+            'velocity': self.velocity,
+            'baseline': self.baseline,
+            'z_score': self.z_score,
+            'bursting': self.bursting,
+            'burst_started_at': self.burst_started_at.isoformat() if self.burst_started_at else None,
+            'peak_z_score': self.peak_z_score,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,34 @@
+from datetime import datetime
+from src.models import db
+
+class TrendForecast(db.Model):
+    """Latest engagement forecast of one trend, rewritten by the ingest that adds its snapshots."""
+    __tablename__ = 'trend_forecast'
+    trend_id = db.Column(db.Integer, db.ForeignKey('trend.id'), primary_key=True)
+    predicted_engagement = db.Column(db.Float, nullable=False, default=0.0)  # at the forecast horizon
+    confidence_score = db.Column(db.Float, nullable=False, default=0.0)  # 0-1
+    trend_direction = db.Column(db.String(20), nullable=False)  # rising, stable, declining
+    time_to_peak = db.Column(db.Integer, nullable=False, default=0)  # hours
+    points = db.Column(db.Integer, nullable=False, default=0)  # snapshots the forecast was fitted on
+    generated_for = db.Column(db.DateTime, nullable=False)  # newest of those snapshots
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_trend_forecast_predicted', 'predicted_engagement'),
+        db.Index('ix_trend_forecast_generated_for', 'generated_for'),
+    )
+
+    def __repr__(self):
+        return f'<TrendForecast {self.trend_id} {self.trend_direction}>'
+
+    def to_dict(self):
+        return {
+            'trend_id': self.trend_id,
+            'predicted_engagement': self.predicted_engagement,
+            'confidence_score': self.confidence_score,
+            'trend_direction': self.trend_direction,
+            'time_to_peak': self.time_to_peak,
+            'points': self.points,
+            'generated_for': self.generated_for.isoformat() if self.generated_for else None,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -0,0 +1,59 @@
+from datetime import datetime
+import json
+from src.models import db
+
+class SchedulerLease(db.Model):
+    """A named lease row; whoever holds an unexpired lease is the leader for that task."""
+    __tablename__ = 'scheduler_lease'
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100))  # host:pid of the current leader
+    expires_at = db.Column(db.DateTime)
+    acquired_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} held by {self.holder}>'
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None
+        }
+
+class TrendRefreshRun(db.Model):
+    __tablename__ = 'trend_refresh_run'
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    platform = db.Column(db.String(50))  # null = every platform
+    trigger = db.Column(db.String(20), nullable=False, default='schedule')  # schedule, manual
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Float)
+    result = db.Column(db.Text)  # JSON string of the ingest stats
+    error = db.Column(db.Text)
+    runner = db.Column(db.String(100))  # host:pid that ran it
+
+    __table_args__ = (
+        db.Index('ix_trend_refresh_run_status_requested', 'status', 'requested_at'),
+        db.Index('ix_trend_refresh_run_platform_finished', 'platform', 'finished_at'),
+    )
+
+    def __repr__(self):
+        return f'<TrendRefreshRun {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'platform': self.platform,
+            'trigger': self.trigger,
+            'status': self.status,
+            'requested_at': self.requested_at.isoformat() if self.requested_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_ms': self.duration_ms,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'runner': self.runner
+        }
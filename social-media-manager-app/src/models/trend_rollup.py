@@ -0,0 +1,33 @@
+from datetime import datetime
+from src.models import db
+
+class TrendRollup(db.Model):
+    """Trends created on one UTC day, per platform, category and sentiment.
+
+    Kept current by trend ingest (new trends add to trend_count, metric
+    updates move engagement_sum), so the visualization distributions sum a
+    few of these rows instead of grouping the whole trend table. A missing
+    category or sentiment is stored as ''.
+    """
+    __tablename__ = 'trend_rollup'
+    day = db.Column(db.Date, primary_key=True)  # date of Trend.created_at
+    platform = db.Column(db.String(50), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    sentiment = db.Column(db.String(20), primary_key=True)
+    trend_count = db.Column(db.Integer, nullable=False, default=0)
+    engagement_sum = db.Column(db.Float, nullable=False, default=0.0)  # current engagement_score of those trends
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TrendRollup {self.day} {self.platform}/{self.category}/{self.sentiment}>'
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'platform': self.platform,
+            'category': self.category or None,
+            'sentiment': self.sentiment or None,
+            'trend_count': self.trend_count,
+            'engagement_sum': self.engagement_sum,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
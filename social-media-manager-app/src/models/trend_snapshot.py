@@ -0,0 +1,18 @@
+from src.models import db
+
+class TrendSnapshot(db.Model):
+    """A trend's volume and engagement as seen by one ingest; rows are only ever appended."""
+    __tablename__ = 'trend_snapshot'
+    id = db.Column(db.Integer, primary_key=True)
+    trend_id = db.Column(db.Integer, db.ForeignKey('trend.id'), nullable=False)
+    ts = db.Column(db.DateTime, nullable=False)
+    volume = db.Column(db.Integer, nullable=False, default=0)
+    engagement = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index('ix_trend_snapshot_trend_ts', 'trend_id', 'ts'),
+        db.Index('ix_trend_snapshot_ts', 'ts'),
+    )
+
+    def __repr__(self):
+        return f'<TrendSnapshot {self.trend_id}@{self.ts}>'
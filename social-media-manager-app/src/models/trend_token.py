@@ -0,0 +1,13 @@
+from datetime import datetime
+from src.models import db
+
+class TrendToken(db.Model):
+    """Postings list row: one normalized hashtag ('#ai') or keyword word ('ai') of a trend."""
+    __tablename__ = 'trend_token'
+    token = db.Column(db.String(200), primary_key=True)
+    trend_id = db.Column(db.Integer, db.ForeignKey('trend.id'), primary_key=True, index=True)
+    # In-memory indexes load postings written since their last load by this column
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<TrendToken {self.token} -> {self.trend_id}>'
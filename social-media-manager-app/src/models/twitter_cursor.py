@@ -0,0 +1,32 @@
+from datetime import datetime
+from src.models import db
+
+class TwitterSearchCursor(db.Model):
+    """How far recent search has read for one query.
+
+    Tweets up to since_id are already ingested. When a refresh runs out of
+    page budget mid-way, next_token and pending_newest_id hold the unfinished
+    pagination so the next refresh resumes it instead of leaving a gap.
+    """
+    __tablename__ = 'twitter_search_cursor'
+    search_query = db.Column(db.String(512), primary_key=True)
+    since_id = db.Column(db.String(32))  # newest tweet id fully ingested
+    next_token = db.Column(db.String(255))  # pagination token of an unfinished backfill
+    pending_newest_id = db.Column(db.String(32))  # becomes since_id once the backfill finishes
+    last_fetched_at = db.Column(db.DateTime)
+    last_new_tweets = db.Column(db.Integer, default=0)
+    total_tweets = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TwitterSearchCursor {self.search_query} since {self.since_id}>'
+
+    def to_dict(self):
+        return {
+            'query': self.search_query,
+            'since_id': self.since_id,
+            'backfilling': self.next_token is not None,
+            'last_fetched_at': self.last_fetched_at.isoformat() if self.last_fetched_at else None,
+            'last_new_tweets': self.last_new_tweets,
+            'total_tweets': self.total_tweets
+        }
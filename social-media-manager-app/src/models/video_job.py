@@ -0,0 +1,53 @@
+from datetime import datetime
+import json
+from src.models import db
+
+class VideoAnalysisJob(db.Model):
+    __tablename__ = 'video_analysis_job'
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    video_url = db.Column(db.String(500), nullable=False)
+    post_id = db.Column(db.Integer)
+    language = db.Column(db.String(10))  # optional transcription language hint, e.g. "en"
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    timeout_seconds = db.Column(db.Integer, nullable=False, default=600)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)  # earliest time the job may be claimed (backoff)
+    locked_by = db.Column(db.String(100))  # worker id holding the job while running
+    lease_expires_at = db.Column(db.DateTime)  # running jobs past this are considered orphaned
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    result = db.Column(db.Text)  # JSON string of the analysis result
+    last_error = db.Column(db.Text)
+    analysis_id = db.Column(db.Integer, db.ForeignKey('video_analysis.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_video_analysis_job_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f'<VideoAnalysisJob {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'video_url': self.video_url,
+            'post_id': self.post_id,
+            'language': self.language,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'timeout_seconds': self.timeout_seconds,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'result': json.loads(self.result) if self.result else None,
+            'last_error': self.last_error,
+            'analysis_id': self.analysis_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,52 @@
+from flask import Blueprint, jsonify, request, current_app
+from src.services.retention import RetentionManager, trigger_purge
+from src.migrations import MigrationRunner
+from src.models import RetentionRun
+
+maintenance_bp = Blueprint('maintenance', __name__)
+
+def _retention_manager() -> RetentionManager:
+    return current_app.extensions.get('retention') or RetentionManager()
+
+@maintenance_bp.route('/maintenance/retention', methods=['GET'])
+def get_retention_status():
+    """Get retention policies, table sizes and recent purge metrics"""
+    return jsonify(_retention_manager().status())
+
+@maintenance_bp.route('/maintenance/retention/runs', methods=['GET'])
+def get_retention_runs():
+    """Get recent purge runs, optionally for one table"""
+    table = request.args.get('table')
+    limit = min(request.args.get('limit', default=50, type=int), 500)
+    
+    query = RetentionRun.query
+    if table:
+        query = query.filter(RetentionRun.table_name == table)
+    runs = query.order_by(RetentionRun.started_at.desc()).limit(limit).all()
+    return jsonify([run.to_dict() for run in runs])
+
+@maintenance_bp.route('/maintenance/retention/run', methods=['POST'])
+def run_retention_purge():
+    """Start a purge now, for all tables or the given `tables`"""
+    data = request.get_json(silent=True) or {}
+    tables = data.get('tables')
+    policies = _retention_manager().policies
+    if tables is not None:
+        if not isinstance(tables, list):
+            return jsonify({'error': 'tables must be a list'}), 400
+        unknown = [table for table in tables if table not in policies]
+        if unknown:
+            return jsonify({'error': f"Unknown tables: {', '.join(map(str, unknown))}"}), 400
+    
+    if not trigger_purge(current_app._get_current_object(), tables):
+        return jsonify({'error': 'A retention purge is already running'}), 409
+    return jsonify({
+        'message': 'Retention purge started.',
+        'tables': tables or list(policies),
+        'runs_url': '/api/maintenance/retention/runs'
+    }), 202
+
+@maintenance_bp.route('/maintenance/migrations', methods=['GET'])
+def get_migrations():
+    """Get every schema migration and whether this database has applied it"""
+    return jsonify(MigrationRunner().status())
@@ -1,15 +1,51 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from src.services.trend_analyzer import TrendAnalyzer
-from src.models import Trend, db
+from src.services.trend_scheduler import trigger_refresh, get_refresh_status
+from src.services.trend_bursts import TrendBurstDetector
+from src.services.trend_forecast import TrendForecaster
+from src.services.trend_tokens import get_token_index
+from src.services.trend_canonical import TrendCanonicalizer
+from src.services.trend_pagination import TrendPaginator, InvalidCursor
+from src.services.trend_rollups import TrendRollups
+from src.services.trend_series import EngagementSeries, BUCKETS
+from src.models import Trend, TrendRefreshRun, CanonicalTrend, db
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 trends_bp = Blueprint("trends", __name__)
 trend_analyzer = TrendAnalyzer()
+burst_detector = TrendBurstDetector()
+trend_forecaster = TrendForecaster()
+trend_canonicalizer = TrendCanonicalizer()
+trend_paginator = TrendPaginator()
+trend_rollups = TrendRollups()
+engagement_series = EngagementSeries()
 
 @trends_bp.route("/trends", methods=["GET"])
 def get_trends():
-    """Get a list of stored trends, with optional filtering."""
+    """Get a page of stored trends, with optional filtering; continue with ?cursor=<next_cursor>."""
+    return _trend_page(default_limit=100)
+
+@trends_bp.route("/trends/top", methods=["GET"])
+def get_top_trends():
+    """Get top trends with optional limit and filters; continue with ?cursor=<next_cursor>."""
+    return _trend_page(default_limit=10)
+
+def _trend_page(default_limit):
+    limit = trend_paginator.clamp_limit(request.args.get('limit', type=int), default_limit)
+    try:
+        page = trend_paginator.page(_filtered_trends(), limit, request.args.get('cursor'))
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        'trends': [_trend_json(trend) for trend in page['items']],
+        'limit': page['limit'],
+        'has_more': page['has_more'],
+        'next_cursor': page['next_cursor']
+    })
+
+def _filtered_trends():
+    """Trend query filtered by the platform, category, start_date and end_date arguments."""
     platform = request.args.get('platform')
     category = request.args.get('category')
     start_date = request.args.get('start_date')
@@ -32,220 +68,194 @@ def get_trends():
             query = query.filter(Trend.created_at <= end_dt)
         except ValueError:
             pass  # Invalid date format, ignore filter
-        
-    trends = query.order_by(Trend.engagement_score.desc()).limit(100).all()
+    return query
+
+def _trend_json(trend):
+    return dict(trend.to_dict(), hashtags=json.loads(trend.hashtags) if trend.hashtags else [])
+
+def _queue_refresh():
+    data = request.get_json(silent=True) or {}
+    platform = data.get('platform')
+    if platform is not None and platform not in trend_analyzer.platforms:
+        return jsonify({"error": f"Unknown platform: {platform}"}), 400
+    run = trigger_refresh(current_app._get_current_object(), platform=platform, trend_analyzer=trend_analyzer)
+    return jsonify({
+        "message": "Trend refresh queued.",
+        "run_id": run.id,
+        "status": run.status,
+        "status_url": f"/api/trends/refresh/runs/{run.id}"
+    }), 202
+
+@trends_bp.route("/trends/hashtags", methods=["GET"])
+def get_trending_hashtags():
+    """Get hashtags ranked by the average engagement of the trends using them."""
+    limit = min(request.args.get('limit', default=20, type=int), 200)
+    platform = request.args.get('platform')
+    return jsonify(get_token_index().top_hashtags(limit=limit, platform=platform))
+
+@trends_bp.route("/trends/related", methods=["GET"])
+def get_related_trends():
+    """Get the top trends by engagement sharing any of the given hashtags or keyword words."""
+    tokens = [token for token in request.args.get('tokens', '').split(',') if token.strip()]
+    if not tokens:
+        return jsonify({"error": "tokens is required"}), 400
+    limit = min(request.args.get('limit', default=10, type=int), 100)
+    platform = request.args.get('platform')
+    
+    matches = get_token_index().trends_for_tokens(tokens, limit=limit, platform=platform)
+    trends = {trend.id: trend for trend in Trend.query.filter(Trend.id.in_([m['trend_id'] for m in matches]))}
     return jsonify([{
         'id': trend.id,
         'keyword': trend.keyword,
         'platform': trend.platform,
         'engagement_score': trend.engagement_score,
         'volume': trend.volume,
-        'growth_rate': trend.growth_rate,
-        'sentiment': trend.sentiment,
         'category': trend.category,
         'hashtags': json.loads(trend.hashtags) if trend.hashtags else [],
-        'created_at': trend.created_at.isoformat() if trend.created_at else None,
-        'updated_at': trend.updated_at.isoformat() if trend.updated_at else None,
-    } for trend in trends])
+    } for trend in (trends.get(m['trend_id']) for m in matches) if trend])
 
-@trends_bp.route("/trends/top", methods=["GET"])
-def get_top_trends():
-    """Get top trends with optional limit and filters."""
-    limit = request.args.get('limit', default=10, type=int)
+@trends_bp.route("/trends/recommendations", methods=["GET"])
+def get_recommendations():
+    """Get a user's content recommendations, recomputed only when trends or characters changed."""
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+    force = request.args.get('refresh', 'false').lower() == 'true'
+    try:
+        recommendations = trend_analyzer.generate_recommendations(user_id, force=force)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify([recommendation.to_dict() for recommendation in recommendations])
+
+@trends_bp.route("/trends/emerging", methods=["GET"])
+def get_emerging_trends():
+    """Get trends whose volume velocity is currently spiking above their own baseline."""
+    limit = min(request.args.get('limit', default=20, type=int), 100)
     platform = request.args.get('platform')
     category = request.args.get('category')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    return jsonify(burst_detector.emerging(limit=limit, platform=platform, category=category))
+
+@trends_bp.route("/trends/canonical", methods=["GET"])
+def get_canonical_trends():
+    """Get canonical trends (merged near-duplicates) with metrics aggregated over their members."""
+    limit = min(request.args.get('limit', default=20, type=int), 200)
+    platform = request.args.get('platform')
+    category = request.args.get('category')
+    return jsonify(trend_canonicalizer.top(limit=limit, platform=platform, category=category))
+
+@trends_bp.route("/trends/canonical/<int:canonical_id>", methods=["GET"])
+def get_canonical_trend(canonical_id):
+    """Get one canonical trend with its member trends."""
+    canonical = db.session.get(CanonicalTrend, canonical_id)
+    if not canonical:
+        return jsonify({"error": "Canonical trend not found"}), 404
+    members = Trend.query.filter_by(canonical_id=canonical_id).order_by(Trend.engagement_score.desc()).all()
+    return jsonify({**canonical.to_dict(), 'trends': [trend.to_dict() for trend in members]})
+
+@trends_bp.route("/trends/predictions", methods=["GET"])
+def get_trend_predictions():
+    """Get engagement forecasts for all trends, recomputed once per ingest."""
+    limit = min(request.args.get('limit', default=50, type=int), 500)
+    platform = request.args.get('platform')
+    direction = request.args.get('direction')
     
-    query = Trend.query
-    if platform:
-        query = query.filter_by(platform=platform)
-    if category:
-        query = query.filter_by(category=category)
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Trend.created_at >= start_dt)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(Trend.created_at <= end_dt)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
-        
-    trends = query.order_by(Trend.engagement_score.desc()).limit(limit).all()
-    return jsonify([{
-        'id': trend.id,
-        'keyword': trend.keyword,
-        'platform': trend.platform,
-        'engagement_score': trend.engagement_score,
-        'volume': trend.volume,
-        'growth_rate': trend.growth_rate,
-        'sentiment': trend.sentiment,
-        'category': trend.category,
-        'hashtags': json.loads(trend.hashtags) if trend.hashtags else [],
-        'created_at': trend.created_at.isoformat() if trend.created_at else None,
-        'updated_at': trend.updated_at.isoformat() if trend.updated_at else None,
-    } for trend in trends])
+    return jsonify(trend_forecaster.predictions(limit=limit, platform=platform, direction=direction))
 
 @trends_bp.route("/trends/refresh", methods=["POST"])
 def refresh_trends():
-    """Trigger a new trend analysis and storage task."""
-    new_trends = trend_analyzer.fetch_and_analyze_trends()
-    return jsonify({
-        "message": "Trend analysis completed.",
-        "new_trends_count": len(new_trends)
-    })
+    """Queue a trend refresh; poll the returned status_url for the result."""
+    return _queue_refresh()
 
 @trends_bp.route("/trends/analyze", methods=["POST"])
 def analyze_trends():
-    """Trigger a new trend analysis and storage task."""
-    new_trends = trend_analyzer.fetch_and_analyze_trends()
-    return jsonify({
-        "message": "Trend analysis completed.",
-        "new_trends_count": len(new_trends)
-    })
+    """Queue a trend refresh; poll the returned status_url for the result."""
+    return _queue_refresh()
+
+@trends_bp.route("/trends/refresh/runs/<run_id>", methods=["GET"])
+def get_refresh_run(run_id):
+    """Get the status, duration and ingest stats of a refresh run."""
+    run = db.session.get(TrendRefreshRun, run_id)
+    if not run:
+        return jsonify({"error": "Refresh run not found"}), 404
+    return jsonify(run.to_dict())
+
+@trends_bp.route("/trends/refresh/status", methods=["GET"])
+def get_refresh_status_route():
+    """Get the current scheduler leader and the last refresh run per platform."""
+    return jsonify(get_refresh_status())
 
 @trends_bp.route("/trends/visualization/platform-distribution", methods=["GET"])
 def get_platform_distribution():
     """Get trend distribution by platform for visualization."""
-    # Get date filters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = db.session.query(
-        Trend.platform,
-        db.func.count(Trend.id).label('count'),
-        db.func.avg(Trend.engagement_score).label('avg_engagement')
-    ).group_by(Trend.platform)
-    
-    # Apply date filters
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Trend.created_at >= start_dt)
-        except ValueError:
-            pass
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(Trend.created_at <= end_dt)
-        except ValueError:
-            pass
-    
-    results = query.all()
+    start_dt, end_dt = _date_range()
+    results = trend_rollups.distribution('platform', start_dt, end_dt)
     
     return jsonify([{
-        'platform': result.platform,
-        'count': result.count,
-        'avg_engagement': float(result.avg_engagement) if result.avg_engagement else 0.0
+        'platform': result['platform'],
+        'count': result['count'],
+        'avg_engagement': result['engagement_sum'] / result['count']
     } for result in results])
 
 @trends_bp.route("/trends/visualization/category-distribution", methods=["GET"])
 def get_category_distribution():
     """Get trend distribution by category for visualization."""
     # Get filters
-    platform = request.args.get('platform')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = db.session.query(
-        Trend.category,
-        db.func.count(Trend.id).label('count'),
-        db.func.avg(Trend.engagement_score).label('avg_engagement')
-    ).group_by(Trend.category)
-    
-    # Apply filters
-    if platform:
-        query = query.filter(Trend.platform == platform)
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Trend.created_at >= start_dt)
-        except ValueError:
-            pass
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(Trend.created_at <= end_dt)
-        except ValueError:
-            pass
-    
-    results = query.all()
+    filters = {name: request.args[name] for name in ('platform',) if request.args.get(name)}
+    start_dt, end_dt = _date_range()
+    results = trend_rollups.distribution('category', start_dt, end_dt, **filters)
     
     return jsonify([{
-        'category': result.category,
-        'count': result.count,
-        'avg_engagement': float(result.avg_engagement) if result.avg_engagement else 0.0
+        'category': result['category'],
+        'count': result['count'],
+        'avg_engagement': result['engagement_sum'] / result['count']
     } for result in results])
 
 @trends_bp.route("/trends/visualization/sentiment-distribution", methods=["GET"])
 def get_sentiment_distribution():
     """Get trend distribution by sentiment for visualization."""
     # Get filters
-    platform = request.args.get('platform')
-    category = request.args.get('category')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = db.session.query(
-        Trend.sentiment,
-        db.func.count(Trend.id).label('count')
-    ).group_by(Trend.sentiment)
-    
-    # Apply filters
-    if platform:
-        query = query.filter(Trend.platform == platform)
-    if category:
-        query = query.filter(Trend.category == category)
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Trend.created_at >= start_dt)
-        except ValueError:
-            pass
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(Trend.created_at <= end_dt)
-        except ValueError:
-            pass
-    
-    results = query.all()
+    filters = {name: request.args[name] for name in ('platform', 'category') if request.args.get(name)}
+    start_dt, end_dt = _date_range()
+    results = trend_rollups.distribution('sentiment', start_dt, end_dt, **filters)
     
     return jsonify([{
-        'sentiment': result.sentiment,
-        'count': result.count
+        'sentiment': result['sentiment'],
+        'count': result['count']
     } for result in results])
 
+def _date_range():
+    """start_date and end_date query arguments as naive UTC datetimes; unparseable ones are ignored."""
+    bounds = []
+    for name in ('start_date', 'end_date'):
+        try:
+            bound = datetime.fromisoformat(request.args[name]) if request.args.get(name) else None
+        except ValueError:
+            bound = None
+        if bound is not None and bound.tzinfo is not None:
+            bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+        bounds.append(bound)
+    return tuple(bounds)
+
 @trends_bp.route("/trends/visualization/engagement-over-time", methods=["GET"])
 def get_engagement_over_time():
-    """Get engagement scores over time for visualization."""
+    """Get engagement scores over time for visualization.
+    
+    Raw points per trend by default; bucket=hour|day aggregates in the database
+    (engagement_score is then the bucket average, plus max_engagement and count),
+    and downsample=lttb caps the series to ?points= points keeping its shape.
+    """
     # Get filters
-    platform = request.args.get('platform')
-    category = request.args.get('category')
+    filters = {name: request.args[name] for name in ('platform', 'category') if request.args.get(name)}
     days = request.args.get('days', default=30, type=int)
+    bucket = request.args.get('bucket') or None
+    downsample = request.args.get('downsample') or None
+    if bucket is not None and bucket not in BUCKETS:
+        return jsonify({"error": f"bucket must be one of: {', '.join(BUCKETS)}"}), 400
+    if downsample not in (None, 'lttb'):
+        return jsonify({"error": "downsample must be lttb"}), 400
+    points = engagement_series.clamp_points(request.args.get('points', type=int)) if downsample else None
     
     # Calculate date range
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
-    
-    query = db.session.query(
-        Trend.created_at,
-        Trend.engagement_score
-    ).filter(Trend.created_at >= start_date)
+    start_date = datetime.utcnow() - timedelta(days=days)
     
-    # Apply filters
-    if platform:
-        query = query.filter(Trend.platform == platform)
-    if category:
-        query = query.filter(Trend.category == category)
-    
-    results = query.order_by(Trend.created_at).all()
-    
-    return jsonify([{
-        'date': result.created_at.isoformat(),
-        'engagement_score': result.engagement_score
-    } for result in results])
\ No newline at end of file
+    return jsonify(engagement_series.series(start_date, bucket=bucket, downsample=points, **filters))
\ No newline at end of file
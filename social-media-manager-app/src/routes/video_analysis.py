@@ -1,27 +1,44 @@
+import os
 from flask import Blueprint, jsonify, request
-from src.models import db, VideoAnalysis
+from src.models import db, VideoAnalysis, VideoAnalysisJob
 from src.services.video_analyzer import VideoAnalyzer
+from src.services.video_job_queue import VideoJobQueue
+from src.services.video_pipeline import VideoAnalysisPipeline
+from src.services.video_search import VideoSearchIndex
 
 video_analysis_bp = Blueprint("video_analysis", __name__)
 video_analyzer = VideoAnalyzer()
+video_job_queue = VideoJobQueue()
+video_pipeline = VideoAnalysisPipeline(video_analyzer)
+video_search_index = VideoSearchIndex()
+PREVIEW_CHARS = int(os.getenv('VIDEO_ANALYSIS_PREVIEW_CHARS', 280))
 
 @video_analysis_bp.route("/analyze_video", methods=["POST"])
 def analyze_video():
-    """Analyze a video from URL including transcription and visual description."""
+    """Queue analysis of a video from URL; poll the returned job for the result."""
     data = request.json
     user_id = data.get("user_id")
     video_url = data.get("video_url")
     post_id = data.get("post_id")
+    language = data.get("language")  # optional transcription language hint, e.g. "en"
 
     if not all([user_id, video_url]):
         return jsonify({"error": "Missing required fields: user_id, video_url"}), 400
 
-    result = video_analyzer.analyze_video_url(user_id, video_url, post_id)
+    job = video_job_queue.enqueue(user_id, video_url, post_id, language)
     
-    if result.get("success"):
-        return jsonify(result), 201
-    else:
-        return jsonify(result), 400
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/analyze_video/jobs/{job.id}"
+    }), 202
+
+@video_analysis_bp.route("/analyze_video/jobs/<job_id>", methods=["GET"])
+def get_video_analysis_job(job_id):
+    """Get the status of a queued video analysis, including its result once finished."""
+    job = VideoAnalysisJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict()), 200
 
 @video_analysis_bp.route("/analyze_video/<int:post_id>", methods=["GET"])
 def get_video_analysis(post_id):
@@ -34,27 +51,74 @@ def get_video_analysis(post_id):
         "transcription_text": analysis.transcription_text,
         "visual_description": analysis.visual_description,
         "analysis_date": analysis.analysis_date.isoformat(),
-        "provider_config_id": analysis.provider_config_id
+        "provider_config_id": analysis.provider_config_id,
+        "transcription_seconds": analysis.transcription_seconds,
+        "visual_seconds": analysis.visual_seconds
     }), 200
 
 @video_analysis_bp.route("/video_analyses", methods=["GET"])
 def get_video_analyses():
-    """Get all video analyses for the current user."""
+    """Get all video analyses for the current user, with truncated text previews."""
     user_id = request.args.get("user_id", type=int)
     if not user_id:
         return jsonify({"error": "user_id is required"}), 400
     
-    analyses = VideoAnalysis.query.filter_by(user_id=user_id).order_by(VideoAnalysis.analysis_date.desc()).all()
+    # Truncate in SQL so full transcripts are never loaded for the list view
+    analyses = db.session.query(
+        VideoAnalysis.id,
+        VideoAnalysis.post_id,
+        VideoAnalysis.video_url,
+        db.func.substr(VideoAnalysis.transcription_text, 1, PREVIEW_CHARS).label("transcription_preview"),
+        db.func.length(VideoAnalysis.transcription_text).label("transcription_length"),
+        db.func.substr(VideoAnalysis.visual_description, 1, PREVIEW_CHARS).label("visual_preview"),
+        db.func.length(VideoAnalysis.visual_description).label("visual_length"),
+        VideoAnalysis.analysis_date,
+        VideoAnalysis.provider_config_id,
+        VideoAnalysis.transcription_seconds,
+        VideoAnalysis.visual_seconds
+    ).filter(VideoAnalysis.user_id == user_id).order_by(VideoAnalysis.analysis_date.desc()).all()
     
     return jsonify([{
+        "id": analysis.id,
+        "post_id": analysis.post_id,
+        "video_url": analysis.video_url,
+        "transcription_preview": analysis.transcription_preview,
+        "transcription_truncated": (analysis.transcription_length or 0) > PREVIEW_CHARS,
+        "visual_preview": analysis.visual_preview,
+        "visual_truncated": (analysis.visual_length or 0) > PREVIEW_CHARS,
+        "analysis_date": analysis.analysis_date.isoformat(),
+        "provider_config_id": analysis.provider_config_id,
+        "transcription_seconds": analysis.transcription_seconds,
+        "visual_seconds": analysis.visual_seconds
+    } for analysis in analyses]), 200
+
+@video_analysis_bp.route("/video_analyses/search", methods=["GET"])
+def search_video_analyses():
+    """Full-text search over a user's transcripts and visual descriptions."""
+    user_id = request.args.get("user_id", type=int)
+    query = (request.args.get("q") or "").strip()
+    if not user_id or not query:
+        return jsonify({"error": "user_id and q are required"}), 400
+    
+    page = request.args.get("page", default=1, type=int)
+    per_page = request.args.get("per_page", default=20, type=int)
+    return jsonify(video_search_index.search(user_id, query, page, per_page)), 200
+
+@video_analysis_bp.route("/video_analyses/<int:analysis_id>", methods=["GET"])
+def get_video_analysis_by_id(analysis_id):
+    """Get a single video analysis with its full transcript and description."""
+    analysis = VideoAnalysis.query.get_or_404(analysis_id)
+    return jsonify({
         "id": analysis.id,
         "post_id": analysis.post_id,
         "video_url": analysis.video_url,
         "transcription_text": analysis.transcription_text,
         "visual_description": analysis.visual_description,
         "analysis_date": analysis.analysis_date.isoformat(),
-        "provider_config_id": analysis.provider_config_id
-    } for analysis in analyses]), 200
+        "provider_config_id": analysis.provider_config_id,
+        "transcription_seconds": analysis.transcription_seconds,
+        "visual_seconds": analysis.visual_seconds
+    }), 200
 
 @video_analysis_bp.route("/analyze_trending", methods=["POST"])
 def analyze_trending_content():
@@ -62,22 +126,9 @@ def analyze_trending_content():
     data = request.json
     user_id = data.get("user_id")
     trending_items = data.get("trending_items", [])
+    language = data.get("language")
 
     if not user_id:
         return jsonify({"error": "Missing required field: user_id"}), 400
 
-    results = []
-    for item in trending_items:
-        if item.get("type") == "video" and item.get("url"):
-            analysis = video_analyzer.analyze_video_url(user_id, item["url"], item.get("id"))
-            results.append({
-                "item_id": item.get("id"),
-                "url": item["url"],
-                "analysis": analysis
-            })
-
-    return jsonify({
-        "success": True,
-        "analyzed_count": len(results),
-        "results": results
-    }), 200
+    return jsonify(video_pipeline.run(user_id, trending_items, language)), 200
@@ -0,0 +1,149 @@
+import os
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.models import db, AudioFingerprint
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AudioFingerprinter:
+    """Landmark audio fingerprints (spectral peak pairs) and matching against stored tracks.
+
+    Audio is resampled to 8 kHz, the strongest local maxima of the log
+    spectrogram are kept, and each peak is paired with a few later peaks. A
+    pair hashes to (anchor frequency, target frequency, time delta), which
+    survives re-encoding, volume changes and a different video track. Two tracks match when
+    enough of their hashes line up at one consistent time offset.
+    """
+
+    sample_rate = 8000
+    n_fft = 512  # 64 ms windows
+    hop = 256  # 32 ms between frames
+    min_bin, max_bin = 4, 200  # ~60 Hz to ~3.1 kHz
+    neighborhood = (7, 15)  # peak must dominate +-7 frames and +-15 bins
+    target_dt = (1, 63)
+    target_df = 60
+    lookup_chunk = 500
+
+    def __init__(self):
+        self.enabled = os.getenv('AUDIO_FINGERPRINT_ENABLED', 'true').lower() == 'true'
+        self.peaks_per_second = int(os.getenv('AUDIO_FINGERPRINT_PEAKS_PER_SECOND', 15))
+        self.fan_out = int(os.getenv('AUDIO_FINGERPRINT_FAN_OUT', 3))
+        self.min_matches = int(os.getenv('AUDIO_FINGERPRINT_MIN_MATCHES', 20))
+        self.min_ratio = float(os.getenv('AUDIO_FINGERPRINT_MIN_RATIO', 0.1))
+
+    def fingerprint(self, samples: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+        """Return the (hash, frame offset) landmarks of a mono int16 track."""
+        spectrogram = self._spectrogram(self._resample(samples, sample_rate))
+        if spectrogram.shape[0] < 2:
+            return []
+        peaks = self._peaks(spectrogram, len(samples) / sample_rate)
+
+        landmarks = []
+        for i, (t1, f1) in enumerate(peaks):
+            paired = 0
+            for t2, f2 in peaks[i + 1:]:
+                dt = t2 - t1
+                if dt > self.target_dt[1] or paired >= self.fan_out:
+                    break
+                if dt >= self.target_dt[0] and abs(f2 - f1) <= self.target_df:
+                    landmarks.append(((f1 << 15) | (f2 << 6) | dt, t1))
+                    paired += 1
+        return landmarks
+
+    def find_match(self, landmarks: List[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+        """Find the stored track that best matches, if it clears the match thresholds."""
+        if not landmarks:
+            return None
+        # Peaks can land one frame apart after re-encoding, so also look up time deltas of +-1
+        offsets_by_hash = defaultdict(list)
+        for hash_value, offset in landmarks:
+            for jitter in (-1, 0, 1):
+                dt = (hash_value & 0x3F) + jitter
+                if self.target_dt[0] <= dt <= self.target_dt[1]:
+                    offsets_by_hash[(hash_value & ~0x3F) | dt].append(offset)
+
+        # Votes per (track, time shift): a true match piles up on a single shift
+        votes = Counter()
+        hashes = list(offsets_by_hash)
+        for start in range(0, len(hashes), self.lookup_chunk):
+            rows = db.session.query(
+                AudioFingerprint.analysis_id, AudioFingerprint.hash, AudioFingerprint.offset
+            ).filter(AudioFingerprint.hash.in_(hashes[start:start + self.lookup_chunk])).all()
+            for analysis_id, hash_value, offset in rows:
+                for query_offset in offsets_by_hash[hash_value]:
+                    votes[(analysis_id, offset - query_offset)] += 1
+        if not votes:
+            return None
+
+        # Count neighbouring shifts together for the same frame-boundary reason
+        (analysis_id, shift), matches = max(
+            (
+                (key, count + votes.get((key[0], key[1] - 1), 0) + votes.get((key[0], key[1] + 1), 0))
+                for key, count in votes.items()
+            ),
+            key=lambda item: item[1]
+        )
+        score = min(matches / len(landmarks), 1.0)
+        if matches < self.min_matches or score < self.min_ratio:
+            return None
+        return {
+            "analysis_id": analysis_id,
+            "matches": matches,
+            "score": round(score, 3),
+            "offset_seconds": round(shift * self.hop / self.sample_rate, 2)
+        }
+
+    def store(self, analysis_id: int, landmarks: List[Tuple[int, int]]):
+        """Index a track's landmarks under its analysis."""
+        if not landmarks:
+            return
+        db.session.execute(
+            AudioFingerprint.__table__.insert(),
+            [{"analysis_id": analysis_id, "hash": hash_value, "offset": offset} for hash_value, offset in landmarks]
+        )
+        db.session.commit()
+
+    def _resample(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        audio = samples.astype(np.float32) / 32768.0
+        if sample_rate == self.sample_rate:
+            return audio
+        ratio = sample_rate / self.sample_rate
+        if ratio > 1:
+            # Box filter against aliasing before dropping samples
+            width = int(round(ratio))
+            audio = np.convolve(audio, np.ones(width, dtype=np.float32) / width, mode='same')
+        positions = np.arange(0, len(audio) - 1, ratio)
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+    def _spectrogram(self, audio: np.ndarray) -> np.ndarray:
+        """Log-magnitude spectrogram, frames x frequency bins."""
+        if len(audio) < self.n_fft:
+            return np.zeros((0, self.max_bin - self.min_bin))
+        frames = sliding_window_view(audio, self.n_fft)[::self.hop] * np.hanning(self.n_fft).astype(np.float32)
+        magnitude = np.abs(np.fft.rfft(frames, axis=1))[:, self.min_bin:self.max_bin]
+        return np.log(magnitude + 1e-6)
+
+    def _peaks(self, spectrogram: np.ndarray, duration: float) -> List[Tuple[int, int]]:
+        """Strongest local maxima as (frame, frequency bin), in time order."""
+        dt, df = self.neighborhood
+        # Separable max filter: over time, then over frequency
+        local_max = sliding_window_view(
+            np.pad(spectrogram, ((dt, dt), (0, 0)), constant_values=-np.inf), 2 * dt + 1, axis=0
+        ).max(axis=-1)
+        local_max = sliding_window_view(
+            np.pad(local_max, ((0, 0), (df, df)), constant_values=-np.inf), 2 * df + 1, axis=1
+        ).max(axis=-1)
+        is_peak = (spectrogram == local_max) & (spectrogram > np.median(spectrogram))
+        frames, bins = np.nonzero(is_peak)
+
+        limit = max(int(self.peaks_per_second * duration), 1)
+        if len(frames) > limit:
+            strongest = np.argsort(spectrogram[frames, bins])[::-1][:limit]
+            frames, bins = frames[strongest], bins[strongest]
+        order = np.lexsort((bins, frames))
+        return [(int(frames[i]), int(bins[i]) + self.min_bin) for i in order]
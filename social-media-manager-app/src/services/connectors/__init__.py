@@ -0,0 +1,22 @@
+from src.services.connectors.base import (
+    TrendConnector, ConnectorPolicy, RequestBudget, categorize_keyword, trend_record, fetch_all
+)
+from src.services.connectors.recording import ConnectorSession, ReplayMiss
+from src.services.connectors.twitter import TwitterConnector
+from src.services.connectors.instagram import InstagramConnector
+from src.services.connectors.tiktok import TikTokConnector
+
+# Platform name -> connector class; add a connector here to have it fetched
+CONNECTORS = {
+    'twitter': TwitterConnector,
+    'instagram': InstagramConnector,
+    'tiktok': TikTokConnector
+}
+
+def build_connectors(platforms=None):
+    """One connector per registered platform (or only `platforms`)."""
+    return {
+        name: connector_class()
+        for name, connector_class in CONNECTORS.items()
+        if not platforms or name in platforms
+    }
@@ -0,0 +1,205 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, List, Optional, Iterable
+from src.services.connectors.recording import ConnectorSession
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def categorize_keyword(keyword: str) -> str:
+    """Categorize a trend based on its keyword"""
+    keyword_lower = keyword.lower()
+    if any(word in keyword_lower for word in ['ai', 'artificial', 'machine', 'tech', 'software']):
+        return 'technology'
+    elif any(word in keyword_lower for word in ['movie', 'music', 'celebrity', 'entertainment']):
+        return 'entertainment'
+    elif any(word in keyword_lower for word in ['health', 'fitness', 'food', 'lifestyle']):
+        return 'lifestyle'
+    elif any(word in keyword_lower for word in ['business', 'finance', 'economy']):
+        return 'business'
+    elif any(word in keyword_lower for word in ['sport', 'football', 'basketball', 'soccer']):
+        return 'sports'
+    else:
+        return random.choice(['technology', 'entertainment', 'lifestyle', 'business', 'sports', 'news'])
+
+def trend_record(keyword: str, platform: str, engagement_score: float, volume: int,
+                 hashtags: Iterable[str] = (), growth_rate: float = 0.0, sentiment: str = 'neutral',
+                 category: str = None) -> Dict[str, Any]:
+    """A normalized trend record, the shape TrendAnalyzer.ingest_trends stores."""
+    return {
+        'keyword': keyword,
+        'platform': platform,
+        'engagement_score': round(min(max(engagement_score, 0.0), 10.0), 4),  # 0-10 scale
+        'volume': int(volume),
+        'growth_rate': growth_rate,
+        'sentiment': sentiment,
+        'category': category or categorize_keyword(keyword),
+        'hashtags': list(hashtags)
+    }
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def top_hashtags(tags: Iterable[str], exclude: str, limit: int = 3) -> List[str]:
+    """The hashtags most often posted alongside `exclude`, as #tag strings."""
+    counts = Counter(tag.lstrip('#').lower() for tag in tags if tag and tag.lstrip('#').lower() != exclude.lower())
+    return [f"#{tag}" for tag, _ in counts.most_common(limit)]
+
+class ConnectorPolicy:
+    """Concurrency, deadline, retry and request budget of one connector.
+
+    CONNECTOR_<SETTING> applies to every connector and
+    CONNECTOR_<NAME>_<SETTING> to one, e.g. CONNECTOR_TIKTOK_CONCURRENCY;
+    the budget is per connector only. The fetch deadline keeps using
+    TREND_FETCH_TIMEOUT_<PLATFORM>_SECONDS.
+    """
+
+    def __init__(self, name: str, concurrency: int = 4, timeout_seconds: float = 20.0, retries: int = 2,
+                 backoff_seconds: float = 0.5, request_timeout_seconds: float = 10.0, budget: int = 20):
+        setting = partial(_connector_setting, name)
+        self.concurrency = max(int(setting('CONCURRENCY', concurrency)), 1)
+        self.timeout_seconds = float(os.getenv(
+            f'TREND_FETCH_TIMEOUT_{name.upper()}_SECONDS', os.getenv('TREND_FETCH_TIMEOUT_SECONDS', timeout_seconds)
+        ))
+        self.retries = int(setting('RETRIES', retries))
+        self.backoff_seconds = float(setting('BACKOFF_SECONDS', backoff_seconds))
+        self.request_timeout_seconds = float(setting('REQUEST_TIMEOUT_SECONDS', request_timeout_seconds))
+        self.budget = int(os.getenv(f'CONNECTOR_{name.upper()}_BUDGET', budget))  # requests per fetch
+
+    def to_dict(self):
+        return {
+            'concurrency': self.concurrency,
+            'timeout_seconds': self.timeout_seconds,
+            'retries': self.retries,
+            'request_timeout_seconds': self.request_timeout_seconds,
+            'budget': self.budget
+        }
+
+def _connector_setting(name: str, setting: str, default):
+    return os.getenv(f'CONNECTOR_{name.upper()}_{setting}', os.getenv(f'CONNECTOR_{setting}', default))
+
+class RequestBudget:
+    """Requests a fetch may still make, shared by its concurrent calls."""
+
+    def __init__(self, requests: int):
+        self.remaining = requests
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+class TrendConnector:
+    """A platform source of trend records.
+
+    Subclasses set `name` and implement fetch(since, budget): an async call
+    returning normalized trend_record() dicts for activity after `since`
+    (None on a first run), making at most `budget` requests. Blocking HTTP
+    runs on the connector's own thread pool, sized by its policy's
+    concurrency, through `self.session`, which retries and can record or
+    replay. prepare() and commit() run in the app context before the fetch
+    and after its trends are stored, for connectors that keep state in the
+    database.
+    """
+
+    name = None
+    default_budget = 20
+
+    def __init__(self, session: ConnectorSession = None):
+        self.policy = ConnectorPolicy(self.name, budget=self.default_budget)
+        self.session = session or ConnectorSession(self.name, self.policy)
+        self._executor = ThreadPoolExecutor(max_workers=self.policy.concurrency,
+                                            thread_name_prefix=f'connector-{self.name}')
+
+    def available(self) -> bool:
+        """Whether the connector is configured (credentials present)."""
+        return True
+
+    def prepare(self):
+        pass
+
+    async def fetch(self, since: Optional[datetime], budget: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def commit(self):
+        pass
+
+    def report(self) -> Dict[str, Any]:
+        """Extra details of the last fetch for the refresh report."""
+        return {}
+
+    async def run(self, fn, *args, **kwargs):
+        """Run blocking work on this connector's thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def get_json(self, url: str, params: Dict = None, headers: Dict = None) -> Dict[str, Any]:
+        return await self.run(self._request_json, 'GET', url, params=params, headers=headers)
+
+    async def post_json(self, url: str, params: Dict = None, json: Any = None, data: Dict = None,
+                        headers: Dict = None) -> Dict[str, Any]:
+        return await self.run(self._request_json, 'POST', url, params=params, json=json, data=data, headers=headers)
+
+    def _request_json(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        response = self.session.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+async def _fetch_one(connector: TrendConnector, since: Optional[datetime], budget: int):
+    started = time.monotonic()
+    timeout = connector.policy.timeout_seconds
+    try:
+        records = await asyncio.wait_for(connector.fetch(since, budget), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{connector.name} trend fetch timed out after {timeout:g}s, continuing without it")
+        return None, {'status': 'timeout', 'count': 0}
+    except Exception as e:
+        logger.error(f"Error fetching {connector.name} trends: {str(e)}")
+        return None, {'status': 'error', 'count': 0}
+    report = {
+        'status': 'ok' if records is not None else 'unavailable',
+        'count': len(records or []),
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+    }
+    if records is not None:
+        report.update(connector.report())
+    return records, report
+
+async def _fetch_connectors(connectors: Dict[str, TrendConnector], since: Dict[str, Optional[datetime]],
+                            budgets: Dict[str, int]):
+    names = list(connectors)
+    outcomes = await asyncio.gather(*(
+        _fetch_one(connectors[name], since.get(name), budgets.get(name, connectors[name].policy.budget))
+        for name in names
+    ))
+    return dict(zip(names, outcomes))
+
+def fetch_all(connectors: Dict[str, TrendConnector], since: Dict[str, Optional[datetime]] = None,
+              budgets: Dict[str, int] = None):
+    """Fetch every available connector concurrently, each under its own deadline.
+
+    Returns (records, report): the records of all connectors that succeeded,
+    and per connector its status, record count and elapsed time. Unconfigured
+    connectors are reported as unavailable without being called.
+    """
+    report = {name: {'status': 'unavailable', 'count': 0} for name, connector in connectors.items()
+              if not connector.available()}
+    active = {name: connector for name, connector in connectors.items() if name not in report}
+    outcomes = asyncio.run(_fetch_connectors(active, since or {}, budgets or {})) if active else {}
+
+    records = []
+    for name, (connector_records, connector_report) in outcomes.items():
+        report[name] = connector_report
+        records.extend(connector_records or [])
+    return records, {name: report[name] for name in connectors}
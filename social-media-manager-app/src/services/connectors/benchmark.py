@@ -0,0 +1,91 @@
+"""Offline fetch and ingest benchmark over recorded connector responses.
+
+Record once against the real APIs (credentials in .env):
+
+    CONNECTOR_RECORD_MODE=record python -m src.services.connectors.benchmark --rounds 1
+
+then replay as often as needed, without network access or credentials:
+
+    python -m src.services.connectors.benchmark --rounds 5 --scale 50
+
+Fetches run against the cassettes in CONNECTOR_CASSETTE_DIR (or --cassettes);
+ingest runs against --database, an in-memory SQLite database by default, so
+the benchmark never writes to the application database unless asked to.
+"""
+import os
+import sys
+import time
+import argparse
+
+# Placeholder credentials, so connectors whose cassettes exist count as configured in replay
+REPLAY_CREDENTIALS = {
+    'twitter': ('TWITTER_BEARER_TOKEN',),
+    'instagram': ('INSTAGRAM_ACCESS_TOKEN', 'INSTAGRAM_BUSINESS_ACCOUNT_ID'),
+    'tiktok': ('TIKTOK_CLIENT_KEY', 'TIKTOK_CLIENT_SECRET')
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cassettes', default=os.getenv('CONNECTOR_CASSETTE_DIR', 'cassettes'),
+                        help='cassette directory')
+    parser.add_argument('--platforms', default=None, help='comma-separated connectors (default: all)')
+    parser.add_argument('--rounds', type=int, default=3, help='fetch and ingest rounds')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='copies of every fetched record to ingest, as distinct keywords')
+    parser.add_argument('--database', default='sqlite://', help='database URL to ingest into')
+    return parser.parse_args(argv)
+
+def scaled(records, scale):
+    if scale <= 1:
+        return list(records)
+    return [
+        dict(record, keyword=f"{record['keyword']} {copy}" if copy else record['keyword'])
+        for copy in range(scale) for record in records
+    ]
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['CONNECTOR_CASSETTE_DIR'] = args.cassettes
+    os.environ['DATABASE_URL'] = args.database
+    mode = os.environ.setdefault('CONNECTOR_RECORD_MODE', 'replay')
+    if mode == 'replay':
+        for platform, variables in REPLAY_CREDENTIALS.items():
+            if os.path.exists(os.path.join(args.cassettes, f'{platform}.json')):
+                for variable in variables:
+                    os.environ.setdefault(variable, 'replay')
+
+    from src.main import create_app
+    from src.services.connectors import build_connectors, fetch_all
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        platforms = [platform.strip() for platform in args.platforms.split(',')] if args.platforms else None
+        connectors = build_connectors(platforms)
+        analyzer = TrendAnalyzer()
+        print(f"mode={mode} cassettes={args.cassettes} connectors={','.join(connectors)}")
+
+        for round_number in range(1, args.rounds + 1):
+            for connector in connectors.values():
+                if connector.available():
+                    connector.prepare()
+            started = time.monotonic()
+            records, report = fetch_all(connectors)
+            fetch_seconds = time.monotonic() - started
+            summary = ' '.join(f"{name}={outcome['status']}:{outcome['count']}" for name, outcome in report.items())
+            print(f"round {round_number} fetch: {len(records)} records in {fetch_seconds * 1000:.1f}ms "
+                  f"({len(records) / max(fetch_seconds, 1e-9):.0f}/s) {summary}")
+
+            batch = scaled(records, args.scale)
+            if not batch:
+                continue
+            started = time.monotonic()
+            stats = analyzer.ingest_trends(batch)
+            ingest_seconds = time.monotonic() - started
+            print(f"round {round_number} ingest: {len(batch)} records in {ingest_seconds * 1000:.1f}ms "
+                  f"({len(batch) / max(ingest_seconds, 1e-9):.0f}/s) "
+                  f"inserted={stats['inserted']} updated={stats['updated']}")
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+    main()
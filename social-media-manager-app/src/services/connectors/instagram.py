@@ -0,0 +1,107 @@
+import os
+import re
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from src.services.connectors.base import TrendConnector, RequestBudget, trend_record, parse_list, top_hashtags
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+
+class InstagramConnector(TrendConnector):
+    """Instagram Graph API hashtag search.
+
+    Each configured hashtag becomes a trend whose volume is the number of
+    its recent media (the API keeps the last 24 hours) posted after `since`.
+    Hashtag ids are looked up once and cached, as the API allows only 30
+    unique hashtag searches per account every 7 days.
+    """
+
+    name = 'instagram'
+    default_budget = 20
+
+    def __init__(self, session=None):
+        super().__init__(session)
+        self.access_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
+        self.account_id = os.getenv('INSTAGRAM_BUSINESS_ACCOUNT_ID')
+        self.base_url = os.getenv('INSTAGRAM_API_BASE_URL', 'https://graph.facebook.com/v19.0').rstrip('/')
+        self.hashtags = parse_list(os.getenv('INSTAGRAM_HASHTAGS', 'travel,food,fashion,fitness,art'))
+        self.page_size = int(os.getenv('INSTAGRAM_PAGE_SIZE', 50))
+        self._hashtag_ids: Dict[str, str] = {}
+        self._requests = 0
+
+    def available(self) -> bool:
+        return bool(self.access_token and self.account_id)
+
+    async def fetch(self, since: Optional[datetime], budget: int) -> List[Dict[str, Any]]:
+        requests_left = RequestBudget(budget)
+        outcomes = await asyncio.gather(*(
+            self._fetch_hashtag(hashtag, since, requests_left) for hashtag in self.hashtags
+        ), return_exceptions=True)
+        self._requests = budget - requests_left.remaining
+
+        trends = []
+        for hashtag, outcome in zip(self.hashtags, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Instagram search for #{hashtag} failed: {str(outcome)}")
+                continue
+            if not outcome:
+                continue
+            total = sum(media.get('like_count', 0) + media.get('comments_count', 0) * 2 for media in outcome)
+            related = top_hashtags((tag for media in outcome for tag in HASHTAG_PATTERN.findall(media.get('caption') or '')),
+                                   exclude=hashtag)
+            trends.append(trend_record(
+                hashtag, 'instagram',
+                engagement_score=total / len(outcome) / 100,
+                volume=len(outcome),
+                hashtags=[f"#{hashtag}", "#instagram"] + related
+            ))
+
+        logger.info(f"Fetched {len(trends)} Instagram trends with {self._requests} requests")
+        return trends
+
+    def report(self) -> Dict[str, Any]:
+        return {'requests': self._requests}
+
+    async def _fetch_hashtag(self, hashtag: str, since: Optional[datetime], requests_left: RequestBudget):
+        hashtag_id = self._hashtag_ids.get(hashtag)
+        if hashtag_id is None:
+            if not requests_left.take():
+                return []
+            found = await self.get_json(f"{self.base_url}/ig_hashtag_search", params={
+                'user_id': self.account_id, 'q': hashtag, 'access_token': self.access_token
+            })
+            if not found.get('data'):
+                return []
+            hashtag_id = self._hashtag_ids[hashtag] = found['data'][0]['id']
+
+        media = []
+        params = {
+            'user_id': self.account_id,
+            'fields': 'id,caption,like_count,comments_count,timestamp',
+            'limit': self.page_size,
+            'access_token': self.access_token
+        }
+        while requests_left.take():
+            page = await self.get_json(f"{self.base_url}/{hashtag_id}/recent_media", params=params)
+            batch = page.get('data') or []
+            fresh = [item for item in batch if since is None or _posted_at(item) > since]
+            media.extend(fresh)
+            after = (page.get('paging') or {}).get('cursors', {}).get('after')
+            # Newest first: a page reaching back past `since` is the last one needed
+            if not after or len(fresh) < len(batch):
+                break
+            params = dict(params, after=after)
+        return media
+
+def _posted_at(media: Dict[str, Any]) -> datetime:
+    """Media timestamp (e.g. 2024-05-01T12:00:00+0000) as naive UTC."""
+    try:
+        posted = datetime.strptime(media['timestamp'], '%Y-%m-%dT%H:%M:%S%z')
+    except (KeyError, TypeError, ValueError):
+        return datetime.utcnow()
+    return posted.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+import requests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Credentials and account ids are never written to cassettes, nor part of the lookup key,
+# so a cassette replays under any account
+_SECRET_FIELDS = {'access_token', 'client_secret', 'client_key', 'token', 'bearer_token', 'user_id'}
+# Request fields that follow the clock (TikTok's query date range): recorded as sent but left out
+# of the lookup key, so a cassette still replays on later days
+_VOLATILE_FIELDS = {'start_date', 'end_date'}
+# Response headers worth keeping: content type and rate-limit state
+_KEPT_HEADERS = ('content-type', 'x-rate-limit-limit', 'x-rate-limit-remaining', 'x-rate-limit-reset')
+
+class ReplayMiss(LookupError):
+    """Replay mode got a request that was never recorded."""
+
+class ConnectorSession:
+    """HTTP session of one connector: retries with backoff, plus record/replay.
+
+    Connection errors, timeouts and 5xx responses are retried up to
+    policy.retries times with jittered exponential backoff. With
+    CONNECTOR_RECORD_MODE=record every response is also appended to the
+    connector's cassette, CONNECTOR_CASSETTE_DIR/<name>.json; with replay,
+    responses are served from that file and nothing touches the network.
+    Repeated identical requests replay their recordings in order, the last
+    one repeating.
+    """
+
+    def __init__(self, name: str, policy, mode: str = None, cassette_dir: str = None,
+                 session: requests.Session = None):
+        self.name = name
+        self.policy = policy
+        self.mode = (mode or os.getenv('CONNECTOR_RECORD_MODE', 'off')).lower()
+        self.path = os.path.join(cassette_dir or os.getenv('CONNECTOR_CASSETTE_DIR', 'cassettes'), f'{name}.json')
+        self._session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._interactions: List[Dict[str, Any]] = []
+        self._replay: Dict[str, List[Dict[str, Any]]] = {}
+        self._replay_position: Dict[str, int] = {}
+        if self.mode in ('record', 'replay') and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as cassette:
+                self._interactions = json.load(cassette).get('interactions', [])
+            for interaction in self._interactions:
+                self._replay.setdefault(interaction['key'], []).append(interaction)
+        elif self.mode == 'replay':
+            logger.warning(f"No cassette for {name} at {self.path}; every request will miss")
+
+    def get(self, url: str, params: Dict = None, headers: Dict = None, timeout: float = None) -> requests.Response:
+        return self.request('GET', url, params=params, headers=headers, timeout=timeout)
+
+    def post(self, url: str, params: Dict = None, json: Any = None, data: Dict = None, headers: Dict = None,
+             timeout: float = None) -> requests.Response:
+        return self.request('POST', url, params=params, json=json, data=data, headers=headers, timeout=timeout)
+
+    def request(self, method: str, url: str, params: Dict = None, json: Any = None, data: Dict = None,
+                headers: Dict = None, timeout: float = None) -> requests.Response:
+        key = _interaction_key(method, url, params, json, data)
+        if self.mode == 'replay':
+            return self._replayed(key)
+        response = self._send(method, url, params=params, json=json, data=data, headers=headers, timeout=timeout)
+        if self.mode == 'record':
+            self._record(key, method, url, params, json, data, response)
+        return response
+
+    def _send(self, method: str, url: str, timeout: float = None, **kwargs) -> requests.Response:
+        retries = self.policy.retries
+        for attempt in range(retries + 1):
+            try:
+                response = self._session.request(method, url, timeout=timeout or self.policy.request_timeout_seconds,
+                                                 **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"{self.name} request failed ({str(e)}), retry {attempt + 1}/{retries}")
+            else:
+                if response.status_code < 500 or attempt == retries:
+                    return response
+                logger.warning(f"{self.name} request got {response.status_code}, retry {attempt + 1}/{retries}")
+            time.sleep(self.policy.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def _record(self, key: str, method: str, url: str, params, json_body, data, response: requests.Response):
+        interaction = {
+            'key': key,
+            'method': method,
+            'url': url,
+            'params': _without_secrets(params),
+            'json': _without_secrets(json_body),
+            'data': _without_secrets(data),
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+            'body': _redacted_body(response.text)
+        }
+        with self._lock:
+            self._interactions.append(interaction)
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as cassette:
+                json.dump({'connector': self.name, 'interactions': self._interactions}, cassette, indent=1)
+
+    def _replayed(self, key: str) -> requests.Response:
+        with self._lock:
+            recordings = self._replay.get(key)
+            if not recordings:
+                raise ReplayMiss(f"No recorded {self.name} response for {key}")
+            position = self._replay_position.get(key, 0)
+            self._replay_position[key] = min(position + 1, len(recordings) - 1)
+            interaction = recordings[position]
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.headers.update(interaction['headers'])
+        response._content = interaction['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = interaction['url']
+        return response
+
+def _without_secrets(value: Optional[Any]) -> Optional[Any]:
+    if isinstance(value, dict):
+        return {name: item for name, item in value.items() if name not in _SECRET_FIELDS}
+    return value
+
+def _redacted_body(text: str) -> str:
+    # Token endpoints answer with the credential itself
+    try:
+        body = json.loads(text)
+    except ValueError:
+        return text
+    if not isinstance(body, dict) or not _SECRET_FIELDS.intersection(body):
+        return text
+    return json.dumps({name: 'redacted' if name in _SECRET_FIELDS else item for name, item in body.items()})
+
+def _lookup_fields(value: Optional[Any]) -> Optional[Any]:
+    if isinstance(value, dict):
+        return {name: item for name, item in value.items() if name not in _SECRET_FIELDS | _VOLATILE_FIELDS}
+    return value
+
+def _interaction_key(method: str, url: str, params, json_body, data) -> str:
+    return json.dumps([method, url, _lookup_fields(params), _lookup_fields(json_body), _lookup_fields(data)],
+                      sort_keys=True, default=str)
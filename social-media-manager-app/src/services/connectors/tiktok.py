@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from src.services.connectors.base import TrendConnector, RequestBudget, trend_record, parse_list, top_hashtags
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TikTokConnector(TrendConnector):
+    """TikTok Research API video query.
+
+    Each configured keyword becomes a trend whose volume is the number of
+    videos created after `since` (the last day on a first run). The
+    client-credentials token is cached until shortly before it expires.
+    """
+
+    name = 'tiktok'
+    default_budget = 20
+    # Research API queries may span at most 30 days
+    max_window_days = 30
+
+    def __init__(self, session=None):
+        super().__init__(session)
+        self.client_key = os.getenv('TIKTOK_CLIENT_KEY')
+        self.client_secret = os.getenv('TIKTOK_CLIENT_SECRET')
+        self.base_url = os.getenv('TIKTOK_API_BASE_URL', 'https://open.tiktokapis.com/v2').rstrip('/')
+        self.keywords = parse_list(os.getenv('TIKTOK_KEYWORDS', 'dance,comedy,challenge,duet,stitch'))
+        self.page_size = int(os.getenv('TIKTOK_PAGE_SIZE', 100))
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self._requests = 0
+
+    def available(self) -> bool:
+        return bool(self.client_key and self.client_secret)
+
+    async def fetch(self, since: Optional[datetime], budget: int) -> List[Dict[str, Any]]:
+        requests_left = RequestBudget(budget)
+        token = await self.run(self._access_token, requests_left)
+        now = datetime.utcnow()
+        since = max(since or now - timedelta(days=1), now - timedelta(days=self.max_window_days - 1))
+        outcomes = await asyncio.gather(*(
+            self._fetch_keyword(keyword, token, since, now, requests_left) for keyword in self.keywords
+        ), return_exceptions=True)
+        self._requests = budget - requests_left.remaining
+
+        trends = []
+        for keyword, outcome in zip(self.keywords, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"TikTok query for {keyword} failed: {str(outcome)}")
+                continue
+            if not outcome:
+                continue
+            total = sum(video.get('like_count', 0) + video.get('comment_count', 0) * 2 + video.get('share_count', 0) * 2
+                        for video in outcome)
+            related = top_hashtags((tag for video in outcome for tag in video.get('hashtag_names') or []),
+                                   exclude=keyword)
+            trends.append(trend_record(
+                keyword, 'tiktok',
+                engagement_score=total / len(outcome) / 1000,
+                volume=len(outcome),
+                hashtags=[f"#{keyword}", "#tiktok"] + related
+            ))
+
+        logger.info(f"Fetched {len(trends)} TikTok trends with {self._requests} requests")
+        return trends
+
+    def report(self) -> Dict[str, Any]:
+        return {'requests': self._requests}
+
+    def _access_token(self, requests_left: RequestBudget) -> str:
+        with self._token_lock:
+            if self._token and time.time() < self._token_expires_at:
+                return self._token
+            if not requests_left.take():
+                raise RuntimeError("TikTok request budget too small to obtain a token")
+            token = self._request_json('POST', f"{self.base_url}/oauth/token/", data={
+                'client_key': self.client_key,
+                'client_secret': self.client_secret,
+                'grant_type': 'client_credentials'
+            }, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+            self._token = token['access_token']
+            # Renew a minute early rather than race the expiry
+            self._token_expires_at = time.time() + int(token.get('expires_in', 7200)) - 60
+            return self._token
+
+    async def _fetch_keyword(self, keyword: str, token: str, since: datetime, until: datetime,
+                             requests_left: RequestBudget) -> List[Dict[str, Any]]:
+        body = {
+            'query': {'and': [{'operation': 'IN', 'field_name': 'keyword', 'field_values': [keyword]}]},
+            'start_date': since.strftime('%Y%m%d'),
+            'end_date': until.strftime('%Y%m%d'),
+            'max_count': min(self.page_size, 100)
+        }
+        since_epoch = (since - datetime(1970, 1, 1)).total_seconds()
+        videos = []
+        while requests_left.take():
+            page = await self.post_json(
+                f"{self.base_url}/research/video/query/",
+                params={'fields': 'id,create_time,like_count,comment_count,share_count,view_count,hashtag_names'},
+                json=body,
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            error = page.get('error') or {}
+            if error.get('code') not in (None, 'ok'):
+                raise RuntimeError(f"{error.get('code')}: {error.get('message')}")
+            data = page.get('data') or {}
+            # Dates are whole days; drop videos the previous refresh already counted
+            videos.extend(video for video in data.get('videos') or [] if video.get('create_time', 0) > since_epoch)
+            if not data.get('has_more'):
+                break
+            body = dict(body, cursor=data.get('cursor'), search_id=data.get('search_id'))
+        return videos
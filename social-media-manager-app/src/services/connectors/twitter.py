@@ -0,0 +1,91 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from src.services.connectors.base import TrendConnector, trend_record
+from src.services.twitter_search import TwitterSearchClient, TwitterIncrementalSearch, TwitterRateLimited
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TwitterConnector(TrendConnector):
+    """Twitter recent search, read incrementally from per-query since_id cursors.
+
+    Twitter API v2 has no trending endpoint; the new tweets of each search
+    query stand in for a trend. `since` is not needed, the stored cursors
+    already mark where the previous refresh stopped.
+    """
+
+    name = 'twitter'
+
+    def __init__(self, session=None):
+        self.default_budget = int(os.getenv('TWITTER_MAX_PAGES_PER_REFRESH', 20))
+        super().__init__(session)
+        bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
+        self.client = TwitterSearchClient(bearer_token, session=self.session,
+                                          timeout=self.policy.request_timeout_seconds) if bearer_token else None
+        self.search = TwitterIncrementalSearch(self.client) if self.client else None
+        self._cursors = None
+        self._fetched = False
+
+    def available(self) -> bool:
+        return self.search is not None
+
+    def prepare(self):
+        # Cursors are read here, in the app context; the fetch only works on this copy
+        self._cursors = self.search.load_cursors()
+        self._fetched = False
+
+    async def fetch(self, since: Optional[datetime], budget: int) -> List[Dict[str, Any]]:
+        if self._cursors is None:
+            self.prepare()
+        cursors = self._cursors
+        scheduled, extra_pages = self.search.plan(cursors, budget)
+        outcomes = await asyncio.gather(*(
+            self.run(self.search.fetch_query, query, cursors[query], extra_pages) for query in scheduled
+        ), return_exceptions=True)
+
+        trends = []
+        new_tweets = 0
+        for query, outcome in zip(scheduled, outcomes):
+            if isinstance(outcome, TwitterRateLimited):
+                logger.warning(f"Twitter search for {query} skipped: rate limit exhausted")
+                continue
+            if isinstance(outcome, Exception):
+                # One failed query should not cost the other keywords
+                logger.warning(f"Twitter search for {query} failed: {str(outcome)}")
+                continue
+            tweets, cursors[query] = outcome
+            new_tweets += len(tweets)
+            if not tweets:
+                continue
+            total_likes = sum(tweet.get('public_metrics', {}).get('like_count', 0) for tweet in tweets)
+            total_retweets = sum(tweet.get('public_metrics', {}).get('retweet_count', 0) for tweet in tweets)
+            trends.append(trend_record(
+                query, 'twitter',
+                # Per-tweet average on the old 10-tweet scale, so page count does not inflate it
+                engagement_score=(total_likes + total_retweets * 2) / len(tweets) / 100,
+                volume=len(tweets),
+                hashtags=[f"#{query.replace(' ', '')}", "#trending", "#twitter"]
+            ))
+
+        self._fetched = True
+        logger.info(f"Fetched {len(trends)} Twitter trends from {new_tweets} new tweets")
+        return trends
+
+    def commit(self):
+        # Advance the search cursors only once the tweets behind them are stored
+        if self._fetched and self._cursors:
+            self.search.save_cursors(self._cursors)
+        self._cursors = None
+        self._fetched = False
+
+    def report(self) -> Dict[str, Any]:
+        cursors = (self._cursors or {}).values()
+        return {
+            'pages': sum(cursor.get('pages', 0) for cursor in cursors),
+            'new_tweets': sum(cursor.get('new_tweets', 0) for cursor in cursors),
+            'rate_limit': self.client.rate_limit.to_dict()
+        }
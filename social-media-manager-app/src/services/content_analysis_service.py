@@ -74,24 +74,10 @@ class ContentAnalysisService:
         except Exception as e:
             return {"error": f"Video analysis failed: {str(e)}"}
     
-    def analyze_trending_content(self, user_id: int, trending_items: list) -> Dict[str, Any]:
-        """Analyze multiple trending content items."""
-        results = []
-        
-        for item in trending_items:
-            if item.get("type") == "video" and item.get("url"):
-                analysis = self.analyze_video_url(user_id, item["url"], item.get("id"))
-                results.append({
-                    "item_id": item.get("id"),
-                    "url": item["url"],
-                    "analysis": analysis
-                })
-        
-        return {
-            "success": True,
-            "analyzed_count": len(results),
-            "results": results
-        }
+    def analyze_trending_content(self, user_id: int, trending_items: list, language: str = None) -> Dict[str, Any]:
+        """Analyze multiple trending content items through the staged video pipeline."""
+        from src.services.video_pipeline import VideoAnalysisPipeline
+        return VideoAnalysisPipeline().run(user_id, trending_items, language)
     
     def get_content_insights(self, user_id: int, content_text: str) -> Dict[str, Any]:
         """Get AI-powered insights about content performance and optimization."""
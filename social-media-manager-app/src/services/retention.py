@@ -0,0 +1,344 @@
+import os
+import json
+import gzip
+import time
+import uuid
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterable
+from sqlalchemy import select, delete, update, func
+from src.models import (
+    db, ContentRecommendation, UserAnalytics, VideoAnalysis, AudioFingerprint, VideoAnalysisJob,
+    RecommendationState, TrendSnapshot, TrendRefreshRun, RetentionRun, SchedulerLease
+)
+from src.services.trend_scheduler import acquire_lease, release_lease
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'retention'
+
+class RetentionPolicy:
+    """How long rows of one table are kept.
+
+    Rows older than max_age_days are purged, and each user keeps at most
+    max_rows_per_user of their newest rows; 0 turns a limit off. Both can be
+    overridden per table, e.g. RETENTION_USER_ANALYTICS_MAX_AGE_DAYS.
+    `children` are (model, foreign key column) pairs deleted ahead of the
+    rows they point at.
+    """
+
+    def __init__(self, model, timestamp_column, max_age_days: float = 0, max_rows_per_user: int = 0,
+                 user_column=None, where=(), children=(), on_purge=None):
+        self.model = model
+        self.table_name = model.__tablename__
+        self.primary_key = model.__table__.c.id
+        self.timestamp_column = timestamp_column
+        self.user_column = user_column
+        self.where = list(where)
+        self.children = list(children)
+        self.on_purge = on_purge
+        prefix = f'RETENTION_{self.table_name.upper()}'
+        self.max_age_days = float(os.getenv(f'{prefix}_MAX_AGE_DAYS', max_age_days))
+        self.max_rows_per_user = int(os.getenv(f'{prefix}_MAX_ROWS_PER_USER', max_rows_per_user)) if user_column is not None else 0
+
+    def to_dict(self):
+        return {
+            'table': self.table_name,
+            'max_age_days': self.max_age_days or None,
+            'max_rows_per_user': self.max_rows_per_user or None,
+            'children': [child.__tablename__ for child, _ in self.children]
+        }
+
+def _detach_video_analyses(ids: List[int], user_ids: Iterable[int]):
+    # Jobs keep their result JSON; only the link to the purged analysis goes
+    db.session.execute(
+        update(VideoAnalysisJob).where(VideoAnalysisJob.analysis_id.in_(ids)).values(analysis_id=None)
+        .execution_options(synchronize_session=False)
+    )
+
+def _reset_recommendation_state(ids: List[int], user_ids: Iterable[int]):
+    # Without its state row the next read recomputes instead of serving the purged rows
+    db.session.execute(
+        delete(RecommendationState).where(RecommendationState.user_id.in_(list(user_ids)))
+        .execution_options(synchronize_session=False)
+    )
+
+def default_policies() -> Dict[str, RetentionPolicy]:
+    policies = [
+        RetentionPolicy(ContentRecommendation, ContentRecommendation.updated_at, max_age_days=30,
+                        user_column=ContentRecommendation.user_id, on_purge=_reset_recommendation_state),
+        RetentionPolicy(UserAnalytics, UserAnalytics.timestamp, max_age_days=365, max_rows_per_user=10000,
+                        user_column=UserAnalytics.user_id),
+        RetentionPolicy(VideoAnalysis, VideoAnalysis.analysis_date, max_age_days=365, max_rows_per_user=1000,
+                        user_column=VideoAnalysis.user_id,
+                        children=[(AudioFingerprint, AudioFingerprint.analysis_id)], on_purge=_detach_video_analyses),
+        RetentionPolicy(TrendSnapshot, TrendSnapshot.ts, max_age_days=30),
+        RetentionPolicy(TrendRefreshRun, TrendRefreshRun.requested_at, max_age_days=30,
+                        where=[TrendRefreshRun.status.in_(['succeeded', 'failed'])]),
+        RetentionPolicy(RetentionRun, RetentionRun.started_at, max_age_days=90),
+    ]
+    return {policy.table_name: policy for policy in policies}
+
+class RetentionManager:
+    """Purges rows that fall outside their table's RetentionPolicy.
+
+    Rows are selected by primary key in batches of RETENTION_BATCH_SIZE
+    through an index on the policy's timestamp (or user and timestamp)
+    columns, and each batch is deleted and committed on its own with a short
+    pause after it, so SQLite's write lock is never held for long. With
+    RETENTION_ARCHIVE_DIR set, each batch is first appended to a gzipped
+    JSON-lines file per table and run. Every table's pass is recorded as a
+    RetentionRun row.
+
+    Each web process runs one worker thread; passes are spaced
+    RETENTION_INTERVAL_SECONDS apart across all processes, and the `retention`
+    lease row keeps two purges from running at once.
+    """
+
+    def __init__(self):
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = int(os.getenv('RETENTION_BATCH_SIZE', 500))
+        self.batch_pause = float(os.getenv('RETENTION_BATCH_PAUSE_MS', 50)) / 1000.0
+        self.archive_dir = os.getenv('RETENTION_ARCHIVE_DIR', '')
+        self.interval_seconds = float(os.getenv('RETENTION_INTERVAL_SECONDS', 3600))
+        self.tick_seconds = float(os.getenv('RETENTION_TICK_SECONDS', 60))
+        self.lease_seconds = int(os.getenv('RETENTION_LEASE_SECONDS', 300))
+        self.policies = default_policies()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, app):
+        self._thread = threading.Thread(target=self._run, args=(app,), name='retention', daemon=True)
+        self._thread.start()
+        logger.info(f"Retention worker started on {self.node_id}")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self, app):
+        with app.app_context():
+            while not self._stop_event.is_set():
+                try:
+                    self.tick()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Retention tick failed: {str(e)}")
+                finally:
+                    db.session.remove()
+                self._stop_event.wait(self.tick_seconds)
+
+    def tick(self):
+        """Run a scheduled pass if the last one, by any process, was at least an interval ago."""
+        last_started = db.session.execute(
+            select(func.max(RetentionRun.started_at)).where(RetentionRun.trigger == 'schedule')
+        ).scalar()
+        if last_started and datetime.utcnow() - last_started < timedelta(seconds=self.interval_seconds):
+            return
+        if not acquire_lease(LEASE_NAME, self.node_id, self.lease_seconds):
+            return
+        try:
+            self.purge(trigger='schedule', holder=self.node_id)
+        finally:
+            release_lease(LEASE_NAME, self.node_id)
+
+    def purge(self, tables: Optional[Iterable[str]] = None, trigger: str = 'manual',
+              holder: str = None) -> List[Dict[str, Any]]:
+        """Apply the policies of `tables` (default: all); returns the RetentionRun of each table.
+
+        With `holder`, the retention lease is renewed between tables and the
+        pass stops early if it has been lost.
+        """
+        runs = []
+        for name in tables or list(self.policies):
+            if holder and not acquire_lease(LEASE_NAME, holder, self.lease_seconds, renewing=True):
+                logger.warning(f"Lost the retention lease; stopping before {name}")
+                break
+            runs.append(self.purge_table(self.policies[name], trigger).to_dict())
+        return runs
+
+    def purge_table(self, policy: RetentionPolicy, trigger: str = 'manual') -> RetentionRun:
+        run = RetentionRun(table_name=policy.table_name, trigger=trigger, started_at=datetime.utcnow(),
+                           rows_purged=0, rows_archived=0, batches=0, runner=self.node_id)
+        db.session.add(run)
+        db.session.commit()
+        started = time.monotonic()
+        try:
+            self._purge_expired(policy, run)
+            self._purge_excess(policy, run)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Retention purge of {policy.table_name} failed: {str(e)}")
+            run = db.session.get(RetentionRun, run.id)
+            run.error = str(e)
+        run.finished_at = datetime.utcnow()
+        run.duration_ms = round((time.monotonic() - started) * 1000, 1)
+        db.session.commit()
+        if run.rows_purged or run.error:
+            logger.info(f"Purged {run.rows_purged} rows from {policy.table_name} in {run.batches} batches "
+                        f"({run.duration_ms}ms)")
+        return run
+
+    def _purge_expired(self, policy: RetentionPolicy, run: RetentionRun):
+        if policy.max_age_days <= 0:
+            return
+        cutoff = datetime.utcnow() - timedelta(days=policy.max_age_days)
+        while True:
+            rows = db.session.execute(
+                select(*self._key_columns(policy)).where(policy.timestamp_column < cutoff, *policy.where)
+                .order_by(policy.timestamp_column).limit(self.batch_size)
+            ).all()
+            if not rows:
+                break
+            self._purge_batch(policy, rows, run)
+
+    def _purge_excess(self, policy: RetentionPolicy, run: RetentionRun):
+        """Trim every user above max_rows_per_user down to their newest rows."""
+        if policy.max_rows_per_user <= 0:
+            return
+        over_limit = db.session.execute(
+            select(policy.user_column, func.count()).where(*policy.where).group_by(policy.user_column)
+            .having(func.count() > policy.max_rows_per_user)
+        ).all()
+        for user_id, count in over_limit:
+            excess = count - policy.max_rows_per_user
+            while excess > 0:
+                rows = db.session.execute(
+                    select(*self._key_columns(policy)).where(policy.user_column == user_id, *policy.where)
+                    .order_by(policy.timestamp_column, policy.primary_key).limit(min(self.batch_size, excess))
+                ).all()
+                if not rows:
+                    break
+                self._purge_batch(policy, rows, run)
+                excess -= len(rows)
+
+    def _key_columns(self, policy: RetentionPolicy):
+        if policy.user_column is not None:
+            return [policy.primary_key, policy.user_column]
+        return [policy.primary_key]
+
+    def _purge_batch(self, policy: RetentionPolicy, rows, run: RetentionRun):
+        ids = [row[0] for row in rows]
+        if self.archive_dir:
+            run.rows_archived += self._archive(policy, ids, run)
+        for child, column in policy.children:
+            self._purge_children(child, column, ids)
+        if policy.on_purge:
+            policy.on_purge(ids, {row[1] for row in rows} if policy.user_column is not None else set())
+        db.session.execute(
+            delete(policy.model).where(policy.primary_key.in_(ids)).execution_options(synchronize_session=False)
+        )
+        run.rows_purged += len(ids)
+        run.batches += 1
+        db.session.commit()
+        if self.batch_pause:
+            time.sleep(self.batch_pause)
+
+    def _purge_children(self, child, column, parent_ids: List[int]):
+        """Delete child rows in batches of their own, committed ahead of the parent batch."""
+        child_key = child.__table__.c.id
+        while True:
+            child_ids = db.session.execute(
+                select(child_key).where(column.in_(parent_ids)).limit(self.batch_size)
+            ).scalars().all()
+            if not child_ids:
+                break
+            db.session.execute(
+                delete(child).where(child_key.in_(child_ids)).execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+    def _archive(self, policy: RetentionPolicy, ids: List[int], run: RetentionRun) -> int:
+        rows = db.session.execute(
+            select(policy.model.__table__).where(policy.primary_key.in_(ids))
+        ).mappings().all()
+        if run.archive_path is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            run.archive_path = os.path.join(
+                self.archive_dir, f"{policy.table_name}-{run.started_at:%Y%m%dT%H%M%S}-{run.id}.jsonl.gz"
+            )
+        # Each batch appends a gzip member; gzip readers see one continuous file
+        with gzip.open(run.archive_path, 'at', encoding='utf-8') as archive:
+            for row in rows:
+                archive.write(json.dumps(dict(row), default=_json_default) + '\n')
+        return len(rows)
+
+    def status(self) -> Dict[str, Any]:
+        """Policies, current table sizes, the last run per table and purge totals over the last day."""
+        tables = {}
+        for policy in self.policies.values():
+            for model in [policy.model] + [child for child, _ in policy.children]:
+                tables[model.__tablename__] = db.session.execute(select(func.count()).select_from(model)).scalar()
+
+        last_runs = {}
+        for name in self.policies:
+            run = RetentionRun.query.filter_by(table_name=name).order_by(RetentionRun.started_at.desc()).first()
+            if run:
+                last_runs[name] = run.to_dict()
+
+        since = datetime.utcnow() - timedelta(days=1)
+        totals = {
+            name: {
+                'runs': runs,
+                'rows_purged': int(purged or 0),
+                'rows_archived': int(archived or 0),
+                'avg_duration_ms': round(avg_ms, 1) if avg_ms is not None else None,
+                'max_duration_ms': max_ms
+            }
+            for name, runs, purged, archived, avg_ms, max_ms in db.session.execute(
+                select(RetentionRun.table_name, func.count(), func.sum(RetentionRun.rows_purged),
+                       func.sum(RetentionRun.rows_archived), func.avg(RetentionRun.duration_ms),
+                       func.max(RetentionRun.duration_ms))
+                .where(RetentionRun.started_at >= since).group_by(RetentionRun.table_name)
+            ).all()
+        }
+
+        lease = db.session.get(SchedulerLease, LEASE_NAME)
+        return {
+            'policies': [policy.to_dict() for policy in self.policies.values()],
+            'table_sizes': tables,
+            'last_runs': last_runs,
+            'last_24h': totals,
+            'running': lease.to_dict() if lease and lease.expires_at and lease.expires_at > datetime.utcnow() else None,
+            'batch_size': self.batch_size,
+            'interval_seconds': self.interval_seconds,
+            'archive_dir': self.archive_dir or None
+        }
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def start_retention_worker(app) -> Optional[RetentionManager]:
+    """Start the purge thread for this process unless RETENTION_ENABLED is false."""
+    if os.getenv('RETENTION_ENABLED', 'true').lower() != 'true':
+        return None
+    manager = RetentionManager()
+    manager.start(app)
+    app.extensions['retention'] = manager
+    return manager
+
+def trigger_purge(app, tables: Optional[List[str]] = None) -> bool:
+    """Start a manual purge in a background thread; False if a purge is already running somewhere."""
+    manager = app.extensions.get('retention') or RetentionManager()
+    holder = f"{manager.node_id}/manual-{uuid.uuid4().hex[:8]}"
+    if not acquire_lease(LEASE_NAME, holder, manager.lease_seconds):
+        return False
+
+    def run_now():
+        with app.app_context():
+            try:
+                manager.purge(tables, trigger='manual', holder=holder)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Manual retention purge failed: {str(e)}")
+            finally:
+                release_lease(LEASE_NAME, holder)
+                db.session.remove()
+
+    threading.Thread(target=run_now, name='retention-manual', daemon=True).start()
+    return True
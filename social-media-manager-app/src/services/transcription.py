@@ -0,0 +1,234 @@
+import os
+import queue
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TranscriptionBackend(ABC):
+    """Interface for speech-to-text engines used by the video analyzer.
+
+    Results use the analyzer's shape: {"success", "transcription", "language",
+    "segments": [{"start", "end", "text"}]}, with times in seconds. Anything a
+    backend needs besides the audio and language hint is given to its
+    constructor.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe one audio file."""
+
+    def transcribe_batch(self, audio_paths: List[str], language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Transcribe several files; engines that can decode in parallel override this."""
+        return [self.transcribe(audio_path, language) for audio_path in audio_paths]
+
+class WhisperBackend(TranscriptionBackend):
+    """Reference openai-whisper engine (PyTorch, fp32 on CPU)."""
+
+    name = "whisper"
+
+    def __init__(self, model_name: str = "base", cpu_threads: int = 0):
+        self.model_name = model_name
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            import whisper
+            if self.cpu_threads:
+                import torch
+                torch.set_num_threads(self.cpu_threads)
+            logger.info(f"Loading Whisper model {self.model_name}")
+            self._model = whisper.load_model(self.model_name)
+        return self._model
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        # The PyTorch model is not safe to share between concurrent decodes
+        with self._lock:
+            result = self._get_model().transcribe(audio_path, language=language, fp16=False)
+        return {
+            "success": True,
+            "transcription": result["text"],
+            "language": result["language"],
+            "segments": [
+                {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                for segment in result.get("segments", [])
+            ]
+        }
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """CTranslate2 Whisper engine (faster-whisper) with int8 quantized weights on CPU.
+
+    `num_workers` model replicas decode in parallel, so a batch of queued
+    videos is transcribed concurrently rather than one after another.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str = "base", compute_type: str = "int8", cpu_threads: int = 0,
+                 num_workers: int = 1, beam_size: int = 5):
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = max(num_workers, 1)
+        self.beam_size = beam_size
+        self._model = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix='faster-whisper')
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                logger.info(f"Loading faster-whisper model {self.model_name} ({self.compute_type}, "
+                            f"{self.cpu_threads or 'default'} threads, {self.num_workers} workers)")
+                self._model = WhisperModel(
+                    self.model_name,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers
+                )
+        return self._model
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        segments, info = self._get_model().transcribe(audio_path, language=language, beam_size=self.beam_size)
+        segments = [{"start": segment.start, "end": segment.end, "text": segment.text} for segment in segments]
+        return {
+            "success": True,
+            "transcription": "".join(segment["text"] for segment in segments).strip(),
+            "language": info.language,
+            "segments": segments
+        }
+
+    def transcribe_batch(self, audio_paths: List[str], language: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._get_model()
+        return list(self._executor.map(lambda audio_path: self.transcribe(audio_path, language), audio_paths))
+
+class RemoteTranscriptionBackend(TranscriptionBackend):
+    """Transcription through a user's configured AI provider (speech-to-text API).
+
+    Calls are billed to `user_id`'s provider config; the deployment-wide
+    instance has none, and `for_user` gives a copy bound to one user.
+    """
+
+    name = "remote"
+
+    def __init__(self, ai_service=None, user_id: int = None):
+        if ai_service is None:
+            from src.services.ai_provider_service import AIProviderService
+            ai_service = AIProviderService()
+        self.ai_service = ai_service
+        self.user_id = user_id
+
+    def for_user(self, user_id: int) -> 'RemoteTranscriptionBackend':
+        return RemoteTranscriptionBackend(self.ai_service, user_id=user_id)
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        with open(audio_path, 'rb') as audio_file:
+            audio_data = audio_file.read()
+        return self.ai_service.call_speech_to_text(self.user_id, audio_data)
+
+class BatchingTranscriber:
+    """Collects transcription requests from concurrent callers and decodes them in batches.
+
+    Requests that arrive within `max_wait_ms` of each other (up to
+    `max_batch_size`, same language hint) are handed to the backend's
+    `transcribe_batch` together.
+    """
+
+    def __init__(self, backend: TranscriptionBackend, max_batch_size: int = 1, max_wait_ms: int = 50):
+        self.backend = backend
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait_ms / 1000.0
+        self._requests = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        if self.max_batch_size == 1:
+            return self.backend.transcribe(audio_path, language)
+        return self.submit(audio_path, language).result()
+
+    def transcribe_many(self, audio_paths: List[str], language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Transcribe several files from one caller, e.g. the speech segments of a clip."""
+        if self.max_batch_size == 1:
+            return self.backend.transcribe_batch(audio_paths, language)
+        futures = [self.submit(audio_path, language) for audio_path in audio_paths]
+        return [future.result() for future in futures]
+
+    def submit(self, audio_path: str, language: Optional[str] = None) -> Future:
+        self._ensure_started()
+        future = Future()
+        self._requests.put((audio_path, language, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='transcription-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._requests.get(timeout=self.max_wait))
+                except queue.Empty:
+                    break
+
+            by_language = {}
+            for request in batch:
+                by_language.setdefault(request[1], []).append(request)
+            for language, requests in by_language.items():
+                try:
+                    results = self.backend.transcribe_batch([audio_path for audio_path, _, _ in requests], language)
+                    for (_, _, future), result in zip(requests, results):
+                        future.set_result(result)
+                except Exception as e:
+                    for _, _, future in requests:
+                        future.set_exception(e)
+
+_transcriber = None
+_transcriber_lock = threading.Lock()
+
+def create_transcription_backend(name: str = None) -> TranscriptionBackend:
+    """Build the backend selected for this deployment (TRANSCRIPTION_BACKEND)."""
+    name = (name or os.getenv('TRANSCRIPTION_BACKEND', 'whisper')).lower()
+    model_name = os.getenv('TRANSCRIPTION_MODEL', 'base')
+    cpu_threads = int(os.getenv('TRANSCRIPTION_CPU_THREADS', 0))
+
+    if name in ('faster-whisper', 'faster_whisper', 'ctranslate2'):
+        return FasterWhisperBackend(
+            model_name=model_name,
+            compute_type=os.getenv('TRANSCRIPTION_COMPUTE_TYPE', 'int8'),
+            cpu_threads=cpu_threads,
+            num_workers=int(os.getenv('TRANSCRIPTION_NUM_WORKERS', 1)),
+            beam_size=int(os.getenv('TRANSCRIPTION_BEAM_SIZE', 5))
+        )
+    if name == 'remote':
+        return RemoteTranscriptionBackend()
+    if name != 'whisper':
+        logger.warning(f"Unknown transcription backend {name}, using whisper")
+    return WhisperBackend(model_name=model_name, cpu_threads=cpu_threads)
+
+def get_transcriber() -> BatchingTranscriber:
+    """Process-wide transcriber, so models are loaded once and requests can be batched."""
+    global _transcriber
+    with _transcriber_lock:
+        if _transcriber is None:
+            _transcriber = BatchingTranscriber(
+                create_transcription_backend(),
+                max_batch_size=int(os.getenv('TRANSCRIPTION_BATCH_SIZE', 1)),
+                max_wait_ms=int(os.getenv('TRANSCRIPTION_BATCH_WAIT_MS', 50))
+            )
+        return _transcriber
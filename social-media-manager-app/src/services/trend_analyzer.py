@@ -1,9 +1,23 @@
 import json
 import random
+import hashlib
 import os
+import time
 import logging
 from datetime import datetime, timedelta
-from src.models import Trend, ContentRecommendation, CharacterProfile, db, User
+from sqlalchemy import tuple_, select, func, case
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from src.models import Trend, TrendRefreshRun, TrendSnapshot, TrendToken, ContentRecommendation, RecommendationState, CharacterProfile, db, User
+from src.services.trend_momentum import TrendMomentumEngine
+from src.services.trend_bursts import TrendBurstDetector
+from src.services.trend_matching import CharacterMatcher
+from src.services.trend_tokens import postings_for
+from src.services.trend_canonical import TrendCanonicalizer
+from src.services.trend_forecast import TrendForecaster
+from src.services.trend_rollups import TrendRollups, rollup_key
+from src.services.connectors import build_connectors, fetch_all
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,249 +29,264 @@ class TrendAnalyzer:
     def __init__(self):
         self.platforms = ['twitter', 'instagram', 'tiktok', 'facebook']
         self.categories = ['technology', 'entertainment', 'lifestyle', 'business', 'sports', 'news']
-        
-        # Try to import social media libraries
-        self._init_social_media_clients()
+        # Rows per INSERT statement; keeps bound parameters under SQLite's limit
+        self.upsert_chunk_size = int(os.getenv('TREND_UPSERT_CHUNK_SIZE', 500))
+        
+        # Platform connectors, fetched side by side each under its own policy
+        self.connectors = build_connectors()
+        self.last_fetch_report = {}
+        self._fetched_connectors = []
+        self.momentum_engine = TrendMomentumEngine()
+        self.burst_detector = TrendBurstDetector()
+        self.canonicalizer = TrendCanonicalizer()
+        self.forecaster = TrendForecaster()
+        self.rollups = TrendRollups()
+        self.recommendation_trend_limit = int(os.getenv('TREND_RECOMMENDATION_TREND_LIMIT', 20))
+        # Recent refresh runs searched for each platform's last successful fetch
+        self.since_lookback_runs = int(os.getenv('TREND_FETCH_SINCE_LOOKBACK_RUNS', 20))
     
-    def _init_social_media_clients(self):
-        """Initialize social media API clients"""
-        try:
-            import tweepy
-            self.tweepy = tweepy
-            # Initialize Twitter client if credentials are available
-            twitter_bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
-            if twitter_bearer_token:
-                self.twitter_client = tweepy.Client(bearer_token=twitter_bearer_token)
-                logger.info("Twitter client initialized successfully")
-            else:
-                self.twitter_client = None
-                logger.info("Twitter client not initialized - no bearer token found")
-        except ImportError:
-            self.tweepy = None
-            self.twitter_client = None
-            logger.warning("tweepy not installed - Twitter integration disabled")
-        
-        # Initialize Instagram Graph API client
-        try:
-            self.instagram_access_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
-            if self.instagram_access_token:
-                logger.info("Instagram Graph API client ready")
-            else:
-                logger.info("Instagram Graph API client not configured - no access token found")
-        except Exception as e:
-            logger.warning(f"Instagram Graph API setup issue: {str(e)}")
-        
-        # Initialize TikTok API client
-        try:
-            self.tiktok_client_key = os.getenv('TIKTOK_CLIENT_KEY')
-            self.tiktok_client_secret = os.getenv('TIKTOK_CLIENT_SECRET')
-            if self.tiktok_client_key and self.tiktok_client_secret:
-                logger.info("TikTok API client ready")
-            else:
-                logger.info("TikTok API client not configured - missing credentials")
-        except Exception as e:
-            logger.warning(f"TikTok API setup issue: {str(e)}")
-    
-    def fetch_and_analyze_trends(self):
-        """Fetch trends from various sources and analyze them"""
-        new_trends = []
-        
+    def fetch_and_analyze_trends(self, platforms=None, before_store=None):
+        """Fetch trends from various sources (or only `platforms`) and store them; returns the ingest stats
+
+        `before_store`, if given, is called once the fetch is done and before
+        anything is written; it can raise to call the refresh off.
+        """
         # Try to fetch real trends from social media APIs
-        real_trends = self._fetch_real_trends()
+        real_trends = self._fetch_real_trends(platforms)
         
         if real_trends:
             logger.info(f"Found {len(real_trends)} real trends")
             trends_to_process = real_trends
+        elif any(report['status'] == 'ok' for report in self.last_fetch_report.values()):
+            # Sources answered but had nothing new since the last refresh
+            logger.info("No new trends since the last refresh")
+            trends_to_process = []
         else:
             # Fallback to simulated trend data
             logger.warning("Using simulated trends as fallback")
-            trends_to_process = self._generate_simulated_trends()
-        
-        for trend_data in trends_to_process:
-            # Check if trend already exists
-            existing_trend = Trend.query.filter_by(
-                keyword=trend_data['keyword'],
-                platform=trend_data['platform']
-            ).first()
-            
-            if existing_trend:
-                # Update existing trend
-                existing_trend.engagement_score = trend_data['engagement_score']
-                existing_trend.volume = trend_data['volume']
-                existing_trend.growth_rate = trend_data['growth_rate']
-                existing_trend.updated_at = datetime.utcnow()
-                new_trends.append(existing_trend)
-            else:
-                # Create new trend
-                trend = Trend(
-                    keyword=trend_data['keyword'],
-                    platform=trend_data['platform'],
-                    engagement_score=trend_data['engagement_score'],
-                    volume=trend_data['volume'],
-                    growth_rate=trend_data['growth_rate'],
-                    sentiment=trend_data['sentiment'],
-                    category=trend_data['category'],
-                    hashtags=json.dumps(trend_data['hashtags'])
-                )
-                db.session.add(trend)
-                new_trends.append(trend)
+            trends_to_process = [
+                trend for trend in self._generate_simulated_trends()
+                if not platforms or trend['platform'] in platforms
+            ]
         
-        db.session.commit()
-        return new_trends
+        if before_store is not None:
+            try:
+                before_store()
+            except Exception:
+                # Leave connector state where it was, so the trends are fetched again
+                self._fetched_connectors = []
+                raise
+        
+        stats = self.ingest_trends(trends_to_process)
+        stats['platforms'] = self.last_fetch_report
+        # Connector state (e.g. search cursors) advances only once the trends behind it are stored
+        for connector in self._fetched_connectors:
+            connector.commit()
+        self._fetched_connectors = []
+        return stats
     
-    def _fetch_real_trends(self):
-        """Fetch real trends from social media APIs"""
-        all_trends = []
-        
-        # Fetch Twitter trends
-        twitter_trends = self._fetch_twitter_trends()
-        if twitter_trends:
-            all_trends.extend(twitter_trends)
+    def ingest_trends(self, trends_data):
+        """Store a batch of fetched trends with one upsert keyed on (keyword, platform).
+        
+        Existing trends get fresh metrics (engagement, volume, growth); new ones are
+        inserted whole, and the daily rollups move with them. Every trend in the
+        batch also gets a trend_snapshot row, growth, velocity, acceleration and the
+        engagement forecast are recomputed from that history, the snapshot is fed
+        to the burst detector, and new trends are clustered into canonical trends.
+        Returns how many rows were inserted and updated.
+        """
+        started = time.monotonic()
+        
+        # Later entries for the same trend carry the newer metrics
+        batch = {}
+        for trend_data in trends_data:
+            batch[(trend_data['keyword'], trend_data['platform'])] = trend_data
+        
+        # Stored trends in the batch, with what their rollup row holds for them
+        existing = {}
+        keys = list(batch)
+        for start in range(0, len(keys), self.upsert_chunk_size):
+            existing.update({
+                (keyword, platform): (rollup_key(created_at, platform, category, sentiment), engagement_score or 0.0)
+                for keyword, platform, created_at, category, sentiment, engagement_score in db.session.query(
+                    Trend.keyword, Trend.platform, Trend.created_at, Trend.category, Trend.sentiment,
+                    Trend.engagement_score
+                ).filter(tuple_(Trend.keyword, Trend.platform).in_(keys[start:start + self.upsert_chunk_size]))
+            })
         
-        # Fetch Instagram trends
-        instagram_trends = self._fetch_instagram_trends()
-        if instagram_trends:
-            all_trends.extend(instagram_trends)
+        now = datetime.utcnow()
+        rows = [{
+            'keyword': trend_data['keyword'],
+            'platform': trend_data['platform'],
+            'engagement_score': trend_data['engagement_score'],
+            'volume': trend_data['volume'],
+            'growth_rate': trend_data['growth_rate'],
+            'sentiment': trend_data['sentiment'],
+            'category': trend_data['category'],
+            'hashtags': json.dumps(trend_data['hashtags']),
+            'created_at': now,
+            'updated_at': now
+        } for trend_data in batch.values()]
+        
+        # Rollup deltas, committed with the trend rows: new trends count towards their day,
+        # updated ones only move engagement (category, sentiment and created_at never change)
+        rollup_deltas = {}
+        for row in rows:
+            key = (row['keyword'], row['platform'])
+            if key in existing:
+                rollup, engagement = existing[key]
+                if rollup is not None:
+                    delta = rollup_deltas.setdefault(rollup, [0, 0.0])
+                    delta[1] += row['engagement_score'] - engagement
+            else:
+                delta = rollup_deltas.setdefault(
+                    rollup_key(now, row['platform'], row['category'], row['sentiment']), [0, 0.0]
+                )
+                delta[0] += 1
+                delta[1] += row['engagement_score']
         
-        # Fetch TikTok trends
-        tiktok_trends = self._fetch_tiktok_trends()
-        if tiktok_trends:
-            all_trends.extend(tiktok_trends)
+        try:
+            self._upsert_trend_rows(rows)
+            self.rollups.add(rollup_deltas)
+            db.session.commit()
+        except (OperationalError, ProgrammingError) as e:
+            # e.g. a database created before the (keyword, platform) constraint existed
+            db.session.rollback()
+            logger.warning(f"Trend upsert unavailable, falling back to bulk insert and update: {str(e.orig or e)}")
+            self._merge_trend_rows(rows, existing)
+            self.rollups.add(rollup_deltas)
+            db.session.commit()
+        
+        # Append this batch to the history, then derive momentum from it
+        trend_ids = self._trend_ids(keys)
+        snapshots = [{
+            'trend_id': trend_ids[key],
+            'ts': now,
+            'volume': trend_data['volume'],
+            'engagement': trend_data['engagement_score']
+        } for key, trend_data in batch.items() if key in trend_ids]
+        db.session.bulk_insert_mappings(TrendSnapshot, snapshots)
+        # Hashtags and keywords never change after insert, so only new trends need postings
+        db.session.bulk_insert_mappings(TrendToken, postings_for(
+            {key: trend_id for key, trend_id in trend_ids.items() if key not in existing}, batch
+        ))
+        momentum_updated = self.momentum_engine.update_trends(trend_ids.values())
+        # Forecasts are refit here, once per ingest, and only read by the predictions endpoint
+        forecasts_updated = self.forecaster.update(trend_ids.values())
+        bursting = self.burst_detector.observe({
+            snapshot['trend_id']: (snapshot['ts'], snapshot['volume']) for snapshot in snapshots
+        })
+        # Near-duplicates across keywords and platforms roll up into canonical trends
+        canonical = self.canonicalizer.update(trend_ids.values())
+        db.session.commit()
         
-        return all_trends
+        stats = {
+            'received': len(trends_data),
+            'inserted': len(batch) - len(existing),
+            'updated': len(existing),
+            'duplicates_dropped': len(trends_data) - len(batch),
+            'snapshots': len(snapshots),
+            'momentum_updated': momentum_updated,
+            'forecasts_updated': forecasts_updated,
+            'bursting': bursting,
+            'canonical_created': canonical['created'],
+            'canonical_refreshed': canonical['refreshed'],
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+        logger.info(f"Ingested trends: {stats}")
+        return stats
     
-    def _fetch_twitter_trends(self):
-        """Fetch trends from Twitter API"""
-        if not self.twitter_client:
-            logger.info("Twitter client not available")
-            return None
-        
-        try:
-            # Get trending topics (Twitter API v2 doesn't have direct trending endpoint)
-            # We'll search for recent popular tweets as a proxy for trends
-            queries = ["AI", "technology", "innovation", "socialmedia", "trending"]
-            trends = []
-            
-            for query in queries:
-                # Search for recent tweets
-                tweets = self.twitter_client.search_recent_tweets(
-                    query=query,
-                    max_results=10,
-                    tweet_fields=['public_metrics', 'created_at']
+    def _upsert_trend_rows(self, rows):
+        """INSERT ... ON CONFLICT (keyword, platform) DO UPDATE, in chunks."""
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            insert = sqlite_insert
+        elif dialect == 'postgresql':
+            insert = postgresql_insert
+        else:
+            raise OperationalError(f"no upsert support for {dialect}", None, None)
+        
+        for start in range(0, len(rows), self.upsert_chunk_size):
+            statement = insert(Trend).values(rows[start:start + self.upsert_chunk_size])
+            statement = statement.on_conflict_do_update(
+                index_elements=['keyword', 'platform'],
+                set_={
+                    'engagement_score': statement.excluded.engagement_score,
+                    'volume': statement.excluded.volume,
+                    'growth_rate': statement.excluded.growth_rate,
+                    'updated_at': statement.excluded.updated_at
+                }
+            )
+            db.session.execute(statement)
+    
+    def _trend_ids(self, keys):
+        """Map (keyword, platform) keys to trend ids, in chunks."""
+        trend_ids = {}
+        keys = list(keys)
+        for start in range(0, len(keys), self.upsert_chunk_size):
+            trend_ids.update({
+                (keyword, platform): trend_id
+                for trend_id, keyword, platform in db.session.query(Trend.id, Trend.keyword, Trend.platform).filter(
+                    tuple_(Trend.keyword, Trend.platform).in_(keys[start:start + self.upsert_chunk_size])
                 )
-                
-                if tweets.data:
-                    # Calculate engagement metrics
-                    total_likes = sum(tweet.public_metrics['like_count'] for tweet in tweets.data)
-                    total_retweets = sum(tweet.public_metrics['retweet_count'] for tweet in tweets.data)
-                    
-                    # Create trend data
-                    trend_data = {
-                        'keyword': query,
-                        'platform': 'twitter',
-                        'engagement_score': min((total_likes + total_retweets * 2) / 1000, 10.0),  # Normalize to 0-10 scale
-                        'volume': len(tweets.data),
-                        'growth_rate': random.uniform(-10.0, 50.0),  # Simulated growth rate
-                        'sentiment': random.choice(['positive', 'negative', 'neutral']),
-                        'category': self._categorize_trend(query),
-                        'hashtags': [f"#{query.replace(' ', '')}", "#trending", "#twitter"]
-                    }
-                    trends.append(trend_data)
-            
-            logger.info(f"Fetched {len(trends)} Twitter trends")
-            return trends
-            
-        except Exception as e:
-            logger.error(f"Error fetching Twitter trends: {str(e)}")
-            return None
+            })
+        return trend_ids
     
-    def _fetch_instagram_trends(self):
-        """Fetch trends from Instagram Graph API"""
-        if not self.instagram_access_token:
-            logger.info("Instagram access token not available")
-            return None
-        
-        try:
-            import requests
-            
-            # For now, we'll simulate Instagram trends since we don't have real API access
-            # In a real implementation, you would use the Instagram Graph API
-            instagram_trending_keywords = [
-                "travel", "food", "fashion", "fitness", "art", "photography", 
-                "beauty", "lifestyle", "nature", "pets"
-            ]
-            
-            trends = []
-            for keyword in instagram_trending_keywords[:5]:  # Limit to 5 for demo
-                trend_data = {
-                    'keyword': keyword,
-                    'platform': 'instagram',
-                    'engagement_score': round(random.uniform(2.0, 9.0), 2),
-                    'volume': random.randint(1000, 50000),
-                    'growth_rate': round(random.uniform(-5.0, 100.0), 2),
-                    'sentiment': random.choice(['positive', 'negative', 'neutral']),
-                    'category': self._categorize_trend(keyword),
-                    'hashtags': [f"#{keyword}", "#instagram", "#trending"]
-                }
-                trends.append(trend_data)
-            
-            logger.info(f"Fetched {len(trends)} Instagram trends (simulated)")
-            return trends
-            
-        except Exception as e:
-            logger.error(f"Error fetching Instagram trends: {str(e)}")
-            return None
+    def _merge_trend_rows(self, rows, existing):
+        """Portable fallback: bulk insert new trends and bulk update existing ones."""
+        existing_ids = self._trend_ids(existing)
+        
+        new_rows = [row for row in rows if (row['keyword'], row['platform']) not in existing_ids]
+        updated_rows = [{
+            'id': existing_ids[(row['keyword'], row['platform'])],
+            'engagement_score': row['engagement_score'],
+            'volume': row['volume'],
+            'growth_rate': row['growth_rate'],
+            'updated_at': row['updated_at']
+        } for row in rows if (row['keyword'], row['platform']) in existing_ids]
+        db.session.bulk_insert_mappings(Trend, new_rows)
+        db.session.bulk_update_mappings(Trend, updated_rows)
     
-    def _fetch_tiktok_trends(self):
-        """Fetch trends from TikTok API"""
-        if not (self.tiktok_client_key and self.tiktok_client_secret):
-            logger.info("TikTok API credentials not available")
-            return None
-        
-        try:
-            # For now, we'll simulate TikTok trends since we don't have real API access
-            # In a real implementation, you would use the TikTok API
-            tiktok_trending_keywords = [
-                "dance", "comedy", "challenge", "duet", "stitch", 
-                "viral", "trend", "funny", "music", "reaction"
-            ]
-            
-            trends = []
-            for keyword in tiktok_trending_keywords[:5]:  # Limit to 5 for demo
-                trend_data = {
-                    'keyword': keyword,
-                    'platform': 'tiktok',
-                    'engagement_score': round(random.uniform(3.0, 10.0), 2),
-                    'volume': random.randint(5000, 100000),
-                    'growth_rate': round(random.uniform(10.0, 200.0), 2),
-                    'sentiment': random.choice(['positive', 'negative', 'neutral']),
-                    'category': self._categorize_trend(keyword),
-                    'hashtags': [f"#{keyword}", "#tiktok", "#fyp"]
-                }
-                trends.append(trend_data)
-            
-            logger.info(f"Fetched {len(trends)} TikTok trends (simulated)")
-            return trends
-            
-        except Exception as e:
-            logger.error(f"Error fetching TikTok trends: {str(e)}")
-            return None
+    def _fetch_real_trends(self, platforms=None):
+        """Fetch real trends from the platform connectors (all, or only `platforms`) concurrently.
+        
+        Each connector has its own timeout; one that fails or times out is
+        skipped and the others' trends are still returned. Per-platform outcomes
+        are kept in last_fetch_report.
+        """
+        connectors = {
+            platform: connector for platform, connector in self.connectors.items()
+            if not platforms or platform in platforms
+        }
+        # Connector state is read here, in the app context; the fetch itself needs no database
+        for connector in connectors.values():
+            if connector.available():
+                connector.prepare()
+        
+        all_trends, report = fetch_all(connectors, self._fetch_since(connectors))
+        self._fetched_connectors = [
+            connector for platform, connector in connectors.items() if report[platform]['status'] == 'ok'
+        ]
+        self.last_fetch_report = report
+        return all_trends
     
-    def _categorize_trend(self, keyword):
-        """Categorize a trend based on its keyword"""
-        keyword_lower = keyword.lower()
-        if any(word in keyword_lower for word in ['ai', 'artificial', 'machine', 'tech', 'software']):
-            return 'technology'
-        elif any(word in keyword_lower for word in ['movie', 'music', 'celebrity', 'entertainment']):
-            return 'entertainment'
-        elif any(word in keyword_lower for word in ['health', 'fitness', 'food', 'lifestyle']):
-            return 'lifestyle'
-        elif any(word in keyword_lower for word in ['business', 'finance', 'economy']):
-            return 'business'
-        elif any(word in keyword_lower for word in ['sport', 'football', 'basketball', 'soccer']):
-            return 'sports'
-        else:
-            return random.choice(['technology', 'entertainment', 'lifestyle', 'business', 'sports', 'news'])
+    def _fetch_since(self, platforms):
+        """Start of the last refresh that fetched each platform successfully (None if never)."""
+        since = dict.fromkeys(platforms)
+        recent_runs = TrendRefreshRun.query.filter(
+            TrendRefreshRun.status == 'succeeded', TrendRefreshRun.started_at.isnot(None)
+        ).order_by(TrendRefreshRun.started_at.desc()).limit(self.since_lookback_runs)
+        for run in recent_runs:
+            try:
+                reported = json.loads(run.result or '{}').get('platforms') or {}
+            except ValueError:
+                continue
+            for platform in platforms:
+                if since[platform] is None and reported.get(platform, {}).get('status') == 'ok':
+                    since[platform] = run.started_at
+            if all(since.values()):
+                break
+        return since
     
     def _generate_simulated_trends(self):
         """Generate simulated trend data for demonstration purposes"""
@@ -302,8 +331,15 @@ class TrendAnalyzer:
         
         return trends
     
-    def generate_recommendations(self, user_id):
-        """Generate content recommendations for a specific user"""
+    def generate_recommendations(self, user_id, force=False):
+        """Get a user's content recommendations, recomputing them only when their inputs changed.
+        
+        Recommendations are materialized per (user, character, trend). They are
+        recomputed when the candidate trends (ids in rank order) or the user's
+        characters differ from the last computation, or with `force`; otherwise
+        the stored rows are returned, with their confidence brought up to date
+        if a refresh moved the scores.
+        """
         user = User.query.get(user_id)
         if not user:
             raise ValueError(f"User {user_id} not found")
@@ -311,61 +347,108 @@ class TrendAnalyzer:
         # Get user's character profiles
         character_profiles = CharacterProfile.query.filter_by(user_id=user_id).all()
         
-        # Get top trending topics
-        top_trends = Trend.query.order_by(
-            Trend.engagement_score.desc()
-        ).limit(20).all()
+        # Get top trending topics, one per canonical trend and platform
+        top_trends = []
+        seen = set()
+        for trend in Trend.query.order_by(Trend.engagement_score.desc(), Trend.id).limit(
+            self.recommendation_trend_limit * 3
+        ):
+            cluster = (trend.canonical_id or -trend.id, trend.platform)
+            if cluster not in seen:
+                seen.add(cluster)
+                top_trends.append(trend)
+                if len(top_trends) == self.recommendation_trend_limit:
+                    break
+        
+        generation = db.session.execute(select(func.max(TrendSnapshot.ts))).scalar()
+        # Scores move on every ingest without changing which recommendations exist
+        trend_signature = self._signature(trend.id for trend in top_trends)
+        character_signature = self._signature(
+            [character.id, character.updated_at.isoformat() if character.updated_at else None]
+            for character in character_profiles
+        )
+        
+        state = db.session.get(RecommendationState, user_id)
+        if (not force and state and state.trend_signature == trend_signature
+                and state.character_signature == character_signature):
+            if state.generation != generation:
+                # A refresh happened but changed nothing this user's recommendations depend on
+                # beyond the scores, which only feed the confidence
+                score = func.coalesce(Trend.engagement_score, 0.0)
+                confidence = select(case((score >= 10.0, 1.0), else_=score / 10.0)).where(
+                    Trend.id == ContentRecommendation.trend_id
+                ).scalar_subquery()
+                ContentRecommendation.query.filter_by(user_id=user_id).update(
+                    {'generation': generation, 'confidence_score': confidence}, synchronize_session=False
+                )
+                state.generation = generation
+                db.session.commit()
+            return self._stored_recommendations(user_id)
         
         recommendations = []
         
+        # Parse every character once and match all trends against the compiled set
+        matcher = CharacterMatcher(character_profiles)
         for trend in top_trends:
-            for character in character_profiles:
-                # Check if trend matches character's interests
-                if self._is_trend_relevant(trend, character):
-                    recommendation = self._create_recommendation(user_id, trend, character)
-                    recommendations.append(recommendation)
+            for index, character in matcher.match(trend):
+                recommendations.append(self._build_recommendation(trend, character, matcher.keywords[index]))
         
         # If no character profiles, create generic recommendations
         if not character_profiles and top_trends:
             for trend in top_trends[:5]:
-                recommendation = self._create_generic_recommendation(user_id, trend)
-                recommendations.append(recommendation)
-        
+                recommendations.append(self._build_generic_recommendation(trend))
+        
+        self._materialize_recommendations(user_id, recommendations, generation)
+        if state is None:
+            state = RecommendationState(user_id=user_id)
+            db.session.add(state)
+        state.generation = generation
+        state.trend_signature = trend_signature
+        state.character_signature = character_signature
+        state.computed_at = datetime.utcnow()
         db.session.commit()
-        return recommendations
+        logger.info(f"Recomputed {len(recommendations)} recommendations for user {user_id}")
+        return self._stored_recommendations(user_id)
     
-    def _is_trend_relevant(self, trend, character):
-        """Check if a trend is relevant to a character profile"""
-        # Parse character keywords
-        try:
-            character_keywords = json.loads(character.keywords) if character.keywords else []
-        except (json.JSONDecodeError, TypeError):
-            character_keywords = []
-        
-        # Parse character platforms
-        try:
-            character_platforms = json.loads(character.preferred_platforms) if character.preferred_platforms else []
-        except (json.JSONDecodeError, TypeError):
-            character_platforms = []
-        
-        # Check platform match
-        if character_platforms and trend.platform not in character_platforms:
-            return False
-        
-        # Check keyword relevance
-        trend_keywords = trend.keyword.lower().split()
-        for keyword in character_keywords:
-            if keyword.lower() in trend.keyword.lower():
-                return True
-        
-        # Check category relevance
-        if character.content_style and character.content_style.lower() in trend.category.lower():
-            return True
-        
-        return random.random() > 0.7  # 30% chance for serendipitous recommendations
+    def _stored_recommendations(self, user_id):
+        return ContentRecommendation.query.filter_by(user_id=user_id).order_by(
+            ContentRecommendation.confidence_score.desc(), ContentRecommendation.id
+        ).all()
+    
+    def _signature(self, items):
+        return hashlib.sha1(json.dumps(list(items)).encode('utf-8')).hexdigest()
+    
+    def _stable_choice(self, options, *key):
+        """Pick one of `options` by a hash of `key`, the same pick in every process and run."""
+        digest = hashlib.sha1(json.dumps(key).encode('utf-8')).digest()
+        return options[int.from_bytes(digest[:4], 'big') % len(options)]
+    
+    def _materialize_recommendations(self, user_id, recommendations, generation):
+        """Upsert a user's recommendations keyed on (character, trend) and drop ones no longer produced."""
+        existing = {}
+        obsolete = []
+        for row in ContentRecommendation.query.filter_by(user_id=user_id):
+            key = (row.character_id, row.trend_id)
+            # Rows appended before recommendations were materialized can repeat a key
+            if key in existing:
+                obsolete.append(row)
+            else:
+                existing[key] = row
+        
+        for fields in recommendations:
+            row = existing.pop((fields['character_id'], fields['trend_id']), None)
+            if row is None:
+                row = ContentRecommendation(user_id=user_id)
+                db.session.add(row)
+            for name, value in fields.items():
+                setattr(row, name, value)
+            row.generation = generation
+        
+        for row in obsolete + list(existing.values()):
+            db.session.delete(row)
     
-    def _create_recommendation(self, user_id, trend, character):
-        """Create a content recommendation based on trend and character"""
+    def _build_recommendation(self, trend, character, character_keywords):
+        """Build the fields of a content recommendation based on trend and character"""
         # Determine content type based on platform and character
         content_types = {
             'twitter': ['post', 'thread'],
@@ -374,37 +457,34 @@ class TrendAnalyzer:
             'facebook': ['post', 'story']
         }
         
-        content_type = random.choice(content_types.get(trend.platform, ['post']))
+        content_type = self._stable_choice(content_types.get(trend.platform, ['post']), trend.id, character.id)
         
         # Calculate confidence score
         confidence_score = min(trend.engagement_score / 10.0, 1.0)
         
         # Generate hashtag suggestions
-        hashtag_suggestions = self._generate_hashtag_suggestions(trend, character)
+        hashtag_suggestions = self._generate_hashtag_suggestions(trend, character_keywords)
         
         # Generate content suggestions
         content_suggestions = self._generate_content_suggestions(trend, character, content_type)
         
         # Calculate optimal posting time (simulate based on platform)
-        recommended_time = self._calculate_optimal_time(trend.platform)
-        
-        recommendation = ContentRecommendation(
-            user_id=user_id,
-            trend_id=trend.id,
-            content_type=content_type,
-            recommended_time=recommended_time,
-            confidence_score=confidence_score,
-            hashtag_suggestions=json.dumps(hashtag_suggestions),
-            content_suggestions=json.dumps(content_suggestions)
-        )
-        
-        db.session.add(recommendation)
-        return recommendation
+        recommended_time = self._calculate_optimal_time(trend.platform, trend.id, character.id)
+        
+        return {
+            'trend_id': trend.id,
+            'character_id': character.id,
+            'content_type': content_type,
+            'recommended_time': recommended_time,
+            'confidence_score': confidence_score,
+            'hashtag_suggestions': json.dumps(hashtag_suggestions),
+            'content_suggestions': json.dumps(content_suggestions)
+        }
     
-    def _create_generic_recommendation(self, user_id, trend):
-        """Create a generic recommendation without character profile"""
+    def _build_generic_recommendation(self, trend):
+        """Build the fields of a generic recommendation without character profile"""
         content_types = ['post', 'story']
-        content_type = random.choice(content_types)
+        content_type = self._stable_choice(content_types, trend.id, None)
         
         confidence_score = min(trend.engagement_score / 10.0, 1.0)
         
@@ -415,23 +495,20 @@ class TrendAnalyzer:
             f"Join the conversation about {trend.keyword}"
         ]
         
-        recommended_time = self._calculate_optimal_time(trend.platform)
-        
-        recommendation = ContentRecommendation(
-            user_id=user_id,
-            trend_id=trend.id,
-            content_type=content_type,
-            recommended_time=recommended_time,
-            confidence_score=confidence_score,
-            hashtag_suggestions=json.dumps(hashtag_suggestions),
-            content_suggestions=json.dumps(content_suggestions)
-        )
+        recommended_time = self._calculate_optimal_time(trend.platform, trend.id, None)
         
-        db.session.add(recommendation)
-        return recommendation
+        return {
+            'trend_id': trend.id,
+            'character_id': None,
+            'content_type': content_type,
+            'recommended_time': recommended_time,
+            'confidence_score': confidence_score,
+            'hashtag_suggestions': json.dumps(hashtag_suggestions),
+            'content_suggestions': json.dumps(content_suggestions)
+        }
     
-    def _generate_hashtag_suggestions(self, trend, character):
-        """Generate hashtag suggestions based on trend and character"""
+    def _generate_hashtag_suggestions(self, trend, character_keywords):
+        """Generate hashtag suggestions based on trend and the character's parsed keywords"""
         hashtags = []
         
         # Add trend hashtags
@@ -442,12 +519,8 @@ class TrendAnalyzer:
             pass
         
         # Add character-specific hashtags
-        try:
-            character_keywords = json.loads(character.keywords) if character.keywords else []
-            for keyword in character_keywords:
-                hashtags.append(f"#{keyword.replace(' ', '').lower()}")
-        except (json.JSONDecodeError, TypeError):
-            pass
+        for keyword in character_keywords:
+            hashtags.append(f"#{keyword.replace(' ', '').lower()}")
         
         # Add platform-specific hashtags
         platform_hashtags = {
@@ -459,7 +532,7 @@ class TrendAnalyzer:
         
         hashtags.extend(platform_hashtags.get(trend.platform, []))
         
-        return list(set(hashtags))[:10]  # Remove duplicates and limit to 10
+        return list(dict.fromkeys(hashtags))[:10]  # Remove duplicates keeping order and limit to 10
     
     def _generate_content_suggestions(self, trend, character, content_type):
         """Generate content suggestions based on trend, character, and content type"""
@@ -507,8 +580,8 @@ class TrendAnalyzer:
         
         return suggestions[:5]  # Limit to 5 suggestions
     
-    def _calculate_optimal_time(self, platform):
-        """Calculate optimal posting time based on platform"""
+    def _calculate_optimal_time(self, platform, *key):
+        """Calculate optimal posting time based on platform, picking the hour by `key`"""
         # Simulate optimal posting times based on general best practices
         optimal_times = {
             'twitter': [9, 12, 15, 18],  # 9am, 12pm, 3pm, 6pm
@@ -518,7 +591,7 @@ class TrendAnalyzer:
         }
         
         hours = optimal_times.get(platform, [12, 15, 18])
-        optimal_hour = random.choice(hours)
+        optimal_hour = self._stable_choice(hours, platform, *key)
         
         # Calculate next occurrence of this hour
         now = datetime.utcnow()
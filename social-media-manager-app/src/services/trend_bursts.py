@@ -0,0 +1,143 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+from src.models import db, Trend, TrendBurstState
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Scales a mean absolute deviation to a standard deviation under normal noise
+_MAD_TO_SIGMA = 1.4826
+
+class TrendBurstDetector:
+    """Streaming robust z-score burst detection on trend volume velocity.
+
+    Each trend keeps a fixed-size TrendBurstState row. A new snapshot turns
+    into a velocity (volume change per hour since the previous one), which is
+    scored against an exponentially weighted baseline and spread of past
+    velocities. Observations are winsorized to baseline +/- clip sigmas before
+    they update the baseline, so a burst does not immediately become the new
+    normal. A trend starts bursting at TREND_BURST_Z_THRESHOLD and stops once
+    its score falls back below TREND_BURST_EXIT_Z, or once it has gone
+    TREND_BURST_STALE_HOURS without a snapshot (it is no longer being fetched).
+    """
+
+    def __init__(self):
+        self.alpha = float(os.getenv('TREND_BURST_ALPHA', 0.1))
+        self.z_threshold = float(os.getenv('TREND_BURST_Z_THRESHOLD', 3.5))
+        self.exit_z = float(os.getenv('TREND_BURST_EXIT_Z', 1.5))
+        self.min_observations = int(os.getenv('TREND_BURST_MIN_OBSERVATIONS', 4))
+        self.stale_hours = float(os.getenv('TREND_BURST_STALE_HOURS', 6))
+        self.clip_sigmas = 3.0
+        # Spread floor, so flat series do not turn tiny wiggles into huge scores
+        self.min_scale = 1.0
+        self.relative_min_scale = 0.05
+        self.chunk_size = int(os.getenv('TREND_UPSERT_CHUNK_SIZE', 500))
+        self.min_interval_hours = 1 / 60
+
+    def observe(self, snapshots: Dict[int, Tuple[datetime, int]]) -> int:
+        """Fold one snapshot per trend ({trend_id: (ts, volume)}) into the burst state.
+
+        Returns how many of the trends are bursting afterwards; the caller commits.
+        Bursts of other trends that have gone stale are ended on the way.
+        """
+        self.expire_stale()
+        trend_ids = list(snapshots)
+        states = {}
+        for start in range(0, len(trend_ids), self.chunk_size):
+            states.update({
+                state.trend_id: state
+                for state in TrendBurstState.query.filter(
+                    TrendBurstState.trend_id.in_(trend_ids[start:start + self.chunk_size])
+                )
+            })
+
+        bursting = 0
+        for trend_id, (ts, volume) in snapshots.items():
+            state = states.get(trend_id)
+            if state is None:
+                state = TrendBurstState(trend_id=trend_id, observations=0, bursting=False)
+                db.session.add(state)
+            self._update(state, ts, volume)
+            bursting += state.bursting
+        return bursting
+
+    def _update(self, state: TrendBurstState, ts: datetime, volume: int):
+        if state.last_ts is not None and ts > state.last_ts:
+            hours = max((ts - state.last_ts).total_seconds() / 3600.0, self.min_interval_hours)
+            velocity = (volume - state.last_volume) / hours
+            self._score(state, velocity, ts)
+        state.last_ts = ts
+        state.last_volume = volume
+        state.updated_at = datetime.utcnow()
+
+    def _score(self, state: TrendBurstState, velocity: float, ts: datetime):
+        state.velocity = velocity
+        if state.observations == 0:
+            state.baseline = velocity
+            state.scale = 0.0
+            state.observations = 1
+            return
+
+        sigma = _MAD_TO_SIGMA * max(state.scale, self.min_scale, self.relative_min_scale * abs(state.baseline))
+        deviation = velocity - state.baseline
+        warmed_up = state.observations >= self.min_observations
+        z_score = deviation / sigma if warmed_up else None
+
+        if warmed_up:
+            deviation = max(min(deviation, self.clip_sigmas * sigma), -self.clip_sigmas * sigma)
+        state.baseline += self.alpha * deviation
+        state.scale += self.alpha * (abs(deviation) - state.scale)
+        state.observations += 1
+        state.z_score = round(z_score, 4) if z_score is not None else None
+
+        if z_score is None:
+            return
+        if not state.bursting and z_score >= self.z_threshold:
+            state.bursting = True
+            state.burst_started_at = ts
+            state.peak_z_score = state.z_score
+        elif state.bursting:
+            if z_score < self.exit_z:
+                state.bursting = False
+            else:
+                state.peak_z_score = max(state.peak_z_score or 0.0, state.z_score)
+
+    def stale_before(self) -> datetime:
+        return datetime.utcnow() - timedelta(hours=self.stale_hours)
+
+    def expire_stale(self) -> int:
+        """End bursts whose trend has had no snapshot for TREND_BURST_STALE_HOURS; the caller commits."""
+        return TrendBurstState.query.filter(
+            TrendBurstState.bursting.is_(True), TrendBurstState.last_ts < self.stale_before()
+        ).update({'bursting': False, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+
+    def emerging(self, limit: int = 20, platform: str = None, category: str = None) -> List[Dict[str, Any]]:
+        """Trends currently bursting, strongest first, read straight from the stored state.
+
+        Bursts not yet expired by an ingest are skipped once they go stale.
+        """
+        query = db.session.query(Trend, TrendBurstState).join(
+            TrendBurstState, TrendBurstState.trend_id == Trend.id
+        ).filter(TrendBurstState.bursting.is_(True), TrendBurstState.last_ts >= self.stale_before())
+        if platform:
+            query = query.filter(Trend.platform == platform)
+        if category:
+            query = query.filter(Trend.category == category)
+        rows = query.order_by(TrendBurstState.z_score.desc()).limit(limit).all()
+        return [{
+            'id': trend.id,
+            'keyword': trend.keyword,
+            'platform': trend.platform,
+            'category': trend.category,
+            'volume': trend.volume,
+            'engagement_score': trend.engagement_score,
+            'velocity': state.velocity,
+            'baseline_velocity': state.baseline,
+            'z_score': state.z_score,
+            'peak_z_score': state.peak_z_score,
+            'burst_started_at': state.burst_started_at.isoformat() if state.burst_started_at else None,
+            'updated_at': state.updated_at.isoformat() if state.updated_at else None
+        } for trend, state in rows]
@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional, Set
+import numpy as np
+from sqlalchemy import select, func
+from src.models import db, Trend, CanonicalTrend, CanonicalTrendBand
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+_YEAR = re.compile(r'^(19|20)\d\d$')
+# Mersenne prime modulus of the MinHash permutations
+_PRIME = np.uint64((1 << 61) - 1)
+
+def canonical_key(keyword: str) -> str:
+    """'AI Revolution' / '#airevolution' / 'AI revolution 2025' -> 'airevolution'.
+
+    Lowercase words without separators or '#', dropping year tokens unless
+    the keyword is nothing but a year.
+    """
+    words = _WORD.findall((keyword or '').lower())
+    kept = [word for word in words if not _YEAR.match(word)]
+    return ''.join(kept or words)
+
+def shingles(key: str, size: int = 3) -> Set[str]:
+    if len(key) <= size:
+        return {key}
+    return {key[start:start + size] for start in range(len(key) - size + 1)}
+
+class MinHasher:
+    """MinHash signatures over string shingles, with a fixed seed so every process agrees."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        # a < 2^31 and crc32 < 2^32 keep a * x + b inside uint64
+        self._a = rng.randint(1, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+
+    def signature(self, items: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(item.encode('utf-8')) for item in items), dtype=np.uint64)
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def band_keys(self, signature: np.ndarray) -> List[str]:
+        """One bucket key per band; signatures sharing any bucket are LSH candidates."""
+        return [
+            f"{band:02d}{hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarities(signatures: np.ndarray, signature: np.ndarray) -> np.ndarray:
+        """Estimated Jaccard similarity of `signature` to each row: the share of matching positions."""
+        return (signatures == signature).mean(axis=1)
+
+class TrendCanonicalizer:
+    """Maps trends to CanonicalTrend clusters of near-duplicates.
+
+    A trend whose canonical_key matches an existing cluster joins it
+    directly. Otherwise its MinHash signature is split into
+    TREND_CANONICAL_BANDS bands and only clusters sharing a band bucket
+    (canonical_trend_band) are compared, so the lookup cost does not grow
+    with the number of clusters. The best candidate at or above
+    TREND_CANONICAL_THRESHOLD estimated similarity wins; with none, the trend
+    starts a new cluster. Trends of one batch can join clusters created
+    earlier in the same batch.
+    """
+
+    def __init__(self):
+        self.hasher = MinHasher(
+            num_perm=int(os.getenv('TREND_CANONICAL_PERMUTATIONS', 64)),
+            bands=int(os.getenv('TREND_CANONICAL_BANDS', 16))
+        )
+        self.threshold = float(os.getenv('TREND_CANONICAL_THRESHOLD', 0.6))
+        self.chunk_size = int(os.getenv('TREND_UPSERT_CHUNK_SIZE', 500))
+
+    def update(self, trend_ids: Iterable[int]) -> Dict[str, int]:
+        """Assign clusters to trends that lack one and refresh the metrics of every cluster touched.
+
+        The caller commits.
+        """
+        trend_ids = list(trend_ids)
+        assigned, created = self.assign(trend_ids)
+        canonical_ids = set()
+        for start in range(0, len(trend_ids), self.chunk_size):
+            canonical_ids.update(db.session.execute(
+                select(Trend.canonical_id).where(
+                    Trend.id.in_(trend_ids[start:start + self.chunk_size]), Trend.canonical_id.isnot(None)
+                ).distinct()
+            ).scalars())
+        return {'assigned': assigned, 'created': created, 'refreshed': self.refresh_metrics(canonical_ids)}
+
+    def assign(self, trend_ids: List[int]):
+        """Set canonical_id on the given trends that have none; returns (assigned, clusters created)."""
+        trends = []
+        for start in range(0, len(trend_ids), self.chunk_size):
+            trends.extend(db.session.execute(
+                select(Trend.id, Trend.keyword, Trend.category).where(
+                    Trend.id.in_(trend_ids[start:start + self.chunk_size]), Trend.canonical_id.is_(None)
+                ).order_by(Trend.id)
+            ).all())
+        if not trends:
+            return 0, 0
+
+        keys = {trend_id: canonical_key(keyword) for trend_id, keyword, _ in trends}
+        by_key = self._clusters_by_key(set(keys.values()))
+        signatures = {}
+        band_keys = {}
+        for trend_id, key in keys.items():
+            if key not in by_key:
+                signatures[trend_id] = self.hasher.signature(shingles(key))
+                band_keys[trend_id] = self.hasher.band_keys(signatures[trend_id])
+
+        buckets = self._buckets({band for bands in band_keys.values() for band in bands})
+        cluster_signatures = self._signatures({cid for ids in buckets.values() for cid in ids})
+
+        # New clusters get provisional negative ids until they are inserted in one go
+        new_clusters = []
+        assignments = []
+        for trend_id, keyword, category in trends:
+            key = keys[trend_id]
+            canonical_id = by_key.get(key)
+            if canonical_id is None:
+                canonical_id = self._best_candidate(signatures[trend_id], band_keys[trend_id], buckets,
+                                                    cluster_signatures)
+            if canonical_id is None:
+                canonical_id = -(len(new_clusters) + 1)
+                new_clusters.append({'key': key, 'label': keyword, 'category': category,
+                                     'signature': signatures[trend_id].tobytes(), 'bands': band_keys[trend_id]})
+                for band in band_keys[trend_id]:
+                    buckets.setdefault(band, set()).add(canonical_id)
+                cluster_signatures[canonical_id] = signatures[trend_id]
+            by_key.setdefault(key, canonical_id)
+            assignments.append({'id': trend_id, 'canonical_id': canonical_id})
+
+        if new_clusters:
+            now = datetime.utcnow()
+            rows = [{'key': cluster['key'], 'label': cluster['label'], 'category': cluster['category'],
+                     'signature': cluster['signature'], 'created_at': now, 'updated_at': now}
+                    for cluster in new_clusters]
+            db.session.bulk_insert_mappings(CanonicalTrend, rows, return_defaults=True)
+            db.session.bulk_insert_mappings(CanonicalTrendBand, [
+                {'band': band, 'canonical_id': row['id']}
+                for row, cluster in zip(rows, new_clusters) for band in cluster['bands']
+            ])
+            for assignment in assignments:
+                if assignment['canonical_id'] < 0:
+                    assignment['canonical_id'] = rows[-assignment['canonical_id'] - 1]['id']
+
+        db.session.bulk_update_mappings(Trend, assignments)
+        return len(assignments), len(new_clusters)
+
+    def _best_candidate(self, signature, bands, buckets, cluster_signatures) -> Optional[int]:
+        candidates = set()
+        for band in bands:
+            candidates.update(buckets.get(band, ()))
+        if not candidates:
+            return None
+        candidates = sorted(candidates)
+        similarity = self.hasher.similarities(
+            np.stack([cluster_signatures[canonical_id] for canonical_id in candidates]), signature
+        )
+        best = int(np.argmax(similarity))
+        return candidates[best] if similarity[best] >= self.threshold else None
+
+    def _clusters_by_key(self, keys: Set[str]) -> Dict[str, int]:
+        keys = list(keys)
+        clusters = {}
+        for start in range(0, len(keys), self.chunk_size):
+            clusters.update(db.session.execute(
+                select(CanonicalTrend.key, CanonicalTrend.id).where(
+                    CanonicalTrend.key.in_(keys[start:start + self.chunk_size])
+                )
+            ).all())
+        return clusters
+
+    def _buckets(self, bands: Set[str]) -> Dict[str, Set[int]]:
+        bands = list(bands)
+        buckets = {}
+        for start in range(0, len(bands), self.chunk_size):
+            for band, canonical_id in db.session.execute(
+                select(CanonicalTrendBand.band, CanonicalTrendBand.canonical_id).where(
+                    CanonicalTrendBand.band.in_(bands[start:start + self.chunk_size])
+                )
+            ):
+                buckets.setdefault(band, set()).add(canonical_id)
+        return buckets
+
+    def _signatures(self, canonical_ids: Set[int]) -> Dict[int, np.ndarray]:
+        canonical_ids = list(canonical_ids)
+        signatures = {}
+        for start in range(0, len(canonical_ids), self.chunk_size):
+            for canonical_id, signature in db.session.execute(
+                select(CanonicalTrend.id, CanonicalTrend.signature).where(
+                    CanonicalTrend.id.in_(canonical_ids[start:start + self.chunk_size])
+                )
+            ):
+                signatures[canonical_id] = np.frombuffer(signature, dtype=np.uint64)
+        return signatures
+
+    def refresh_metrics(self, canonical_ids: Iterable[int]) -> int:
+        """Recompute the aggregate metrics of the given clusters from their members."""
+        canonical_ids = list(canonical_ids)
+        mappings = []
+        for start in range(0, len(canonical_ids), self.chunk_size):
+            chunk = canonical_ids[start:start + self.chunk_size]
+            platforms = {}
+            for canonical_id, platform in db.session.execute(
+                select(Trend.canonical_id, Trend.platform).where(Trend.canonical_id.in_(chunk)).distinct()
+            ):
+                platforms.setdefault(canonical_id, []).append(platform)
+
+            volume = func.coalesce(Trend.volume, 0)
+            for (canonical_id, count, total_volume, weighted_engagement, mean_engagement, peak_engagement,
+                 weighted_growth, mean_growth, velocity) in db.session.execute(
+                select(
+                    Trend.canonical_id, func.count(Trend.id), func.sum(volume),
+                    func.sum(Trend.engagement_score * volume), func.avg(Trend.engagement_score),
+                    func.max(Trend.engagement_score),
+                    func.sum(Trend.growth_rate * volume), func.avg(Trend.growth_rate),
+                    func.sum(Trend.velocity)
+                ).where(Trend.canonical_id.in_(chunk)).group_by(Trend.canonical_id)
+            ):
+                total_volume = int(total_volume or 0)
+                # Weighted by volume when there is any, plain mean otherwise
+                mappings.append({
+                    'id': canonical_id,
+                    'trend_count': count,
+                    'platforms': json.dumps(sorted(platforms.get(canonical_id, []))),
+                    'volume': total_volume,
+                    'engagement_score': round((weighted_engagement or 0.0) / total_volume if total_volume
+                                              else mean_engagement or 0.0, 4),
+                    'peak_engagement': peak_engagement or 0.0,
+                    'growth_rate': round((weighted_growth or 0.0) / total_volume if total_volume
+                                         else mean_growth or 0.0, 2),
+                    'velocity': velocity
+                })
+        db.session.bulk_update_mappings(CanonicalTrend, mappings)
+        return len(mappings)
+
+    def top(self, limit: int = 20, platform: str = None, category: str = None) -> List[Dict[str, Any]]:
+        """Canonical trends by aggregated engagement."""
+        query = CanonicalTrend.query
+        if platform:
+            query = query.filter(
+                select(Trend.id).where(Trend.canonical_id == CanonicalTrend.id, Trend.platform == platform).exists()
+            )
+        if category:
+            query = query.filter(CanonicalTrend.category == category)
+        return [canonical.to_dict() for canonical in query.order_by(
+            CanonicalTrend.engagement_score.desc(), CanonicalTrend.id
+        ).limit(limit)]
+
+def backfill_canonical_trends(chunk_size: int = 1000) -> int:
+    """Cluster trends stored before canonicalization existed."""
+    canonicalizer = TrendCanonicalizer()
+    assigned = 0
+    while True:
+        trend_ids = db.session.execute(
+            select(Trend.id).where(Trend.canonical_id.is_(None)).order_by(Trend.id).limit(chunk_size)
+        ).scalars().all()
+        if not trend_ids:
+            break
+        assigned += canonicalizer.update(trend_ids)['assigned']
+        db.session.commit()
+    if assigned:
+        logger.info(f"Assigned canonical trends to {assigned} trends")
+    return assigned
@@ -0,0 +1,244 @@
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Iterable, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, delete, func
+from src.models import db, Trend, TrendSnapshot, TrendForecast
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TrendForecaster:
+    """Damped Holt (linear trend) forecasts of engagement for many trends at once.
+
+    Each trend's last TREND_FORECAST_MAX_POINTS snapshots are laid out as one
+    row of a right-aligned (trends x steps) matrix, shorter histories padded
+    with NaN on the left. The smoothing recursion then runs once per column,
+    updating every series in the same NumPy operation, so the Python loop is
+    over time steps only.
+
+    Ingest calls update() with the trends it just snapshotted and the results
+    are stored in trend_forecast, so reads never fit anything.
+    """
+
+    def __init__(self):
+        self.alpha = float(os.getenv('TREND_FORECAST_ALPHA', 0.5))
+        self.beta = float(os.getenv('TREND_FORECAST_BETA', 0.3))
+        self.phi = float(os.getenv('TREND_FORECAST_DAMPING', 0.9))
+        self.horizon_hours = float(os.getenv('TREND_FORECAST_HORIZON_HOURS', 24))
+        self.max_points = int(os.getenv('TREND_FORECAST_MAX_POINTS', 48))
+        self.history_hours = float(os.getenv('TREND_FORECAST_HISTORY_HOURS', 72))
+        self.chunk_size = int(os.getenv('TREND_UPSERT_CHUNK_SIZE', 500))
+        # Relative change over the horizon that counts as rising or declining
+        self.direction_threshold = 0.05
+        # A rising trend peaks once a step adds less than this share of its level
+        self.peak_step_share = 0.01
+
+    def update(self, trend_ids: Optional[Iterable[int]] = None) -> int:
+        """Refit and store forecasts for `trend_ids` (or every trend with recent history).
+
+        Forecasts of trends without a snapshot in TREND_FORECAST_HISTORY_HOURS
+        are dropped. Returns how many were stored; the caller commits.
+        """
+        started = time.monotonic()
+        since = datetime.utcnow() - timedelta(hours=self.history_hours)
+        db.session.execute(delete(TrendForecast).where(TrendForecast.generated_for < since))
+        snapshots = self._load_history(trend_ids, since)
+        if snapshots.empty:
+            return 0
+        series_ids, values, step_hours = self._build_matrix(snapshots)
+        forecast = self.forecast(values, step_hours)
+        directions = self.directions(forecast)
+        generated_for = snapshots.groupby('trend_id')['ts'].max()
+
+        now = datetime.utcnow()
+        rows = [{
+            'trend_id': trend_id,
+            'predicted_engagement': round(max(predicted, 0.0), 4),
+            'confidence_score': round(confidence, 4),
+            'trend_direction': direction,
+            'time_to_peak': int(time_to_peak),
+            'points': int(points),
+            'generated_for': generated_for[trend_id].to_pydatetime(),
+            'computed_at': now
+        } for trend_id, predicted, confidence, direction, time_to_peak, points in zip(
+            series_ids.tolist(), forecast['predicted'].tolist(), forecast['confidence'].tolist(), directions.tolist(),
+            forecast['time_to_peak'].tolist(), forecast['points'].tolist()
+        )]
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            db.session.execute(delete(TrendForecast).where(
+                TrendForecast.trend_id.in_([row['trend_id'] for row in chunk])
+            ))
+            db.session.bulk_insert_mappings(TrendForecast, chunk)
+        logger.info(f"Forecast {len(rows)} trends in {round((time.monotonic() - started) * 1000, 1)}ms")
+        return len(rows)
+
+    def predictions(self, limit: int = 50, platform: str = None, direction: str = None) -> Dict[str, Any]:
+        """Stored forecasts by predicted engagement, optionally for one platform or direction."""
+        query = select(TrendForecast, Trend.keyword, Trend.platform).join(Trend, Trend.id == TrendForecast.trend_id)
+        if platform:
+            query = query.where(Trend.platform == platform)
+        if direction:
+            query = query.where(TrendForecast.trend_direction == direction)
+        total = db.session.execute(select(func.count()).select_from(query.subquery())).scalar()
+        rows = db.session.execute(query.order_by(
+            TrendForecast.predicted_engagement.desc(), TrendForecast.trend_id
+        ).limit(limit)).all()
+        generated_for, computed_at = db.session.execute(
+            select(func.max(TrendForecast.generated_for), func.max(TrendForecast.computed_at))
+        ).one()
+        return {
+            'generated_for': generated_for.isoformat() if generated_for else None,
+            'computed_at': computed_at.isoformat() if computed_at else None,
+            'total': total,
+            'predictions': [self.serialize(forecast, keyword, trend_platform)
+                            for forecast, keyword, trend_platform in rows]
+        }
+
+    def serialize(self, forecast: TrendForecast, keyword: str, platform: str) -> Dict[str, Any]:
+        return {
+            'trend_id': forecast.trend_id,
+            'hashtag': keyword,
+            'platform': platform,
+            'predicted_engagement': forecast.predicted_engagement,
+            'confidence_score': forecast.confidence_score,
+            'trend_direction': forecast.trend_direction,
+            'time_to_peak': forecast.time_to_peak,
+            'recommended_actions': self._recommended_actions(keyword, forecast.trend_direction, forecast.time_to_peak)
+        }
+
+    def forecast(self, values: np.ndarray, step_hours: np.ndarray) -> Dict[str, np.ndarray]:
+        """Run damped Holt smoothing over a right-aligned (series x steps) matrix.
+
+        Returns per-series arrays: level, trend, predicted value at the horizon,
+        hours to peak, a 0-1 confidence and the number of points used.
+        """
+        n_series, n_steps = values.shape
+        level = np.full(n_series, np.nan)
+        slope = np.zeros(n_series)
+        abs_error = np.zeros(n_series)
+        error_count = np.zeros(n_series)
+        points = np.zeros(n_series)
+        alpha, beta, phi = self.alpha, self.beta, self.phi
+
+        for step in range(n_steps):
+            observed = values[:, step]
+            has_value = ~np.isnan(observed)
+            started = has_value & ~np.isnan(level)
+            first = has_value & np.isnan(level)
+
+            # One-step-ahead error, measured before the update, for the confidence score
+            expected = level + phi * slope
+            with np.errstate(invalid='ignore', divide='ignore'):
+                error = np.abs(observed - expected) / np.maximum(np.abs(observed), 1e-6)
+            abs_error += np.where(started, np.minimum(error, 1.0), 0.0)
+            error_count += started
+
+            new_level = alpha * observed + (1 - alpha) * expected
+            new_slope = beta * (new_level - level) + (1 - beta) * phi * slope
+            # The second point seeds the slope instead of smoothing it from zero
+            seed = started & (points == 1)
+            new_slope = np.where(seed, observed - level, new_slope)
+            new_level = np.where(seed, observed, new_level)
+
+            level = np.where(started, new_level, np.where(first, observed, level))
+            slope = np.where(started, new_slope, slope)
+            points += has_value
+
+        horizon_steps = self.horizon_hours / step_hours
+        # phi + phi^2 + ... + phi^h, for fractional h
+        damped_sum = phi * (1 - phi ** horizon_steps) / (1 - phi) if phi < 1 else horizon_steps
+        predicted = level + damped_sum * slope
+
+        # Increments shrink by phi per step; the peak is where they fall below a share of the level
+        with np.errstate(invalid='ignore', divide='ignore'):
+            peak_steps = np.log(self.peak_step_share * np.maximum(np.abs(level), 1e-6) / (phi * slope)) / np.log(phi)
+        peak_steps = np.where(slope > 0, np.clip(np.nan_to_num(peak_steps, nan=0.0), 0, None), 0.0)
+        time_to_peak = np.minimum(np.ceil(peak_steps * step_hours), self.horizon_hours)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_error = np.where(error_count > 0, abs_error / error_count, 1.0)
+        # Low fitting error and more history both raise confidence
+        confidence = (1 - mean_error) * (points / (points + 5))
+
+        return {
+            'level': level,
+            'slope': slope,
+            'predicted': predicted,
+            'time_to_peak': time_to_peak,
+            'confidence': np.clip(confidence, 0.0, 1.0),
+            'points': points
+        }
+
+    def _load_history(self, trend_ids: Optional[Iterable[int]], since: datetime) -> pd.DataFrame:
+        """Each trend's latest max_points snapshots since `since` (ts and engagement only)."""
+        if trend_ids is None:
+            trend_ids = db.session.execute(
+                select(TrendSnapshot.trend_id).where(TrendSnapshot.ts >= since).distinct()
+            ).scalars().all()
+        trend_ids = list(trend_ids)
+        rows = []
+        for start in range(0, len(trend_ids), self.chunk_size):
+            ranked = select(
+                TrendSnapshot.trend_id, TrendSnapshot.ts, TrendSnapshot.engagement,
+                func.row_number().over(
+                    partition_by=TrendSnapshot.trend_id, order_by=TrendSnapshot.ts.desc()
+                ).label('position')
+            ).where(
+                TrendSnapshot.trend_id.in_(trend_ids[start:start + self.chunk_size]), TrendSnapshot.ts >= since
+            ).subquery()
+            rows.extend(db.session.execute(
+                select(ranked.c.trend_id, ranked.c.ts, ranked.c.engagement).where(ranked.c.position <= self.max_points)
+            ).all())
+        snapshots = pd.DataFrame(rows, columns=['trend_id', 'ts', 'engagement'])
+        snapshots['ts'] = pd.to_datetime(snapshots['ts'])
+        return snapshots
+
+    def _build_matrix(self, snapshots: pd.DataFrame):
+        """Right-align each trend's latest max_points snapshots into one matrix."""
+        snapshots = snapshots.sort_values(['trend_id', 'ts'], kind='stable')
+        position = snapshots.groupby('trend_id', sort=False).cumcount(ascending=False).to_numpy()
+        recent = snapshots[position < self.max_points]
+        position = position[position < self.max_points]
+
+        trend_ids, row = np.unique(recent['trend_id'].to_numpy(), return_inverse=True)
+        values = np.full((len(trend_ids), self.max_points), np.nan)
+        values[row, self.max_points - 1 - position] = recent['engagement'].to_numpy(dtype=float)
+
+        # Average spacing between snapshots turns forecast steps into hours
+        seconds = (recent['ts'] - recent['ts'].min()).dt.total_seconds().to_numpy()
+        frame = pd.DataFrame({'row': row, 'seconds': seconds}).groupby('row')['seconds'].agg(['min', 'max', 'count'])
+        span_hours = (frame['max'] - frame['min']).to_numpy() / 3600.0
+        intervals = np.maximum(frame['count'].to_numpy() - 1, 1)
+        default_step = float(os.getenv('TREND_REFRESH_INTERVAL_SECONDS', 900)) / 3600.0
+        step_hours = np.where(span_hours > 0, span_hours / intervals, default_step)
+        return trend_ids, values, step_hours
+
+    def directions(self, forecast: Dict[str, np.ndarray]) -> np.ndarray:
+        """'rising', 'stable' or 'declining' from the relative change between level and prediction."""
+        level = forecast['level']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = (forecast['predicted'] - level) / np.maximum(np.abs(level), 1e-6)
+        return np.where(change > self.direction_threshold, 'rising',
+                        np.where(change < -self.direction_threshold, 'declining', 'stable'))
+
+    def _recommended_actions(self, keyword: str, direction: str, time_to_peak: int) -> List[str]:
+        if direction == 'rising':
+            return [f"Publish content about {keyword} within the next {max(time_to_peak, 1)} hours",
+                    f"Use #{keyword.replace(' ', '').lower()} while engagement is still climbing"]
+        if direction == 'declining':
+            return [f"Avoid starting new content about {keyword}; engagement is falling"]
+        return [f"Keep {keyword} in the regular posting rotation"]
+
+def backfill_trend_forecasts() -> int:
+    """Forecast trends with recent history when none are stored, e.g. right after the upgrade."""
+    if db.session.execute(select(TrendForecast.trend_id).limit(1)).first() is not None:
+        return 0
+    stored = TrendForecaster().update()
+    db.session.commit()
+    return stored
@@ -0,0 +1,152 @@
+import hashlib
+import json
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over a text finds every pattern it contains.
+
+    Each pattern carries an integer bitmask payload; find() returns the OR
+    of the payloads of all patterns found, so callers can map patterns to
+    any set of owners without a per-pattern loop.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+        for pattern, payload in patterns:
+            self._add(pattern, payload)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, payload: int):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(0)
+            node = next_node
+        self._output[node] |= payload
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end here via a shorter suffix
+                self._output[child] |= self._output[self._fail[child]]
+
+    def find(self, text: str) -> int:
+        """OR of the payloads of every pattern occurring in `text`."""
+        found = self._output[0]  # empty patterns match everything
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found |= output[node]
+        return found
+
+class CharacterMatcher:
+    """A user's character profiles compiled once for matching against many trends.
+
+    JSON fields are parsed up front. Characters are numbered 0..n-1 and sets
+    of characters are int bitmasks: keywords and content styles each become
+    an Aho-Corasick automaton whose payloads are character masks, and each
+    platform maps to the mask of characters allowed to post there. Matching
+    a trend is then two automaton passes and a few integer ANDs.
+    """
+
+    def __init__(self, characters: List):
+        self.characters = characters
+        self.keywords: List[List[str]] = []
+        self.platforms: List[List[str]] = []
+        self.platform_bits: Dict[str, int] = {}
+        self.platform_masks: List[int] = []  # per character; 0 means any platform
+
+        keyword_owners: Dict[str, int] = {}
+        style_owners: Dict[str, int] = {}
+        unrestricted = 0
+        for index, character in enumerate(characters):
+            bit = 1 << index
+            keywords = [keyword for keyword in _parse_list(character.keywords) if isinstance(keyword, str)]
+            platforms = [platform for platform in _parse_list(character.preferred_platforms) if isinstance(platform, str)]
+            self.keywords.append(keywords)
+            self.platforms.append(platforms)
+
+            for keyword in keywords:
+                keyword_owners[keyword.lower()] = keyword_owners.get(keyword.lower(), 0) | bit
+            if character.content_style:
+                style = character.content_style.lower()
+                style_owners[style] = style_owners.get(style, 0) | bit
+
+            mask = 0
+            for platform in platforms:
+                mask |= 1 << self.platform_bits.setdefault(platform, len(self.platform_bits))
+            self.platform_masks.append(mask)
+            if not mask:
+                unrestricted |= bit
+
+        # Characters allowed per platform: unrestricted ones plus those listing it
+        self._allowed_by_platform: Dict[str, int] = {}
+        for platform, platform_bit in self.platform_bits.items():
+            allowed = unrestricted
+            for index, mask in enumerate(self.platform_masks):
+                if mask >> platform_bit & 1:
+                    allowed |= 1 << index
+            self._allowed_by_platform[platform] = allowed
+        self._unrestricted = unrestricted
+
+        self._keyword_automaton = AhoCorasick(keyword_owners.items())
+        self._style_automaton = AhoCorasick(style_owners.items())
+        self._style_cache: Dict[str, int] = {}
+
+    def match(self, trend, serendipity: float = 0.3) -> Iterator[Tuple[int, object]]:
+        """Yield (index, character) for characters a trend is relevant to, in character order.
+
+        A character matches when the trend is on one of its platforms (or it has
+        none) and one of its keywords occurs in the trend keyword or its content
+        style occurs in the trend category. Other allowed characters still get
+        the trend with probability `serendipity`, decided by a hash of the trend
+        and character so the same pair always gets the same answer.
+        """
+        allowed = self._allowed_by_platform.get(trend.platform, self._unrestricted)
+        if not allowed:
+            return
+        matched = self._keyword_automaton.find(trend.keyword.lower())
+        category = (trend.category or '').lower()
+        if category not in self._style_cache:
+            self._style_cache[category] = self._style_automaton.find(category)
+        matched = (matched | self._style_cache[category]) & allowed
+
+        remaining = allowed
+        while remaining:
+            low_bit = remaining & -remaining
+            index = low_bit.bit_length() - 1
+            remaining ^= low_bit
+            if matched & low_bit or _stable_fraction(trend.id, self.characters[index].id) < serendipity:
+                yield index, self.characters[index]
+
+def _stable_fraction(*key) -> float:
+    """A number in [0, 1) derived from `key`, the same in every process and run."""
+    digest = hashlib.sha1(json.dumps(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+def _parse_list(value) -> List:
+    try:
+        parsed = json.loads(value) if value else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+    if isinstance(parsed, str):
+        return [parsed]
+    return parsed if isinstance(parsed, list) else []
@@ -0,0 +1,118 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from src.models import db, Trend, TrendSnapshot
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TrendMomentumEngine:
+    """Growth, velocity and acceleration for many trends at once from their snapshot history.
+
+    All trends are handled in one DataFrame sorted by (trend_id, ts); every
+    step is a column operation or a grouped cumulative sum, so the cost is
+    one pass over the snapshots rather than a Python loop per trend.
+
+    - growth_rate: percent change in volume across the last
+      TREND_MOMENTUM_WINDOW_HOURS.
+    - velocity: time-decayed EWMA (half-life TREND_MOMENTUM_HALFLIFE_HOURS) of
+      volume change per hour between consecutive snapshots. Snapshots arrive
+      at irregular times, so weights decay with elapsed time, not row count.
+    - acceleration: change in that velocity per hour over the latest interval.
+    """
+
+    def __init__(self):
+        self.window_hours = float(os.getenv('TREND_MOMENTUM_WINDOW_HOURS', 24))
+        self.halflife_hours = float(os.getenv('TREND_MOMENTUM_HALFLIFE_HOURS', 6))
+        self.history_hours = float(os.getenv('TREND_MOMENTUM_HISTORY_HOURS', 72))
+        self.chunk_size = int(os.getenv('TREND_UPSERT_CHUNK_SIZE', 500))
+        # Snapshots closer together than this are treated as this far apart
+        self.min_interval_hours = 1 / 60
+
+    def update_trends(self, trend_ids: Optional[Iterable[int]] = None) -> int:
+        """Recompute momentum for `trend_ids` (or every trend with recent history) and store it on Trend.
+
+        Trends with a single snapshot keep their current values. Returns how
+        many trends were updated; the caller commits.
+        """
+        metrics = self.compute(trend_ids)
+        if metrics.empty:
+            return 0
+        metrics = metrics.astype(object).where(metrics.notna(), None)
+        mappings = [
+            {'id': int(trend_id), **{column: value for column, value in row.items() if value is not None}}
+            for trend_id, row in metrics.iterrows()
+        ]
+        mappings = [mapping for mapping in mappings if len(mapping) > 1]
+        db.session.bulk_update_mappings(Trend, mappings)
+        return len(mappings)
+
+    def compute(self, trend_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """Momentum metrics indexed by trend_id; NaN where there is not enough history."""
+        snapshots = self._load_snapshots(trend_ids)
+        if snapshots.empty:
+            return pd.DataFrame(columns=['growth_rate', 'velocity', 'acceleration'], dtype=float)
+
+        snapshots = snapshots.sort_values(['trend_id', 'ts'], kind='stable').reset_index(drop=True)
+        hours = (snapshots['ts'] - snapshots['ts'].min()).dt.total_seconds().to_numpy() / 3600.0
+        volume = snapshots['volume'].to_numpy(dtype=float)
+        trend_id = snapshots['trend_id'].to_numpy()
+        first_of_trend = np.r_[True, trend_id[1:] != trend_id[:-1]]
+        last_hours = snapshots.groupby('trend_id', sort=False)['ts'].transform('max')
+        last_hours = (last_hours - snapshots['ts'].min()).dt.total_seconds().to_numpy() / 3600.0
+
+        # Volume change per hour between consecutive snapshots of the same trend
+        dt = np.maximum(np.diff(hours, prepend=hours[0]), self.min_interval_hours)
+        rate = np.where(first_of_trend, 0.0, np.diff(volume, prepend=volume[0]) / dt)
+        has_rate = ~first_of_trend
+
+        # Time-decayed EWMA as a ratio of grouped cumulative sums. Weights are
+        # anchored at each trend's latest snapshot; the anchor cancels out, so
+        # the ratio at any row is the EWMA as of that row.
+        weight = np.where(has_rate, np.exp(-np.log(2) * (last_hours - hours) / self.halflife_hours), 0.0)
+        frame = pd.DataFrame({'trend_id': trend_id, 'wx': weight * rate, 'w': weight})
+        cumulative = frame.groupby('trend_id', sort=False)[['wx', 'w']].cumsum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ewma = np.where(cumulative['w'] > 0, cumulative['wx'] / cumulative['w'], np.nan)
+        snapshots['velocity'] = ewma
+        snapshots['dt'] = np.where(first_of_trend, np.nan, dt)
+        snapshots['in_window'] = hours >= last_hours - self.window_hours
+
+        latest = snapshots.groupby('trend_id', sort=False).tail(2)
+        last = latest.drop_duplicates('trend_id', keep='last').set_index('trend_id')
+        previous_velocity = latest[latest.duplicated('trend_id', keep='last')].set_index('trend_id')['velocity']
+        acceleration = (last['velocity'] - previous_velocity) / last['dt']
+
+        window = snapshots[snapshots['in_window']].groupby('trend_id')['volume']
+        base_volume = window.first().astype(float)
+        growth_rate = ((last['volume'] - base_volume) / base_volume.where(base_volume > 0) * 100).where(
+            window.size() > 1
+        )
+
+        return pd.DataFrame({
+            'growth_rate': growth_rate.round(2),
+            'velocity': last['velocity'].round(4),
+            'acceleration': acceleration.round(4)
+        })
+
+    def _load_snapshots(self, trend_ids: Optional[Iterable[int]]) -> pd.DataFrame:
+        since = datetime.utcnow() - timedelta(hours=self.history_hours)
+        columns = [TrendSnapshot.trend_id, TrendSnapshot.ts, TrendSnapshot.volume]
+        if trend_ids is None:
+            rows = db.session.execute(select(*columns).where(TrendSnapshot.ts >= since)).all()
+        else:
+            trend_ids = list(trend_ids)
+            rows = []
+            for start in range(0, len(trend_ids), self.chunk_size):
+                rows.extend(db.session.execute(select(*columns).where(
+                    TrendSnapshot.trend_id.in_(trend_ids[start:start + self.chunk_size]),
+                    TrendSnapshot.ts >= since
+                )).all())
+        snapshots = pd.DataFrame(rows, columns=['trend_id', 'ts', 'volume'])
+        snapshots['ts'] = pd.to_datetime(snapshots['ts'])
+        return snapshots
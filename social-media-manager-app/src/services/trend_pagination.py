@@ -0,0 +1,61 @@
+import os
+import json
+import base64
+import binascii
+import logging
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import tuple_
+from src.models import Trend
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that was not issued by this API."""
+
+def encode_cursor(trend: Trend) -> str:
+    """Opaque cursor pointing just past `trend` in (engagement_score DESC, id DESC) order."""
+    # engagement_score is NOT NULL in the table; an unsaved trend may still lack it
+    payload = json.dumps([trend.engagement_score or 0.0, trend.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        engagement_score, trend_id = json.loads(payload)
+        return float(engagement_score), int(trend_id)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+
+class TrendPaginator:
+    """Keyset pagination of trends by (engagement_score DESC, id DESC).
+
+    Each page continues strictly after the last row of the previous one
+    instead of skipping rows with OFFSET, so on the (engagement_score, id)
+    indexes a deep page costs the same as the first. Page sizes are capped
+    at TREND_LIST_MAX_LIMIT.
+    """
+
+    def __init__(self):
+        self.max_limit = int(os.getenv('TREND_LIST_MAX_LIMIT', 200))
+
+    def clamp_limit(self, limit: Optional[int], default: int) -> int:
+        return min(max(limit or default, 1), self.max_limit)
+
+    def page(self, query, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of `query` (a filtered Trend query) after `cursor`; raises InvalidCursor."""
+        if cursor:
+            engagement_score, trend_id = decode_cursor(cursor)
+            # Row-value comparison, so the index range starts right at the cursor
+            query = query.filter(tuple_(Trend.engagement_score, Trend.id) < (engagement_score, trend_id))
+        # One extra row tells whether another page follows
+        rows = query.order_by(Trend.engagement_score.desc(), Trend.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'items': rows,
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(rows[-1]) if has_more else None
+        }
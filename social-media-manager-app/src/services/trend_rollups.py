@@ -0,0 +1,156 @@
+import os
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import select, delete, insert, func, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from src.models import db, Trend, TrendRollup
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ('platform', 'category', 'sentiment')
+
+def rollup_key(created_at: Optional[datetime], platform: str, category: Optional[str],
+               sentiment: Optional[str]) -> Optional[Tuple]:
+    """(day, platform, category, sentiment) of the rollup row a trend counts towards; None without created_at."""
+    if created_at is None:
+        return None
+    return (created_at.date(), platform, category or '', sentiment or '')
+
+class TrendRollups:
+    """Daily trend counts and engagement sums per platform, category and sentiment.
+
+    Ingest hands over per-row deltas with add(). distribution() answers a
+    date range from whole days of rollup rows; only the partial days at
+    either end of the range are read from the trend table (through
+    ix_trend_created_at), so the totals match a GROUP BY over trend exactly.
+    """
+
+    def __init__(self):
+        # Rows per INSERT statement; keeps bound parameters under SQLite's limit
+        self.chunk_size = int(os.getenv('TREND_UPSERT_CHUNK_SIZE', 500))
+
+    def add(self, deltas: Dict[Tuple, List[float]]) -> int:
+        """Add [trend_count, engagement_sum] deltas to rollup rows in the session's transaction."""
+        now = datetime.utcnow()
+        rows = [{
+            'day': day, 'platform': platform, 'category': category, 'sentiment': sentiment,
+            'trend_count': int(count), 'engagement_sum': float(engagement), 'updated_at': now
+        } for (day, platform, category, sentiment), (count, engagement) in deltas.items() if count or engagement]
+        if not rows:
+            return 0
+
+        dialect = db.engine.dialect.name
+        if dialect not in ('sqlite', 'postgresql'):
+            self._merge(rows)
+            return len(rows)
+        insert_for_dialect = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        for start in range(0, len(rows), self.chunk_size):
+            statement = insert_for_dialect(TrendRollup).values(rows[start:start + self.chunk_size])
+            statement = statement.on_conflict_do_update(
+                index_elements=['day', 'platform', 'category', 'sentiment'],
+                set_={
+                    'trend_count': TrendRollup.trend_count + statement.excluded.trend_count,
+                    'engagement_sum': TrendRollup.engagement_sum + statement.excluded.engagement_sum,
+                    'updated_at': statement.excluded.updated_at
+                }
+            )
+            db.session.execute(statement)
+        return len(rows)
+
+    def _merge(self, rows: List[Dict[str, Any]]):
+        """Portable fallback: read, add and write back each rollup row."""
+        for row in rows:
+            rollup = db.session.get(TrendRollup, (row['day'], row['platform'], row['category'], row['sentiment']))
+            if rollup is None:
+                db.session.add(TrendRollup(**row))
+            else:
+                rollup.trend_count += row['trend_count']
+                rollup.engagement_sum += row['engagement_sum']
+
+    def distribution(self, dimension: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     **filters) -> List[Dict[str, Any]]:
+        """Trend count and engagement sum per value of `dimension`, for trends created in [start, end].
+
+        `filters` narrow other dimensions, e.g. platform='tiktok'.
+        """
+        if dimension not in DIMENSIONS or any(name not in DIMENSIONS for name in filters):
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+        totals: Dict[str, List[float]] = {}
+
+        # Days wholly inside the range come from the rollups, the partial days at the ends from trend
+        first_day = None if start is None else (start.date() if start == _midnight(start.date())
+                                                else start.date() + timedelta(days=1))
+        last_day = None if end is None else end.date() - timedelta(days=1)
+        if first_day is not None and last_day is not None and first_day > last_day:
+            slices = [(start, end, True)]
+        else:
+            self._add_rollups(totals, dimension, first_day, last_day, filters)
+            slices = []
+            if first_day is not None and start < _midnight(first_day):
+                slices.append((start, _midnight(first_day), False))
+            if last_day is not None:
+                slices.append((_midnight(last_day + timedelta(days=1)), end, True))
+        for low, high, high_inclusive in slices:
+            self._add_trends(totals, dimension, low, high, high_inclusive, filters)
+
+        return [{
+            dimension: value or None, 'count': int(count), 'engagement_sum': engagement
+        } for value, (count, engagement) in sorted(totals.items()) if count]
+
+    def _add_rollups(self, totals, dimension, first_day: Optional[date], last_day: Optional[date], filters):
+        column = getattr(TrendRollup, dimension)
+        query = select(
+            column, func.sum(TrendRollup.trend_count), func.sum(TrendRollup.engagement_sum)
+        ).group_by(column)
+        for name, value in filters.items():
+            query = query.where(getattr(TrendRollup, name) == (value or ''))
+        if first_day is not None:
+            query = query.where(TrendRollup.day >= first_day)
+        if last_day is not None:
+            query = query.where(TrendRollup.day <= last_day)
+        for value, count, engagement in db.session.execute(query):
+            _accumulate(totals, value, count, engagement)
+
+    def _add_trends(self, totals, dimension, low: Optional[datetime], high: Optional[datetime], high_inclusive: bool,
+                    filters):
+        column = getattr(Trend, dimension)
+        query = select(
+            column, func.count(Trend.id), func.sum(func.coalesce(Trend.engagement_score, 0.0))
+        ).where(Trend.created_at.isnot(None)).group_by(column)
+        for name, value in filters.items():
+            query = query.where(getattr(Trend, name) == value)
+        if low is not None:
+            query = query.where(Trend.created_at >= low)
+        if high is not None:
+            query = query.where(Trend.created_at <= high if high_inclusive else Trend.created_at < high)
+        for value, count, engagement in db.session.execute(query):
+            _accumulate(totals, value, count, engagement)
+
+def _midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+def _accumulate(totals: Dict[str, List[float]], value: Optional[str], count, engagement):
+    total = totals.setdefault(value or '', [0, 0.0])
+    total[0] += count or 0
+    total[1] += engagement or 0.0
+
+def rebuild_trend_rollups(connection) -> int:
+    """Recompute every rollup row from the trend table on `connection`; returns the rows written."""
+    day = func.date(Trend.created_at)
+    category = func.coalesce(Trend.category, '')
+    sentiment = func.coalesce(Trend.sentiment, '')
+    connection.execute(delete(TrendRollup))
+    connection.execute(insert(TrendRollup).from_select(
+        ['day', 'platform', 'category', 'sentiment', 'trend_count', 'engagement_sum', 'updated_at'],
+        select(
+            day, Trend.platform, category, sentiment, func.count(Trend.id),
+            func.coalesce(func.sum(Trend.engagement_score), 0.0), literal(datetime.utcnow(), db.DateTime)
+        ).where(Trend.created_at.isnot(None)).group_by(day, Trend.platform, category, sentiment)
+    ))
+    rows = connection.execute(select(func.count()).select_from(TrendRollup)).scalar()
+    logger.info(f"Rebuilt {rows} trend rollup rows")
+    return rows
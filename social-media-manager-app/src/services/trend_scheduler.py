@@ -0,0 +1,381 @@
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from src.models import db, SchedulerLease, TrendRefreshRun
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'trend_scheduler'
+
+class LeaseLost(Exception):
+    """Raised when the scheduler no longer holds its lease in the middle of a run."""
+
+class TrendRefreshScheduler:
+    """Refreshes trends in the background on per-platform intervals.
+
+    Every web process runs one of these threads, but only the holder of the
+    `trend_scheduler` lease row acts: it starts scheduled runs when a platform
+    falls due (interval plus jitter) and executes runs queued through the
+    refresh endpoints. If the leader dies its lease expires and another
+    process takes over.
+    """
+
+    def __init__(self, trend_analyzer=None):
+        if trend_analyzer is None:
+            from src.services.trend_analyzer import TrendAnalyzer
+            trend_analyzer = TrendAnalyzer()
+        self.trend_analyzer = trend_analyzer
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.tick_seconds = float(os.getenv('TREND_SCHEDULER_TICK_SECONDS', 5))
+        self.lease_seconds = int(os.getenv('TREND_SCHEDULER_LEASE_SECONDS', 60))
+        self.jitter = float(os.getenv('TREND_REFRESH_JITTER', 0.1))
+        self.stale_run_seconds = int(os.getenv('TREND_REFRESH_STALE_SECONDS', 900))
+        self.platforms = [
+            platform.strip()
+            for platform in os.getenv('TREND_SCHEDULER_PLATFORMS', 'twitter,instagram,tiktok').split(',')
+            if platform.strip()
+        ]
+        default_interval = float(os.getenv('TREND_REFRESH_INTERVAL_SECONDS', 900))
+        self.intervals = {
+            platform: float(os.getenv(f'TREND_REFRESH_INTERVAL_{platform.upper()}_SECONDS', default_interval))
+            for platform in self.platforms
+        }
+        self._next_due = {}
+        self._is_leader = False
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+    def start(self, app):
+        self._thread = threading.Thread(target=self._run, args=(app,), name='trend-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"Trend scheduler started on {self.node_id}")
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def wake(self):
+        """Check for queued runs now instead of at the next tick."""
+        self._wake_event.set()
+
+    def _run(self, app):
+        with app.app_context():
+            while not self._stop_event.is_set():
+                try:
+                    self.tick()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Trend scheduler tick failed: {str(e)}")
+                finally:
+                    db.session.remove()
+                self._wake_event.wait(self.tick_seconds)
+                self._wake_event.clear()
+
+    def tick(self):
+        """One scheduling pass: renew leadership, then run whatever is queued or due."""
+        was_leader = self._is_leader
+        self._is_leader = self.acquire_lease()
+        if not self._is_leader:
+            return
+        if not was_leader:
+            logger.info(f"{self.node_id} is now the trend scheduler leader")
+            self._load_schedule()
+            self._fail_stale_runs()
+
+        now = datetime.utcnow()
+        for platform in self.platforms:
+            if now >= self._next_due[platform]:
+                enqueue_refresh(platform=platform, trigger='schedule')
+                self._next_due[platform] = now + self._jittered(self.intervals[platform])
+
+        while not self._stop_event.is_set():
+            run = self._claim_next_run()
+            if run is None:
+                break
+            self.execute(run)
+            # Keep the lease alive across back-to-back runs
+            if not self._is_leader or not self.acquire_lease():
+                self._is_leader = False
+                break
+
+    def acquire_lease(self) -> bool:
+        """Take or renew the scheduler lease; returns whether this node holds it."""
+        return acquire_lease(LEASE_NAME, self.node_id, self.lease_seconds, renewing=self._is_leader)
+
+    def execute(self, run: TrendRefreshRun):
+        """Run one claimed refresh and record its outcome.
+
+        As the leader, the lease is renewed from a heartbeat thread while the
+        run is in progress, and the fetched trends are only stored if the lease
+        is still held once the fetch is done. A run that lost the lease is
+        recorded as failed and its trends are left to the new leader.
+        """
+        started = time.monotonic()
+        platforms = [run.platform] if run.platform else None
+        heartbeat = _LeaseHeartbeat(self, current_app._get_current_object()) if self._is_leader else None
+        try:
+            if heartbeat:
+                heartbeat.start()
+            stats = self.trend_analyzer.fetch_and_analyze_trends(
+                platforms, before_store=heartbeat.ensure_held if heartbeat else None
+            )
+            run.status = 'succeeded'
+            run.result = json.dumps(stats)
+        except LeaseLost:
+            db.session.rollback()
+            logger.warning(f"{self.node_id} lost the trend scheduler lease during run {run.id}; not storing it")
+            self._is_leader = False
+            run = db.session.get(TrendRefreshRun, run.id)
+            run.status = 'failed'
+            run.error = 'Scheduler lost its lease while the run was in progress'
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Trend refresh run {run.id} failed: {str(e)}")
+            run = db.session.get(TrendRefreshRun, run.id)
+            run.status = 'failed'
+            run.error = str(e)
+        finally:
+            if heartbeat:
+                heartbeat.stop()
+        run.finished_at = datetime.utcnow()
+        run.duration_ms = round((time.monotonic() - started) * 1000, 1)
+        db.session.commit()
+        logger.info(f"Trend refresh run {run.id} ({run.platform or 'all platforms'}) {run.status} "
+                    f"in {run.duration_ms}ms")
+
+    def run_manual(self, run_id: str):
+        """Without a scheduler thread: take the lease, then run queued refreshes until none are left.
+
+        Waits for the lease while `run_id` is still queued; whoever holds it
+        drains the queue, so the run is picked up either way.
+        """
+        self.node_id = f"{self.node_id}/manual-{uuid.uuid4().hex[:8]}"
+        while not self.acquire_lease():
+            run = db.session.get(TrendRefreshRun, run_id, populate_existing=True)
+            if run is None or run.status != 'queued':
+                return
+            db.session.rollback()
+            self._stop_event.wait(self.tick_seconds)
+
+        self._is_leader = True
+        try:
+            while self._is_leader:
+                run = self._claim_next_run()
+                if run is None:
+                    break
+                self.execute(run)
+        finally:
+            if self._is_leader:
+                release_lease(LEASE_NAME, self.node_id)
+            self._is_leader = False
+
+    def _claim_next_run(self) -> Optional[TrendRefreshRun]:
+        run = TrendRefreshRun.query.filter_by(status='queued').order_by(TrendRefreshRun.requested_at).first()
+        if run is None:
+            return None
+        return self.claim(run.id)
+
+    def claim(self, run_id: str) -> Optional[TrendRefreshRun]:
+        """Move a queued run to running; None if another process got to it first."""
+        claimed = TrendRefreshRun.query.filter_by(id=run_id, status='queued').update({
+            'status': 'running',
+            'started_at': datetime.utcnow(),
+            'runner': self.node_id
+        }, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            return None
+        return db.session.get(TrendRefreshRun, run_id, populate_existing=True)
+
+    def _load_schedule(self):
+        """Pick up each platform's schedule from its last run, so a new leader does not refresh everything at once."""
+        now = datetime.utcnow()
+        for platform in self.platforms:
+            last_run = TrendRefreshRun.query.filter(
+                db.or_(TrendRefreshRun.platform == platform, TrendRefreshRun.platform.is_(None)),
+                TrendRefreshRun.requested_at.isnot(None)
+            ).order_by(TrendRefreshRun.requested_at.desc()).first()
+            if last_run:
+                self._next_due[platform] = last_run.requested_at + self._jittered(self.intervals[platform])
+            else:
+                # Spread the first runs out a little instead of firing all platforms together
+                self._next_due[platform] = now + timedelta(seconds=random.uniform(0, self.tick_seconds * 2))
+
+    def _fail_stale_runs(self):
+        """Fail runs left 'running' by a leader that died mid-run."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_run_seconds)
+        stale = TrendRefreshRun.query.filter(
+            TrendRefreshRun.status == 'running',
+            TrendRefreshRun.started_at < cutoff
+        ).update({
+            'status': 'failed',
+            'error': 'Scheduler stopped while the run was in progress',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if stale:
+            logger.warning(f"Marked {stale} abandoned trend refresh runs as failed")
+
+    def _jittered(self, interval: float) -> timedelta:
+        return timedelta(seconds=interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+class _LeaseHeartbeat:
+    """Renews the scheduler's lease every third of its length while a run is in progress."""
+
+    def __init__(self, scheduler: TrendRefreshScheduler, app):
+        self.scheduler = scheduler
+        self.app = app
+        self.interval = max(scheduler.lease_seconds / 3.0, 1.0)
+        self._lost = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='trend-scheduler-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def ensure_held(self):
+        """Raise LeaseLost unless the lease was kept through the run so far; renews it once more to be sure."""
+        if self._lost.is_set() or not acquire_lease(LEASE_NAME, self.scheduler.node_id,
+                                                    self.scheduler.lease_seconds, renewing=True):
+            raise LeaseLost(f"{self.scheduler.node_id} no longer holds the {LEASE_NAME} lease")
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    if not acquire_lease(LEASE_NAME, self.scheduler.node_id, self.scheduler.lease_seconds,
+                                         renewing=True):
+                        self._lost.set()
+                        return
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Trend scheduler heartbeat failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+def acquire_lease(name: str, holder: str, lease_seconds: int, renewing: bool = False) -> bool:
+    """Take or renew the named lease for `holder`; returns whether it holds the lease now.
+
+    The lease changes hands only once it has expired. `renewing` tells an
+    extension of a lease already held apart from a fresh acquisition, which
+    resets acquired_at.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    renewed = SchedulerLease.query.filter(
+        SchedulerLease.name == name,
+        db.or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now)
+    ).update({'holder': holder, 'expires_at': expires_at}, synchronize_session=False)
+    if renewed:
+        lease = db.session.get(SchedulerLease, name)
+        if lease.acquired_at is None or not renewing:
+            lease.acquired_at = now
+        db.session.commit()
+        return True
+    db.session.commit()
+
+    if db.session.get(SchedulerLease, name) is None:
+        db.session.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at, acquired_at=now))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+    return False
+
+def release_lease(name: str, holder: str):
+    """Expire the named lease now if `holder` has it, so the next taker need not wait."""
+    SchedulerLease.query.filter_by(name=name, holder=holder).update(
+        {'expires_at': datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+
+def enqueue_refresh(platform: str = None, trigger: str = 'manual') -> TrendRefreshRun:
+    """Queue a trend refresh run for the scheduler leader to execute."""
+    run = TrendRefreshRun(
+        id=uuid.uuid4().hex,
+        platform=platform,
+        trigger=trigger,
+        status='queued',
+        requested_at=datetime.utcnow()
+    )
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+def get_refresh_status() -> Dict[str, Any]:
+    """Current leader plus the latest run overall and per platform."""
+    lease = db.session.get(SchedulerLease, LEASE_NAME)
+    finished = TrendRefreshRun.query.filter(TrendRefreshRun.finished_at.isnot(None))
+    latest = finished.order_by(TrendRefreshRun.finished_at.desc()).first()
+
+    platforms = {}
+    for (platform,) in db.session.query(TrendRefreshRun.platform).filter(
+        TrendRefreshRun.platform.isnot(None)
+    ).distinct():
+        run = finished.filter(TrendRefreshRun.platform == platform).order_by(
+            TrendRefreshRun.finished_at.desc()
+        ).first()
+        if run:
+            platforms[platform] = run.to_dict()
+
+    return {
+        'leader': lease.to_dict() if lease and lease.expires_at and lease.expires_at > datetime.utcnow() else None,
+        'queued': TrendRefreshRun.query.filter_by(status='queued').count(),
+        'running': TrendRefreshRun.query.filter_by(status='running').count(),
+        'last_run': latest.to_dict() if latest else None,
+        'platforms': platforms
+    }
+
+def start_trend_scheduler(app, trend_analyzer=None) -> Optional[TrendRefreshScheduler]:
+    """Start the scheduler thread for this process unless TREND_SCHEDULER_ENABLED is false."""
+    if os.getenv('TREND_SCHEDULER_ENABLED', 'true').lower() != 'true':
+        return None
+    scheduler = TrendRefreshScheduler(trend_analyzer)
+    scheduler.start(app)
+    app.extensions['trend_scheduler'] = scheduler
+    return scheduler
+
+def trigger_refresh(app, platform: str = None, trend_analyzer=None) -> TrendRefreshRun:
+    """Queue a manual refresh and make sure something picks it up promptly.
+
+    With the scheduler running, the leader claims the run on its next tick
+    (immediately, if this process is the leader). Without it, a one-off
+    background thread of this process runs it under the scheduler lease, so
+    manual refreshes (here or in other processes) run one at a time.
+    """
+    run = enqueue_refresh(platform=platform, trigger='manual')
+    scheduler = app.extensions.get('trend_scheduler')
+    if scheduler is not None:
+        scheduler.wake()
+        return run
+
+    def run_now(run_id):
+        with app.app_context():
+            try:
+                TrendRefreshScheduler(trend_analyzer).run_manual(run_id)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Manual trend refresh {run_id} failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=run_now, args=(run.id,), name=f'trend-refresh-{run.id[:8]}', daemon=True).start()
+    return run
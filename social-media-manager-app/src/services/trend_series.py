@@ -0,0 +1,107 @@
+import os
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import numpy as np
+from sqlalchemy import select, func
+from src.models import db, Trend
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUCKETS = ('hour', 'day')
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps of a series sorted by x.
+
+    The first and last points are always kept. The points between are split
+    into threshold - 2 buckets, and each bucket keeps the point forming the
+    largest triangle with the point kept before it and the mean of the next
+    bucket, so peaks and dips survive where plain striding would skip them.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    every = (count - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    kept[-1] = count - 1
+    return kept
+
+class EngagementSeries:
+    """Engagement of trends over time, as raw points, SQL time buckets, or LTTB-downsampled.
+
+    bucket='hour' or 'day' groups trends by created_at in the database and
+    returns the average, maximum and count per bucket. downsample caps the
+    raw or bucketed series to a number of points with lttb(), which keeps
+    its shape (spikes included) for charting.
+    """
+
+    def __init__(self):
+        self.default_points = int(os.getenv('TREND_SERIES_DEFAULT_POINTS', 500))
+        self.max_points = int(os.getenv('TREND_SERIES_MAX_POINTS', 5000))
+
+    def clamp_points(self, points: Optional[int]) -> int:
+        """Target size of a downsampled series; unset, zero or negative means the default."""
+        if points is None or points <= 0:
+            return self.default_points
+        return max(3, min(points, self.max_points))
+
+    def series(self, start: datetime, bucket: Optional[str] = None, downsample: Optional[int] = None,
+               **filters) -> List[Dict[str, Any]]:
+        """Points for trends created since `start`, oldest first; `filters` narrow platform or category."""
+        if bucket is not None and bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {BUCKETS}")
+        points = self._buckets(start, bucket, filters) if bucket else self._raw(start, filters)
+        if downsample and len(points) > downsample:
+            x = np.fromiter((point['date'].timestamp() for point in points), dtype=float, count=len(points))
+            y = np.fromiter((point['engagement_score'] for point in points), dtype=float, count=len(points))
+            points = [points[index] for index in lttb(x, y, downsample)]
+        return [dict(point, date=point['date'].isoformat()) for point in points]
+
+    def _raw(self, start: datetime, filters: Dict[str, str]) -> List[Dict[str, Any]]:
+        query = select(Trend.created_at, Trend.engagement_score).where(Trend.created_at >= start)
+        for name, value in filters.items():
+            query = query.where(getattr(Trend, name) == value)
+        return [{
+            'date': created_at, 'engagement_score': engagement_score or 0.0
+        } for created_at, engagement_score in db.session.execute(query.order_by(Trend.created_at))]
+
+    def _buckets(self, start: datetime, bucket: str, filters: Dict[str, str]) -> List[Dict[str, Any]]:
+        period = self._bucket_expression(bucket)
+        query = select(
+            period,
+            func.avg(Trend.engagement_score),
+            func.max(Trend.engagement_score),
+            func.count(Trend.id)
+        ).where(Trend.created_at >= start).group_by(period).order_by(period)
+        for name, value in filters.items():
+            query = query.where(getattr(Trend, name) == value)
+        return [{
+            'date': period_start if isinstance(period_start, datetime) else datetime.fromisoformat(str(period_start)),
+            'engagement_score': float(average or 0.0),
+            'max_engagement': float(peak or 0.0),
+            'count': count
+        } for period_start, average, peak, count in db.session.execute(query)]
+
+    def _bucket_expression(self, bucket: str):
+        """Start of the created_at hour or day, computed by the database."""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            return func.date_trunc(bucket, Trend.created_at)
+        if dialect == 'sqlite':
+            return func.strftime('%Y-%m-%d %H:00:00' if bucket == 'hour' else '%Y-%m-%d 00:00:00', Trend.created_at)
+        raise ValueError(f"time buckets are not supported on {dialect}")
@@ -0,0 +1,236 @@
+import re
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, func
+from src.models import db, Trend, TrendToken, TrendSnapshot
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+
+def normalize_hashtag(tag: str) -> Optional[str]:
+    """'#AI Revolution' / 'ai revolution' -> '#airevolution'; None if nothing is left."""
+    tag = ''.join(_WORD.findall(str(tag).lower()))
+    return f'#{tag}' if tag else None
+
+def tokenize_trend(keyword: str, hashtags: Iterable[str]) -> List[str]:
+    """Index tokens for a trend: its normalized hashtags plus the words of its keyword."""
+    tokens = {normalize_hashtag(tag) for tag in hashtags or []}
+    tokens.update(_WORD.findall((keyword or '').lower()))
+    tokens.discard(None)
+    return sorted(tokens)
+
+class TrendTokenIndex:
+    """In-memory inverted index from hashtag and keyword tokens to trends.
+
+    The trend_token table is the durable postings list, appended during
+    ingest. Each process keeps a copy as token -> sorted numpy array of trend
+    ids, plus trend id -> engagement/platform arrays. When a new ingest lands
+    (newest trend_snapshot.ts changes) only trends updated and postings
+    written since the last load are read back. Trends deleted since then are
+    dropped, and an id reused by a new trend loses the old trend's postings.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, np.ndarray] = {}
+        self._ids = np.empty(0, dtype=np.int64)
+        self._engagement = np.empty(0, dtype=float)
+        self._platforms = np.empty(0, dtype=object)
+        self._created = np.empty(0, dtype=object)
+        self._trends_loaded_at = None
+        self._postings_loaded_at = None
+        self._generation = object()
+
+    def refresh(self):
+        """Pick up new postings and current engagement if an ingest happened since the last load."""
+        generation = db.session.execute(select(func.max(TrendSnapshot.ts))).scalar()
+        with self._lock:
+            if generation == self._generation:
+                return
+            self._load_trends()
+            self._load_postings()
+            self._generation = generation
+
+    def _load_trends(self):
+        query = select(Trend.id, Trend.engagement_score, Trend.platform, Trend.created_at, Trend.updated_at)
+        if self._trends_loaded_at is not None:
+            # >= re-reads the last load's newest rows, so none committed with the same time are missed
+            query = query.where(Trend.updated_at >= self._trends_loaded_at)
+        rows = db.session.execute(query.order_by(Trend.id)).all()
+        stamps = [row[4] for row in rows if row[4] is not None]
+        if stamps:
+            self._trends_loaded_at = max(stamps)
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        engagement = np.fromiter((row[1] or 0.0 for row in rows), dtype=float, count=len(rows))
+        platforms = np.array([row[2] for row in rows], dtype=object)
+        created = np.array([row[3] for row in rows], dtype=object)
+
+        positions = np.minimum(np.searchsorted(self._ids, ids), max(len(self._ids) - 1, 0))
+        known = self._ids[positions] == ids if len(self._ids) else np.zeros(len(ids), dtype=bool)
+        positions = positions[known]
+        # A known id with a different creation time is a new trend that took over a deleted one's id
+        reused = ids[known][self._created[positions] != created[known]]
+        self._engagement[positions] = engagement[known]
+        self._platforms[positions] = platforms[known]
+        self._created[positions] = created[known]
+        if (~known).any():
+            self._ids = np.concatenate([self._ids, ids[~known]])
+            order = np.argsort(self._ids, kind='stable')
+            self._ids = self._ids[order]
+            self._engagement = np.concatenate([self._engagement, engagement[~known]])[order]
+            self._platforms = np.concatenate([self._platforms, platforms[~known]])[order]
+            self._created = np.concatenate([self._created, created[~known]])[order]
+        if len(reused):
+            self.forget(reused, keep_trends=True)
+            self._load_postings(TrendToken.trend_id.in_(reused.tolist()))
+
+        # Every trend the table holds is loaded now, unless some were deleted since the last load
+        count = db.session.execute(select(func.count()).select_from(Trend)).scalar()
+        if count != len(self._ids):
+            live = db.session.execute(select(Trend.id)).scalars().all()
+            self.forget(np.setdiff1d(self._ids, np.asarray(live, dtype=np.int64)))
+
+    def _load_postings(self, where=None):
+        query = select(TrendToken.token, TrendToken.trend_id, TrendToken.indexed_at)
+        if where is not None:
+            query = query.where(where)
+        elif self._postings_loaded_at is not None:
+            query = query.where(TrendToken.indexed_at >= self._postings_loaded_at)
+        rows = db.session.execute(query).all()
+        if where is None:
+            stamps = [row[2] for row in rows if row[2] is not None]
+            if stamps:
+                self._postings_loaded_at = max(stamps)
+        self._add_postings((token, trend_id) for token, trend_id, _ in rows)
+
+    def _add_postings(self, postings: Iterable[Tuple[str, int]]):
+        grouped: Dict[str, List[int]] = {}
+        for token, trend_id in postings:
+            grouped.setdefault(token, []).append(trend_id)
+        for token, trend_ids in grouped.items():
+            existing = self._postings.get(token)
+            ids = np.asarray(trend_ids, dtype=np.int64)
+            self._postings[token] = np.union1d(existing, ids) if existing is not None else np.unique(ids)
+
+    def forget(self, trend_ids: Iterable[int], keep_trends: bool = False):
+        """Drop the postings of deleted trends, and with them the trends unless `keep_trends`."""
+        trend_ids = np.unique(np.fromiter(trend_ids, dtype=np.int64))
+        if not len(trend_ids):
+            return
+        with self._lock:
+            for token in list(self._postings):
+                kept = self._postings[token][~np.isin(self._postings[token], trend_ids, assume_unique=True)]
+                if len(kept):
+                    self._postings[token] = kept
+                else:
+                    del self._postings[token]
+            if not keep_trends:
+                kept = ~np.isin(self._ids, trend_ids, assume_unique=True)
+                self._ids = self._ids[kept]
+                self._engagement = self._engagement[kept]
+                self._platforms = self._platforms[kept]
+                self._created = self._created[kept]
+        logger.info(f"Dropped {len(trend_ids)} deleted trends from the token index")
+
+    def _positions(self, trend_ids: np.ndarray) -> np.ndarray:
+        """Positions in the engagement arrays of the given sorted ids; ids of deleted trends drop out."""
+        if not len(self._ids):
+            return np.empty(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._ids, trend_ids), len(self._ids) - 1)
+        return positions[self._ids[positions] == trend_ids]
+
+    def trends_for_tokens(self, tokens: Iterable[str], limit: int = 10, platform: str = None,
+                          exclude: Iterable[int] = ()) -> List[Dict[str, Any]]:
+        """Top-`limit` trends by engagement that carry any of `tokens` (hashtags or keyword words)."""
+        self.refresh()
+        normalized = set()
+        for token in tokens:
+            token = token.strip()
+            normalized.add(normalize_hashtag(token) if token.startswith('#') else token.lower())
+        with self._lock:
+            lists = [self._postings[token] for token in normalized if token in self._postings]
+            if not lists:
+                return []
+            candidates = np.unique(np.concatenate(lists))
+            candidates = candidates[~np.isin(candidates, np.fromiter(exclude, dtype=np.int64))]
+            positions = self._positions(candidates)
+            if platform:
+                positions = positions[self._platforms[positions] == platform]
+            if len(positions) > limit:
+                top = np.argpartition(-self._engagement[positions], limit - 1)[:limit]
+                positions = positions[top]
+            positions = positions[np.argsort(-self._engagement[positions], kind='stable')]
+            return [{'trend_id': int(self._ids[position]), 'engagement_score': float(self._engagement[position]),
+                     'platform': self._platforms[position]} for position in positions]
+
+    def top_hashtags(self, limit: int = 20, platform: str = None) -> List[Dict[str, Any]]:
+        """Hashtags ranked by the average engagement of the trends using them."""
+        self.refresh()
+        with self._lock:
+            results = []
+            for token, trend_ids in self._postings.items():
+                if not token.startswith('#'):
+                    continue
+                positions = self._positions(trend_ids)
+                if platform:
+                    positions = positions[self._platforms[positions] == platform]
+                if len(positions):
+                    engagement = self._engagement[positions]
+                    results.append({'hashtag': token, 'count': int(len(positions)),
+                                    'avg_engagement': round(float(engagement.mean()), 4)})
+        results.sort(key=lambda item: (item['avg_engagement'], item['count']), reverse=True)
+        return results[:limit]
+
+def postings_for(trend_ids: Dict[Tuple[str, str], int], trends_data: Dict[Tuple[str, str], Dict]) -> List[Dict]:
+    """trend_token rows for newly inserted trends, from the batch being ingested."""
+    return [
+        {'token': token, 'trend_id': trend_id}
+        for key, trend_id in trend_ids.items()
+        for token in tokenize_trend(trends_data[key]['keyword'], trends_data[key].get('hashtags'))
+    ]
+
+def backfill_trend_tokens(chunk_size: int = 1000) -> int:
+    """Index trends that have no postings yet, e.g. ones stored before trend_token existed."""
+    indexed = select(TrendToken.trend_id).where(TrendToken.trend_id == Trend.id).exists()
+    added = 0
+    last_id = 0
+    while True:
+        trends = db.session.execute(
+            select(Trend.id, Trend.keyword, Trend.hashtags).where(~indexed, Trend.id > last_id)
+            .order_by(Trend.id).limit(chunk_size)
+        ).all()
+        if not trends:
+            break
+        last_id = trends[-1][0]
+        rows = []
+        for trend_id, keyword, hashtags in trends:
+            try:
+                hashtags = json.loads(hashtags) if hashtags else []
+            except (json.JSONDecodeError, TypeError):
+                hashtags = []
+            tokens = tokenize_trend(keyword, hashtags if isinstance(hashtags, list) else [])
+            rows.extend({'token': token, 'trend_id': trend_id} for token in tokens)
+        db.session.bulk_insert_mappings(TrendToken, rows)
+        db.session.commit()
+        added += len(trends)
+    if added:
+        logger.info(f"Indexed tokens for {added} trends")
+    return added
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_token_index() -> TrendTokenIndex:
+    """Process-wide token index, loaded lazily on first lookup."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TrendTokenIndex()
+        return _index
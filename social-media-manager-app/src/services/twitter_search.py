@@ -0,0 +1,257 @@
+import os
+import math
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from src.models import db, TwitterSearchCursor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TwitterRateLimited(Exception):
+    """The recent search rate-limit window is used up until reset_at (epoch seconds)."""
+
+    def __init__(self, reset_at: Optional[float]):
+        self.reset_at = reset_at
+        super().__init__(f"Twitter rate limit exhausted until {reset_at}")
+
+class RateLimitTracker:
+    """Rate-limit window of the recent search endpoint, kept from x-rate-limit-* response headers.
+
+    `reserve` requests of every window are left unused, for other clients
+    sharing the token.
+    """
+
+    def __init__(self, reserve: int = 0):
+        self.reserve = reserve
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        with self._lock:
+            for header, attribute in (('x-rate-limit-limit', 'limit'), ('x-rate-limit-remaining', 'remaining'),
+                                      ('x-rate-limit-reset', 'reset_at')):
+                value = headers.get(header)
+                if value is not None:
+                    try:
+                        setattr(self, attribute, int(value))
+                    except ValueError:
+                        pass
+
+    def consume(self):
+        """Count a request against the window before its response (and headers) come back."""
+        with self._lock:
+            if self.remaining is not None:
+                self.remaining -= 1
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return (self.remaining is not None and self.remaining <= self.reserve
+                    and self.reset_at is not None and self.reset_at > time.time())
+
+    def page_budget(self, refresh_interval: float, default: int) -> int:
+        """Requests one refresh may spend, spreading what is left of the window over the refreshes until reset."""
+        with self._lock:
+            now = time.time()
+            if self.remaining is None or self.reset_at is None or self.reset_at <= now:
+                return default
+            available = max(self.remaining - self.reserve, 0)
+            refreshes_left = max(math.ceil((self.reset_at - now) / max(refresh_interval, 1)), 1)
+            return min(default, math.ceil(available / refreshes_left))
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset_at': datetime.utcfromtimestamp(self.reset_at).isoformat() if self.reset_at else None
+            }
+
+class TwitterSearchClient:
+    """Minimal Twitter API v2 recent search client that exposes rate-limit headers.
+
+    TWITTER_API_BASE_URL and `session` can point it at a local stand-in of
+    the API, e.g. one serving recorded responses.
+    """
+
+    def __init__(self, bearer_token: str, base_url: str = None, session: requests.Session = None,
+                 timeout: float = None):
+        self.bearer_token = bearer_token
+        self.base_url = (base_url or os.getenv('TWITTER_API_BASE_URL', 'https://api.twitter.com/2')).rstrip('/')
+        self.session = session or requests.Session()
+        self.timeout = timeout if timeout is not None else float(os.getenv('TWITTER_REQUEST_TIMEOUT_SECONDS', 10))
+        self.rate_limit = RateLimitTracker(reserve=int(os.getenv('TWITTER_RATE_LIMIT_RESERVE', 0)))
+
+    def search_recent(self, query: str, since_id: str = None, next_token: str = None,
+                      max_results: int = 100) -> Dict[str, Any]:
+        """One page of GET /tweets/search/recent, newest tweets first."""
+        if self.rate_limit.exhausted():
+            raise TwitterRateLimited(self.rate_limit.reset_at)
+        params = {
+            'query': query,
+            'max_results': max(10, min(max_results, 100)),
+            'tweet.fields': 'public_metrics,created_at'
+        }
+        if since_id:
+            params['since_id'] = since_id
+        if next_token:
+            params['next_token'] = next_token
+
+        self.rate_limit.consume()
+        response = self.session.get(
+            f"{self.base_url}/tweets/search/recent",
+            params=params,
+            headers={'Authorization': f'Bearer {self.bearer_token}'},
+            timeout=self.timeout
+        )
+        self.rate_limit.update(response.headers)
+        if response.status_code == 429:
+            raise TwitterRateLimited(self.rate_limit.reset_at)
+        response.raise_for_status()
+        return response.json()
+
+class _PageBudget:
+    """Extra pages shared by the queries of one refresh."""
+
+    def __init__(self, pages: int):
+        self._pages = pages
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self._pages <= 0:
+                return False
+            self._pages -= 1
+            return True
+
+class TwitterIncrementalSearch:
+    """Fetches only tweets newer than each query's stored cursor.
+
+    A refresh may spend up to TWITTER_MAX_PAGES_PER_REFRESH requests, fewer
+    when the rate-limit window would otherwise run dry before it resets.
+    Every scheduled query gets its first page; the rest go to queries with
+    more new tweets than fit on one. When the budget is short of one page per
+    query, the queries fetched longest ago go first.
+
+    Cursors are plain dicts between load_cursors() and save_cursors(), so
+    fetching needs no database access and the caller saves them only once the
+    tweets are stored.
+    """
+
+    def __init__(self, client: TwitterSearchClient, queries: List[str] = None):
+        self.client = client
+        self.queries = queries or [
+            query.strip()
+            for query in os.getenv('TWITTER_SEARCH_QUERIES', 'AI,technology,innovation,socialmedia,trending').split(',')
+            if query.strip()
+        ]
+        self.max_pages = int(os.getenv('TWITTER_MAX_PAGES_PER_REFRESH', 20))
+        self.page_size = int(os.getenv('TWITTER_PAGE_SIZE', 100))
+        self.refresh_interval = float(os.getenv(
+            'TREND_REFRESH_INTERVAL_TWITTER_SECONDS', os.getenv('TREND_REFRESH_INTERVAL_SECONDS', 900)
+        ))
+
+    def load_cursors(self) -> Dict[str, Dict[str, Any]]:
+        stored = {
+            cursor.search_query: cursor
+            for cursor in TwitterSearchCursor.query.filter(TwitterSearchCursor.search_query.in_(self.queries))
+        }
+        cursors = {}
+        for query in self.queries:
+            cursor = stored.get(query)
+            cursors[query] = {
+                'since_id': cursor.since_id if cursor else None,
+                'next_token': cursor.next_token if cursor else None,
+                'pending_newest_id': cursor.pending_newest_id if cursor else None,
+                'last_fetched_at': cursor.last_fetched_at if cursor else None
+            }
+        return cursors
+
+    def save_cursors(self, cursors: Dict[str, Dict[str, Any]]):
+        """Persist the cursors of queries fetched this refresh; the caller has stored their tweets."""
+        for query, state in cursors.items():
+            if 'new_tweets' not in state:
+                continue
+            cursor = db.session.get(TwitterSearchCursor, query)
+            if cursor is None:
+                cursor = TwitterSearchCursor(search_query=query, total_tweets=0)
+                db.session.add(cursor)
+            cursor.since_id = state['since_id']
+            cursor.next_token = state['next_token']
+            cursor.pending_newest_id = state['pending_newest_id']
+            cursor.last_fetched_at = state['last_fetched_at']
+            cursor.last_new_tweets = state['new_tweets']
+            cursor.total_tweets = (cursor.total_tweets or 0) + state['new_tweets']
+        db.session.commit()
+
+    def plan(self, cursors: Dict[str, Dict[str, Any]], max_pages: int = None) -> Tuple[List[str], '_PageBudget']:
+        """Queries to fetch this refresh and the shared pool of pages beyond their first."""
+        budget = self.client.rate_limit.page_budget(self.refresh_interval, max_pages or self.max_pages)
+        stalest_first = sorted(self.queries, key=lambda query: cursors[query]['last_fetched_at'] or datetime.min)
+        scheduled = stalest_first[:budget]
+        if len(scheduled) < len(self.queries):
+            logger.info(f"Twitter page budget {budget} covers {len(scheduled)} of {len(self.queries)} queries")
+        return scheduled, _PageBudget(budget - len(scheduled))
+
+    def fetch(self, cursors: Dict[str, Dict[str, Any]], max_pages: int = None) -> Dict[str, List[Dict[str, Any]]]:
+        """New tweets per query within this refresh's page budget; advances `cursors` in place."""
+        scheduled, extra_pages = self.plan(cursors, max_pages)
+        results = {}
+        for query in scheduled:
+            try:
+                tweets, cursors[query] = self.fetch_query(query, cursors[query], extra_pages)
+            except TwitterRateLimited:
+                logger.warning(f"Twitter search for {query} skipped: rate limit exhausted")
+                continue
+            except Exception as e:
+                # One failed query should not cost the other keywords
+                logger.warning(f"Twitter search for {query} failed: {str(e)}")
+                continue
+            results[query] = tweets
+        return results
+
+    def fetch_query(self, query: str, cursor: Dict[str, Any], extra_pages: '_PageBudget') -> Tuple[List[Dict], Dict]:
+        """New tweets for one query, paging while `extra_pages` allows; returns them with the advanced cursor."""
+        cursor = dict(cursor)
+        since_id = cursor['since_id']
+        # Resume an unfinished backfill, or start a new pagination above since_id
+        token = cursor['next_token']
+        newest = cursor['pending_newest_id'] if token else None
+        tweets = []
+        pages = 0
+        while True:
+            try:
+                page = self.client.search_recent(query, since_id=since_id, next_token=token, max_results=self.page_size)
+            except TwitterRateLimited:
+                if not pages:
+                    raise
+                cursor.update(next_token=token, pending_newest_id=newest)
+                break
+            except requests.HTTPError as e:
+                if not (token and e.response is not None and e.response.status_code == 400):
+                    raise
+                # Pagination tokens expire with the 7-day search window; skip the rest of the backfill
+                logger.warning(f"Twitter pagination for {query} expired, resuming from the newest tweet seen")
+                cursor.update(since_id=newest or since_id, next_token=None, pending_newest_id=None)
+                break
+            pages += 1
+            tweets.extend(page.get('data') or [])
+            meta = page.get('meta') or {}
+            if newest is None:
+                newest = meta.get('newest_id')
+            token = meta.get('next_token')
+            if not token:
+                cursor.update(since_id=newest or since_id, next_token=None, pending_newest_id=None)
+                break
+            if not extra_pages.take():
+                cursor.update(next_token=token, pending_newest_id=newest)
+                break
+
+        cursor.update(last_fetched_at=datetime.utcnow(), new_tweets=len(tweets), pages=pages)
+        return tweets, cursor
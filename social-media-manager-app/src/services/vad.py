@@ -0,0 +1,122 @@
+import os
+import wave
+import logging
+import tempfile
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class VoiceActivityDetector:
+    """Finds the speech regions of a decoded audio track (16-bit mono PCM WAV).
+
+    Uses WebRTC VAD when `webrtcvad` is installed and an adaptive energy
+    detector otherwise. Frames are classified individually, then merged into
+    segments: short gaps are bridged, short blips dropped and every segment
+    padded so words at the edges are not clipped.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+        self.mode = os.getenv('VAD_MODE', 'auto').lower()  # auto, webrtc, energy
+        self.aggressiveness = int(os.getenv('VAD_AGGRESSIVENESS', 2))
+        self.frame_ms = 30
+        self.energy_margin_db = float(os.getenv('VAD_ENERGY_MARGIN_DB', 12))
+        self.energy_floor_db = float(os.getenv('VAD_ENERGY_FLOOR_DB', -50))
+        self.energy_ceiling_db = -35.0  # never require more than this, even when speech never pauses
+        self.min_speech_ms = int(os.getenv('VAD_MIN_SPEECH_MS', 250))
+        self.min_silence_ms = int(os.getenv('VAD_MIN_SILENCE_MS', 500))
+        self.padding_ms = int(os.getenv('VAD_PADDING_MS', 200))
+        # Above this share of speech, splitting the track costs more than it saves
+        self.full_track_ratio = float(os.getenv('VAD_FULL_TRACK_RATIO', 0.9))
+
+    def read_wav(self, audio_path: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Read a 16-bit PCM WAV file as mono int16 samples, or None if it is in another format."""
+        try:
+            with wave.open(audio_path, 'rb') as wav:
+                if wav.getsampwidth() != 2:
+                    return None
+                channels = wav.getnchannels()
+                sample_rate = wav.getframerate()
+                samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        except (wave.Error, EOFError) as e:
+            logger.warning(f"VAD could not read {audio_path}: {str(e)}")
+            return None
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        return samples, sample_rate
+
+    def detect(self, samples: np.ndarray, sample_rate: int) -> List[Tuple[float, float]]:
+        """Return (start, end) speech segments in seconds."""
+        frame_length = int(sample_rate * self.frame_ms / 1000)
+        num_frames = len(samples) // frame_length
+        if num_frames == 0:
+            return []
+        frames = samples[:num_frames * frame_length].reshape(num_frames, frame_length)
+
+        speech = None
+        if self.mode in ('auto', 'webrtc'):
+            speech = self._webrtc_frames(frames, sample_rate)
+        if speech is None:
+            speech = self._energy_frames(frames)
+        return self._segments(speech, len(samples) / sample_rate)
+
+    def _webrtc_frames(self, frames: np.ndarray, sample_rate: int) -> Optional[np.ndarray]:
+        """Classify frames with WebRTC VAD; None when it is unavailable for this audio."""
+        if sample_rate not in (8000, 16000, 32000, 48000):
+            return None
+        try:
+            import webrtcvad
+        except ImportError:
+            if self.mode == 'webrtc':
+                logger.warning("webrtcvad not installed - using energy VAD")
+            return None
+        vad = webrtcvad.Vad(self.aggressiveness)
+        return np.array([vad.is_speech(frame.tobytes(), sample_rate) for frame in frames])
+
+    def _energy_frames(self, frames: np.ndarray) -> np.ndarray:
+        """Classify frames as speech when they are clearly louder than the clip's noise floor."""
+        rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+        level_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+        noise_floor_db = np.percentile(level_db, 10)
+        threshold_db = min(max(noise_floor_db + self.energy_margin_db, self.energy_floor_db), self.energy_ceiling_db)
+        return level_db > threshold_db
+
+    def _segments(self, speech: np.ndarray, duration: float) -> List[Tuple[float, float]]:
+        """Turn per-frame decisions into padded, merged segments."""
+        frame_seconds = self.frame_ms / 1000
+        padding = self.padding_ms / 1000
+        segments = []
+        start = None
+        for index, is_speech in enumerate(np.append(speech, False)):
+            if is_speech and start is None:
+                start = index
+            elif not is_speech and start is not None:
+                segments.append([start * frame_seconds, index * frame_seconds])
+                start = None
+
+        merged = []
+        for segment in segments:
+            if merged and segment[0] - merged[-1][1] < self.min_silence_ms / 1000:
+                merged[-1][1] = segment[1]
+            else:
+                merged.append(segment)
+
+        return [
+            (max(start - padding, 0.0), min(end + padding, duration))
+            for start, end in merged
+            if end - start >= self.min_speech_ms / 1000
+        ]
+
+    def write_segment(self, samples: np.ndarray, sample_rate: int, start: float, end: float) -> str:
+        """Write one segment of the track to a temporary WAV file and return its path."""
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_audio:
+            path = temp_audio.name
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(samples[int(start * sample_rate):int(end * sample_rate)].tobytes())
+        return path
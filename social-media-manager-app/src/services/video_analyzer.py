@@ -1,102 +1,349 @@
 import os
 import tempfile
 import base64
+import time
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import requests
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from src.services.ai_provider_service import AIProviderService
+from src.services.transcription import RemoteTranscriptionBackend, get_transcriber
+from src.services.vad import VoiceActivityDetector
+from src.services.audio_fingerprint import AudioFingerprinter
 from src.models import db, VideoAnalysis
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Query parameters that only track where a share came from and never change the media:
+# on every host (plus utm_*), and per platform where a short name is only safe to drop there
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'si', 'feature'}
+_HOST_TRACKING_PARAMS = {
+    'twitter.com': {'s', 't', 'ref_src', 'ref_url'},
+    'x.com': {'s', 't', 'ref_src', 'ref_url'},
+    'instagram.com': {'igshid', 'igsh'},
+    'tiktok.com': {'_r', '_t', 'is_from_webapp', 'sender_device', 'share_id'},
+}
+
+def _tracking_params(host: str) -> set:
+    for domain, params in _HOST_TRACKING_PARAMS.items():
+        if host == domain or host.endswith('.' + domain):
+            return _TRACKING_PARAMS | params
+    return _TRACKING_PARAMS
+
+def normalize_video_url(video_url: str) -> str:
+    """Normalize a video URL so re-shares of the same post compare equal."""
+    parts = urlsplit(video_url.strip())
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'm.', 'mobile.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    tracking = _tracking_params(host)
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in tracking
+    )
+    return urlunsplit(('https', host, parts.path.rstrip('/') or '/', urlencode(query), ''))
+
+class VideoDownloadError(Exception):
+    """Raised when a video cannot be downloaded from its URL."""
+
 class VideoAnalyzer:
     """Service for analyzing video content including transcription and visual analysis."""
     
     def __init__(self):
         self.ai_service = AIProviderService()
+        self.transcriber = get_transcriber()
+        self.vad = VoiceActivityDetector()
+        self.fingerprinter = AudioFingerprinter()
+        self.default_language = os.getenv('TRANSCRIPTION_LANGUAGE') or None
+        self.transcription_timeout = float(os.getenv('VIDEO_TRANSCRIPTION_TIMEOUT_SECONDS', 300))
+        self.visual_timeout = float(os.getenv('VIDEO_VISUAL_TIMEOUT_SECONDS', 120))
+        self._branch_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('VIDEO_BRANCH_WORKERS', 4)),
+            thread_name_prefix='video-branch'
+        )
     
-    def analyze_video(self, user_id: int, video_data: bytes, video_url: str = None, post_id: int = None) -> Dict[str, Any]:
+    def analyze_video(self, user_id: int, video_data: bytes, video_url: str = None, post_id: int = None,
+                      language: str = None) -> Dict[str, Any]:
         """Analyze a video including transcription and visual description."""
         try:
-            # Save video data to a temporary file
-            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_video:
-                temp_video.write(video_data)
-                temp_video_path = temp_video.name
+            # Identical media analyzed before (under any URL or post) is served from the stored result
+            content_hash = hashlib.sha256(video_data).hexdigest()
+            cached = self._find_cached_analysis(content_hash=content_hash)
+            if cached:
+                return self._reuse_cached_analysis(cached, user_id, video_url, post_id)
+            
+            # Save video data to a temporary file, removed once both branches are done with it
+            temp_video_path = self._save_video_file(video_data)
             
+            # Transcription (CPU-bound) and frame analysis (network-bound) run side by side
+            branches = self._run_branches(user_id, temp_video_path, language,
+                                          cleanup=lambda: self._remove_file(temp_video_path))
+            transcription_result, transcription_seconds = branches["audio"]
+            visual_result, visual_seconds = branches["visual"]
+            
+            # Get AI config used
+            config = self.ai_service._get_config_for_user(user_id)
+            
+            # Save analysis results
+            analysis = self._build_analysis(user_id, video_url, post_id, transcription_result, visual_result, config,
+                                            transcription_seconds, visual_seconds, content_hash)
+            db.session.add(analysis)
             try:
-                # Extract audio for transcription
-                audio_path = self._extract_audio(temp_video_path)
-                if audio_path:
-                    transcription_result = self._transcribe_audio(user_id, audio_path)
-                    os.unlink(audio_path)  # Clean up audio file
-                else:
-                    transcription_result = {
-                        "transcription": "Audio extraction failed or no audio found.",
-                        "success": False
-                    }
-                
-                # Extract frame for visual analysis
-                frame_path = self._extract_frame(temp_video_path)
-                if frame_path:
-                    visual_result = self._analyze_frame(user_id, frame_path)
-                    os.unlink(frame_path)  # Clean up frame file
-                else:
-                    visual_result = {
-                        "description": "Frame extraction failed.",
-                        "success": False
-                    }
-                
-                # Get AI config used
-                config = self.ai_service._get_config_for_user(user_id)
-                
-                # Save analysis results
-                analysis = VideoAnalysis(
-                    post_id=post_id or 0,
-                    video_url=video_url or "",
-                    transcription_text=transcription_result.get("transcription", ""),
-                    visual_description=visual_result.get("description", ""),
-                    user_id=user_id,
-                    provider_config_id=config.id if config else None
-                )
-                
-                db.session.add(analysis)
                 db.session.commit()
-                
-                return {
-                    "success": True,
-                    "analysis_id": analysis.id,
-                    "transcription": transcription_result.get("transcription", ""),
-                    "visual_description": visual_result.get("description", ""),
-                    "transcription_success": transcription_result.get("success", False),
-                    "visual_success": visual_result.get("success", False)
-                }
-                
-            finally:
-                # Clean up temporary video file
-                os.unlink(temp_video_path)
+            except IntegrityError:
+                # Another worker stored the same media for this user and post first
+                db.session.rollback()
+                return self._reuse_cached_analysis(self._find_cached_analysis(content_hash=content_hash),
+                                                   user_id, video_url, post_id)
+            self._store_fingerprint(analysis, transcription_result)
+            
+            return self._analysis_response(analysis, transcription_result, visual_result)
                 
         except Exception as e:
             logger.error(f"Video analysis failed: {str(e)}")
             return {"error": f"Video analysis failed: {str(e)}"}
     
-    def analyze_video_url(self, user_id: int, video_url: str, post_id: int = None) -> Dict[str, Any]:
+    def analyze_video_url(self, user_id: int, video_url: str, post_id: int = None,
+                          language: str = None) -> Dict[str, Any]:
         """Analyze a video from URL including transcription and visual description."""
         try:
+            # A URL that was already analyzed does not need to be downloaded again
+            cached = self._find_cached_analysis(normalized_url=normalize_video_url(video_url))
+            if cached:
+                return self._reuse_cached_analysis(cached, user_id, video_url, post_id)
+            
             # Download video content
-            logger.info(f"Downloading video from {video_url}")
-            response = requests.get(video_url, timeout=30)
-            if response.status_code != 200:
-                return {"error": f"Failed to download video: {response.status_code}"}
+            try:
+                video_data = self._download_video(video_url)
+            except VideoDownloadError as e:
+                return {"error": str(e)}
             
-            video_data = response.content
-            return self.analyze_video(user_id, video_data, video_url, post_id)
+            return self.analyze_video(user_id, video_data, video_url, post_id, language)
             
         except Exception as e:
             logger.error(f"Video URL analysis failed: {str(e)}")
             return {"error": f"Video URL analysis failed: {str(e)}"}
     
+    def _download_video(self, video_url: str) -> bytes:
+        """Download video content from a URL."""
+        logger.info(f"Downloading video from {video_url}")
+        response = requests.get(video_url, timeout=30)
+        if response.status_code != 200:
+            raise VideoDownloadError(f"Failed to download video: {response.status_code}")
+        return response.content
+    
+    def _save_video_file(self, video_data: bytes) -> str:
+        """Write video bytes to a temporary file and return its path."""
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_video:
+            temp_video.write(video_data)
+            return temp_video.name
+    
+    def _remove_file(self, path: str):
+        """Delete a temporary file, logging instead of raising if it cannot be removed."""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove temporary file {path}: {str(e)}")
+    
+    def _build_analysis(self, user_id: int, video_url: Optional[str], post_id: Optional[int],
+                        transcription_result: Dict[str, Any], visual_result: Dict[str, Any], config,
+                        transcription_seconds: float = None, visual_seconds: float = None,
+                        content_hash: str = None) -> VideoAnalysis:
+        """Build an unsaved VideoAnalysis row from the branch results.
+        
+        The content hash is only kept when both branches succeeded, so partial
+        failures are re-analyzed on the next submission instead of being cached.
+        """
+        fully_analyzed = transcription_result.get("success") and visual_result.get("success")
+        return VideoAnalysis(
+            post_id=post_id or 0,
+            video_url=video_url or "",
+            transcription_text=transcription_result.get("transcription", ""),
+            visual_description=visual_result.get("description", ""),
+            user_id=user_id,
+            provider_config_id=config.id if config else None,
+            transcription_seconds=transcription_seconds,
+            visual_seconds=visual_seconds,
+            content_hash=content_hash if fully_analyzed else None,
+            normalized_url=normalize_video_url(video_url) if video_url else None
+        )
+    
+    def _analysis_response(self, analysis: VideoAnalysis, transcription_result: Dict[str, Any],
+                           visual_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the API response for a saved analysis."""
+        return {
+            "success": True,
+            "analysis_id": analysis.id,
+            "transcription": transcription_result.get("transcription", ""),
+            "visual_description": visual_result.get("description", ""),
+            "transcription_success": transcription_result.get("success", False),
+            "visual_success": visual_result.get("success", False),
+            "transcription_seconds": analysis.transcription_seconds,
+            "visual_seconds": analysis.visual_seconds,
+            "fingerprint_match": transcription_result.get("fingerprint_match"),
+            "cached": False
+        }
+    
+    def _find_cached_analysis(self, content_hash: str = None, normalized_url: str = None) -> Optional[VideoAnalysis]:
+        """Find a complete earlier analysis of the same media by content hash or normalized URL."""
+        query = VideoAnalysis.query.filter(VideoAnalysis.content_hash.isnot(None))
+        if content_hash:
+            query = query.filter(VideoAnalysis.content_hash == content_hash)
+        if normalized_url:
+            query = query.filter(VideoAnalysis.normalized_url == normalized_url)
+        return query.order_by(VideoAnalysis.id).first()
+    
+    def _cached_analysis_row(self, cached: VideoAnalysis, user_id: int, video_url: Optional[str],
+                             post_id: Optional[int]) -> VideoAnalysis:
+        """Return this user's row for cached media, building an unsaved copy if there is none yet."""
+        existing = VideoAnalysis.query.filter_by(
+            content_hash=cached.content_hash, user_id=user_id, post_id=post_id or 0
+        ).first()
+        if existing:
+            return existing
+        return VideoAnalysis(
+            post_id=post_id or 0,
+            video_url=video_url or cached.video_url,
+            transcription_text=cached.transcription_text,
+            visual_description=cached.visual_description,
+            user_id=user_id,
+            provider_config_id=cached.provider_config_id,
+            content_hash=cached.content_hash,
+            normalized_url=normalize_video_url(video_url) if video_url else cached.normalized_url
+        )
+    
+    def _reuse_cached_analysis(self, cached: VideoAnalysis, user_id: int, video_url: Optional[str],
+                               post_id: Optional[int]) -> Dict[str, Any]:
+        """Serve a submission from an earlier analysis of the same media."""
+        analysis = self._cached_analysis_row(cached, user_id, video_url, post_id)
+        if analysis.id is None:
+            db.session.add(analysis)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                analysis = self._cached_analysis_row(cached, user_id, video_url, post_id)
+        logger.info(f"Serving video analysis {analysis.id} from cached content {cached.content_hash[:12]}")
+        return self._cached_response(analysis)
+    
+    def _cached_response(self, analysis: VideoAnalysis) -> Dict[str, Any]:
+        """Build the API response for an analysis served from the cache."""
+        response = self._analysis_response(
+            analysis,
+            {"transcription": analysis.transcription_text, "success": True},
+            {"description": analysis.visual_description, "success": True}
+        )
+        response["cached"] = True
+        return response
+    
+    def _run_branches(self, user_id: int, video_path: str, language: str = None,
+                      cleanup=None) -> Dict[str, Tuple[Dict[str, Any], float]]:
+        """Run the audio and visual branches concurrently, each under its own timeout.
+        
+        Returns each branch's result with its wall-clock duration in seconds. A
+        branch that overruns its timeout is reported as failed and left to finish
+        in the background, since a running thread cannot be stopped; it keeps
+        reading `video_path`. `cleanup`, which removes that file, therefore runs
+        only once both branches have finished, not when this returns.
+        """
+        started = time.monotonic()
+        futures = {}
+        try:
+            app = current_app._get_current_object()
+            futures["audio"] = (
+                self._branch_executor.submit(self._timed_in_app_context, app, self._audio_branch, user_id, video_path, language),
+                self.transcription_timeout,
+                "transcription"
+            )
+            futures["visual"] = (
+                self._branch_executor.submit(self._timed_in_app_context, app, self._visual_branch, user_id, video_path),
+                self.visual_timeout,
+                "description"
+            )
+        finally:
+            if cleanup:
+                self._when_done([future for future, _, _ in futures.values()], cleanup)
+        
+        results = {}
+        for name, (future, timeout, result_key) in futures.items():
+            remaining = max(started + timeout - time.monotonic(), 0)
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                logger.warning(f"Video {name} branch timed out after {timeout:g}s")
+                future.cancel()
+                results[name] = ({result_key: f"Timed out after {timeout:g} seconds.", "success": False}, round(timeout, 3))
+            except Exception as e:
+                logger.error(f"Video {name} branch failed: {str(e)}")
+                results[name] = (
+                    {result_key: f"Analysis failed: {str(e)}", "success": False},
+                    round(time.monotonic() - started, 3)
+                )
+        return results
+    
+    def _when_done(self, futures: List, callback):
+        """Call `callback` once, after the last of `futures` finishes (right away if there are none)."""
+        pending = [len(futures)]
+        lock = threading.Lock()
+        
+        def finished(_):
+            with lock:
+                pending[0] -= 1
+                last = pending[0] == 0
+            if last:
+                callback()
+        
+        if not futures:
+            callback()
+        for future in futures:
+            future.add_done_callback(finished)
+    
+    def _timed_in_app_context(self, app, branch, *args) -> Tuple[Dict[str, Any], float]:
+        """Run a branch in its own app context (it may hit the database) and time it."""
+        started = time.monotonic()
+        with app.app_context():
+            result = branch(*args)
+        return result, round(time.monotonic() - started, 3)
+    
+    def _audio_branch(self, user_id: int, video_path: str, language: str = None) -> Dict[str, Any]:
+        """Extract the audio track and transcribe it."""
+        audio_path = self._extract_audio(video_path)
+        if not audio_path:
+            return {
+                "transcription": "Audio extraction failed or no audio found.",
+                "success": False
+            }
+        try:
+            return self._transcribe_track(user_id, audio_path, language)
+        finally:
+            os.unlink(audio_path)  # Clean up audio file
+    
+    def _visual_branch(self, user_id: int, video_path: str) -> Dict[str, Any]:
+        """Extract a representative frame and describe it."""
+        frame_path = self._extract_frame(video_path)
+        if not frame_path:
+            return {
+                "description": "Frame extraction failed.",
+                "success": False
+            }
+        try:
+            return self._analyze_frame(user_id, frame_path)
+        finally:
+            os.unlink(frame_path)  # Clean up frame file
+    
     def _extract_audio(self, video_path: str) -> Optional[str]:
         """Extract audio from video file."""
         try:
@@ -115,21 +362,71 @@ class VideoAnalyzer:
             logger.warning(f"Audio extraction failed: {str(e)}")
             return None
     
-    def _transcribe_audio(self, user_id: int, audio_path: str) -> Dict[str, Any]:
-        """Transcribe audio using Whisper."""
+    def _transcribe_track(self, user_id: int, audio_path: str, language: str = None) -> Dict[str, Any]:
+        """Reuse the transcript of an earlier upload of the same audio, otherwise transcribe the track.
+        
+        A fresh transcription carries the track's fingerprint under "audio_fingerprint"
+        so it can be indexed with the saved analysis (see _store_fingerprint).
+        """
+        audio = self.vad.read_wav(audio_path) if self.fingerprinter.enabled else None
+        landmarks = []
+        if audio is not None:
+            try:
+                landmarks = self.fingerprinter.fingerprint(*audio)
+                match = self.fingerprinter.find_match(landmarks)
+            except Exception as e:
+                logger.warning(f"Audio fingerprinting failed: {str(e)}")
+                db.session.rollback()
+                match = None
+            matched = db.session.get(VideoAnalysis, match["analysis_id"]) if match else None
+            if matched:
+                logger.info(f"Audio matches analysis {matched.id} ({match['matches']} landmarks), reusing its transcript")
+                return {
+                    "success": True,
+                    "transcription": matched.transcription_text or "",
+                    "language": None,
+                    "fingerprint_match": match
+                }
+        
+        result = self._transcribe_audio(user_id, audio_path, language, audio)
+        if result.get("success") and landmarks:
+            result["audio_fingerprint"] = landmarks
+        return result
+    
+    def _store_fingerprint(self, analysis: VideoAnalysis, transcription_result: Dict[str, Any]):
+        """Index the audio fingerprint of a freshly transcribed, saved analysis."""
+        landmarks = transcription_result.pop("audio_fingerprint", None)
+        if not landmarks or analysis.id is None:
+            return
         try:
-            import whisper
-            # Load the Whisper model
-            model = whisper.load_model("base")
-            
-            # Transcribe the audio
-            result = model.transcribe(audio_path)
-            
-            return {
-                "success": True,
-                "transcription": result["text"],
-                "language": result["language"]
-            }
+            self.fingerprinter.store(analysis.id, landmarks)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Storing audio fingerprint for analysis {analysis.id} failed: {str(e)}")
+    
+    def _transcribe_audio(self, user_id: int, audio_path: str, language: str = None,
+                          audio: Tuple = None) -> Dict[str, Any]:
+        """Transcribe the speech in an audio track, skipping silence and music found by VAD."""
+        language = language or self.default_language
+        try:
+            if self.vad.enabled and audio is None:
+                audio = self.vad.read_wav(audio_path)
+            if self.vad.enabled and audio is not None:
+                samples, sample_rate = audio
+                segments = self.vad.detect(samples, sample_rate)
+                if not segments:
+                    logger.info("No speech detected, skipping transcription")
+                    return {
+                        "success": True,
+                        "transcription": "",
+                        "language": None,
+                        "segments": [],
+                        "speech_detected": False
+                    }
+                speech_seconds = sum(end - start for start, end in segments)
+                if speech_seconds < self.vad.full_track_ratio * len(samples) / sample_rate:
+                    return self._transcribe_segments(user_id, samples, sample_rate, segments, language)
+            return self._transcribe_file(user_id, audio_path, language)
         except Exception as e:
             logger.error(f"Audio transcription failed: {str(e)}")
             # Fallback to AI service
@@ -144,6 +441,55 @@ class VideoAnalyzer:
                     "success": False
                 }
     
+    def _transcribe_file(self, user_id: int, audio_path: str, language: Optional[str]) -> Dict[str, Any]:
+        """Transcribe a whole audio file with the deployment's backend (TRANSCRIPTION_BACKEND)."""
+        backend = self.transcriber.backend
+        if isinstance(backend, RemoteTranscriptionBackend):
+            # Remote calls are billed to the user's own provider config, so they are not batched
+            return backend.for_user(user_id).transcribe(audio_path, language)
+        return self.transcriber.transcribe(audio_path, language)
+    
+    def _transcribe_segments(self, user_id: int, samples, sample_rate: int, segments: List[Tuple[float, float]],
+                             language: Optional[str]) -> Dict[str, Any]:
+        """Transcribe only the speech segments and stitch them back together on the original timeline."""
+        segment_paths = [self.vad.write_segment(samples, sample_rate, start, end) for start, end in segments]
+        try:
+            backend = self.transcriber.backend
+            if isinstance(backend, RemoteTranscriptionBackend):
+                results = backend.for_user(user_id).transcribe_batch(segment_paths, language)
+            else:
+                results = self.transcriber.transcribe_many(segment_paths, language)
+        finally:
+            for path in segment_paths:
+                os.unlink(path)
+        
+        failed = next((result for result in results if not result.get("success")), None)
+        if failed:
+            raise RuntimeError(failed.get("error") or failed.get("transcription") or "segment transcription failed")
+        
+        texts = []
+        timeline = []
+        for (start, end), result in zip(segments, results):
+            text = result.get("transcription", "").strip()
+            if text:
+                texts.append(text)
+            if result.get("segments"):
+                timeline.extend(
+                    {"start": round(start + segment["start"], 3), "end": round(start + segment["end"], 3),
+                     "text": segment["text"]}
+                    for segment in result["segments"]
+                )
+            elif text:
+                timeline.append({"start": start, "end": end, "text": text})
+        
+        return {
+            "success": True,
+            "transcription": " ".join(texts),
+            "language": next((result.get("language") for result in results if result.get("language")), language),
+            "segments": timeline,
+            "speech_detected": True
+        }
+    
     def _extract_frame(self, video_path: str) -> Optional[str]:
         """Extract a frame from video file."""
         try:
@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import uuid
+import random
+import signal
+import socket
+import logging
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from src.models import db, VideoAnalysisJob
+from src.services.trend_scheduler import acquire_lease, release_lease
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'video_job_workers'
+
+class JobTimeoutError(Exception):
+    """Raised inside a worker when a job exceeds its timeout."""
+
+class VideoJobQueue:
+    """Persistent video analysis job queue backed by the `video_analysis_job` table.
+
+    Claiming is a conditional UPDATE on the row status, so any number of worker
+    processes (on SQLite or Postgres) can poll the same table without handing
+    the same job out twice.
+    """
+
+    def __init__(self):
+        self.max_attempts = int(os.getenv('VIDEO_JOB_MAX_ATTEMPTS', 3))
+        self.timeout_seconds = int(os.getenv('VIDEO_JOB_TIMEOUT_SECONDS', 600))
+        self.backoff_base_seconds = float(os.getenv('VIDEO_JOB_BACKOFF_BASE_SECONDS', 30))
+        self.backoff_max_seconds = float(os.getenv('VIDEO_JOB_BACKOFF_MAX_SECONDS', 900))
+        self.lease_grace_seconds = int(os.getenv('VIDEO_JOB_LEASE_GRACE_SECONDS', 60))
+
+    def enqueue(self, user_id: int, video_url: str, post_id: int = None, language: str = None) -> VideoAnalysisJob:
+        """Add a video analysis job to the queue."""
+        job = VideoAnalysisJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            video_url=video_url,
+            post_id=post_id,
+            language=language,
+            status='queued',
+            max_attempts=self.max_attempts,
+            timeout_seconds=self.timeout_seconds,
+            run_after=datetime.utcnow()
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def claim(self, worker_id: str) -> Optional[VideoAnalysisJob]:
+        """Atomically claim the next runnable job for a worker."""
+        now = datetime.utcnow()
+        candidates = db.session.query(VideoAnalysisJob.id).filter(
+            VideoAnalysisJob.status == 'queued',
+            VideoAnalysisJob.run_after <= now
+        ).order_by(VideoAnalysisJob.run_after, VideoAnalysisJob.created_at).limit(5).all()
+
+        for (job_id,) in candidates:
+            job = db.session.get(VideoAnalysisJob, job_id)
+            claimed = VideoAnalysisJob.query.filter_by(id=job_id, status='queued').update({
+                'status': 'running',
+                'attempts': VideoAnalysisJob.attempts + 1,
+                'locked_by': worker_id,
+                'started_at': now,
+                'lease_expires_at': now + timedelta(seconds=job.timeout_seconds + self.lease_grace_seconds)
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                db.session.refresh(job)
+                return job
+        return None
+
+    def complete(self, job: VideoAnalysisJob, result: Dict[str, Any]):
+        """Mark a job as succeeded and store its result."""
+        job.status = 'succeeded'
+        job.result = json.dumps(result)
+        job.analysis_id = result.get('analysis_id')
+        job.last_error = None
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.lease_expires_at = None
+        db.session.commit()
+
+    def fail(self, job: VideoAnalysisJob, error: str):
+        """Record a failed attempt, re-queueing with backoff while attempts remain."""
+        job.last_error = error
+        job.locked_by = None
+        job.lease_expires_at = None
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=self._backoff_delay(job.attempts))
+            logger.warning(f"Video job {job.id} attempt {job.attempts} failed, retrying at {job.run_after}: {error}")
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            logger.error(f"Video job {job.id} failed after {job.attempts} attempts: {error}")
+        db.session.commit()
+
+    def recover_stale_jobs(self) -> int:
+        """Return orphaned running jobs (worker crashed or was killed) to the queue."""
+        stale_jobs = VideoAnalysisJob.query.filter(
+            VideoAnalysisJob.status == 'running',
+            VideoAnalysisJob.lease_expires_at < datetime.utcnow()
+        ).all()
+        for job in stale_jobs:
+            self.fail(job, f"Worker {job.locked_by} stopped while the job was running")
+        return len(stale_jobs)
+
+    def _backoff_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given number of attempts made."""
+        delay = min(self.backoff_base_seconds * (2 ** max(attempts - 1, 0)), self.backoff_max_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+class VideoJobWorker:
+    """Polls the job queue and runs video analyses, one job at a time."""
+
+    def __init__(self, worker_id: str = None, poll_interval: float = None):
+        from src.services.video_analyzer import VideoAnalyzer
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval or float(os.getenv('VIDEO_JOB_POLL_INTERVAL_SECONDS', 2))
+        self.queue = VideoJobQueue()
+        self.video_analyzer = VideoAnalyzer()
+        self._stopping = False
+
+    def run_forever(self):
+        """Process jobs until the process is asked to stop."""
+        logger.info(f"Video job worker {self.worker_id} started")
+        last_recovery = 0.0
+        while not self._stopping:
+            try:
+                if time.monotonic() - last_recovery > 60:
+                    recovered = self.queue.recover_stale_jobs()
+                    if recovered:
+                        logger.warning(f"Recovered {recovered} orphaned video jobs")
+                    last_recovery = time.monotonic()
+
+                job = self.queue.claim(self.worker_id)
+                if job is None:
+                    time.sleep(self.poll_interval)
+                    continue
+                self.run_job(job)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Video job worker {self.worker_id} error: {str(e)}")
+                time.sleep(self.poll_interval)
+
+    def stop(self, *args):
+        self._stopping = True
+
+    def run_job(self, job: VideoAnalysisJob):
+        """Run a single claimed job, enforcing its timeout."""
+        logger.info(f"Worker {self.worker_id} running video job {job.id} (attempt {job.attempts})")
+        try:
+            result = self._run_with_timeout(
+                lambda: self.video_analyzer.analyze_video_url(job.user_id, job.video_url, job.post_id, job.language),
+                job.timeout_seconds
+            )
+        except JobTimeoutError:
+            db.session.rollback()
+            self.queue.fail(job, f"Job timed out after {job.timeout_seconds} seconds")
+            return
+        except Exception as e:
+            db.session.rollback()
+            self.queue.fail(job, str(e))
+            return
+
+        if result.get('error'):
+            self.queue.fail(job, result['error'])
+        else:
+            self.queue.complete(job, result)
+
+    def _run_with_timeout(self, func, timeout_seconds: int):
+        """Run func, raising JobTimeoutError if it runs longer than timeout_seconds.
+
+        Uses SIGALRM, so it only applies in a process's main thread; elsewhere the
+        job lease is the only guard and a hung job is recovered once it expires.
+        """
+        if not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+            return func()
+
+        def _on_timeout(signum, frame):
+            raise JobTimeoutError()
+
+        previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+        signal.alarm(max(int(timeout_seconds), 1))
+        try:
+            return func()
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+def _worker_process_main(poll_interval: float):
+    """Entry point for a spawned worker process."""
+    from src.main import create_app
+    app = create_app(start_workers=False)
+    with app.app_context():
+        worker = VideoJobWorker(poll_interval=poll_interval)
+        signal.signal(signal.SIGTERM, worker.stop)
+        worker.run_forever()
+
+class VideoJobWorkerPool:
+    """Supervises a fixed number of worker processes, restarting any that die.
+
+    Given an app, the pool is gated on the `video_job_workers` lease row:
+    every web process runs the supervisor thread, but only the lease holder
+    spawns workers, so several web processes do not each start a pool. If the
+    holder stops, its lease expires and another process's pool takes over.
+    Without an app (the standalone entrypoint) the workers always run.
+    """
+
+    def __init__(self, num_workers: int, poll_interval: float = None, app=None):
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval or float(os.getenv('VIDEO_JOB_POLL_INTERVAL_SECONDS', 2))
+        self.app = app
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = int(os.getenv('VIDEO_JOB_POOL_LEASE_SECONDS', 30))
+        self.supervise_seconds = 5
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._is_leader = False
+        self._stop_event = threading.Event()
+        self._supervisor = None
+
+    def start(self):
+        if self.app is None:
+            self._start_workers()
+        self._supervisor = threading.Thread(target=self._supervise, name='video-job-supervisor', daemon=True)
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 10):
+        self._stop_event.set()
+        self._stop_workers(timeout)
+        if self.app is not None and self._is_leader:
+            with self.app.app_context():
+                release_lease(LEASE_NAME, self.node_id)
+                db.session.remove()
+            self._is_leader = False
+
+    def _start_workers(self):
+        for _ in range(self.num_workers):
+            self._processes.append(self._spawn())
+        logger.info(f"Started {self.num_workers} video job worker processes on {self.node_id}")
+
+    def _stop_workers(self, timeout: float = 10):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(timeout)
+        self._processes = []
+
+    def _spawn(self):
+        process = self._context.Process(
+            target=_worker_process_main,
+            args=(self.poll_interval,),
+            name='video-job-worker',
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _supervise(self):
+        while not self._stop_event.is_set():
+            if self.app is not None:
+                self._hold_lease()
+            for index, process in enumerate(self._processes):
+                if not process.is_alive():
+                    logger.warning(f"Video job worker pid={process.pid} exited with {process.exitcode}, restarting")
+                    self._processes[index] = self._spawn()
+            self._stop_event.wait(self.supervise_seconds)
+
+    def _hold_lease(self):
+        """Take or renew the pool lease, starting or stopping the workers when leadership changes."""
+        with self.app.app_context():
+            try:
+                is_leader = acquire_lease(LEASE_NAME, self.node_id, self.lease_seconds, renewing=self._is_leader)
+            except Exception as e:
+                # Keep the current state; an unrenewed lease simply runs out
+                db.session.rollback()
+                logger.error(f"Video job pool lease check failed: {str(e)}")
+                return
+            finally:
+                db.session.remove()
+
+        if is_leader and not self._is_leader:
+            logger.info(f"{self.node_id} now runs the video job workers")
+            self._start_workers()
+        elif self._is_leader and not is_leader:
+            logger.warning(f"{self.node_id} lost the video job pool lease, stopping its workers")
+            self._stop_workers()
+        self._is_leader = is_leader
+
+def start_video_job_workers(app) -> Optional[VideoJobWorkerPool]:
+    """Start this process's share of the worker pool configured by VIDEO_JOB_WORKERS (0 disables it).
+
+    Only the process holding the `video_job_workers` lease actually runs workers.
+    """
+    num_workers = int(os.getenv('VIDEO_JOB_WORKERS', 2))
+    if num_workers <= 0:
+        return None
+    pool = VideoJobWorkerPool(num_workers, app=app)
+    pool.start()
+    app.extensions['video_job_pool'] = pool
+    return pool
+
+if __name__ == '__main__':
+    # Standalone worker pool, e.g. when the web tier runs with VIDEO_JOB_WORKERS=0:
+    #   python -m src.services.video_job_queue
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    pool = VideoJobWorkerPool(int(os.getenv('VIDEO_JOB_WORKERS', 2)) or 1)
+    pool.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,270 @@
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Callable, Optional
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from src.models import db, VideoAnalysis
+from src.services.video_analyzer import VideoAnalyzer, VideoDownloadError, normalize_video_url
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class _Stage:
+    """A pool of threads that takes tasks from a bounded queue, processes them and hands them on."""
+
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], None], workers: int,
+                 inbox: queue.Queue, outbox: queue.Queue, downstream_workers: int, app):
+        self.name = name
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.downstream_workers = downstream_workers
+        self.app = app
+        self._remaining = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"video-pipeline-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                task = self.inbox.get()
+                if task is _STOP:
+                    break
+                if not task.get("error") and not task.get("cached_id"):
+                    try:
+                        self.handler(task)
+                    except Exception as e:
+                        logger.error(f"Video pipeline stage {self.name} failed for {task['url']}: {str(e)}")
+                        task["error"] = f"Video analysis failed: {str(e)}"
+                # Blocks while the next stage is saturated, which is what throttles this one
+                self.outbox.put(task)
+
+        # The last worker out tells every downstream worker to stop
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                for _ in range(self.downstream_workers):
+                    self.outbox.put(_STOP)
+
+class VideoAnalysisPipeline:
+    """Analyze a batch of videos as a staged pipeline.
+
+    Download (network), decode (ffmpeg/OpenCV), transcribe (CPU) and describe
+    (remote vision model) each run on their own thread pool, connected by
+    bounded queues, so one video can be transcribing while the next is
+    decoding and a third is downloading. All rows are committed at the end.
+    """
+
+    def __init__(self, video_analyzer: Optional[VideoAnalyzer] = None):
+        self.video_analyzer = video_analyzer or VideoAnalyzer()
+        self.download_workers = int(os.getenv('VIDEO_PIPELINE_DOWNLOAD_WORKERS', 4))
+        self.decode_workers = int(os.getenv('VIDEO_PIPELINE_DECODE_WORKERS', 2))
+        # Several transcribe workers let the transcriber batch queued videos (TRANSCRIPTION_BATCH_SIZE)
+        self.transcribe_workers = int(os.getenv('VIDEO_PIPELINE_TRANSCRIBE_WORKERS',
+                                                os.getenv('TRANSCRIPTION_BATCH_SIZE', 1)))
+        self.describe_workers = int(os.getenv('VIDEO_PIPELINE_DESCRIBE_WORKERS', 4))
+        self.queue_size = int(os.getenv('VIDEO_PIPELINE_QUEUE_SIZE', 4))
+
+    def run(self, user_id: int, trending_items: List[Dict[str, Any]], language: str = None) -> Dict[str, Any]:
+        """Analyze every video item and return per-item results in input order."""
+        tasks = [
+            {"index": index, "item_id": item.get("id"), "url": item["url"], "user_id": user_id,
+             "language": item.get("language") or language}
+            for index, item in enumerate(
+                item for item in trending_items if item.get("type") == "video" and item.get("url")
+            )
+        ]
+        if tasks:
+            self._run_stages(tasks)
+        return self._save_results(user_id, tasks)
+
+    def _run_stages(self, tasks: List[Dict[str, Any]]):
+        app = current_app._get_current_object()
+        stage_specs = [
+            ("download", self._download, self.download_workers),
+            ("decode", self._decode, self.decode_workers),
+            ("transcribe", self._transcribe, self.transcribe_workers),
+            ("describe", self._describe, self.describe_workers),
+        ]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stage_specs]
+        done = queue.Queue()
+
+        stages = []
+        for i, (name, handler, workers) in enumerate(stage_specs):
+            last = i == len(stage_specs) - 1
+            stage = _Stage(
+                name, handler, workers,
+                inbox=queues[i],
+                outbox=done if last else queues[i + 1],
+                downstream_workers=1 if last else max(stage_specs[i + 1][2], 1),
+                app=app
+            )
+            stage.start()
+            stages.append(stage)
+
+        def _feed():
+            for task in tasks:
+                queues[0].put(task)
+            for _ in range(stages[0].workers):
+                queues[0].put(_STOP)
+
+        threading.Thread(target=_feed, name="video-pipeline-feed", daemon=True).start()
+
+        while done.get() is not _STOP:
+            pass
+
+    def _download(self, task: Dict[str, Any]):
+        # Media analyzed before (same URL, or same bytes under another URL) skips the remaining stages
+        cached = self.video_analyzer._find_cached_analysis(normalized_url=normalize_video_url(task["url"]))
+        if cached:
+            task["cached_id"] = cached.id
+            return
+        try:
+            video_data = self.video_analyzer._download_video(task["url"])
+        except VideoDownloadError as e:
+            task["error"] = str(e)
+            return
+        task["content_hash"] = hashlib.sha256(video_data).hexdigest()
+        cached = self.video_analyzer._find_cached_analysis(content_hash=task["content_hash"])
+        if cached:
+            task["cached_id"] = cached.id
+            return
+        task["video_path"] = self.video_analyzer._save_video_file(video_data)
+
+    def _decode(self, task: Dict[str, Any]):
+        try:
+            task["audio_path"] = self.video_analyzer._extract_audio(task["video_path"])
+            task["frame_path"] = self.video_analyzer._extract_frame(task["video_path"])
+        finally:
+            self._remove(task, "video_path")
+
+    def _transcribe(self, task: Dict[str, Any]):
+        started = time.monotonic()
+        try:
+            self._transcribe_audio(task)
+        finally:
+            task["transcription_seconds"] = round(time.monotonic() - started, 3)
+
+    def _transcribe_audio(self, task: Dict[str, Any]):
+        if task.get("audio_path"):
+            try:
+                task["transcription"] = self.video_analyzer._transcribe_track(
+                    task["user_id"], task["audio_path"], task["language"]
+                )
+            finally:
+                self._remove(task, "audio_path")
+        else:
+            task["transcription"] = {
+                "transcription": "Audio extraction failed or no audio found.",
+                "success": False
+            }
+
+    def _describe(self, task: Dict[str, Any]):
+        started = time.monotonic()
+        try:
+            self._describe_frame(task)
+        finally:
+            task["visual_seconds"] = round(time.monotonic() - started, 3)
+
+    def _describe_frame(self, task: Dict[str, Any]):
+        if task.get("frame_path"):
+            try:
+                task["visual"] = self.video_analyzer._analyze_frame(task["user_id"], task["frame_path"])
+            finally:
+                self._remove(task, "frame_path")
+        else:
+            task["visual"] = {
+                "description": "Frame extraction failed.",
+                "success": False
+            }
+
+    def _remove(self, task: Dict[str, Any], key: str):
+        path = task.pop(key, None)
+        if path and os.path.exists(path):
+            os.unlink(path)
+
+    def _save_results(self, user_id: int, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Insert all new analyses in one transaction and build the response."""
+        config = self.video_analyzer.ai_service._get_config_for_user(user_id)
+        analyses = {}
+        rows_by_key = {}
+        for task in tasks:
+            for key in ("video_path", "audio_path", "frame_path"):
+                self._remove(task, key)
+            if task.get("error"):
+                continue
+            if task.get("cached_id"):
+                cached = db.session.get(VideoAnalysis, task["cached_id"])
+                analysis = self.video_analyzer._cached_analysis_row(cached, user_id, task["url"], task["item_id"])
+            else:
+                analysis = self.video_analyzer._build_analysis(
+                    user_id, task["url"], task["item_id"], task["transcription"], task["visual"], config,
+                    task.get("transcription_seconds"), task.get("visual_seconds"), task.get("content_hash")
+                )
+            # The same media can appear twice in one batch; keep one row per (content, user, post)
+            if analysis.content_hash:
+                key = (analysis.content_hash, analysis.post_id)
+                analysis = rows_by_key.setdefault(key, analysis)
+            if analysis.id is None:
+                db.session.add(analysis)
+            analyses[task["index"]] = analysis
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent analysis of the same media; save rows one at a time
+            db.session.rollback()
+            for index, analysis in list(analyses.items()):
+                if analysis.id is not None:
+                    continue
+                db.session.add(analysis)
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    db.session.rollback()
+                    analyses[index] = VideoAnalysis.query.filter_by(
+                        content_hash=analysis.content_hash, user_id=user_id, post_id=analysis.post_id
+                    ).first()
+
+        stored = set()
+        for task in tasks:
+            analysis = analyses.get(task["index"])
+            if analysis is not None and analysis.id not in stored and task.get("transcription"):
+                self.video_analyzer._store_fingerprint(analysis, task["transcription"])
+                stored.add(analysis.id)
+
+        results = []
+        for task in tasks:
+            if task.get("error"):
+                analysis_result = {"error": task["error"]}
+            elif task.get("cached_id"):
+                analysis_result = self.video_analyzer._cached_response(analyses[task["index"]])
+            else:
+                analysis_result = self.video_analyzer._analysis_response(
+                    analyses[task["index"]], task["transcription"], task["visual"]
+                )
+            results.append({
+                "item_id": task["item_id"],
+                "url": task["url"],
+                "analysis": analysis_result
+            })
+
+        return {
+            "success": True,
+            "analyzed_count": len(results),
+            "results": results
+        }
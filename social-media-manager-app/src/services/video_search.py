@@ -0,0 +1,217 @@
+import os
+import re
+import html
+import logging
+from typing import Dict, Any, Optional
+from sqlalchemy import text, or_
+from src.models import db, VideoAnalysis
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Match markers put around hits by the database; replaced after HTML-escaping the snippet
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_SQLITE_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS video_analysis_fts USING fts5(
+        transcription_text, visual_description,
+        content='video_analysis', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS video_analysis_fts_ai AFTER INSERT ON video_analysis BEGIN
+        INSERT INTO video_analysis_fts(rowid, transcription_text, visual_description)
+        VALUES (new.id, new.transcription_text, new.visual_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_analysis_fts_ad AFTER DELETE ON video_analysis BEGIN
+        INSERT INTO video_analysis_fts(video_analysis_fts, rowid, transcription_text, visual_description)
+        VALUES ('delete', old.id, old.transcription_text, old.visual_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_analysis_fts_au AFTER UPDATE OF transcription_text, visual_description
+    ON video_analysis BEGIN
+        INSERT INTO video_analysis_fts(video_analysis_fts, rowid, transcription_text, visual_description)
+        VALUES ('delete', old.id, old.transcription_text, old.visual_description);
+        INSERT INTO video_analysis_fts(rowid, transcription_text, visual_description)
+        VALUES (new.id, new.transcription_text, new.visual_description);
+    END""",
+]
+
+_POSTGRES_INDEX_DDL = [
+    # Generated column, so the index follows every insert and update without triggers
+    """ALTER TABLE video_analysis ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(transcription_text, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(visual_description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_video_analysis_search_vector ON video_analysis USING GIN (search_vector)",
+]
+
+class VideoSearchIndex:
+    """Full-text search over video transcripts and visual descriptions.
+
+    SQLite uses an FTS5 external-content table kept in sync by triggers;
+    Postgres uses a generated tsvector column with a GIN index. Other
+    databases fall back to LIKE matching without ranking.
+    """
+
+    def __init__(self):
+        self.max_per_page = int(os.getenv('VIDEO_SEARCH_MAX_PER_PAGE', 100))
+        self.snippet_words = int(os.getenv('VIDEO_SEARCH_SNIPPET_WORDS', 16))
+
+    def ensure_index(self):
+        """Create the search index for the current database if it does not exist yet."""
+        dialect = db.engine.dialect.name
+        try:
+            if dialect == 'sqlite':
+                existed = db.session.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_analysis_fts'"
+                )).first()
+                for statement in _SQLITE_INDEX_DDL:
+                    db.session.execute(text(statement))
+                if not existed:
+                    # Index rows saved before the search index existed
+                    db.session.execute(text("INSERT INTO video_analysis_fts(video_analysis_fts) VALUES ('rebuild')"))
+            elif dialect == 'postgresql':
+                for statement in _POSTGRES_INDEX_DDL:
+                    db.session.execute(text(statement))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not create video search index on {dialect}, using LIKE search: {str(e)}")
+
+    def search(self, user_id: int, query: str, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """Search a user's analyses; returns one page of ranked results with highlighted snippets."""
+        page = max(page, 1)
+        per_page = min(max(per_page, 1), self.max_per_page)
+        offset = (page - 1) * per_page
+
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite' and self._has_sqlite_index():
+            total, rows = self._search_sqlite(user_id, query, per_page, offset)
+        elif dialect == 'postgresql':
+            total, rows = self._search_postgres(user_id, query, per_page, offset)
+        else:
+            total, rows = self._search_like(user_id, query, per_page, offset)
+
+        return {
+            "query": query,
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "has_more": offset + len(rows) < total,
+            "results": rows
+        }
+
+    def _has_sqlite_index(self) -> bool:
+        return db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_analysis_fts'"
+        )).first() is not None
+
+    def _search_sqlite(self, user_id: int, query: str, limit: int, offset: int):
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return 0, []
+        # Every word must match; the last one as a prefix so search-as-you-type works
+        match = ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+        params = {"match": match, "user_id": user_id, "limit": limit, "offset": offset,
+                  "start": _MARK_START, "end": _MARK_END, "words": self.snippet_words}
+
+        total = db.session.execute(text(
+            """SELECT count(*) FROM video_analysis_fts
+            JOIN video_analysis ON video_analysis.id = video_analysis_fts.rowid
+            WHERE video_analysis_fts MATCH :match AND video_analysis.user_id = :user_id"""
+        ), params).scalar()
+        rows = db.session.execute(text(
+            """SELECT video_analysis.id, video_analysis.post_id, video_analysis.video_url,
+                video_analysis.analysis_date,
+                snippet(video_analysis_fts, 0, :start, :end, '…', :words) AS transcription_snippet,
+                snippet(video_analysis_fts, 1, :start, :end, '…', :words) AS visual_snippet,
+                bm25(video_analysis_fts, 1.0, 0.5) AS rank
+            FROM video_analysis_fts
+            JOIN video_analysis ON video_analysis.id = video_analysis_fts.rowid
+            WHERE video_analysis_fts MATCH :match AND video_analysis.user_id = :user_id
+            ORDER BY rank
+            LIMIT :limit OFFSET :offset"""
+        ), params).mappings().all()
+        # bm25() is lower-is-better; flip it so higher scores rank first for clients
+        return total, [self._result(row, -row["rank"]) for row in rows]
+
+    def _search_postgres(self, user_id: int, query: str, limit: int, offset: int):
+        params = {"query": query, "user_id": user_id, "limit": limit, "offset": offset,
+                  "options": f"StartSel={_MARK_START}, StopSel={_MARK_END}, "
+                             f"MaxWords={self.snippet_words}, MinWords={self.snippet_words // 2}"}
+
+        total = db.session.execute(text(
+            """SELECT count(*) FROM video_analysis
+            WHERE user_id = :user_id AND search_vector @@ websearch_to_tsquery('english', :query)"""
+        ), params).scalar()
+        # ts_headline re-parses the documents, so only run it on the page being returned
+        rows = db.session.execute(text(
+            """SELECT page.id, page.post_id, page.video_url, page.analysis_date, page.rank,
+                ts_headline('english', coalesce(page.transcription_text, ''), page.query, :options)
+                    AS transcription_snippet,
+                ts_headline('english', coalesce(page.visual_description, ''), page.query, :options)
+                    AS visual_snippet
+            FROM (
+                SELECT video_analysis.*, q.query, ts_rank_cd(search_vector, q.query) AS rank
+                FROM video_analysis, websearch_to_tsquery('english', :query) AS q(query)
+                WHERE user_id = :user_id AND search_vector @@ q.query
+                ORDER BY rank DESC, id DESC
+                LIMIT :limit OFFSET :offset
+            ) AS page
+            ORDER BY page.rank DESC, page.id DESC"""
+        ), params).mappings().all()
+        return total, [self._result(row, row["rank"]) for row in rows]
+
+    def _search_like(self, user_id: int, query: str, limit: int, offset: int):
+        pattern = f"%{query}%"
+        base = VideoAnalysis.query.filter(
+            VideoAnalysis.user_id == user_id,
+            or_(VideoAnalysis.transcription_text.ilike(pattern), VideoAnalysis.visual_description.ilike(pattern))
+        )
+        total = base.count()
+        analyses = base.order_by(VideoAnalysis.analysis_date.desc()).limit(limit).offset(offset).all()
+        return total, [
+            self._result({
+                "id": analysis.id,
+                "post_id": analysis.post_id,
+                "video_url": analysis.video_url,
+                "analysis_date": analysis.analysis_date,
+                "transcription_snippet": self._like_snippet(analysis.transcription_text, query),
+                "visual_snippet": self._like_snippet(analysis.visual_description, query)
+            }, None)
+            for analysis in analyses
+        ]
+
+    def _like_snippet(self, value: Optional[str], query: str) -> str:
+        if not value:
+            return ''
+        position = value.lower().find(query.lower())
+        if position < 0:
+            return ''
+        start = max(position - 80, 0)
+        end = position + len(query)
+        return (('…' if start else '') + value[start:position] + _MARK_START + value[position:end] + _MARK_END
+                + value[end:end + 80] + ('…' if end + 80 < len(value) else ''))
+
+    def _result(self, row, score: Optional[float]) -> Dict[str, Any]:
+        analysis_date = row["analysis_date"]
+        if isinstance(analysis_date, str):
+            # Raw SQLite rows carry the stored text, e.g. "2024-01-01 12:00:00"
+            analysis_date = analysis_date.replace(' ', 'T', 1)
+        elif analysis_date is not None:
+            analysis_date = analysis_date.isoformat()
+        return {
+            "id": row["id"],
+            "post_id": row["post_id"],
+            "video_url": row["video_url"],
+            "analysis_date": analysis_date,
+            "score": round(score, 6) if score is not None else None,
+            "transcription_snippet": self._highlight(row["transcription_snippet"]),
+            "visual_snippet": self._highlight(row["visual_snippet"])
+        }
+
+    def _highlight(self, snippet: Optional[str]) -> str:
+        """HTML-escape a snippet and turn the match markers into <mark> tags."""
+        escaped = html.escape(snippet or '')
+        return escaped.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
@@ -29,7 +29,7 @@ export function ContentGenerator() {
   const fetchTrends = async () => {
     try {
       const data = await apiService.getTopTrends(10)
-      setTrends(data)
+      setTrends(data.trends)
     } catch (error) {
       console.error('Error fetching trends:', error)
       setTrends(mockTrends)
@@ -15,6 +15,8 @@ const COLORS = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6']
 export function TrendsPage() {
   const [trends, setTrends] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [searchQuery, setSearchQuery] = useState('')
   const [selectedPlatform, setSelectedPlatform] = useState('all')
   const [selectedCategory, setSelectedCategory] = useState('all')
@@ -27,7 +29,8 @@ export function TrendsPage() {
     setLoading(true)
     try {
       const data = await apiService.getTrends()
-      setTrends(data)
+      setTrends(data.trends)
+      setNextCursor(data.next_cursor)
       toast.success('Trends loaded successfully!')
     } catch (error) {
       console.error('Error fetching trends:', error)
@@ -42,8 +45,14 @@ export function TrendsPage() {
   const refreshTrends = async () => {
     setLoading(true)
     try {
-      const data = await apiService.refreshTrends()
-      setTrends(data.trends || [])
+      const { run_id } = await apiService.refreshTrends()
+      const run = await apiService.waitForTrendRefreshRun(run_id)
+      if (run.status === 'failed') {
+        throw new Error(run.error || 'Trend refresh failed')
+      }
+      const data = await apiService.getTrends()
+      setTrends(data.trends)
+      setNextCursor(data.next_cursor)
       toast.success('Trends refreshed successfully!')
     } catch (error) {
       console.error('Error refreshing trends:', error)
@@ -53,6 +62,20 @@ export function TrendsPage() {
     }
   }
 
+  const loadMoreTrends = async () => {
+    setLoadingMore(true)
+    try {
+      const data = await apiService.getTrends({ cursor: nextCursor })
+      setTrends(current => [...current, ...data.trends])
+      setNextCursor(data.next_cursor)
+    } catch (error) {
+      console.error('Error loading more trends:', error)
+      toast.error('Failed to load more trends')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const filteredTrends = trends.filter(trend => {
     const matchesSearch = trend.keyword.toLowerCase().includes(searchQuery.toLowerCase())
     const matchesPlatform = selectedPlatform === 'all' || trend.platform === selectedPlatform
@@ -175,7 +198,7 @@ export function TrendsPage() {
                 </Card>
               ))
             ) : (
-              filteredTrends.slice(0, 12).map((trend) => (
+              filteredTrends.map((trend) => (
                 <Card key={trend.id} className="hover:shadow-lg transition-shadow cursor-pointer">
                   <CardContent className="p-6">
                     <div className="flex items-start justify-between mb-4">
@@ -230,6 +253,13 @@ export function TrendsPage() {
               ))
             )}
           </div>
+          {!loading && nextCursor && (
+            <div className="flex justify-center">
+              <Button variant="outline" onClick={loadMoreTrends} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more trends'}
+              </Button>
+            </div>
+          )}
         </TabsContent>
 
         <TabsContent value="analytics" className="space-y-6">
@@ -27,6 +27,8 @@ export function VideoAnalysis() {
   const [isAnalyzeDialogOpen, setIsAnalyzeDialogOpen] = useState(false)
   const [analyzingVideo, setAnalyzingVideo] = useState(false)
   const [searchQuery, setSearchQuery] = useState('')
+  const [searchMatches, setSearchMatches] = useState(null)
+  const [userId, setUserId] = useState(null)
   const [filterPlatform, setFilterPlatform] = useState('all')
   const [formData, setFormData] = useState({
     video_url: '',
@@ -39,11 +41,31 @@ export function VideoAnalysis() {
     fetchAnalyses()
   }, [])
 
+  // The list only holds previews, so search the full transcripts on the server
+  useEffect(() => {
+    const query = searchQuery.trim()
+    if (!query || !userId) {
+      setSearchMatches(null)
+      return
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await apiService.searchVideoAnalyses(userId, query, { per_page: 100 })
+        setSearchMatches(new Set(response.results.map(result => result.id)))
+      } catch (error) {
+        console.error('Error searching video analyses:', error)
+        setSearchMatches(null)
+      }
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [searchQuery, userId])
+
     const fetchAnalyses = async () => {
     try {
       // Get user ID from profile
       const profileResponse = await apiService.getProfile()
       const userId = profileResponse.user?.id || 1 // Fallback to 1 for demo
+      setUserId(userId)
       
       // Call the backend API to fetch video analyses
       const results = await apiService.getVideoAnalyses(userId)
@@ -54,8 +76,8 @@ export function VideoAnalysis() {
         post_id: analysis.post_id,
         video_url: analysis.video_url || '',
         platform: analysis.platform || 'tiktok',
-        transcription_text: analysis.transcription_text || analysis.transcription || 'Transcription not available',
-        visual_description: analysis.visual_description || 'Visual description not available',
+        transcription_text: analysis.transcription_preview || analysis.transcription_text || analysis.transcription || 'Transcription not available',
+        visual_description: analysis.visual_preview || analysis.visual_description || 'Visual description not available',
         analysis_date: analysis.analysis_date || new Date().toISOString(),
         engagement_score: analysis.engagement_score || 0,
         trending_elements: Array.isArray(analysis.trending_elements) ? analysis.trending_elements : [],
@@ -109,12 +131,14 @@ export function VideoAnalysis() {
       const profileResponse = await apiService.getProfile()
       const userId = profileResponse.user?.id || 1 // Fallback to 1 for demo
       
-      // Call the backend API for video analysis
-      const result = await apiService.analyzeVideo({
+      // Queue the video analysis and wait for the background job to finish
+      const queued = await apiService.analyzeVideo({
         user_id: userId,
         video_url: formData.video_url,
         platform: formData.platform
       })
+      const job = await apiService.waitForVideoAnalysisJob(queued.job_id)
+      const result = job.status === 'succeeded' ? job.result : { error: job.last_error }
       
       // Check if the result is successful
       if (result && (result.success === true || !result.error)) {
@@ -157,7 +181,8 @@ export function VideoAnalysis() {
   }
 
   const filteredAnalyses = analyses.filter(analysis => {
-    const matchesSearch = (analysis.transcription_text && analysis.transcription_text.toLowerCase().includes(searchQuery.toLowerCase())) ||
+    const matchesSearch = searchMatches ? searchMatches.has(analysis.id) :
+                         (analysis.transcription_text && analysis.transcription_text.toLowerCase().includes(searchQuery.toLowerCase())) ||
                          (Array.isArray(analysis.trending_elements) && 
                           analysis.trending_elements.some(element => 
                             element && element.toLowerCase().includes(searchQuery.toLowerCase())
@@ -201,9 +226,23 @@ export function VideoAnalysis() {
     toast.success('Analysis downloaded successfully!')
   }
 
-  const handleViewDetails = (analysis) => {
+  const handleViewDetails = async (analysis) => {
     setViewingAnalysis(analysis)
     setIsViewDialogOpen(true)
+    
+    // List entries only carry previews; load the full text for the dialog
+    if (analysis.transcription_truncated || analysis.visual_truncated) {
+      try {
+        const full = await apiService.getVideoAnalysisById(analysis.id)
+        setViewingAnalysis({
+          ...analysis,
+          transcription_text: full.transcription_text,
+          visual_description: full.visual_description
+        })
+      } catch (error) {
+        console.error('Error fetching video analysis:', error)
+      }
+    }
   }
 
   return (
@@ -123,17 +123,69 @@ class ApiService {
   }
 
   // Trends API
+  // getTrends and getTopTrends return { trends, limit, has_more, next_cursor }; pass next_cursor as `cursor` for the next page
   async getTrends(params = {}) {
     const queryString = new URLSearchParams(params).toString()
     return this.request(`/trends${queryString ? `?${queryString}` : ''}`)
   }
 
-  async getTopTrends(limit = 10) {
-    return this.request(`/trends/top?limit=${limit}`)
+  async getTopTrends(limit = 10, cursor = null) {
+    return this.request(`/trends/top?limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`)
   }
 
-  async refreshTrends() {
-    return this.request('/trends/refresh', { method: 'POST' })
+  async getRecommendations(userId, { refresh = false } = {}) {
+    return this.request(`/trends/recommendations?user_id=${userId}${refresh ? '&refresh=true' : ''}`)
+  }
+
+  async getRelatedTrends(tokens, params = {}) {
+    const queryString = new URLSearchParams({ tokens: tokens.join(','), ...params }).toString()
+    return this.request(`/trends/related?${queryString}`)
+  }
+
+  async getEmergingTrends(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    return this.request(`/trends/emerging${queryString ? `?${queryString}` : ''}`)
+  }
+
+  async getCanonicalTrends(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    return this.request(`/trends/canonical${queryString ? `?${queryString}` : ''}`)
+  }
+
+  async getCanonicalTrend(canonicalId) {
+    return this.request(`/trends/canonical/${canonicalId}`)
+  }
+
+  async getTrendPredictions(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    return this.request(`/trends/predictions${queryString ? `?${queryString}` : ''}`)
+  }
+
+  async refreshTrends(platform = null) {
+    return this.request('/trends/refresh', {
+      method: 'POST',
+      body: JSON.stringify(platform ? { platform } : {}),
+    })
+  }
+
+  async getTrendRefreshRun(runId) {
+    return this.request(`/trends/refresh/runs/${runId}`)
+  }
+
+  async waitForTrendRefreshRun(runId, { intervalMs = 2000, timeoutMs = 5 * 60 * 1000 } = {}) {
+    const deadline = Date.now() + timeoutMs
+    while (Date.now() < deadline) {
+      const run = await this.getTrendRefreshRun(runId)
+      if (run.status === 'succeeded' || run.status === 'failed') {
+        return run
+      }
+      await new Promise(resolve => setTimeout(resolve, intervalMs))
+    }
+    throw new Error('Timed out waiting for trend refresh')
+  }
+
+  async getTrendRefreshStatus() {
+    return this.request('/trends/refresh/status')
   }
 
   async getTrendingHashtags(params = {}) {
@@ -179,6 +231,22 @@ class ApiService {
     })
   }
 
+  async getVideoAnalysisJob(jobId) {
+    return this.request(`/analyze_video/jobs/${jobId}`)
+  }
+
+  async waitForVideoAnalysisJob(jobId, { intervalMs = 2000, timeoutMs = 15 * 60 * 1000 } = {}) {
+    const deadline = Date.now() + timeoutMs
+    while (Date.now() < deadline) {
+      const job = await this.getVideoAnalysisJob(jobId)
+      if (job.status === 'succeeded' || job.status === 'failed') {
+        return job
+      }
+      await new Promise(resolve => setTimeout(resolve, intervalMs))
+    }
+    throw new Error('Timed out waiting for video analysis')
+  }
+
   async getVideoAnalysis(postId) {
     return this.request(`/analyze_video/${postId}`)
   }
@@ -187,6 +255,15 @@ class ApiService {
     return this.request(`/video_analyses?user_id=${userId}`)
   }
 
+  async getVideoAnalysisById(analysisId) {
+    return this.request(`/video_analyses/${analysisId}`)
+  }
+
+  async searchVideoAnalyses(userId, query, params = {}) {
+    const queryString = new URLSearchParams({ user_id: userId, q: query, ...params }).toString()
+    return this.request(`/video_analyses/search?${queryString}`)
+  }
+
   async analyzeTrendingVideos(data = {}) {
     return this.request('/analyze_trending', {
       method: 'POST',
@@ -229,6 +306,7 @@ class ApiService {
     return this.request(`/trends/visualization/sentiment-distribution${queryString ? `?${queryString}` : ''}`)
   }
 
+  // params may include bucket ('hour' | 'day'), downsample: 'lttb' and points, to get a chart-sized series
   async getEngagementOverTime(params = {}) {
     const queryString = new URLSearchParams(params).toString()
     return this.request(`/trends/visualization/engagement-over-time${queryString ? `?${queryString}` : ''}`)
@@ -47,7 +47,35 @@ def main():
     # Test trends endpoints
     test_endpoint(f"{BASE_URL}/trends")
     test_endpoint(f"{BASE_URL}/trends/top")
-    test_endpoint(f"{BASE_URL}/trends/refresh", method="POST")
+    test_endpoint(f"{BASE_URL}/trends/top?limit=5&cursor=not-a-cursor", expected_status=400)
+    test_endpoint(f"{BASE_URL}/trends/emerging")
+    test_endpoint(f"{BASE_URL}/trends/canonical")
+    test_endpoint(f"{BASE_URL}/trends/canonical/999999", expected_status=404)
+    test_endpoint(f"{BASE_URL}/trends/hashtags")
+    test_endpoint(f"{BASE_URL}/trends/related?tokens=%23ai,technology")
+    test_endpoint(f"{BASE_URL}/trends/related", expected_status=400)
+    test_endpoint(f"{BASE_URL}/trends/visualization/platform-distribution")
+    test_endpoint(f"{BASE_URL}/trends/visualization/category-distribution?platform=tiktok&start_date=2025-01-01T12:00:00")
+    test_endpoint(f"{BASE_URL}/trends/visualization/engagement-over-time?bucket=hour&downsample=lttb&points=100")
+    test_endpoint(f"{BASE_URL}/trends/visualization/engagement-over-time?bucket=week", expected_status=400)
+    test_endpoint(f"{BASE_URL}/trends/recommendations", expected_status=400)
+    test_endpoint(f"{BASE_URL}/trends/predictions")
+    test_endpoint(f"{BASE_URL}/trends/refresh", method="POST", expected_status=202)
+    test_endpoint(f"{BASE_URL}/trends/refresh", method="POST", data={"platform": "myspace"}, expected_status=400)
+    test_endpoint(f"{BASE_URL}/trends/refresh/status")
+    test_endpoint(f"{BASE_URL}/trends/refresh/runs/does-not-exist", expected_status=404)
+    
+    # Test video analysis endpoints
+    test_endpoint(f"{BASE_URL}/analyze_video", method="POST", data={}, expected_status=400)
+    test_endpoint(f"{BASE_URL}/analyze_video/jobs/does-not-exist", expected_status=404)
+    test_endpoint(f"{BASE_URL}/video_analyses/search?user_id=1&q=tutorial")
+    test_endpoint(f"{BASE_URL}/video_analyses/search?user_id=1", expected_status=400)
+    
+    # Test maintenance endpoints
+    test_endpoint(f"{BASE_URL}/maintenance/retention")
+    test_endpoint(f"{BASE_URL}/maintenance/retention/runs")
+    test_endpoint(f"{BASE_URL}/maintenance/retention/run", method="POST", data={"tables": ["users"]}, expected_status=400)
+    test_endpoint(f"{BASE_URL}/maintenance/migrations")
     
     # Test characters endpoints
     test_endpoint(f"{BASE_URL}/characters/templates")
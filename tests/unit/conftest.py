@@ -0,0 +1,31 @@
+"""Shared fixtures: a backend app on a throwaway SQLite database per test."""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            "social-media-manager-app")
+sys.path.insert(0, BACKEND_PATH)
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    """URL of an empty SQLite file; create_app() picks it up from DATABASE_URL."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    return url
+
+
+@pytest.fixture
+def app(database_url):
+    """App with every table created and migration applied, inside an app context."""
+    from src.main import create_app
+    from src.models import db
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,103 @@
+"""Audio fingerprints: re-encoded and trimmed copies match their stored track, and a match reuses its transcript."""
+
+import wave
+
+import numpy as np
+
+RATE = 16000
+SHIFT = 32768  # 2.048 s, a whole number of 32 ms fingerprint frames
+
+
+def _song(seed, seconds=20):
+    """A melody of short random notes, loud enough to have clear spectral peaks."""
+    generator = np.random.default_rng(seed)
+    time = np.arange(RATE // 4) / RATE
+    notes = [np.sin(2 * np.pi * generator.uniform(150, 1500) * time) * np.hanning(len(time))
+             for _ in range(seconds * 4)]
+    return (np.concatenate(notes) * 12000).astype(np.int16)
+
+
+def _reencoded(samples, rate=44100):
+    """The same audio trimmed at the start, quieter, noisier and resampled."""
+    trimmed = samples[SHIFT:].astype(np.float64) * 0.5
+    trimmed += np.random.default_rng(9).normal(0, 200, len(trimmed))
+    positions = np.arange(0, len(trimmed) - 1, RATE / rate)
+    return np.interp(positions, np.arange(len(trimmed)), trimmed).astype(np.int16)
+
+
+def _analysis(db, transcription="hello from the first upload"):
+    from src.models import User, VideoAnalysis
+
+    user = User(username="ana", email="ana@example.com")
+    db.session.add(user)
+    db.session.flush()
+    analysis = VideoAnalysis(user_id=user.id, video_url="https://example.com/v.mp4",
+                             transcription_text=transcription)
+    db.session.add(analysis)
+    db.session.commit()
+    return analysis
+
+
+def _wav(path, samples, rate=RATE):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return str(path)
+
+
+def test_a_reencoded_copy_matches_its_track_at_the_trimmed_offset(app):
+    from src.models import db
+    from src.services.audio_fingerprint import AudioFingerprinter
+
+    fingerprinter = AudioFingerprinter()
+    original = _song(1)
+    landmarks = fingerprinter.fingerprint(original, RATE)
+    assert landmarks == fingerprinter.fingerprint(original, RATE)
+    analysis = _analysis(db)
+    fingerprinter.store(analysis.id, landmarks)
+    fingerprinter.store(analysis.id, [])  # nothing to index
+
+    match = fingerprinter.find_match(fingerprinter.fingerprint(_reencoded(original), 44100))
+    assert match["analysis_id"] == analysis.id
+    assert match["matches"] >= fingerprinter.min_matches
+    assert match["offset_seconds"] == 2.05
+
+    # Other music, silence and a clip too short for one window match nothing
+    assert fingerprinter.find_match(fingerprinter.fingerprint(_song(2), RATE)) is None
+    assert fingerprinter.fingerprint(np.zeros(RATE * 5, dtype=np.int16), RATE) == []
+    assert fingerprinter.fingerprint(original[:500], RATE) == []
+    assert fingerprinter.find_match([]) is None
+
+
+def test_a_matching_track_reuses_the_stored_transcript(app, monkeypatch, tmp_path):
+    from src.models import db, AudioFingerprint
+    from src.services.video_analyzer import VideoAnalyzer
+
+    analyzer = VideoAnalyzer()
+    transcribed = []
+
+    def transcribe(user_id, audio_path, language=None, audio=None):
+        transcribed.append(audio_path)
+        return {"success": True, "transcription": "hello from the first upload"}
+
+    monkeypatch.setattr(analyzer, "_transcribe_audio", transcribe)
+    original = _song(3)
+    first = analyzer._transcribe_track(1, _wav(tmp_path / "first.wav", original))
+    assert transcribed and first["audio_fingerprint"]
+    analysis = _analysis(db)
+    analyzer._store_fingerprint(analysis, first)
+    assert "audio_fingerprint" not in first
+    assert AudioFingerprint.query.filter_by(analysis_id=analysis.id).count() > 0
+
+    second = analyzer._transcribe_track(1, _wav(tmp_path / "second.wav", _reencoded(original), 44100))
+    assert len(transcribed) == 1
+    assert second["transcription"] == "hello from the first upload"
+    assert second["fingerprint_match"]["analysis_id"] == analysis.id
+    assert "audio_fingerprint" not in second
+
+    # Different audio is transcribed and carries its own fingerprint
+    third = analyzer._transcribe_track(1, _wav(tmp_path / "third.wav", _song(4)))
+    assert len(transcribed) == 2
+    assert "fingerprint_match" not in third and third["audio_fingerprint"]
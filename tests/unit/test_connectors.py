@@ -0,0 +1,192 @@
+"""Platform connectors replayed from the cassettes in tests/fixtures, plus the session's record, replay and retries."""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+import requests
+
+CASSETTES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "cassettes")
+# The clock the cassettes were recorded at; TikTok filters videos by creation time against it
+RECORDED_AT = datetime(2025, 6, 2, 12, 0)
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    import src.services.connectors.tiktok as tiktok
+
+    class RecordingClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return RECORDED_AT
+
+    monkeypatch.setattr(tiktok, "datetime", RecordingClock)
+    for name, value in {
+        "CONNECTOR_RECORD_MODE": "replay", "CONNECTOR_CASSETTE_DIR": CASSETTES,
+        "TWITTER_BEARER_TOKEN": "replay", "TWITTER_SEARCH_QUERIES": "AI,fitness",
+        "INSTAGRAM_ACCESS_TOKEN": "replay", "INSTAGRAM_BUSINESS_ACCOUNT_ID": "replay",
+        "INSTAGRAM_HASHTAGS": "travel,food", "TIKTOK_CLIENT_KEY": "replay", "TIKTOK_CLIENT_SECRET": "replay",
+        "TIKTOK_KEYWORDS": "dance,comedy",
+    }.items():
+        monkeypatch.setenv(name, value)
+
+
+def _connectors():
+    from src.services.connectors import build_connectors
+
+    connectors = build_connectors()
+    for connector in connectors.values():
+        connector.prepare()
+    return connectors
+
+
+def _by_key(records):
+    return {(record["platform"], record["keyword"]): record for record in records}
+
+
+def test_replayed_cassettes_give_normalized_records(app, replay):
+    from src.services.connectors import fetch_all
+
+    records, report = fetch_all(_connectors())
+
+    assert {name: outcome["status"] for name, outcome in report.items()} == \
+        {"twitter": "ok", "instagram": "ok", "tiktok": "ok"}
+    assert report["twitter"]["new_tweets"] == 5
+    assert report["instagram"]["requests"] == 5  # two hashtag lookups, three media pages
+    assert report["tiktok"]["requests"] == 4  # token, two pages of dance, one of comedy
+
+    records = _by_key(records)
+    assert sorted(records) == [("instagram", "food"), ("instagram", "travel"), ("tiktok", "comedy"),
+                               ("tiktok", "dance"), ("twitter", "AI"), ("twitter", "fitness")]
+    ai = records[("twitter", "AI")]
+    # (120 + 80 + 40 likes + 2 * 45 retweets) / 3 tweets / 100
+    assert ai["engagement_score"] == 1.1
+    assert ai["volume"] == 3
+    assert ai["category"] == "technology"
+    assert ai["hashtags"] == ["#AI", "#trending", "#twitter"]
+
+    travel = records[("instagram", "travel")]
+    assert travel["volume"] == 3  # both pages of recent media
+    assert travel["engagement_score"] == round((460 + 2 * 35) / 3 / 100, 4)
+    assert travel["hashtags"] == ["#travel", "#instagram", "#wanderlust", "#beach", "#europe"]
+
+    dance = records[("tiktok", "dance")]
+    assert dance["volume"] == 3
+    assert dance["engagement_score"] == round((5600 + 2 * 320 + 2 * 410) / 3 / 1000, 4)
+    assert dance["hashtags"][:3] == ["#dance", "#tiktok", "#fyp"]
+    for record in records.values():
+        assert set(record) == {"keyword", "platform", "engagement_score", "volume", "growth_rate", "sentiment",
+                               "category", "hashtags"}
+        assert 0.0 <= record["engagement_score"] <= 10.0
+
+
+class _SlowSession:
+    def __init__(self, session, delay):
+        self.session = session
+        self.delay = delay
+
+    def request(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return self.session.request(*args, **kwargs)
+
+
+def test_a_connector_timing_out_does_not_drop_the_others(app, replay, monkeypatch):
+    from src.services.connectors import fetch_all
+
+    monkeypatch.setenv("TREND_FETCH_TIMEOUT_TIKTOK_SECONDS", "0.2")
+    connectors = _connectors()
+    connectors["tiktok"].session = _SlowSession(connectors["tiktok"].session, 1.0)
+
+    started = time.monotonic()
+    records, report = fetch_all(connectors)
+    assert time.monotonic() - started < 1.0
+    assert report["tiktok"] == {"status": "timeout", "count": 0}
+    assert report["twitter"]["status"] == report["instagram"]["status"] == "ok"
+    assert {record["platform"] for record in records} == {"twitter", "instagram"}
+    assert len(records) == 4
+
+
+def test_a_cassette_miss_drops_only_the_request_that_was_not_recorded(app, replay, monkeypatch):
+    from src.services.connectors import fetch_all
+
+    monkeypatch.setenv("INSTAGRAM_HASHTAGS", "travel,music,food")
+    records, report = fetch_all(_connectors())
+
+    assert report["instagram"]["status"] == "ok"
+    assert sorted(record["keyword"] for record in records if record["platform"] == "instagram") == ["food", "travel"]
+
+
+def _response(status, body, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {"content-type": "application/json"})
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+class _Upstream:
+    """Answers with the queued responses (or raises queued exceptions) in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _session(upstream=None, mode="off", cassette_dir=None, retries=2):
+    from src.services.connectors import ConnectorPolicy, ConnectorSession
+
+    policy = ConnectorPolicy("test")
+    policy.retries = retries
+    policy.backoff_seconds = 0
+    return ConnectorSession("test", policy, mode=mode, cassette_dir=cassette_dir, session=upstream)
+
+
+def test_record_mode_strips_credentials_and_the_cassette_replays_in_order(tmp_path):
+    from src.services.connectors import ReplayMiss
+
+    upstream = _Upstream(_response(200, {"access_token": "live-secret", "expires_in": 60}),
+                         _response(200, {"page": 1}), _response(200, {"page": 2}))
+    recorder = _session(upstream, mode="record", cassette_dir=str(tmp_path))
+    recorder.post("https://api.test/token", data={"client_secret": "s3cret", "grant_type": "client_credentials"})
+    for _ in range(2):
+        recorder.get("https://api.test/items", params={"q": "dance", "access_token": "live-secret"})
+
+    cassette = (tmp_path / "test.json").read_text()
+    assert "live-secret" not in cassette and "s3cret" not in cassette
+    assert len(json.loads(cassette)["interactions"]) == 3
+
+    player = _session(mode="replay", cassette_dir=str(tmp_path))
+    assert player.post("https://api.test/token", data={"grant_type": "client_credentials"}).json() == \
+        {"access_token": "redacted", "expires_in": 60}
+    # Any account's token finds the recording; repeats replay in order, the last one repeating
+    pages = [player.get("https://api.test/items", params={"q": "dance", "access_token": "other"}).json()["page"]
+             for _ in range(3)]
+    assert pages == [1, 2, 2]
+    with pytest.raises(ReplayMiss):
+        player.get("https://api.test/items", params={"q": "comedy"})
+
+
+def test_transient_failures_are_retried_and_client_errors_are_not():
+    upstream = _Upstream(requests.ConnectionError("reset"), _response(503, {}), _response(200, {"ok": True}))
+    assert _session(upstream).get("https://api.test/items").json() == {"ok": True}
+    assert upstream.calls == 3
+
+    upstream = _Upstream(_response(404, {}), _response(200, {}))
+    assert _session(upstream).get("https://api.test/items").status_code == 404
+    assert upstream.calls == 1
+
+    # Out of retries: the last 5xx is returned, the last connection error raised
+    upstream = _Upstream(_response(502, {}), _response(503, {}))
+    assert _session(upstream, retries=1).get("https://api.test/items").status_code == 503
+    upstream = _Upstream(requests.Timeout("slow"), requests.Timeout("slow"))
+    with pytest.raises(requests.Timeout):
+        _session(upstream, retries=1).get("https://api.test/items")
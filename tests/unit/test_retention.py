@@ -0,0 +1,148 @@
+"""Retention purges: only expired rows and their children go, archives, small batches and the maintenance routes."""
+
+import gzip
+import json
+import threading
+from datetime import datetime, timedelta
+
+
+def _user(db, name="ana"):
+    from src.models import User
+
+    user = User(username=name, email=f"{name}@example.com")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def _analyses(db, user_id, ages_days, fingerprints=3):
+    from src.models import AudioFingerprint, VideoAnalysis
+
+    ids = []
+    for age in ages_days:
+        analysis = VideoAnalysis(user_id=user_id, video_url=f"https://example.com/{age}-{len(ids)}.mp4",
+                                 analysis_date=datetime.utcnow() - timedelta(days=age))
+        db.session.add(analysis)
+        db.session.flush()
+        db.session.add_all(AudioFingerprint(analysis_id=analysis.id, hash=analysis.id * 100 + index, offset=index)
+                           for index in range(fingerprints))
+        ids.append(analysis.id)
+    db.session.commit()
+    return ids
+
+
+def _manager(monkeypatch, tmp_path=None, batch_size=500):
+    from src.services.retention import RetentionManager
+
+    monkeypatch.setenv("RETENTION_BATCH_SIZE", str(batch_size))
+    monkeypatch.setenv("RETENTION_BATCH_PAUSE_MS", "0")
+    if tmp_path is not None:
+        monkeypatch.setenv("RETENTION_ARCHIVE_DIR", str(tmp_path))
+    return RetentionManager()
+
+
+def test_expired_rows_and_their_children_are_purged_in_small_batches_and_archived(app, monkeypatch, tmp_path):
+    from src.models import db, AudioFingerprint, VideoAnalysis, VideoAnalysisJob
+
+    user_id = _user(db)
+    expired = _analyses(db, user_id, [400, 500, 380, 900, 366])
+    kept = _analyses(db, user_id, [1, 364])
+    job = VideoAnalysisJob(id="a" * 32, user_id=user_id, video_url="https://example.com/x.mp4", analysis_id=expired[0])
+    db.session.add(job)
+    db.session.commit()
+
+    # Batches of 2: three batches of analyses, each with its fingerprints in batches of their own
+    runs = _manager(monkeypatch, tmp_path, batch_size=2).purge(["video_analysis"])
+
+    assert [(run["table_name"], run["rows_purged"], run["rows_archived"], run["batches"]) for run in runs] == \
+        [("video_analysis", 5, 5, 3)]
+    assert sorted(analysis.id for analysis in VideoAnalysis.query) == kept
+    assert sorted({row.analysis_id for row in AudioFingerprint.query}) == kept
+    assert AudioFingerprint.query.count() == 3 * len(kept)
+    assert db.session.get(VideoAnalysisJob, job.id).analysis_id is None
+
+    with gzip.open(runs[0]["archive_path"], "rt", encoding="utf-8") as archive:
+        archived = [json.loads(line) for line in archive]
+    assert sorted(row["id"] for row in archived) == sorted(expired)
+    assert {row["user_id"] for row in archived} == {user_id}
+
+    # Nothing left to do on the next pass
+    assert _manager(monkeypatch, batch_size=2).purge(["video_analysis"])[0]["rows_purged"] == 0
+
+
+def test_rows_over_the_per_user_limit_go_oldest_first(app, monkeypatch):
+    from src.models import db, UserAnalytics
+
+    monkeypatch.setenv("RETENTION_USER_ANALYTICS_MAX_ROWS_PER_USER", "3")
+    heavy, light = _user(db, "heavy"), _user(db, "light")
+    now = datetime.utcnow()
+    for user_id, count in ((heavy, 7), (light, 2)):
+        db.session.add_all(UserAnalytics(user_id=user_id, metric_name="views", value=str(index),
+                                         timestamp=now - timedelta(hours=index)) for index in range(count))
+    # Expired by age regardless of the limit
+    db.session.add(UserAnalytics(user_id=light, metric_name="views", value="old", timestamp=now - timedelta(days=400)))
+    db.session.commit()
+
+    runs = _manager(monkeypatch, batch_size=2).purge(["user_analytics"])
+    assert runs[0]["rows_purged"] == 5
+    remaining = {}
+    for row in UserAnalytics.query:
+        remaining.setdefault(row.user_id, []).append(row.value)
+    assert sorted(remaining[heavy]) == ["0", "1", "2"]
+    assert sorted(remaining[light]) == ["0", "1"]
+
+
+def test_purged_recommendations_reset_only_their_users_state(app, monkeypatch):
+    from src.models import db, ContentRecommendation, RecommendationState, Trend
+
+    stale_user, fresh_user = _user(db, "stale"), _user(db, "fresh")
+    trend = Trend(keyword="ai", platform="twitter", engagement_score=1.0)
+    db.session.add(trend)
+    db.session.flush()
+    old = datetime.utcnow() - timedelta(days=31)
+    db.session.add_all([
+        ContentRecommendation(user_id=stale_user, trend_id=trend.id, content_type="post", updated_at=old),
+        ContentRecommendation(user_id=fresh_user, trend_id=trend.id, content_type="post"),
+        RecommendationState(user_id=stale_user), RecommendationState(user_id=fresh_user),
+    ])
+    db.session.commit()
+
+    assert _manager(monkeypatch).purge(["content_recommendation"])[0]["rows_purged"] == 1
+    assert [row.user_id for row in ContentRecommendation.query] == [fresh_user]
+    assert [state.user_id for state in RecommendationState.query] == [fresh_user]
+
+
+def test_maintenance_routes_start_a_purge_and_report_it(app, monkeypatch):
+    from src.models import db, VideoAnalysis
+    from src.services.trend_scheduler import acquire_lease, release_lease
+
+    monkeypatch.setenv("RETENTION_BATCH_PAUSE_MS", "0")
+    user_id = _user(db)
+    kept = _analyses(db, user_id, [400, 1], fingerprints=1)[1:]
+    client = app.test_client()
+
+    assert client.post("/api/maintenance/retention/run", json={"tables": "video_analysis"}).status_code == 400
+    response = client.post("/api/maintenance/retention/run", json={"tables": ["video_analysis", "nope"]})
+    assert response.status_code == 400
+    assert "nope" in response.get_json()["error"]
+
+    assert acquire_lease("retention", "elsewhere", 60)
+    assert client.post("/api/maintenance/retention/run", json={"tables": ["video_analysis"]}).status_code == 409
+    release_lease("retention", "elsewhere")
+
+    response = client.post("/api/maintenance/retention/run", json={"tables": ["video_analysis"]})
+    assert response.status_code == 202
+    assert response.get_json()["tables"] == ["video_analysis"]
+    for thread in threading.enumerate():
+        if thread.name == "retention-manual":
+            thread.join(5)
+    db.session.expire_all()
+    assert [analysis.id for analysis in VideoAnalysis.query] == kept
+
+    runs = client.get("/api/maintenance/retention/runs?table=video_analysis").get_json()
+    assert [(run["trigger"], run["rows_purged"]) for run in runs] == [("manual", 1)]
+    status = client.get("/api/maintenance/retention").get_json()
+    assert status["table_sizes"]["video_analysis"] == 1
+    assert status["table_sizes"]["audio_fingerprint"] == 1
+    assert status["last_24h"]["video_analysis"]["rows_purged"] == 1
+    assert status["running"] is None
@@ -0,0 +1,140 @@
+"""Upgrading a database created by an older release."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+
+# trend and content_recommendation as the baseline release created them: no (keyword, platform) key
+BASELINE_TABLES = [
+    """CREATE TABLE trend (
+        id INTEGER PRIMARY KEY, keyword VARCHAR(200) NOT NULL, platform VARCHAR(50) NOT NULL,
+        engagement_score FLOAT, volume INTEGER, growth_rate FLOAT, sentiment VARCHAR(20),
+        category VARCHAR(100), hashtags TEXT, created_at DATETIME, updated_at DATETIME
+    )""",
+    """CREATE TABLE content_recommendation (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, trend_id INTEGER NOT NULL,
+        content_type VARCHAR(50) NOT NULL, recommended_time DATETIME, confidence_score FLOAT,
+        hashtag_suggestions TEXT, content_suggestions TEXT, created_at DATETIME
+    )""",
+]
+
+
+def _timestamp(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _build_legacy_database(url, clustered):
+    """Duplicate trends (as the old per-row insert left them) with history pointing at every copy.
+
+    With `clustered`, the database also went through the canonical trend
+    migration while the upsert key stayed postponed, so the copies sit in
+    canonical trends of their own.
+    """
+    from src.models import db, TrendSnapshot, TrendToken, TrendBurstState, User, CanonicalTrend, CanonicalTrendBand
+
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        for statement in BASELINE_TABLES:
+            connection.execute(text(statement))
+        db.metadata.create_all(connection, tables=[
+            User.__table__, TrendSnapshot.__table__, TrendToken.__table__, TrendBurstState.__table__,
+            CanonicalTrend.__table__, CanonicalTrendBand.__table__
+        ])
+        if clustered:
+            connection.execute(text("ALTER TABLE trend ADD COLUMN canonical_id INTEGER"))
+            connection.execute(text(
+                "INSERT INTO canonical_trend (id, key, label, trend_count) VALUES "
+                "(10, 'airevolution', 'AI Revolution', 2), (11, 'airevolution2', 'AI Revolution', 1)"
+            ))
+            connection.execute(text("INSERT INTO canonical_trend_band (band, canonical_id) VALUES ('00ab', 10)"))
+        connection.execute(text("INSERT INTO users (id, username, email) VALUES (1, 'ana', 'ana@example.com')"))
+        # ids 1-3 are one trend fetched three times; 4 is a distinct trend
+        for trend_id, keyword, engagement, age_hours in [
+            (1, "AI Revolution", 5.0, 48), (2, "AI Revolution", 7.0, 24), (3, "AI Revolution", 9.0, 1),
+            (4, "Remote Work", 3.0, 5),
+        ]:
+            stamp = _timestamp(now - timedelta(hours=age_hours))
+            connection.execute(text(
+                "INSERT INTO trend (id, keyword, platform, engagement_score, volume, growth_rate, sentiment, "
+                "category, hashtags, created_at, updated_at) VALUES (:id, :keyword, 'twitter', :engagement, 100, "
+                "0.0, 'positive', 'technology', '[]', :stamp, :stamp)"
+            ), {"id": trend_id, "keyword": keyword, "engagement": engagement, "stamp": stamp})
+            connection.execute(text(
+                "INSERT INTO trend_snapshot (trend_id, ts, volume, engagement) VALUES (:id, :stamp, 100, :engagement)"
+            ), {"id": trend_id, "stamp": stamp, "engagement": engagement})
+        if clustered:
+            connection.execute(text("UPDATE trend SET canonical_id = CASE WHEN id = 3 THEN 11 ELSE 10 END "
+                                    "WHERE keyword = 'AI Revolution'"))
+        connection.execute(text(
+            "INSERT INTO trend_token (token, trend_id) VALUES ('ai', 1), ('ai', 2), ('revolution', 2), "
+            "('ai', 3), ('remote', 4)"
+        ))
+        connection.execute(text(
+            "INSERT INTO trend_burst_state (trend_id, observations, bursting) VALUES (1, 3, 0), (2, 2, 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO content_recommendation (user_id, trend_id, content_type) "
+            "VALUES (1, 1, 'post'), (1, 2, 'post'), (1, 4, 'story')"
+        ))
+    engine.dispose()
+
+
+@pytest.mark.parametrize("clustered", [False, True])
+def test_upgrade_merges_duplicate_trends_before_adding_the_upsert_key(database_url, clustered):
+    from src.main import create_app
+    from src.models import (
+        db, Trend, TrendSnapshot, TrendToken, TrendBurstState, ContentRecommendation, SchemaMigration, TrendRollup,
+        CanonicalTrend
+    )
+    from src.migrations.operations import Operations
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    _build_legacy_database(database_url, clustered)
+    app = create_app(start_workers=False)
+    with app.app_context():
+        assert db.session.get(SchemaMigration, "0004_trend_upsert_key") is not None
+        with db.engine.connect() as connection:
+            assert Operations(connection).has_index("trend", "uq_trend_keyword_platform")
+
+        # The most recently updated copy survives, dated from the first fetch
+        trends = {trend.keyword: trend for trend in Trend.query.all()}
+        assert len(trends) == 2
+        kept = trends["AI Revolution"]
+        assert kept.id == 3
+        assert kept.engagement_score == 9.0
+        assert kept.created_at == datetime(2025, 5, 30, 12, 0, 0)
+
+        assert sorted(snapshot.trend_id for snapshot in TrendSnapshot.query.all()) == [3, 3, 3, 4]
+        assert sorted((token.trend_id, token.token) for token in TrendToken.query.all()) == [
+            (3, "ai"), (3, "revolution"), (4, "remote")
+        ]
+        assert [state.trend_id for state in TrendBurstState.query.all()] == [3]
+        assert sorted(rec.trend_id for rec in ContentRecommendation.query.all()) == [3, 3, 4]
+
+        # Derived tables count each trend once
+        assert db.session.query(db.func.sum(TrendRollup.trend_count)).scalar() == 2
+        # Clusters emptied by the merge are gone; the kept trend is clustered again
+        assert kept.canonical_id is not None
+        assert [(canonical.id, canonical.trend_count) for canonical in CanonicalTrend.query.all()] == [
+            (kept.canonical_id, 1), (trends["Remote Work"].canonical_id, 1)
+        ]
+
+        # Ingest takes the upsert path and updates the surviving row in place
+        stats = TrendAnalyzer().ingest_trends([{
+            "keyword": "AI Revolution", "platform": "twitter", "engagement_score": 9.5, "volume": 150,
+            "growth_rate": 0.0, "sentiment": "positive", "category": "technology", "hashtags": ["#ai"]
+        }])
+        assert (stats["inserted"], stats["updated"]) == (0, 1)
+        assert Trend.query.filter_by(keyword="AI Revolution").count() == 1
+        assert db.session.get(Trend, 3).engagement_score == 9.5
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_fresh_database_records_every_migration(app):
+    from src.migrations import MigrationRunner
+
+    statuses = MigrationRunner().status()
+    assert statuses and all(status["status"] == "applied" for status in statuses)
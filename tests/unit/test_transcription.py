@@ -0,0 +1,66 @@
+"""Transcription backends share one interface, and the batching transcriber hands them batches."""
+
+import pytest
+
+
+def _echo_backend():
+    from src.services.transcription import TranscriptionBackend
+
+    class EchoBackend(TranscriptionBackend):
+        name = "echo"
+
+        def __init__(self):
+            self.batches = []
+
+        def transcribe(self, audio_path, language=None):
+            return {"success": True, "transcription": audio_path, "language": language, "segments": []}
+
+        def transcribe_batch(self, audio_paths, language=None):
+            self.batches.append((list(audio_paths), language))
+            return super().transcribe_batch(audio_paths, language)
+
+    return EchoBackend()
+
+
+def test_a_backend_must_implement_transcribe():
+    from src.services.transcription import TranscriptionBackend
+
+    with pytest.raises(TypeError):
+        TranscriptionBackend()
+
+    class Incomplete(TranscriptionBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_remote_backend_bills_the_user_it_is_bound_to(tmp_path):
+    from src.services.transcription import RemoteTranscriptionBackend
+
+    calls = []
+
+    class AIService:
+        def call_speech_to_text(self, user_id, audio_data):
+            calls.append((user_id, audio_data))
+            return {"success": True, "transcription": "hi"}
+
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"RIFF")
+    backend = RemoteTranscriptionBackend(AIService())
+    results = backend.for_user(7).transcribe_batch([str(audio_path), str(audio_path)], "en")
+
+    assert [result["transcription"] for result in results] == ["hi", "hi"]
+    assert calls == [(7, b"RIFF"), (7, b"RIFF")]
+    assert backend.user_id is None
+
+
+def test_batching_transcriber_groups_concurrent_requests_by_language():
+    from src.services.transcription import BatchingTranscriber
+
+    backend = _echo_backend()
+    transcriber = BatchingTranscriber(backend, max_batch_size=4, max_wait_ms=200)
+    futures = [transcriber.submit("a.wav", "en"), transcriber.submit("b.wav", "de"), transcriber.submit("c.wav", "en")]
+
+    assert [future.result(timeout=5)["transcription"] for future in futures] == ["a.wav", "b.wav", "c.wav"]
+    assert sorted(backend.batches) == [(["a.wav", "c.wav"], "en"), (["b.wav"], "de")]
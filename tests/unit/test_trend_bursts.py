@@ -0,0 +1,78 @@
+"""Streaming burst detection on trend volume velocity, and the emerging-trends listing."""
+
+from datetime import datetime, timedelta
+
+
+def _detector():
+    from src.services.trend_bursts import TrendBurstDetector
+
+    return TrendBurstDetector()
+
+
+def _feed(detector, state, volumes, start, step=timedelta(hours=1)):
+    for index, volume in enumerate(volumes):
+        detector._update(state, start + index * step, volume)
+    return state
+
+
+def _state(trend_id=1):
+    from src.models import TrendBurstState
+
+    return TrendBurstState(trend_id=trend_id, observations=0, bursting=False)
+
+
+def test_steady_growth_does_not_burst_and_a_jump_does():
+    detector = _detector()
+    start = datetime(2025, 6, 1)
+    # +100 per hour, then +2000 in one hour
+    state = _feed(detector, _state(), [1000 + 100 * hour for hour in range(10)], start)
+    assert not state.bursting
+    assert abs(state.z_score) < 1
+
+    _feed(detector, state, [1900 + 2000], start + timedelta(hours=10))
+    assert state.bursting
+    assert state.z_score >= detector.z_threshold
+    assert state.burst_started_at == start + timedelta(hours=10)
+    assert state.peak_z_score == state.z_score
+
+
+def test_burst_ends_once_velocity_falls_back():
+    detector = _detector()
+    start = datetime(2025, 6, 1)
+    state = _feed(detector, _state(), [1000 + 100 * hour for hour in range(10)] + [3900], start)
+    assert state.bursting
+
+    _feed(detector, state, [4000], start + timedelta(hours=11))
+    assert not state.bursting
+    # The winsorized spike only moved the baseline part of the way
+    assert state.baseline < 1000
+
+
+def test_no_score_before_enough_observations():
+    detector = _detector()
+    state = _feed(detector, _state(), [0, 10, 5000], datetime(2025, 6, 1))
+    assert state.observations < detector.min_observations
+    assert state.z_score is None
+    assert not state.bursting
+
+
+def test_stale_bursts_leave_emerging_and_are_expired_by_the_next_ingest(app):
+    from src.models import db, Trend, TrendBurstState
+
+    now = datetime.utcnow()
+    for trend_id, keyword, hours_ago in [(1, "fresh burst", 1), (2, "forgotten burst", 48)]:
+        db.session.add(Trend(id=trend_id, keyword=keyword, platform="tiktok", volume=100))
+        db.session.add(TrendBurstState(trend_id=trend_id, observations=10, bursting=True, z_score=5.0,
+                                       baseline=10.0, scale=5.0, last_ts=now - timedelta(hours=hours_ago), last_volume=100))
+    db.session.commit()
+
+    detector = _detector()
+    assert [trend["keyword"] for trend in detector.emerging()] == ["fresh burst"]
+    # The stored flag is still set until an ingest comes by
+    assert db.session.get(TrendBurstState, 2).bursting
+
+    detector.observe({1: (now, 160)})
+    db.session.commit()
+    db.session.expire_all()
+    assert not db.session.get(TrendBurstState, 2).bursting
+    assert db.session.get(TrendBurstState, 1).bursting
@@ -0,0 +1,75 @@
+"""Clustering near-duplicate trends into canonical trends, and keeping their aggregates current."""
+
+import json
+
+
+def _trend(keyword, platform, engagement=1.0, volume=100, category="technology"):
+    return {"keyword": keyword, "platform": platform, "engagement_score": engagement, "volume": volume,
+            "growth_rate": 0.0, "sentiment": "neutral", "category": category, "hashtags": []}
+
+
+def _ingest(trends):
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    return TrendAnalyzer().ingest_trends(trends)
+
+
+def _clusters():
+    from src.models import db, Trend, CanonicalTrend
+
+    db.session.expire_all()
+    members = {}
+    for trend in Trend.query.order_by(Trend.id):
+        members.setdefault(trend.canonical_id, []).append(trend.keyword)
+    return {canonical.label: (canonical, members[canonical.id]) for canonical in CanonicalTrend.query}
+
+
+def test_canonical_key_drops_case_separators_hashes_and_years():
+    from src.services.trend_canonical import canonical_key
+
+    assert canonical_key("AI Revolution") == "airevolution"
+    assert canonical_key("#airevolution") == "airevolution"
+    assert canonical_key("AI revolution 2025") == "airevolution"
+    assert canonical_key("2025") == "2025"
+
+
+def test_near_duplicates_merge_and_distinct_keywords_do_not(app):
+    _ingest([
+        _trend("AI Revolution", "twitter"),
+        _trend("#airevolution", "instagram"),
+        _trend("AI revolution 2025", "tiktok"),
+        _trend("summer fashion trends", "instagram", category="fashion"),
+        _trend("winter recipes", "tiktok", category="food"),
+        _trend("crypto news", "twitter", category="finance"),
+    ])
+    # Arrives later, differs by one letter from a stored cluster's key
+    stats = _ingest([_trend("Summer fashion trend", "tiktok", category="fashion"),
+                     _trend("cryptonews today", "tiktok", category="finance")])
+    assert stats["canonical_created"] == 1
+
+    clusters = _clusters()
+    assert sorted(clusters) == ["AI Revolution", "crypto news", "cryptonews today", "summer fashion trends",
+                                "winter recipes"]
+    canonical, members = clusters["AI Revolution"]
+    assert members == ["AI Revolution", "#airevolution", "AI revolution 2025"]
+    assert canonical.trend_count == 3
+    assert json.loads(canonical.platforms) == ["instagram", "tiktok", "twitter"]
+    assert clusters["summer fashion trends"][1] == ["summer fashion trends", "Summer fashion trend"]
+    assert clusters["winter recipes"][1] == ["winter recipes"]
+
+
+def test_reingest_refreshes_the_cluster_aggregates(app):
+    _ingest([_trend("AI Revolution", "twitter", engagement=2.0, volume=100),
+             _trend("#airevolution", "instagram", engagement=4.0, volume=300)])
+    canonical, _ = _clusters()["AI Revolution"]
+    assert canonical.volume == 400
+    assert canonical.engagement_score == (2.0 * 100 + 4.0 * 300) / 400
+    assert canonical.peak_engagement == 4.0
+
+    _ingest([_trend("AI Revolution", "twitter", engagement=8.0, volume=500)])
+    canonical, members = _clusters()["AI Revolution"]
+    assert members == ["AI Revolution", "#airevolution"]
+    assert canonical.trend_count == 2
+    assert canonical.volume == 800
+    assert canonical.engagement_score == (8.0 * 500 + 4.0 * 300) / 800
+    assert canonical.peak_engagement == 8.0
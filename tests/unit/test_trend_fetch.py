@@ -0,0 +1,136 @@
+"""TrendAnalyzer._fetch_real_trends: connectors fetch concurrently and one failing does not touch the others."""
+
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def _connector(name, fetch, available=True):
+    """A connector whose fetch(connector, since, budget) coroutine is given; it logs its lifecycle calls."""
+    from src.services.connectors import TrendConnector
+
+    class Connector(TrendConnector):
+        def __init__(self):
+            self.name = name
+            super().__init__()
+            self.calls = []
+
+        def available(self):
+            return available
+
+        def prepare(self):
+            self.calls.append("prepare")
+
+        async def fetch(self, since, budget):
+            self.calls.append(("fetch", since))
+            return await fetch(self, since, budget)
+
+        def commit(self):
+            self.calls.append("commit")
+
+    return Connector()
+
+
+def _records(platform, *keywords):
+    from src.services.connectors import trend_record
+
+    async def fetch(connector, since, budget):
+        return [trend_record(keyword, platform, 5.0, 100, category="technology") for keyword in keywords]
+    return fetch
+
+
+def test_a_failing_slow_or_unconfigured_connector_leaves_the_others_alone(app, monkeypatch):
+    from src.models import Trend
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    monkeypatch.setenv("TREND_FETCH_TIMEOUT_SLOW_SECONDS", "0.2")
+
+    async def broken(connector, since, budget):
+        raise RuntimeError("API down")
+
+    async def slow(connector, since, budget):
+        await asyncio.sleep(5)
+        return []
+
+    async def nothing(connector, since, budget):
+        return None
+
+    analyzer = TrendAnalyzer()
+    analyzer.connectors = {
+        "twitter": _connector("twitter", _records("twitter", "ai agents", "rust")),
+        "broken": _connector("broken", broken),
+        "slow": _connector("slow", slow),
+        "offline": _connector("offline", _records("offline", "never"), available=False),
+        "empty": _connector("empty", nothing),
+        "tiktok": _connector("tiktok", _records("tiktok", "pasta")),
+    }
+
+    started = time.monotonic()
+    stats = analyzer.fetch_and_analyze_trends()
+    assert time.monotonic() - started < 2.0
+
+    report = analyzer.last_fetch_report
+    assert {platform: outcome["status"] for platform, outcome in report.items()} == {
+        "twitter": "ok", "broken": "error", "slow": "timeout", "offline": "unavailable", "empty": "unavailable",
+        "tiktok": "ok"}
+    assert (report["twitter"]["count"], report["tiktok"]["count"]) == (2, 1)
+    assert stats["platforms"] == report
+    assert sorted((trend.platform, trend.keyword) for trend in Trend.query) == \
+        [("tiktok", "pasta"), ("twitter", "ai agents"), ("twitter", "rust")]
+
+    # Only connectors that fetched successfully advance their state
+    connectors = analyzer.connectors
+    for platform in ("twitter", "tiktok"):
+        assert connectors[platform].calls == ["prepare", ("fetch", None), "commit"]
+    for platform in ("broken", "slow", "empty"):
+        assert connectors[platform].calls == ["prepare", ("fetch", None)]
+    assert connectors["offline"].calls == []
+
+
+def test_connectors_fetch_at_the_same_time(app):
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    # Each connector blocks on its own thread pool until every other one is fetching too
+    barrier = threading.Barrier(3, timeout=5)
+
+    def meet(platform):
+        async def fetch(connector, since, budget):
+            await connector.run(barrier.wait)
+            return await _records(platform, f"{platform} news")(connector, since, budget)
+        return fetch
+
+    analyzer = TrendAnalyzer()
+    analyzer.connectors = {platform: _connector(platform, meet(platform)) for platform in ("a", "b", "c")}
+    trends = analyzer._fetch_real_trends()
+
+    assert sorted(trend["keyword"] for trend in trends) == ["a news", "b news", "c news"]
+    assert {outcome["status"] for outcome in analyzer.last_fetch_report.values()} == {"ok"}
+
+
+def test_each_connector_fetches_since_its_own_last_success(app):
+    from src.models import db, TrendRefreshRun
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    now = datetime(2025, 6, 1, 12)
+    runs = [
+        (now - timedelta(hours=1), {"twitter": "error", "tiktok": "ok"}),
+        (now - timedelta(hours=2), {"twitter": "ok", "tiktok": "ok"}),
+    ]
+    for index, (started_at, statuses) in enumerate(runs):
+        platforms = {platform: {"status": status} for platform, status in statuses.items()}
+        db.session.add(TrendRefreshRun(id=f"{index:032d}", status="succeeded", started_at=started_at,
+                                       result=json.dumps({"platforms": platforms})))
+    db.session.commit()
+
+    analyzer = TrendAnalyzer()
+    analyzer.connectors = {platform: _connector(platform, _records(platform, "ai"))
+                           for platform in ("twitter", "tiktok", "instagram")}
+    analyzer._fetch_real_trends(["twitter", "tiktok"])
+
+    assert analyzer.connectors["twitter"].calls == ["prepare", ("fetch", now - timedelta(hours=2))]
+    assert analyzer.connectors["tiktok"].calls == ["prepare", ("fetch", now - timedelta(hours=1))]
+    # Platforms left out of the refresh are not touched at all
+    assert analyzer.connectors["instagram"].calls == []
+    assert set(analyzer.last_fetch_report) == {"twitter", "tiktok"}
@@ -0,0 +1,107 @@
+"""Damped Holt forecasts: the vectorised recursion, storage at ingest and the predictions endpoint."""
+
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+def _forecaster():
+    from src.services.trend_forecast import TrendForecaster
+
+    return TrendForecaster()
+
+
+def test_flat_series_forecasts_its_level():
+    forecaster = _forecaster()
+    values = np.full((1, 6), 4.0)
+    forecast = forecaster.forecast(values, np.ones(1))
+
+    assert forecast["level"][0] == 4.0
+    assert forecast["slope"][0] == 0.0
+    assert forecast["predicted"][0] == 4.0
+    assert forecast["time_to_peak"][0] == 0
+    # A perfect fit over six points: confidence is the history factor 6 / (6 + 5)
+    assert np.isclose(forecast["confidence"][0], 6 / 11)
+    assert forecaster.directions(forecast).tolist() == ["stable"]
+
+
+def test_directions_follow_the_slope_and_nan_padding_is_skipped():
+    forecaster = _forecaster()
+    values = np.array([
+        [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        [6.0, 5.0, 4.0, 3.0, 2.0, 1.0],
+        [np.nan, np.nan, np.nan, 2.0, 2.0, 2.0],
+    ])
+    forecast = forecaster.forecast(values, np.ones(3))
+
+    assert forecaster.directions(forecast).tolist() == ["rising", "declining", "stable"]
+    assert forecast["points"].tolist() == [6, 6, 3]
+    # A rising series has not peaked yet; the prediction stays above its level
+    assert forecast["predicted"][0] > forecast["level"][0]
+    assert 0 < forecast["time_to_peak"][0] <= forecaster.horizon_hours
+
+
+def _add_history(db, trend_id, engagements, hours_ago):
+    from src.models import TrendSnapshot
+
+    now = datetime.utcnow()
+    db.session.bulk_insert_mappings(TrendSnapshot, [{
+        "trend_id": trend_id, "ts": now - timedelta(hours=hours_ago - index), "volume": 100, "engagement": engagement
+    } for index, engagement in enumerate(engagements)])
+
+
+def _add_trend(db, trend_id, keyword, platform):
+    from src.models import Trend
+
+    db.session.add(Trend(id=trend_id, keyword=keyword, platform=platform, engagement_score=1.0))
+
+
+def test_update_stores_forecasts_from_the_latest_points_and_drops_stale_ones(app):
+    from src.models import db, TrendForecast
+
+    _add_trend(db, 1, "rising topic", "tiktok")
+    _add_trend(db, 2, "old topic", "twitter")
+    _add_history(db, 1, [9.0, 9.0, 9.0, 1.0, 2.0, 3.0], hours_ago=6)
+    db.session.add(TrendForecast(trend_id=2, predicted_engagement=5.0, trend_direction="stable",
+                                 generated_for=datetime.utcnow() - timedelta(days=30)))
+    db.session.commit()
+
+    forecaster = _forecaster()
+    forecaster.max_points = 3
+    assert forecaster.update([1]) == 1
+    db.session.commit()
+
+    stored = db.session.get(TrendForecast, 1)
+    # Only the three newest snapshots (1, 2, 3) were fitted: the older plateau is ignored
+    assert stored.points == 3
+    assert stored.trend_direction == "rising"
+    assert db.session.get(TrendForecast, 2) is None
+
+
+def test_predictions_endpoint_reads_stored_forecasts_without_the_legacy_ml_stack(app):
+    from src.models import db
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    analyzer = TrendAnalyzer()
+    for engagement in (1.0, 2.0, 3.0):
+        stats = analyzer.ingest_trends([
+            {"keyword": "ai agents", "platform": "tiktok", "engagement_score": engagement, "volume": 100,
+             "growth_rate": 0.0, "sentiment": "positive", "category": "technology", "hashtags": []},
+            {"keyword": "quiet topic", "platform": "twitter", "engagement_score": 2.0, "volume": 100,
+             "growth_rate": 0.0, "sentiment": "neutral", "category": "news", "hashtags": []},
+        ])
+    assert stats["forecasts_updated"] == 2
+
+    client = app.test_client()
+    body = client.get("/api/trends/predictions").get_json()
+    assert body["total"] == 2
+    assert [item["hashtag"] for item in body["predictions"]] == ["ai agents", "quiet topic"]
+    assert body["predictions"][0]["platform"] == "tiktok"
+    assert body["predictions"][0]["recommended_actions"]
+
+    body = client.get("/api/trends/predictions?platform=twitter").get_json()
+    assert [item["hashtag"] for item in body["predictions"]] == ["quiet topic"]
+    assert "src.ml_services" not in sys.modules
+    assert "src.database" not in sys.modules
+    db.session.remove()
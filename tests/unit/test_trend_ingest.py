@@ -0,0 +1,94 @@
+"""The trend ingest write path: upsert on (keyword, platform), in-batch dedupe, stats and rollup deltas."""
+
+from collections import defaultdict
+
+import pytest
+
+
+def _trend(keyword, platform, engagement, volume=100, category="technology", sentiment="positive"):
+    return {"keyword": keyword, "platform": platform, "engagement_score": engagement, "volume": volume,
+            "growth_rate": 1.5, "sentiment": sentiment, "category": category, "hashtags": [f"#{keyword}"]}
+
+
+def _rollups_by_key():
+    from src.models import db, TrendRollup
+
+    db.session.expire_all()
+    return {
+        (rollup.day, rollup.platform, rollup.category, rollup.sentiment):
+            (rollup.trend_count, round(rollup.engagement_sum, 6))
+        for rollup in TrendRollup.query if rollup.trend_count
+    }
+
+
+def _grouped_trends():
+    from src.models import Trend
+
+    totals = defaultdict(lambda: [0, 0.0])
+    for trend in Trend.query:
+        total = totals[(trend.created_at.date(), trend.platform, trend.category or "", trend.sentiment or "")]
+        total[0] += 1
+        total[1] += trend.engagement_score or 0.0
+    return {key: (count, round(engagement, 6)) for key, (count, engagement) in totals.items()}
+
+
+@pytest.fixture(params=["upsert", "fallback"])
+def analyzer(request, app, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    if request.param == "fallback":
+        def unavailable(self, rows):
+            raise OperationalError("INSERT ... ON CONFLICT", None, Exception("no unique constraint"))
+
+        monkeypatch.setattr(TrendAnalyzer, "_upsert_trend_rows", unavailable)
+    analyzer = TrendAnalyzer()
+    analyzer.merges = 0
+    merge = analyzer._merge_trend_rows
+
+    def counted_merge(rows, existing):
+        analyzer.merges += 1
+        return merge(rows, existing)
+
+    analyzer._merge_trend_rows = counted_merge
+    analyzer.expected_merges = 2 if request.param == "fallback" else 0
+    return analyzer
+
+
+def test_ingesting_twice_inserts_then_updates_and_keeps_rollups_exact(analyzer):
+    from src.models import db, Trend, TrendSnapshot
+
+    stats = analyzer.ingest_trends([
+        _trend("ai agents", "tiktok", 1.0, volume=10),
+        _trend("ai agents", "tiktok", 3.0, volume=30),  # later entry wins
+        _trend("street food", "instagram", 2.0, category="lifestyle"),
+        _trend("ai agents", "twitter", 4.0, sentiment="neutral"),
+    ])
+    assert {key: stats[key] for key in ("received", "inserted", "updated", "duplicates_dropped", "snapshots")} == \
+        {"received": 4, "inserted": 3, "updated": 0, "duplicates_dropped": 1, "snapshots": 3}
+    assert Trend.query.count() == 3
+    stored = Trend.query.filter_by(keyword="ai agents", platform="tiktok").one()
+    assert (stored.engagement_score, stored.volume) == (3.0, 30)
+    assert _rollups_by_key() == _grouped_trends()
+
+    created_at = stored.created_at
+    stats = analyzer.ingest_trends([
+        _trend("ai agents", "tiktok", 5.0, volume=50, category="news"),
+        _trend("ai agents", "tiktok", 6.0, volume=60, category="news"),
+        _trend("pasta", "tiktok", 1.0, category="lifestyle"),
+    ])
+    assert {key: stats[key] for key in ("received", "inserted", "updated", "duplicates_dropped", "snapshots")} == \
+        {"received": 3, "inserted": 1, "updated": 1, "duplicates_dropped": 1, "snapshots": 2}
+    db.session.expire_all()
+    assert Trend.query.count() == 4
+    stored = Trend.query.filter_by(keyword="ai agents", platform="tiktok").one()
+    assert (stored.engagement_score, stored.volume) == (6.0, 60)
+    # Only metrics move on update; the identity of the trend stays
+    assert stored.category == "technology"
+    assert stored.created_at == created_at
+    assert TrendSnapshot.query.filter_by(trend_id=stored.id).count() == 2
+
+    assert _rollups_by_key() == _grouped_trends()
+    assert sum(count for count, _ in _rollups_by_key().values()) == 4
+    assert round(sum(engagement for _, engagement in _rollups_by_key().values()), 6) == 6.0 + 2.0 + 4.0 + 1.0
+    assert analyzer.merges == analyzer.expected_merges
@@ -0,0 +1,117 @@
+"""Character matching (Aho-Corasick automata and character bitmasks) against a naive substring scan."""
+
+import json
+import random
+from types import SimpleNamespace
+
+
+def _character(character_id, keywords=None, platforms=None, style=None):
+    return SimpleNamespace(id=character_id, keywords=None if keywords is None else json.dumps(keywords),
+                           preferred_platforms=None if platforms is None else json.dumps(platforms),
+                           content_style=style)
+
+
+def _trend(trend_id, keyword, platform="twitter", category=None):
+    return SimpleNamespace(id=trend_id, keyword=keyword, platform=platform, category=category)
+
+
+def _naive(characters, trend):
+    """Indexes of the characters a trend matches, by scanning every keyword of every character."""
+    matched = []
+    for index, character in enumerate(characters):
+        platforms = json.loads(character.preferred_platforms or "[]")
+        if platforms and trend.platform not in platforms:
+            continue
+        try:
+            keywords = [keyword for keyword in json.loads(character.keywords or "[]") if isinstance(keyword, str)]
+        except ValueError:
+            keywords = []
+        style = (character.content_style or "").lower()
+        if any(keyword.lower() in trend.keyword.lower() for keyword in keywords) or \
+                (character.content_style and style in (trend.category or "").lower()):
+            matched.append(index)
+    return matched
+
+
+def _matched(matcher, trend):
+    return [index for index, _ in matcher.match(trend, serendipity=0.0)]
+
+
+def test_overlapping_keywords_and_case_differences():
+    from src.services.trend_matching import AhoCorasick, CharacterMatcher
+
+    # Patterns ending inside, overlapping and containing one another
+    automaton = AhoCorasick([("he", 1), ("she", 2), ("his", 4), ("hers", 8)])
+    assert automaton.find("ushers") == 1 | 2 | 8
+    assert automaton.find("ahishe") == 1 | 2 | 4
+    assert automaton.find("xyz") == 0
+
+    characters = [
+        _character(1, ["AI", "machine learning"]),
+        _character(2, ["Learning"], platforms=["tiktok"]),
+        _character(3, ["art", "SMART"]),
+        _character(4, [], style="Lifestyle"),
+    ]
+    matcher = CharacterMatcher(characters)
+    trends = [
+        _trend(1, "Machine Learning Smartphones", "tiktok"),
+        _trend(2, "MACHINE LEARNING", "twitter", "lifestyle tips"),
+        _trend(3, "painting", "twitter", "LIFESTYLE"),
+        _trend(4, "startups", "instagram"),
+    ]
+    for trend in trends:
+        assert _matched(matcher, trend) == _naive(characters, trend)
+    assert _matched(matcher, trends[0]) == [0, 1, 2]
+    assert _matched(matcher, trends[1]) == [0, 3]
+
+
+def test_empty_interest_lists_match_nothing():
+    from src.services.trend_matching import CharacterMatcher
+
+    # No keywords, an empty list, only non-string entries, and a malformed field
+    characters = [_character(1), _character(2, []), _character(3, [7, None]),
+                  SimpleNamespace(id=4, keywords="{not json", preferred_platforms=None, content_style=None)]
+    matcher = CharacterMatcher(characters)
+    for trend in [_trend(1, "ai agents"), _trend(2, "", category="tech")]:
+        assert _matched(matcher, trend) == _naive(characters, trend) == []
+    assert list(CharacterMatcher([]).match(_trend(1, "ai agents"), serendipity=1.0)) == []
+
+
+def test_matches_agree_with_a_naive_scan_on_generated_profiles():
+    from src.services.trend_matching import CharacterMatcher
+
+    generator = random.Random(7)
+    # A small alphabet so keywords overlap, repeat and nest inside one another
+    letters = "abAB "
+
+    def word(low, high):
+        return "".join(generator.choice(letters) for _ in range(generator.randint(low, high)))
+
+    platforms = ["twitter", "tiktok", "instagram"]
+    for _ in range(30):
+        characters = [
+            _character(index, [word(1, 4) for _ in range(generator.randint(0, 4))],
+                       generator.sample(platforms, generator.randint(0, 2)),
+                       generator.choice([None, word(1, 3)]))
+            for index in range(generator.randint(0, 12))
+        ]
+        matcher = CharacterMatcher(characters)
+        for trend_id in range(20):
+            trend = _trend(trend_id, word(0, 12), generator.choice(platforms + ["facebook"]),
+                           generator.choice([None, word(0, 8)]))
+            assert _matched(matcher, trend) == _naive(characters, trend)
+
+
+def test_serendipity_adds_allowed_characters_the_same_way_every_time():
+    from src.services.trend_matching import CharacterMatcher
+
+    characters = [_character(index, ["zzz"], ["tiktok"] if index % 2 else []) for index in range(40)]
+    matcher = CharacterMatcher(characters)
+    trend = _trend(9, "ai agents", "twitter")
+
+    picked = [index for index, _ in matcher.match(trend, serendipity=0.5)]
+    assert picked == [index for index, _ in CharacterMatcher(characters).match(trend, serendipity=0.5)]
+    # Only characters allowed on the platform, and roughly the requested share of them
+    assert set(picked) <= set(range(0, 40, 2))
+    assert 3 <= len(picked) <= 17
+    assert [index for index, _ in matcher.match(trend, serendipity=1.0)] == list(range(0, 40, 2))
@@ -0,0 +1,74 @@
+"""Vectorised growth, velocity and acceleration from snapshot history, checked against hand computations."""
+
+import math
+from datetime import datetime, timedelta
+
+
+def _add_snapshots(db, rows):
+    from src.models import TrendSnapshot
+
+    db.session.bulk_insert_mappings(TrendSnapshot, [
+        {"trend_id": trend_id, "ts": ts, "volume": volume, "engagement": 1.0} for trend_id, ts, volume in rows
+    ])
+
+
+def _add_trends(db, *trend_ids):
+    from src.models import Trend
+
+    for trend_id in trend_ids:
+        db.session.add(Trend(id=trend_id, keyword=f"topic {trend_id}", platform="tiktok", growth_rate=7.0))
+    db.session.commit()
+
+
+def test_compute_matches_a_hand_computation_per_trend(app):
+    from src.models import db
+    from src.services.trend_momentum import TrendMomentumEngine
+
+    engine = TrendMomentumEngine()
+    now = datetime.utcnow().replace(microsecond=0)
+    _add_trends(db, 1, 2, 3)
+    # Out of order and interleaved across trends on purpose
+    _add_snapshots(db, [
+        (1, now, 260),
+        (3, now - timedelta(hours=2), 100),
+        (1, now - timedelta(hours=3), 100),
+        (3, now - timedelta(hours=30), 50),
+        (2, now, 500),
+        (1, now - timedelta(hours=2), 200),
+        (3, now, 150),
+    ])
+    db.session.commit()
+    metrics = engine.compute([1, 2, 3])
+
+    # Trend 1: +100 over 1h, then +60 over 2h; the older rate decays by its 2h age
+    older_weight = 2 ** (-2 / engine.halflife_hours)
+    velocity = (older_weight * 100 + 30) / (older_weight + 1)
+    assert math.isclose(metrics.loc[1, "velocity"], round(velocity, 4))
+    assert math.isclose(metrics.loc[1, "acceleration"], round((velocity - 100) / 2, 4))
+    assert metrics.loc[1, "growth_rate"] == 160.0
+
+    # Trend 2: one snapshot is not enough for any of them
+    assert metrics.loc[2].isna().all()
+
+    # Trend 3: growth only looks back over the window, velocity over the whole history
+    assert metrics.loc[3, "growth_rate"] == 50.0
+    velocity = (older_weight * (50 / 28) + 25) / (older_weight + 1)
+    assert math.isclose(metrics.loc[3, "velocity"], round(velocity, 4))
+
+
+def test_update_trends_stores_metrics_and_leaves_single_snapshot_trends_alone(app):
+    from src.models import db, Trend
+    from src.services.trend_momentum import TrendMomentumEngine
+
+    now = datetime.utcnow()
+    _add_trends(db, 1, 2)
+    _add_snapshots(db, [(1, now - timedelta(hours=1), 100), (1, now, 150), (2, now, 500)])
+    db.session.commit()
+
+    assert TrendMomentumEngine().update_trends([1, 2]) == 1
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(Trend, 1).growth_rate == 50.0
+    assert math.isclose(db.session.get(Trend, 1).velocity, 50.0, rel_tol=1e-3)
+    assert db.session.get(Trend, 2).growth_rate == 7.0
+    assert db.session.get(Trend, 2).velocity is None
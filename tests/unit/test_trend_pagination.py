@@ -0,0 +1,122 @@
+"""Keyset pagination of trends: cursors, page sequencing across ties, and the limit cap."""
+
+import base64
+
+import pytest
+
+
+def _paginator():
+    from src.services.trend_pagination import TrendPaginator
+
+    return TrendPaginator()
+
+
+def _add_trends(db, count):
+    from src.models import Trend
+
+    # Few distinct scores, so most pages start and end inside a run of ties
+    db.session.add_all(
+        Trend(keyword=f"topic {index}", platform=("tiktok", "twitter")[index % 2], engagement_score=float(index % 4))
+        for index in range(count)
+    )
+    db.session.commit()
+
+
+def test_cursor_round_trip_and_rejects_foreign_cursors():
+    from src.models import Trend
+    from src.services.trend_pagination import InvalidCursor, decode_cursor, encode_cursor
+
+    cursor = encode_cursor(Trend(id=42, engagement_score=3.25))
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (3.25, 42)
+    assert decode_cursor(encode_cursor(Trend(id=7))) == (0.0, 7)
+
+    for bad in ["not a cursor!", base64.urlsafe_b64encode(b'{"id": 1}').decode(),
+                base64.urlsafe_b64encode(b"[1, 2, 3]").decode(), base64.urlsafe_b64encode(b'["x", 1]').decode()]:
+        with pytest.raises(InvalidCursor):
+            decode_cursor(bad)
+
+
+def test_clamp_limit():
+    paginator = _paginator()
+    assert paginator.clamp_limit(None, 10) == 10
+    assert paginator.clamp_limit(0, 10) == 10
+    assert paginator.clamp_limit(-3, 10) == 1
+    assert paginator.clamp_limit(25, 10) == 25
+    assert paginator.clamp_limit(10 ** 6, 10) == paginator.max_limit
+
+
+@pytest.mark.parametrize("platform", [None, "twitter"])
+def test_pages_cover_every_trend_once_in_order(app, platform):
+    from src.models import db, Trend
+
+    _add_trends(db, 57)
+    query = Trend.query.filter_by(platform=platform) if platform else Trend.query
+    expected = [trend.id for trend in query.order_by(Trend.engagement_score.desc(), Trend.id.desc())]
+
+    paginator = _paginator()
+    seen = []
+    cursor = None
+    while True:
+        page = paginator.page(query, 10, cursor)
+        assert len(page["items"]) <= 10
+        seen.extend(trend.id for trend in page["items"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            break
+        cursor = page["next_cursor"]
+
+    assert seen == expected
+
+
+def test_trends_stored_with_a_null_score_are_paged_as_zero_after_upgrade(database_url):
+    from sqlalchemy import create_engine, text
+    from src.main import create_app
+    from src.models import db, Trend
+
+    # The baseline release's trend table allowed NULL scores
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE trend (id INTEGER PRIMARY KEY, keyword VARCHAR(200) NOT NULL, "
+            "platform VARCHAR(50) NOT NULL, engagement_score FLOAT, volume INTEGER, growth_rate FLOAT, "
+            "sentiment VARCHAR(20), category VARCHAR(100), hashtags TEXT, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text(
+            "INSERT INTO trend (id, keyword, platform, engagement_score) VALUES "
+            "(1, 'a', 'twitter', 2.0), (2, 'b', 'twitter', NULL), (3, 'c', 'twitter', 0.0), (4, 'd', 'tiktok', NULL), "
+            "(5, 'e', 'tiktok', -1.0)"
+        ))
+    engine.dispose()
+
+    app = create_app(start_workers=False)
+    with app.app_context():
+        paginator = _paginator()
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.page(Trend.query, 1, cursor)
+            seen.extend(trend.id for trend in page["items"])
+            if not page["has_more"]:
+                break
+            cursor = page["next_cursor"]
+        assert seen == [1, 4, 3, 2, 5]
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_trends_endpoint_pages_and_rejects_a_bad_cursor(app):
+    from src.models import db
+
+    _add_trends(db, 5)
+    client = app.test_client()
+
+    first = client.get("/api/trends/top?limit=3").get_json()
+    assert len(first["trends"]) == 3 and first["has_more"]
+    second = client.get(f"/api/trends/top?limit=3&cursor={first['next_cursor']}").get_json()
+    assert len(second["trends"]) == 2 and not second["has_more"]
+    assert not {trend["id"] for trend in first["trends"]} & {trend["id"] for trend in second["trends"]}
+
+    response = client.get("/api/trends?cursor=garbage")
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.get_json()["error"]
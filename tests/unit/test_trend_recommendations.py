@@ -0,0 +1,88 @@
+"""Materialized content recommendations: deterministic output and recomputing only when their inputs change."""
+
+import json
+from datetime import datetime, timedelta
+
+
+def _seed(db):
+    from src.models import CharacterProfile, Trend, TrendSnapshot, User
+
+    user = User(username="creator", email="creator@example.com")
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all([
+        CharacterProfile(user_id=user.id, name="Techie", tone="educational", keywords=json.dumps(["ai"]),
+                         preferred_platforms=json.dumps(["twitter", "tiktok"])),
+        CharacterProfile(user_id=user.id, name="Foodie", tone="casual", keywords=json.dumps(["food"])),
+    ])
+    trends = [Trend(keyword=keyword, platform=platform, engagement_score=score, category="technology",
+                    hashtags=json.dumps([f"#{keyword.replace(' ', '')}"]))
+              for keyword, platform, score in [("ai agents", "tiktok", 8.0), ("street food", "instagram", 6.0),
+                                               ("ai art", "twitter", 4.0), ("food trucks", "tiktok", 2.0)]]
+    db.session.add_all(trends)
+    db.session.flush()
+    db.session.add_all(TrendSnapshot(trend_id=trend.id, ts=datetime(2025, 6, 1), engagement=trend.engagement_score)
+                       for trend in trends)
+    db.session.commit()
+    return user, trends
+
+
+def _rows(recommendations):
+    return [(row.id, row.character_id, row.trend_id, row.content_type, row.recommended_time, row.confidence_score,
+             row.hashtag_suggestions, row.content_suggestions, row.generation) for row in recommendations]
+
+
+def test_unchanged_inputs_return_the_same_rows_without_recomputing(app):
+    from src.models import db, RecommendationState
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    user, _ = _seed(db)
+    analyzer = TrendAnalyzer()
+    first = _rows(analyzer.generate_recommendations(user.id))
+    assert first
+    computed_at = db.session.get(RecommendationState, user.id).computed_at
+
+    second = _rows(analyzer.generate_recommendations(user.id))
+    assert second == first
+    state = db.session.get(RecommendationState, user.id)
+    assert state.computed_at == computed_at
+    assert state.generation == datetime(2025, 6, 1)
+
+    # Forcing a recomputation produces the same recommendations, content types included
+    forced = _rows(analyzer.generate_recommendations(user.id, force=True))
+    assert [row[1:] for row in forced] == [row[1:] for row in first]
+
+
+def test_a_refresh_that_only_moves_scores_keeps_the_rows_and_updates_confidence(app):
+    from src.models import db, RecommendationState, TrendSnapshot
+    from src.services.trend_analyzer import TrendAnalyzer
+
+    user, trends = _seed(db)
+    analyzer = TrendAnalyzer()
+    first = {row.trend_id: row for row in analyzer.generate_recommendations(user.id)}
+    computed_at = db.session.get(RecommendationState, user.id).computed_at
+    content_types = {trend_id: row.content_type for trend_id, row in first.items()}
+
+    # Same ranking, new scores and a newer snapshot generation
+    refreshed_at = datetime(2025, 6, 1) + timedelta(hours=1)
+    for trend, score in zip(trends, (9.5, 7.0, 3.0, 1.0)):
+        trend.engagement_score = score
+        db.session.add(TrendSnapshot(trend_id=trend.id, ts=refreshed_at, engagement=score))
+    db.session.commit()
+
+    second = analyzer.generate_recommendations(user.id)
+    state = db.session.get(RecommendationState, user.id)
+    assert state.computed_at == computed_at
+    assert state.generation == refreshed_at
+    db.session.expire_all()
+    assert {row.trend_id: row.content_type for row in second} == content_types
+    scores = {trend.id: trend.engagement_score for trend in trends}
+    for row in second:
+        assert row.generation == refreshed_at
+        assert row.confidence_score == min(scores[row.trend_id] / 10.0, 1.0)
+
+    # A change in the ranking recomputes
+    trends[3].engagement_score = 9.9
+    db.session.commit()
+    analyzer.generate_recommendations(user.id)
+    assert db.session.get(RecommendationState, user.id).computed_at > computed_at
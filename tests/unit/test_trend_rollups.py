@@ -0,0 +1,115 @@
+"""Daily trend rollups: distributions over any date range match a GROUP BY over trend through ingest and purges."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+DAY = datetime(2025, 6, 1)
+RANGES = [
+    (None, None),
+    (DAY + timedelta(hours=12), DAY + timedelta(days=2, hours=12)),  # partial days at both ends
+    (DAY + timedelta(days=1), DAY + timedelta(days=2)),  # whole days
+    (DAY + timedelta(hours=8), DAY + timedelta(hours=20)),  # within one day
+    (DAY + timedelta(days=1, hours=6), None),
+    (None, DAY + timedelta(days=1, hours=6)),
+    (DAY + timedelta(days=5), DAY + timedelta(days=6)),  # nothing there
+]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Sets the time ingest stamps trends with."""
+    import src.services.trend_analyzer as trend_analyzer
+
+    class Clock(datetime):
+        now_value = DAY
+
+        @classmethod
+        def utcnow(cls):
+            return cls.now_value
+
+    monkeypatch.setattr(trend_analyzer, "datetime", Clock)
+
+    def set_time(value):
+        Clock.now_value = value
+    return set_time
+
+
+def _trend(keyword, platform, engagement, category="technology", sentiment="positive"):
+    return {"keyword": keyword, "platform": platform, "engagement_score": engagement, "volume": 100,
+            "growth_rate": 0.0, "sentiment": sentiment, "category": category, "hashtags": []}
+
+
+def _grouped(dimension, start, end, **filters):
+    from sqlalchemy import func, select
+    from src.models import db, Trend
+
+    column = getattr(Trend, dimension)
+    query = select(column, func.count(Trend.id), func.sum(Trend.engagement_score)).group_by(column)
+    for name, value in filters.items():
+        query = query.where(getattr(Trend, name) == value)
+    if start is not None:
+        query = query.where(Trend.created_at >= start)
+    if end is not None:
+        query = query.where(Trend.created_at <= end)
+    return sorted((value, count, round(engagement, 6)) for value, count, engagement in db.session.execute(query))
+
+
+def _assert_distributions_match():
+    from src.services.trend_rollups import TrendRollups
+
+    rollups = TrendRollups()
+    for start, end in RANGES:
+        for dimension, filters in [("platform", {}), ("category", {}), ("sentiment", {}),
+                                   ("category", {"platform": "tiktok"}), ("platform", {"sentiment": "negative"})]:
+            distribution = [(row[dimension], row["count"], round(row["engagement_sum"], 6))
+                            for row in rollups.distribution(dimension, start, end, **filters)]
+            assert distribution == _grouped(dimension, start, end, **filters), (dimension, filters, start, end)
+
+
+def test_distributions_match_a_group_by_through_ingest_updates_and_purges(app, clock):
+    from sqlalchemy import delete
+    from src.models import db, Trend, TrendSnapshot, TrendToken
+    from src.services.trend_analyzer import TrendAnalyzer
+    from src.services.trend_rollups import rebuild_trend_rollups
+
+    analyzer = TrendAnalyzer()
+    batches = [
+        (DAY + timedelta(hours=9), [_trend("ai agents", "tiktok", 4.0), _trend("street food", "instagram", 2.5,
+                                                                             "lifestyle", "neutral")]),
+        (DAY + timedelta(hours=18), [_trend("ai art", "twitter", 1.5, sentiment="negative"),
+                                     _trend("ai agents", "tiktok", 6.0)]),  # an update
+        (DAY + timedelta(days=1, hours=12), [_trend("pasta", "tiktok", 3.0, "lifestyle", "negative"),
+                                             _trend("street food", "instagram", 0.5, "lifestyle", "neutral")]),
+        (DAY + timedelta(days=2, hours=23), [_trend("ai agents", "twitter", 7.0),
+                                             _trend("pasta", "tiktok", 9.0, "lifestyle", "negative")]),
+    ]
+    for at, batch in batches:
+        clock(at)
+        analyzer.ingest_trends(batch)
+        _assert_distributions_match()
+    assert Trend.query.count() == 5
+
+    # Trends leave the table only in the duplicate merge, which rebuilds the rollups after its deletes
+    purged = [trend.id for trend in Trend.query.filter(Trend.keyword.in_(["street food", "ai art"]))]
+    for model, column in ((TrendToken, TrendToken.trend_id), (TrendSnapshot, TrendSnapshot.trend_id),
+                          (Trend, Trend.id)):
+        db.session.execute(delete(model).where(column.in_(purged)))
+    rebuild_trend_rollups(db.session.connection())
+    db.session.commit()
+    _assert_distributions_match()
+
+    # Ingest keeps adding onto the rebuilt rows
+    clock(DAY + timedelta(days=1, hours=3))
+    analyzer.ingest_trends([_trend("street food", "instagram", 1.0, "lifestyle", "neutral"),
+                            _trend("pasta", "tiktok", 2.0, "lifestyle", "negative")])
+    _assert_distributions_match()
+
+
+def test_distribution_rejects_unknown_dimensions(app):
+    from src.services.trend_rollups import TrendRollups
+
+    with pytest.raises(ValueError):
+        TrendRollups().distribution("keyword")
+    with pytest.raises(ValueError):
+        TrendRollups().distribution("platform", keyword="ai")
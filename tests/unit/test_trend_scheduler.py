@@ -0,0 +1,118 @@
+"""The trend scheduler keeps its lease through long runs and does not store a run it lost the lease for."""
+
+import time
+from datetime import datetime, timedelta
+
+
+class _Analyzer:
+    """Stands in for TrendAnalyzer: a fetch that takes a while, then the store step."""
+
+    def __init__(self, fetch_seconds=0.0, during_fetch=None):
+        self.fetch_seconds = fetch_seconds
+        self.during_fetch = during_fetch
+        self.stored = 0
+
+    def fetch_and_analyze_trends(self, platforms=None, before_store=None):
+        time.sleep(self.fetch_seconds)
+        if self.during_fetch:
+            self.during_fetch()
+        if before_store is not None:
+            before_store()
+        self.stored += 1
+        return {"inserted": 0, "updated": 0}
+
+
+def _leader(monkeypatch, analyzer, lease_seconds):
+    from src.services.trend_scheduler import TrendRefreshScheduler
+
+    monkeypatch.setenv("TREND_SCHEDULER_LEASE_SECONDS", str(lease_seconds))
+    scheduler = TrendRefreshScheduler(analyzer)
+    scheduler._is_leader = scheduler.acquire_lease()
+    assert scheduler._is_leader
+    return scheduler
+
+
+def _run(scheduler):
+    from src.services.trend_scheduler import enqueue_refresh
+
+    return scheduler.claim(enqueue_refresh(platform="tiktok").id)
+
+
+def test_the_lease_is_renewed_while_a_run_is_in_progress(app, monkeypatch):
+    from src.models import db, SchedulerLease
+
+    seen = []
+
+    def read_lease():
+        seen.append(db.session.get(SchedulerLease, "trend_scheduler", populate_existing=True).expires_at)
+
+    analyzer = _Analyzer(fetch_seconds=1.6, during_fetch=read_lease)
+    scheduler = _leader(monkeypatch, analyzer, lease_seconds=3)
+    started = datetime.utcnow()
+    run = _run(scheduler)
+    scheduler.execute(run)
+
+    assert run.status == "succeeded"
+    assert analyzer.stored == 1
+    # The heartbeat renewed it after a second, before the fetch was over
+    assert seen[0] > started + timedelta(seconds=3.5)
+    assert db.session.get(SchedulerLease, "trend_scheduler").holder == scheduler.node_id
+
+
+def test_a_run_whose_lease_was_taken_over_is_not_stored(app, monkeypatch):
+    from src.models import db, SchedulerLease
+
+    def take_over():
+        lease = db.session.get(SchedulerLease, "trend_scheduler")
+        lease.holder = "other-node:1"
+        lease.expires_at = datetime.utcnow() + timedelta(seconds=60)
+        db.session.commit()
+
+    analyzer = _Analyzer(during_fetch=take_over)
+    scheduler = _leader(monkeypatch, analyzer, lease_seconds=60)
+    run = _run(scheduler)
+    scheduler.execute(run)
+
+    run = db.session.get(type(run), run.id, populate_existing=True)
+    assert analyzer.stored == 0
+    assert run.status == "failed"
+    assert "lost its lease" in run.error
+    assert not scheduler._is_leader
+    assert db.session.get(SchedulerLease, "trend_scheduler").holder == "other-node:1"
+
+
+def test_manual_refreshes_without_a_scheduler_run_one_at_a_time(app, monkeypatch):
+    import threading
+    from src.models import db, TrendRefreshRun
+    from src.services.trend_scheduler import trigger_refresh
+
+    monkeypatch.setenv("TREND_SCHEDULER_TICK_SECONDS", "0.05")
+    running = []
+    overlaps = []
+    lock = threading.Lock()
+
+    class SharedAnalyzer(_Analyzer):
+        def fetch_and_analyze_trends(self, platforms=None, before_store=None):
+            with lock:
+                running.append(platforms)
+                overlaps.append(len(running))
+            try:
+                return super().fetch_and_analyze_trends(platforms, before_store)
+            finally:
+                with lock:
+                    running.remove(platforms)
+
+    # The route hands every trigger the same module-level analyzer
+    analyzer = SharedAnalyzer(fetch_seconds=0.3)
+    runs = [trigger_refresh(app, platform=platform, trend_analyzer=analyzer) for platform in ("tiktok", "twitter")]
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        if all(db.session.get(TrendRefreshRun, run.id).status == "succeeded" for run in runs):
+            break
+        time.sleep(0.05)
+
+    assert [db.session.get(TrendRefreshRun, run.id).status for run in runs] == ["succeeded", "succeeded"]
+    assert analyzer.stored == 2
+    assert max(overlaps) == 1
@@ -0,0 +1,90 @@
+"""Engagement over time: LTTB downsampling, SQL time buckets and the points limit."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+def _series():
+    from src.services.trend_series import EngagementSeries
+
+    return EngagementSeries()
+
+
+def test_lttb_keeps_the_ends_and_the_spike():
+    from src.services.trend_series import lttb
+
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50.0)
+    y[437] = 25.0
+    kept = lttb(x, y, 50)
+
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 437 in kept
+
+
+def test_lttb_returns_short_series_whole():
+    from src.services.trend_series import lttb
+
+    x = np.arange(5, dtype=float)
+    assert lttb(x, x, 5).tolist() == [0, 1, 2, 3, 4]
+    assert lttb(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_clamp_points():
+    series = _series()
+    assert series.clamp_points(None) == series.default_points
+    assert series.clamp_points(0) == series.default_points
+    assert series.clamp_points(-5) == series.default_points
+    assert series.clamp_points(1) == 3
+    assert series.clamp_points(200) == 200
+    assert series.clamp_points(10 ** 9) == series.max_points
+
+
+def _add_trends(db, rows):
+    from src.models import Trend
+
+    db.session.add_all(
+        Trend(keyword=f"topic {index}", platform=platform, engagement_score=engagement, created_at=created_at)
+        for index, (created_at, engagement, platform) in enumerate(rows)
+    )
+    db.session.commit()
+
+
+def test_hour_buckets_match_a_hand_computation(app):
+    from src.models import db
+
+    hour = datetime(2025, 6, 1, 10)
+    _add_trends(db, [
+        (hour + timedelta(minutes=5), 2.0, "tiktok"),
+        (hour + timedelta(minutes=40), 4.0, "tiktok"),
+        (hour + timedelta(minutes=59), 9.0, "twitter"),
+        (hour + timedelta(hours=2, minutes=1), 1.0, "tiktok"),
+    ])
+
+    points = _series().series(hour - timedelta(days=1), bucket="hour")
+    assert points == [
+        {"date": "2025-06-01T10:00:00", "engagement_score": 5.0, "max_engagement": 9.0, "count": 3},
+        {"date": "2025-06-01T12:00:00", "engagement_score": 1.0, "max_engagement": 1.0, "count": 1},
+    ]
+
+    points = _series().series(hour - timedelta(days=1), bucket="day", platform="tiktok")
+    assert points == [
+        {"date": "2025-06-01T00:00:00", "engagement_score": 7.0 / 3, "max_engagement": 4.0, "count": 3},
+    ]
+
+
+def test_downsampled_series_has_at_most_the_requested_points(app):
+    from src.models import db
+
+    start = datetime(2025, 6, 1)
+    _add_trends(db, [(start + timedelta(minutes=index), float(index % 7), "tiktok") for index in range(300)])
+
+    series = _series()
+    points = series.series(start, downsample=series.clamp_points(40))
+    assert len(points) == 40
+    assert points[0]["date"] == start.isoformat()
+    assert points[-1]["date"] == (start + timedelta(minutes=299)).isoformat()
+    assert len(series.series(start, downsample=series.clamp_points(1000))) == 300
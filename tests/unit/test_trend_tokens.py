@@ -0,0 +1,102 @@
+"""The in-memory token index: incremental loads, deleted trends and trend ids reused after a delete."""
+
+import json
+from datetime import datetime, timedelta
+
+START = datetime(2025, 6, 1, 12, 0)
+
+
+def _add(db, minute, keyword, hashtags, score, trend_id=None, platform="twitter"):
+    from src.models import Trend, TrendSnapshot, TrendToken
+    from src.services.trend_tokens import tokenize_trend
+
+    at = START + timedelta(minutes=minute)
+    trend = Trend(id=trend_id, keyword=keyword, platform=platform, engagement_score=score,
+                  hashtags=json.dumps(hashtags), created_at=at, updated_at=at)
+    db.session.add(trend)
+    db.session.flush()
+    db.session.add_all(TrendToken(token=token, trend_id=trend.id, indexed_at=at)
+                       for token in tokenize_trend(keyword, hashtags))
+    db.session.add(TrendSnapshot(trend_id=trend.id, ts=at, volume=1, engagement=score))
+    db.session.commit()
+    return trend.id
+
+
+def _delete(db, trend_id):
+    from sqlalchemy import delete
+    from src.models import Trend, TrendSnapshot, TrendToken
+
+    for model, column in ((TrendToken, TrendToken.trend_id), (TrendSnapshot, TrendSnapshot.trend_id),
+                          (Trend, Trend.id)):
+        db.session.execute(delete(model).where(column == trend_id))
+    db.session.commit()
+
+
+def _found(index, *tokens):
+    return [match["trend_id"] for match in index.trends_for_tokens(tokens)]
+
+
+def test_tokenize_trend_normalizes_hashtags_and_keyword_words():
+    from src.services.trend_tokens import normalize_hashtag, tokenize_trend
+
+    assert normalize_hashtag("#AI Revolution") == "#airevolution"
+    assert normalize_hashtag("#!!") is None
+    assert tokenize_trend("AI Revolution", ["#AI", "ai", "#Tech-News", "#"]) == ["#ai", "#technews", "ai", "revolution"]
+
+
+def test_refresh_loads_new_trends_and_scores_incrementally(app):
+    from src.models import db, Trend, TrendSnapshot
+    from src.services.trend_tokens import TrendTokenIndex
+
+    index = TrendTokenIndex()
+    first = _add(db, 0, "ai agents", ["#AI"], 3.0)
+    second = _add(db, 1, "ai art", ["#AI", "#art"], 5.0, platform="instagram")
+    assert _found(index, "#ai") == [second, first]
+
+    third = _add(db, 2, "ai music", ["#ai"], 4.0)
+    trend = db.session.get(Trend, first)
+    trend.engagement_score = 9.0
+    trend.updated_at = START + timedelta(minutes=3)
+    db.session.add(TrendSnapshot(trend_id=first, ts=START + timedelta(minutes=3), volume=1, engagement=9.0))
+    db.session.commit()
+
+    assert _found(index, "#AI", "agents") == [first, second, third]
+    assert [match["trend_id"] for match in index.trends_for_tokens(["ai"], platform="twitter")] == [first, third]
+    assert index.trends_for_tokens(["#ai"], limit=1)[0]["engagement_score"] == 9.0
+    assert {item["hashtag"]: item["count"] for item in index.top_hashtags()} == {"#ai": 3, "#art": 1}
+
+
+def test_deleted_trends_drop_out_and_a_reused_id_keeps_only_its_own_postings(app):
+    from src.models import db
+    from src.services.trend_tokens import TrendTokenIndex
+
+    index = TrendTokenIndex()
+    kept = _add(db, 0, "street food", ["#food"], 2.0)
+    purged = _add(db, 1, "ai agents", ["#ai"], 6.0)
+    reused = _add(db, 2, "ai art", ["#ai", "#art"], 4.0)
+    assert _found(index, "#ai", "#food") == [purged, reused, kept]
+
+    # One trend goes while another arrives, and the highest id is deleted and handed out again
+    _delete(db, purged)
+    _delete(db, reused)
+    assert _add(db, 3, "pasta night", ["#food", "#pasta"], 1.0, trend_id=reused) == reused
+    newest = _add(db, 4, "food trucks", ["#food"], 3.0)
+
+    assert _found(index, "#ai", "agents", "art") == []
+    assert _found(index, "#food") == [newest, kept, reused]
+    assert {item["hashtag"] for item in index.top_hashtags()} == {"#food", "#pasta"}
+
+
+def test_forget_drops_postings_and_trends(app):
+    from src.models import db
+    from src.services.trend_tokens import TrendTokenIndex
+
+    index = TrendTokenIndex()
+    first = _add(db, 0, "ai agents", ["#ai"], 3.0)
+    second = _add(db, 1, "ai art", ["#ai"], 5.0)
+    assert _found(index, "#ai") == [second, first]
+
+    index.forget([second])
+    assert _found(index, "#ai") == [first]
+    index.forget([first, 99])
+    assert _found(index, "#ai", "agents") == []
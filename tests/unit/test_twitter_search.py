@@ -0,0 +1,179 @@
+"""Incremental Twitter recent search against recorded API pages served by a stand-in session."""
+
+import json
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+
+def _headers(remaining, reset_in=900, limit=450):
+    return {"x-rate-limit-limit": str(limit), "x-rate-limit-remaining": str(remaining),
+            "x-rate-limit-reset": str(int(time.time() + reset_in))}
+
+
+def _page(tweet_ids, next_token=None, remaining=449):
+    """A recorded 200 response of GET /tweets/search/recent, newest tweet first."""
+    tweet_ids = sorted(tweet_ids, reverse=True)
+    meta = {"result_count": len(tweet_ids)}
+    if tweet_ids:
+        meta.update(newest_id=str(tweet_ids[0]), oldest_id=str(tweet_ids[-1]))
+    if next_token:
+        meta["next_token"] = next_token
+    body = {"data": [{"id": str(tweet_id), "text": f"tweet {tweet_id}",
+                      "public_metrics": {"like_count": 10, "retweet_count": 1}} for tweet_id in tweet_ids],
+            "meta": meta}
+    return 200, _headers(remaining), body
+
+
+def _error(status, remaining=0):
+    return status, _headers(remaining), {"title": "error"}
+
+
+class RecordedSession:
+    """Stands in for requests.Session: serves recorded pages in order and keeps each request's params."""
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        assert url.endswith("/tweets/search/recent")
+        assert headers["Authorization"] == "Bearer test-token"
+        self.requests.append(dict(params))
+        status, response_headers, body = self.pages.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(response_headers)
+        response._content = json.dumps(body).encode("utf-8")
+        response.url = url
+        return response
+
+
+def _search(session, queries=("AI",), max_pages=20):
+    from src.services.twitter_search import TwitterIncrementalSearch, TwitterSearchClient
+
+    client = TwitterSearchClient("test-token", base_url="http://twitter.test/2", session=session)
+    search = TwitterIncrementalSearch(client, queries=list(queries))
+    search.max_pages = max_pages
+    return search
+
+
+def _page_budget(pages):
+    from src.services.twitter_search import _PageBudget
+
+    return _PageBudget(pages)
+
+
+def _ids(tweets):
+    return sorted(int(tweet["id"]) for tweet in tweets)
+
+
+def test_second_refresh_sends_the_stored_since_id_and_gets_only_new_tweets(app):
+    from src.models import db, TwitterSearchCursor
+
+    session = RecordedSession(_page([104, 105]), _page([106, 107]))
+    search = _search(session)
+
+    cursors = search.load_cursors()
+    assert _ids(search.fetch(cursors)["AI"]) == [104, 105]
+    search.save_cursors(cursors)
+    assert "since_id" not in session.requests[0]
+
+    cursors = search.load_cursors()
+    assert _ids(search.fetch(cursors)["AI"]) == [106, 107]
+    search.save_cursors(cursors)
+    assert session.requests[1]["since_id"] == "105"
+
+    stored = db.session.get(TwitterSearchCursor, "AI")
+    assert stored.since_id == "107"
+    assert stored.total_tweets == 4
+    assert stored.next_token is None
+
+
+def test_a_429_stops_the_refresh_after_its_first_page_and_the_next_one_resumes(app):
+    session = RecordedSession(_page([201, 202], next_token="page-2", remaining=1), _error(429))
+    search = _search(session, queries=("AI", "tech"))
+    cursors = search.load_cursors()
+    cursors["AI"]["since_id"] = "150"
+
+    results = search.fetch(cursors)
+    assert _ids(results["AI"]) == [201, 202]
+    # The window is used up: "tech" is skipped without a request
+    assert "tech" not in results
+    assert len(session.requests) == 2
+    assert search.client.rate_limit.remaining == 0
+    # The unfinished pagination is kept; since_id only moves once it is done
+    assert cursors["AI"]["since_id"] == "150"
+    assert cursors["AI"]["next_token"] == "page-2"
+    assert cursors["AI"]["pending_newest_id"] == "202"
+
+    # Next refresh, after the window reset: finish the backfill first
+    session = RecordedSession(_page([180, 190]))
+    search = _search(session, queries=("AI",))
+    tweets, cursor = search.fetch_query("AI", cursors["AI"], _page_budget(0))
+    assert _ids(tweets) == [180, 190]
+    assert session.requests[0]["next_token"] == "page-2"
+    assert session.requests[0]["since_id"] == "150"
+    assert cursor["since_id"] == "202"
+    assert cursor["next_token"] is None and cursor["pending_newest_id"] is None
+
+
+def test_an_expired_pagination_token_resumes_from_the_newest_tweet_seen():
+    session = RecordedSession(_error(400, remaining=400))
+    search = _search(session)
+    cursor = {"since_id": "150", "next_token": "stale", "pending_newest_id": "202", "last_fetched_at": None}
+
+    tweets, cursor = search.fetch_query("AI", cursor, _page_budget(5))
+    assert tweets == []
+    assert cursor["since_id"] == "202"
+    assert cursor["next_token"] is None
+
+
+def test_extra_pages_are_shared_by_the_queries_of_a_refresh():
+    session = RecordedSession(_page([1, 2], next_token="a-2"), _page([3], next_token="a-3"), _page([10]))
+    search = _search(session, queries=("AI", "tech"), max_pages=3)
+    cursors = {query: {"since_id": None, "next_token": None, "pending_newest_id": None, "last_fetched_at": None}
+               for query in ("AI", "tech")}
+
+    results = search.fetch(cursors)
+    # Three pages: "tech" keeps its first page, "AI" got the one extra and stops at a-3
+    assert _ids(results["AI"]) == [1, 2, 3]
+    assert _ids(results["tech"]) == [10]
+    assert cursors["AI"]["next_token"] == "a-3"
+    assert cursors["AI"]["pending_newest_id"] == "2"
+
+
+def test_page_budget_shrinks_as_the_window_runs_dry():
+    from src.services.twitter_search import RateLimitTracker
+
+    tracker = RateLimitTracker()
+    assert tracker.page_budget(900, 20) == 20
+
+    budgets = []
+    for remaining in (400, 30, 3, 0):
+        tracker.update(_headers(remaining, reset_in=3600))
+        budgets.append(tracker.page_budget(900, 20))
+    # An hour to reset at 15-minute refreshes: what is left is spread over 4 refreshes
+    assert budgets == [20, 8, 1, 0]
+
+    tracker = RateLimitTracker(reserve=10)
+    tracker.update(_headers(30, reset_in=3600))
+    assert tracker.page_budget(900, 20) == 5
+
+    # Once the window has reset the headers no longer constrain anything
+    tracker.update(_headers(0, reset_in=-5))
+    assert tracker.page_budget(900, 20) == 20
+
+
+def test_plan_fetches_the_stalest_queries_first_when_pages_are_short():
+    search = _search(RecordedSession(), queries=("AI", "tech", "news"), max_pages=2)
+    now = datetime.utcnow()
+    cursors = {
+        "AI": {"last_fetched_at": now},
+        "tech": {"last_fetched_at": now - timedelta(hours=1)},
+        "news": {"last_fetched_at": None},
+    }
+    scheduled, extra_pages = search.plan(cursors)
+    assert scheduled == ["news", "tech"]
+    assert not extra_pages.take()
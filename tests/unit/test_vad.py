@@ -0,0 +1,104 @@
+"""Voice activity detection: frame runs merged into padded segments, and their offsets on the original timeline."""
+
+import numpy as np
+import pytest
+
+RATE = 16000
+FRAME = 480  # 30 ms at 16 kHz
+
+
+def _detector(monkeypatch, **settings):
+    from src.services.vad import VoiceActivityDetector
+
+    for name, value in {"VAD_MODE": "energy", **settings}.items():
+        monkeypatch.setenv(name, str(value))
+    return VoiceActivityDetector()
+
+
+def _frames(total, *runs):
+    speech = np.zeros(total, dtype=bool)
+    for start, end in runs:
+        speech[start:end] = True
+    return speech
+
+
+def _track(seconds, *bursts):
+    """Quiet noise with loud tone bursts between the given (start, end) seconds."""
+    samples = np.random.default_rng(3).normal(0, 40, int(seconds * RATE))
+    time = np.arange(len(samples)) / RATE
+    for start, end in bursts:
+        burst = (time >= start) & (time < end)
+        samples[burst] += 8000 * np.sin(2 * np.pi * 220 * time[burst])
+    return samples.astype(np.int16)
+
+
+def _approx(segments):
+    return [pytest.approx(segment) for segment in segments]
+
+
+def test_short_gaps_merge_short_runs_drop_and_padding_stays_inside_the_track(monkeypatch):
+    detector = _detector(monkeypatch)
+    # 100 frames of 30 ms: 0-0.3s and 0.6-0.9s bridge a 0.3s gap, the single frame at 0.36s
+    # falls inside it, the 90 ms blip at 1.5s stands alone and 2.1-2.4s joins 2.7s-the end
+    speech = _frames(100, (0, 10), (12, 13), (20, 30), (50, 53), (70, 80), (90, 100))
+
+    assert detector._segments(speech, 3.0) == _approx([(0.0, 1.1), (1.9, 3.0)])
+    assert detector._segments(np.zeros(100, dtype=bool), 3.0) == []
+    assert detector._segments(np.ones(100, dtype=bool), 3.0) == _approx([(0.0, 3.0)])
+
+
+def test_segment_thresholds_follow_the_settings(monkeypatch):
+    detector = _detector(monkeypatch, VAD_MIN_SPEECH_MS=60, VAD_MIN_SILENCE_MS=100, VAD_PADDING_MS=0)
+    speech = _frames(40, (5, 8), (10, 12), (20, 21), (30, 32))
+
+    # The 60 ms gap merges, the 30 ms run is dropped, unpadded offsets are frame index * 30 ms
+    assert detector._segments(speech, 1.2) == _approx([(0.15, 0.36), (0.9, 0.96)])
+
+
+def test_energy_detection_finds_bursts_at_their_offsets(monkeypatch):
+    detector = _detector(monkeypatch)
+    samples = _track(3.0, (0.6, 1.2), (1.8, 2.4))
+
+    assert detector.detect(samples, RATE) == _approx([(0.4, 1.4), (1.6, 2.6)])
+    assert detector.detect(samples[:FRAME - 1], RATE) == []
+    assert detector.detect(_track(2.0), RATE) == []
+
+
+def test_segment_files_and_transcript_times_keep_their_offsets(app, monkeypatch, tmp_path):
+    import wave
+    from src.services.video_analyzer import VideoAnalyzer
+
+    analyzer = VideoAnalyzer()
+    analyzer.vad = _detector(monkeypatch)
+    samples = _track(4.0, (0.9, 1.5), (2.7, 3.3))
+    audio_path = str(tmp_path / "track.wav")
+    with wave.open(audio_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+
+    written = []
+
+    def transcribe_many(paths, language=None):
+        results = []
+        for path in paths:
+            segment, _ = analyzer.vad.read_wav(path)
+            written.append(segment)
+            # Times relative to the start of the segment file
+            results.append({"success": True, "transcription": f"part {len(written)}", "language": "en",
+                            "segments": [{"start": 0.2, "end": 0.5, "text": f"part {len(written)}"}]})
+        return results
+
+    monkeypatch.setattr(analyzer.transcriber, "transcribe_many", transcribe_many)
+    result = analyzer._transcribe_audio(1, audio_path)
+
+    segments = analyzer.vad.detect(samples, RATE)
+    assert segments == _approx([(0.7, 1.7), (2.5, 3.5)])
+    # Each file holds exactly the samples of its segment
+    assert len(written) == 2
+    for segment, (start, end) in zip(written, segments):
+        assert abs(len(segment) - RATE) <= 1
+        assert np.array_equal(segment, samples[int(start * RATE):int(end * RATE)])
+    assert result["transcription"] == "part 1 part 2"
+    assert [(segment["start"], segment["end"]) for segment in result["segments"]] == [(0.9, 1.2), (2.7, 3.0)]
@@ -0,0 +1,98 @@
+"""The concurrent audio and visual branches of a video analysis, their timeouts and the temporary input file."""
+
+import os
+import threading
+
+
+def _user(db):
+    from src.models import User
+
+    user = User(username="ana", email="ana@example.com")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def _analyzer(monkeypatch, audio_branch, visual_branch, transcription_timeout=5.0):
+    from src.services.video_analyzer import VideoAnalyzer
+
+    analyzer = VideoAnalyzer()
+    analyzer.transcription_timeout = transcription_timeout
+    monkeypatch.setattr(analyzer, "_audio_branch", audio_branch)
+    monkeypatch.setattr(analyzer, "_visual_branch", visual_branch)
+    return analyzer
+
+
+def test_a_timed_out_branch_keeps_its_input_file_until_it_finishes(app, monkeypatch):
+    from src.models import db, VideoAnalysis
+
+    release = threading.Event()
+    finished = threading.Event()
+    seen = {}
+
+    def slow_audio(user_id, video_path, language=None):
+        seen["path"] = video_path
+        release.wait(5)
+        # Still readable after analyze_video has returned
+        with open(video_path, "rb") as video:
+            seen["audio_read"] = video.read()
+        finished.set()
+        return {"transcription": "late", "success": True}
+
+    def visual(user_id, video_path):
+        with open(video_path, "rb") as video:
+            seen["visual_read"] = video.read()
+        return {"description": "a cat", "success": True}
+
+    analyzer = _analyzer(monkeypatch, slow_audio, visual, transcription_timeout=0.1)
+    result = analyzer.analyze_video(_user(db), b"video bytes", "https://example.com/v.mp4")
+
+    assert result["success"] and not result["transcription_success"]
+    assert result["transcription"] == "Timed out after 0.1 seconds."
+    assert result["visual_description"] == "a cat"
+    # The analysis is kept but not cached, so the next submission analyzes again
+    assert db.session.get(VideoAnalysis, result["analysis_id"]).content_hash is None
+    assert os.path.exists(seen["path"])
+
+    release.set()
+    assert finished.wait(5)
+    assert seen["audio_read"] == seen["visual_read"] == b"video bytes"
+    analyzer._branch_executor.shutdown(wait=True)
+    assert not os.path.exists(seen["path"])
+
+
+def test_the_input_file_is_removed_once_both_branches_are_done(app, monkeypatch):
+    from src.models import db
+
+    paths = []
+
+    def audio(user_id, video_path, language=None):
+        paths.append(video_path)
+        return {"transcription": "hello", "success": True}
+
+    def failing_visual(user_id, video_path):
+        raise RuntimeError("no frames")
+
+    analyzer = _analyzer(monkeypatch, audio, failing_visual)
+    result = analyzer.analyze_video(_user(db), b"other bytes")
+
+    assert result["transcription"] == "hello"
+    assert result["visual_description"] == "Analysis failed: no frames"
+    assert not os.path.exists(paths[0])
+
+
+def test_when_done_calls_back_once_after_the_last_future(app):
+    from concurrent.futures import Future
+    from src.services.video_analyzer import VideoAnalyzer
+
+    analyzer = VideoAnalyzer()
+    calls = []
+    first, second = Future(), Future()
+    analyzer._when_done([first, second], lambda: calls.append("done"))
+    first.set_result(1)
+    assert calls == []
+    second.set_exception(RuntimeError("failed"))
+    assert calls == ["done"]
+
+    analyzer._when_done([], lambda: calls.append("nothing to wait for"))
+    assert calls == ["done", "nothing to wait for"]
@@ -0,0 +1,68 @@
+"""The video job worker pool runs in one app process at a time."""
+
+
+class _Process:
+    pid = 0
+    exitcode = None
+
+    def __init__(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+
+    def join(self, timeout=None):
+        pass
+
+
+def _pool(app, monkeypatch, node_id):
+    from src.services.video_job_queue import VideoJobWorkerPool
+
+    pool = VideoJobWorkerPool(2, app=app)
+    pool.node_id = node_id
+    monkeypatch.setattr(pool, "_spawn", _Process)
+    return pool
+
+
+def test_only_the_lease_holder_runs_workers_and_another_takes_over(app, monkeypatch):
+    from src.models import db, SchedulerLease
+
+    first = _pool(app, monkeypatch, "web-1:100")
+    second = _pool(app, monkeypatch, "web-2:200")
+    first._hold_lease()
+    second._hold_lease()
+    assert len(first._processes) == 2
+    assert second._processes == []
+
+    # Renewing keeps the same workers
+    workers = list(first._processes)
+    first._hold_lease()
+    assert first._processes == workers
+
+    first.stop()
+    assert not any(process.is_alive() for process in workers)
+    second._hold_lease()
+    assert len(second._processes) == 2
+    assert db.session.get(SchedulerLease, "video_job_workers").holder == "web-2:200"
+
+
+def test_a_pool_that_lost_its_lease_stops_its_workers(app, monkeypatch):
+    from datetime import datetime, timedelta
+    from src.models import db, SchedulerLease
+
+    pool = _pool(app, monkeypatch, "web-1:100")
+    pool._hold_lease()
+    workers = list(pool._processes)
+
+    # The lease ran out (e.g. the database was unreachable) and another node took it
+    lease = db.session.get(SchedulerLease, "video_job_workers")
+    lease.holder = "web-2:200"
+    lease.expires_at = datetime.utcnow() + timedelta(seconds=30)
+    db.session.commit()
+
+    pool._hold_lease()
+    assert pool._processes == []
+    assert not any(process.is_alive() for process in workers)
@@ -0,0 +1,153 @@
+"""The staged video pipeline: stage order per video, STOP propagation between pools, errors and cleanup."""
+
+import os
+import queue
+import threading
+
+import pytest
+
+
+def _stage(name, handler, workers, inbox, outbox, downstream_workers, app):
+    from src.services.video_pipeline import _Stage
+
+    stage = _Stage(name, handler, workers, inbox=inbox, outbox=outbox, downstream_workers=downstream_workers, app=app)
+    stage.start()
+    return stage
+
+
+def test_the_last_worker_of_a_stage_stops_every_downstream_worker(app):
+    from src.services.video_pipeline import _STOP
+
+    first_inbox, second_inbox, done = queue.Queue(maxsize=1), queue.Queue(maxsize=1), queue.Queue()
+    seen = []
+    lock = threading.Lock()
+
+    def record(stage):
+        def handler(task):
+            if task["url"] == "bad":
+                raise RuntimeError("broken")
+            with lock:
+                seen.append((stage, task["url"]))
+        return handler
+
+    first = _stage("first", record("first"), 3, first_inbox, second_inbox, 2, app)
+    second = _stage("second", record("second"), 2, second_inbox, done, 1, app)
+    urls = [f"video-{index}" for index in range(10)] + ["bad"]
+    for url in urls:
+        first_inbox.put({"url": url})
+    for _ in range(first.workers):
+        first_inbox.put(_STOP)
+
+    finished = []
+    while True:
+        task = done.get(timeout=5)
+        if task is _STOP:
+            break
+        finished.append(task)
+    for thread in first._threads + second._threads:
+        thread.join(5)
+        assert not thread.is_alive()
+    # Exactly one STOP reached the end, after every task
+    assert done.empty()
+    assert sorted(task["url"] for task in finished) == sorted(urls)
+
+    # Each video went through the stages in order; a failed one skipped the rest
+    for url in urls[:-1]:
+        assert seen.index(("first", url)) < seen.index(("second", url))
+    bad = next(task for task in finished if task["url"] == "bad")
+    assert bad["error"] == "Video analysis failed: broken"
+    assert not any(url == "bad" for _, url in seen)
+
+
+@pytest.fixture
+def pipeline(app, monkeypatch):
+    """A pipeline whose analyzer downloads, decodes and describes without network or ffmpeg."""
+    from src.services.video_analyzer import VideoAnalyzer, VideoDownloadError
+    from src.services.video_pipeline import VideoAnalysisPipeline
+
+    analyzer = VideoAnalyzer()
+    log = []
+    lock = threading.Lock()
+    leftovers = []
+
+    def step(name, url):
+        with lock:
+            log.append((name, url))
+
+    def download(url):
+        step("download", url)
+        if "missing" in url:
+            raise VideoDownloadError("Failed to download video: 404")
+        return url.encode("utf-8")
+
+    def temp_file(path, suffix):
+        with open(path + suffix, "wb") as handle:
+            handle.write(b"x")
+        leftovers.append(path + suffix)
+        return path + suffix
+
+    def extract_audio(video_path):
+        with open(video_path, "rb") as video:
+            step("decode", video.read().decode("utf-8"))
+        return temp_file(video_path, ".wav")
+
+    def extract_frame(video_path):
+        return temp_file(video_path, ".jpg")
+
+    urls = {}
+
+    def save(video_data):
+        path = VideoAnalyzer._save_video_file(analyzer, video_data)
+        urls[path] = video_data.decode("utf-8")
+        leftovers.append(path)
+        return path
+
+    def transcribe(user_id, audio_path, language=None):
+        url = urls[audio_path[:-len(".wav")]]
+        step("transcribe", url)
+        return {"transcription": f"words of {url}", "success": True}
+
+    def describe(user_id, frame_path):
+        url = urls[frame_path[:-len(".jpg")]]
+        step("describe", url)
+        return {"description": f"frame of {url}", "success": True}
+
+    for name, replacement in [("_download_video", download), ("_save_video_file", save),
+                              ("_extract_audio", extract_audio), ("_extract_frame", extract_frame),
+                              ("_transcribe_track", transcribe), ("_analyze_frame", describe)]:
+        monkeypatch.setattr(analyzer, name, replacement)
+
+    pipeline = VideoAnalysisPipeline(analyzer)
+    pipeline.log = log
+    pipeline.leftovers = leftovers
+    return pipeline
+
+
+@pytest.mark.parametrize("workers,queue_size", [(1, 1), (3, 2)])
+def test_each_video_runs_through_the_stages_in_order(pipeline, workers, queue_size):
+    from src.models import db, User
+
+    user = User(username="ana", email="ana@example.com")
+    db.session.add(user)
+    db.session.commit()
+    pipeline.download_workers = pipeline.decode_workers = pipeline.transcribe_workers = workers
+    pipeline.describe_workers = workers
+    pipeline.queue_size = queue_size
+
+    items = [{"id": index, "type": "video", "url": f"https://example.com/{index}.mp4"} for index in range(8)]
+    items.insert(3, {"id": 99, "type": "video", "url": "https://example.com/missing.mp4"})
+    items.append({"id": 100, "type": "image", "url": "https://example.com/a.jpg"})
+    result = pipeline.run(user.id, items)
+
+    assert result["analyzed_count"] == 9
+    assert [entry["item_id"] for entry in result["results"]] == [0, 1, 2, 99, 3, 4, 5, 6, 7]
+    assert result["results"][3]["analysis"] == {"error": "Failed to download video: 404"}
+    for entry in result["results"][:3] + result["results"][4:]:
+        url = entry["url"]
+        assert entry["analysis"]["transcription"] == f"words of {url}"
+        assert entry["analysis"]["visual_description"] == f"frame of {url}"
+        steps = [name for name, logged_url in pipeline.log if logged_url == url]
+        assert steps == ["download", "decode", "transcribe", "describe"]
+    # Only the download stage saw the missing video
+    assert [name for name, url in pipeline.log if "missing" in url] == ["download"]
+    assert not [path for path in pipeline.leftovers if os.path.exists(path)]
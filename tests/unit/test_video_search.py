@@ -0,0 +1,124 @@
+"""Video search on in-memory SQLite: FTS5 matching and ranking, trigger sync with the table and snippet escaping."""
+
+import pytest
+
+
+@pytest.fixture
+def database_url(monkeypatch):
+    """An in-memory SQLite database, so the FTS5 index lives and dies with the test."""
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    return "sqlite://"
+
+
+def _user(db, name="ana"):
+    from src.models import User
+
+    user = User(username=name, email=f"{name}@example.com")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def _analysis(db, user_id, transcription=None, visual=None):
+    from src.models import VideoAnalysis
+
+    analysis = VideoAnalysis(user_id=user_id, video_url=f"https://example.com/{transcription or visual}.mp4",
+                             transcription_text=transcription, visual_description=visual)
+    db.session.add(analysis)
+    db.session.commit()
+    return analysis
+
+
+def _drop_index(db):
+    from sqlalchemy import text
+
+    for name in ("video_analysis_fts_ai", "video_analysis_fts_ad", "video_analysis_fts_au"):
+        db.session.execute(text(f"DROP TRIGGER {name}"))
+    db.session.execute(text("DROP TABLE video_analysis_fts"))
+    db.session.commit()
+
+
+def _ids(result):
+    return [row["id"] for row in result["results"]]
+
+
+def test_every_word_must_match_and_the_last_one_as_a_prefix(app):
+    from src.models import db
+    from src.services.video_search import VideoSearchIndex
+
+    assert str(db.engine.url) == "sqlite://"
+    ana, bea = _user(db), _user(db, "bea")
+    cooking = _analysis(db, ana, "Today we are cooking pasta with garlic", "a kitchen with a pot")
+    baking = _analysis(db, ana, "Baking bread at home", "flour on a wooden table")
+    garlic = _analysis(db, ana, "garlic garlic garlic, cooking with garlic", None)
+    _analysis(db, bea, "cooking pasta for my friends", None)
+    index = VideoSearchIndex()
+
+    assert sorted(_ids(index.search(ana, "cooking"))) == [cooking.id, garlic.id]
+    assert _ids(index.search(ana, "cooking past")) == [cooking.id]
+    # Porter stemming: "cooked" and "cooking" share a stem
+    assert sorted(_ids(index.search(ana, "cooked"))) == [cooking.id, garlic.id]
+    # Visual descriptions are searched too
+    assert _ids(index.search(ana, "wooden")) == [baking.id]
+    # The transcript that repeats the word ranks first
+    ranked = index.search(ana, "garlic")
+    assert _ids(ranked) == [garlic.id, cooking.id]
+    assert ranked["results"][0]["score"] > ranked["results"][1]["score"]
+    # Query syntax is not passed through to FTS5
+    assert _ids(index.search(ana, 'garlic" OR "bread')) == []
+    assert index.search(ana, "-- *")["total"] == 0
+
+    first = index.search(ana, "garlic", page=1, per_page=1)
+    second = index.search(ana, "garlic", page=2, per_page=1)
+    assert (first["total"], first["has_more"], second["has_more"]) == (2, True, False)
+    assert _ids(first) + _ids(second) == _ids(ranked)
+
+
+def test_the_index_follows_inserts_updates_and_deletes(app):
+    from src.models import db
+    from src.services.video_search import VideoSearchIndex
+
+    ana = _user(db)
+    index = VideoSearchIndex()
+    analysis = _analysis(db, ana, "a tour of the harbour", "boats at sunset")
+    assert _ids(index.search(ana, "harbour")) == [analysis.id]
+
+    analysis.transcription_text = "a walk through the market"
+    db.session.commit()
+    assert _ids(index.search(ana, "harbour")) == []
+    assert _ids(index.search(ana, "market")) == [analysis.id]
+    assert _ids(index.search(ana, "boats")) == [analysis.id]
+
+    db.session.delete(analysis)
+    db.session.commit()
+    assert index.search(ana, "market")["total"] == 0
+    assert index.search(ana, "boats")["total"] == 0
+
+    # Rows saved before the index existed are picked up when it is created
+    _drop_index(db)
+    older = _analysis(db, ana, "an older market video", None)
+    index.ensure_index()
+    assert _ids(index.search(ana, "market")) == [older.id]
+
+
+def test_snippets_are_escaped_and_highlight_only_the_matches(app):
+    from src.models import db
+    from src.services.video_search import VideoSearchIndex
+
+    ana = _user(db)
+    _analysis(db, ana, "<script>alert('cats')</script> cats & dogs", "<b>cats</b> on a sofa")
+    index = VideoSearchIndex()
+
+    row = index.search(ana, "cats")["results"][0]
+    assert row["transcription_snippet"] == \
+        "&lt;script&gt;alert(&#x27;<mark>cats</mark>&#x27;)&lt;/script&gt; <mark>cats</mark> &amp; dogs"
+    assert row["visual_snippet"] == "&lt;b&gt;<mark>cats</mark>&lt;/b&gt; on a sofa"
+    assert row["analysis_date"] and "T" in row["analysis_date"]
+
+    # The LIKE fallback, used without an FTS table, escapes the same way
+    _drop_index(db)
+    row = index.search(ana, "dogs")["results"][0]
+    assert row["transcription_snippet"] == \
+        "&lt;script&gt;alert(&#x27;cats&#x27;)&lt;/script&gt; cats &amp; <mark>dogs</mark>"
+    assert row["visual_snippet"] == ""
+    assert row["score"] is None
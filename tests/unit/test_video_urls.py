@@ -0,0 +1,30 @@
+"""Normalizing video URLs drops share tracking but keeps parameters that pick the media."""
+
+import pytest
+
+
+@pytest.mark.parametrize("url, expected", [
+    # Tracking keys dropped on every host
+    ("https://www.youtube.com/watch?v=abc123&utm_source=x&si=Zq&feature=share",
+     "https://youtube.com/watch?v=abc123"),
+    ("https://example.com/clip.mp4?fbclid=1&gclid=2", "https://example.com/clip.mp4"),
+    # A YouTube start time and a generic `s` are part of what was shared
+    ("https://youtu.be/abc123?t=42&si=Zq", "https://youtu.be/abc123?t=42"),
+    ("https://videos.example.com/play?s=7&t=3", "https://videos.example.com/play?s=7&t=3"),
+    # Platform-specific share tracking
+    ("https://twitter.com/user/status/1/video/1?s=20&t=AbCd", "https://twitter.com/user/status/1/video/1"),
+    ("https://x.com/user/status/1?ref_src=twsrc", "https://x.com/user/status/1"),
+    ("https://www.instagram.com/reel/Cx1/?igsh=MWQ", "https://instagram.com/reel/Cx1"),
+    ("https://vm.tiktok.com/ZM1/?_r=1&_t=8k&is_from_webapp=1", "https://vm.tiktok.com/ZM1"),
+])
+def test_normalize_video_url(url, expected):
+    from src.services.video_analyzer import normalize_video_url
+
+    assert normalize_video_url(url) == expected
+
+
+def test_reshares_of_the_same_post_compare_equal():
+    from src.services.video_analyzer import normalize_video_url
+
+    assert normalize_video_url("http://m.youtube.com/watch?feature=share&v=abc123") == \
+        normalize_video_url("https://www.youtube.com/watch?v=abc123&utm_medium=social")